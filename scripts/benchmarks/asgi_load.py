@@ -0,0 +1,134 @@
+"""Benchmark: latency and throughput of the async HTTP API under concurrent
+requests, served by one worker (one event loop).
+
+By default, the Django ASGI application is driven in-process on a large
+sqlite database. With --url, the requests are sent to a running server
+instead, e.g. 'uvicorn django_project.asgi:application' on the same data.
+
+Usage (from the repository root):
+  python -m scripts.benchmarks.asgi_load [num_problems] [num_logs]
+  python -m scripts.benchmarks.asgi_load --url http://127.0.0.1:8000"""
+
+# pylint: disable=C0413
+
+import argparse
+import asyncio
+import statistics
+import time
+from functools import partial
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+# sets up django on a temporary database
+from scripts.benchmarks.concurrent_reads import create_db
+
+from django.core.asgi import get_asgi_application
+from django.core.management import call_command
+
+CONCURRENCY = [1, 10, 50]
+REQUESTS = 200
+# cached snapshot views, and filtered requests that query the database
+PATHS = ['/tags', '/next?k=5', '/problems?sort=problem&limit=20',
+         '/combos?problem=problem_123', '/combos?tag=tag_7&limit=20']
+
+
+async def asgi_get(application, path: str) -> int:
+    """ Status code of a GET request to the in-process ASGI application """
+    path, _, query = path.partition('?')
+    scope = {'type': 'http', 'asgi': {'version': '3.0'},
+             'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+             'path': path, 'raw_path': path.encode(),
+             'query_string': query.encode(), 'root_path': '',
+             'headers': [(b'host', b'localhost')],
+             'client': ('127.0.0.1', 0), 'server': ('localhost', 80)}
+    status = None
+    requested, responded = False, asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await responded.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif not message.get('more_body', False):
+            responded.set()
+
+    await application(scope, receive, send)
+    return status
+
+
+async def http_get(url: str, path: str) -> int:
+    """ Status code of a GET request to a running server """
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname,
+                                                   parts.port or 80)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+                 'Connection: close\r\n\r\n'.encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(response.split(b' ', 2)[1])
+
+
+async def run_load(get, concurrency: int) -> Tuple[List[float], float]:
+    """ Latencies of REQUESTS requests, at most 'concurrency' at a time,
+    and the total duration """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def request(idx: int):
+        async with semaphore:
+            start = time.perf_counter()
+            status = await get(PATHS[idx % len(PATHS)])
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise RuntimeError(f'{PATHS[idx % len(PATHS)]}: {status}')
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(idx) for idx in range(REQUESTS)))
+    return latencies, time.perf_counter() - start
+
+
+def percentile(values: List[float], pct: int) -> float:
+    return statistics.quantiles(values, n=100)[pct - 1]
+
+
+async def report(get, target: str):
+    await run_load(get, concurrency=1)  # warm up the knowledge snapshot
+    print(f'{target}, {REQUESTS} requests over {len(PATHS)} endpoints:')
+    for concurrency in CONCURRENCY:
+        latencies, duration = await run_load(get, concurrency=concurrency)
+        print(f'concurrency {concurrency:3d}: '
+              f'p50 {1000 * percentile(latencies, 50):7.1f} ms, '
+              f'p95 {1000 * percentile(latencies, 95):7.1f} ms, '
+              f'p99 {1000 * percentile(latencies, 99):7.1f} ms, '
+              f'{REQUESTS / duration:7.1f} req/s')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('num_problems', type=int, nargs='?', default=2000)
+    parser.add_argument('num_logs', type=int, nargs='?', default=20000)
+    parser.add_argument('--url', help='base url of a running server')
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(report(partial(http_get, args.url), target=args.url))
+        return
+
+    call_command('migrate', verbosity=0)
+    create_db(num_problems=args.num_problems, num_logs=args.num_logs)
+    asyncio.run(report(partial(asgi_get, get_asgi_application()),
+                       target=f'{args.num_problems} problems, '
+                              f'{args.num_logs} logs'))
+
+
+if __name__ == "__main__":
+    main()
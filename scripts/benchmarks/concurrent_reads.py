@@ -0,0 +1,107 @@
+"""Benchmark: latency of a cold 'srep list-tags' (tags, problems and logs
+fetched and the knowledge status computed) on a large sqlite database,
+with sequential vs. concurrent gateway reads.
+
+Usage (from the repository root):
+  python -m scripts.benchmarks.concurrent_reads [num_problems] [num_logs]"""
+
+# pylint: disable=C0413
+
+import datetime as dt
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+
+os.environ.setdefault(
+    'DJANGO_SETTINGS_MODULE',
+    'spaced_repetition.gateways.django_gateway.django_project.django_project.settings')
+
+TMP_DIR = tempfile.mkdtemp()
+settings.DATABASES['default']['NAME'] = Path(TMP_DIR) / 'db.sqlite3'
+django.setup()
+
+import numpy as np
+from dateutil.tz import gettz
+from pandas.testing import assert_frame_equal
+
+from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.gateways.django_gateway.django_project.apps.problem.models import (
+    Problem as OrmProblem,
+    ProblemLog as OrmProblemLog,
+    Tag as OrmTag)
+from spaced_repetition.presenters.cli_presenter import CliPresenter
+from spaced_repetition.use_cases.get_tag import TagGetter
+
+NUM_TAGS = 20
+REPETITIONS = 5
+
+
+def create_db(num_problems: int, num_logs: int):
+    rng = np.random.default_rng(0)
+    tags = OrmTag.objects.bulk_create(
+        [OrmTag(name=f'tag_{idx}') for idx in range(NUM_TAGS)])
+    problems = OrmProblem.objects.bulk_create(
+        [OrmProblem(name=f'problem_{idx}', difficulty=idx % 3 + 1)
+         for idx in range(num_problems)])
+    problem_tags = {problem.pk: [tags[idx].pk for idx in rng.choice(
+        NUM_TAGS, size=2, replace=False)] for problem in problems}
+    OrmProblem.tags.through.objects.bulk_create(
+        [OrmProblem.tags.through(problem_id=problem_id, tag_id=tag_id)
+         for problem_id, tag_ids in problem_tags.items()
+         for tag_id in tag_ids])
+
+    start = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+    log_problems = rng.choice(list(problem_tags), size=num_logs)
+    logs = OrmProblemLog.objects.bulk_create(
+        [OrmProblemLog(problem_id=int(problem_id),
+                       result=int(rng.integers(6)),
+                       timestamp=start + dt.timedelta(minutes=idx))
+         for idx, problem_id in enumerate(log_problems)],
+        batch_size=10000)
+    OrmProblemLog.tags.through.objects.bulk_create(
+        [OrmProblemLog.tags.through(problemlog_id=log.pk, tag_id=tag_id)
+         for log in logs for tag_id in problem_tags[log.problem_id]],
+        batch_size=10000)
+
+
+def cold_list_tags(concurrent_reads: bool):
+    """ A fresh TagGetter comes with an empty knowledge snapshot cache """
+    start = time.perf_counter()
+    tags = TagGetter(db_gateway=DjangoGateway(),
+                     presenter=CliPresenter(),
+                     concurrent_reads=concurrent_reads).get_prioritized_tags()
+    return tags, time.perf_counter() - start
+
+
+def main():
+    num_problems = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    num_logs = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    call_command('migrate', verbosity=0)
+    create_db(num_problems=num_problems, num_logs=num_logs)
+
+    reference, _ = cold_list_tags(concurrent_reads=False)  # warm up
+    durations = {False: [], True: []}
+    for _ in range(REPETITIONS):
+        for concurrent_reads, runs in durations.items():
+            tags, duration = cold_list_tags(concurrent_reads=concurrent_reads)
+            assert_frame_equal(reference, tags)
+            runs.append(duration)
+
+    print(f'{num_problems} problems, {num_logs} logs, {os.cpu_count()} cpus, '
+          f'median of {REPETITIONS}:')
+    sequential = statistics.median(durations[False])
+    concurrent = statistics.median(durations[True])
+    print(f'sequential reads: {sequential:7.3f} s')
+    print(f'concurrent reads: {concurrent:7.3f} s '
+          f'({sequential / concurrent:.2f}x)')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark: knowledge forecast of many problem-tag-combos over a grid of
+days, evaluated date by date vs. in one broadcast (combos x days).
+
+Usage (from the repository root):
+  python -m scripts.benchmarks.forecast [num_combos] [days]"""
+
+import datetime as dt
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import gettz
+
+from spaced_repetition.domain.problem_log import Result
+from spaced_repetition.use_cases.get_problem_log import ProblemLogGetter
+
+
+def create_log_data(num_combos: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    start = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+    return pd.DataFrame(data={
+        'interval': rng.integers(1, 60, size=num_combos).astype(float),
+        'result': rng.choice(list(Result), size=num_combos),
+        'ts_logged': [start + dt.timedelta(minutes=int(minutes))
+                      for minutes in rng.integers(0, 60 * 24 * 90,
+                                                  size=num_combos)]})
+
+
+def forecast_date_by_date(log_data: pd.DataFrame, ts: dt.datetime,
+                          days: int) -> np.ndarray:
+    return np.column_stack([
+        ProblemLogGetter._add_knowledge_scores(  # pylint: disable=protected-access
+            log_data=log_data, ts=ts + dt.timedelta(days=day)).KS
+        for day in range(days + 1)])
+
+
+def main():
+    num_combos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+    log_data = create_log_data(num_combos=num_combos)
+    ts = dt.datetime(2021, 4, 1, tzinfo=gettz('UTC'))
+
+    start = time.perf_counter()
+    expected = forecast_date_by_date(log_data=log_data, ts=ts, days=days)
+    looped = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, knowledge = ProblemLogGetter.forecast_knowledge_scores(
+        log_data=log_data, ts=ts, days=days)
+    broadcast = time.perf_counter() - start
+    np.testing.assert_allclose(expected, knowledge)
+
+    print(f'{num_combos} combos x {days + 1} days:')
+    print(f'date by date: {looped:7.3f} s')
+    print(f'broadcast:    {broadcast:7.3f} s ({looped / broadcast:.1f}x)')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Benchmark: peak memory (tracemalloc) of the 'srep list-full' pipeline,
+from the gateway's domain objects to the formatted table - along the
+copying path (the helpers as they were before copies were avoided) and
+along the current one, side by side.
+
+Usage (from the repository root):
+  python -m scripts.benchmarks.memory_list_full [num_problems] [num_logs]"""
+
+import datetime as dt
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from typing import List
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import gettz
+
+from spaced_repetition.domain.problem import Difficulty, ProblemCreator
+from spaced_repetition.domain.problem_log import ProblemLogCreator, Result
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.presenters.cli_presenter import CliPresenter
+from spaced_repetition.use_cases import get_problem, get_problem_log, get_tag
+from spaced_repetition.use_cases.db_gateway_interface import DBGatewayInterface
+from spaced_repetition.use_cases.due_date_index import (DueDateIndex,
+                                                        sort_by_due_date)
+from spaced_repetition.use_cases.get_problem import ProblemGetter
+from spaced_repetition.use_cases.get_problem_log import (RESULT_VALUES,
+                                                         ProblemLogGetter)
+from spaced_repetition.use_cases.helpers_pandas import (TYPE_MAPPER,
+                                                        case_insensitive_sort)
+
+ORDERED_COLS = ['tag', 'problem', 'problem_id', 'difficulty', 'last_access',
+                'last_result', 'KS', 'RF', 'url', 'ease', 'interval']
+
+
+# -------------------- the copying path --------------------
+def copying_add_missing_columns(df, required_columns: List[str]):
+    df = df.copy()
+    for col in required_columns:
+        if col not in df.columns:
+            df[col] = pd.Series(dtype=TYPE_MAPPER.get(col, float))
+    return df
+
+
+def copying_denormalize_tags(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        return copying_add_missing_columns(
+            df.drop(columns='tags', errors='ignore'), required_columns=['tag'])
+
+    df = df.copy()
+    df['tags'] = df['tags'].str.split(', ')
+    return df \
+        .explode('tags', ignore_index=True) \
+        .rename(columns={'tags': 'tag'})
+
+
+def copying_sort_page(df: pd.DataFrame, sorted_by, limit: int = None,
+                      offset: int = 0) -> pd.DataFrame:
+    end = None if limit is None else offset + limit
+    return df \
+        .sort_values(by=sorted_by,
+                     key=case_insensitive_sort,
+                     kind='mergesort',
+                     na_position='first') \
+        .iloc[offset:end]
+
+
+def copying_last_entry_per_problem_tag_combo(
+        plog_df: pd.DataFrame) -> pd.DataFrame:
+    columns = ['problem_id', 'tag', 'ts_logged', 'result', 'ease',
+               'interval']
+    df = copying_add_missing_columns(
+        df=plog_df.loc[:, [col for col in columns if col in plog_df.columns]],
+        required_columns=columns)
+    return sort_by_due_date(df
+                            .sort_values('ts_logged')
+                            .groupby(['problem_id', 'tag'])
+                            .tail(1))
+
+
+def copying_add_knowledge_scores(log_data: pd.DataFrame,
+                                 ts: dt.datetime = None) -> pd.DataFrame:
+    ts = ts or dt.datetime.now(tz=gettz('UTC'))
+    df = log_data.copy()
+    if df.empty:
+        return copying_add_missing_columns(df, required_columns=['KS', 'RF'])
+
+    due_date_index = DueDateIndex(df)
+    overdue = due_date_index.overdue(ts=ts)
+    retention = np.ones(len(df))
+    retention[overdue] = ProblemLogGetter._retention_score(  # pylint: disable=protected-access
+        days_over=due_date_index.days_overdue(positions=overdue, ts=ts),
+        interval=due_date_index.interval[overdue])
+    df['RF'] = retention
+    df['KS'] = df.RF * df.result.map(RESULT_VALUES)
+    return df
+
+
+def copying_format_df(df: pd.DataFrame, ordered_cols: List[str],
+                      index_col: str):
+    df = df \
+        .rename(columns={'result': 'last_result', 'ts_logged': 'last_access'}) \
+        .reindex(columns=ordered_cols) \
+        .set_index(index_col)
+    df.difficulty = df.difficulty.map(lambda x: x.name, na_action='ignore')
+    df.last_result = df.last_result.map(lambda x: x.name, na_action='ignore')
+    df.last_access = pd.to_datetime(df.last_access) \
+        .dt.strftime('%Y-%m-%d %H:%M')
+    return df
+
+
+@contextmanager
+def copying_path():
+    """ Runs the pipeline with the copying helpers """
+    with ExitStack() as stack:
+        for module in [get_problem, get_problem_log, get_tag]:
+            for name, helper in [('add_missing_columns',
+                                  copying_add_missing_columns),
+                                 ('denormalize_tags', copying_denormalize_tags),
+                                 ('sort_page', copying_sort_page)]:
+                if hasattr(module, name):
+                    stack.enter_context(patch.object(module, name, helper))
+        stack.enter_context(patch.object(
+            ProblemLogGetter, '_last_entry_per_problem_tag_combo',
+            staticmethod(copying_last_entry_per_problem_tag_combo)))
+        stack.enter_context(patch.object(
+            ProblemLogGetter, '_add_knowledge_scores',
+            staticmethod(copying_add_knowledge_scores)))
+        stack.enter_context(patch.object(
+            CliPresenter, 'format_df', staticmethod(copying_format_df)))
+        yield
+
+
+# -------------------- benchmark --------------------
+def create_gateway(num_problems: int, num_logs: int) -> DBGatewayInterface:
+    rng = np.random.default_rng(0)
+    tags = [TagCreator.create(name=f'tag_{idx}', tag_id=idx)
+            for idx in range(20)]
+    problems = [ProblemCreator.create(
+        difficulty=Difficulty(idx % 3 + 1),
+        name=f'problem_{idx}',
+        problem_id=idx,
+        tags=[tags[t] for t in rng.choice(20, size=2, replace=False)],
+        url=f'https://leetcode.com/problems/problem_{idx}')
+        for idx in range(num_problems)]
+
+    start = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+    logs = []
+    for idx in range(num_logs):
+        problem = problems[rng.integers(num_problems)]
+        logs.append(ProblemLogCreator.create(
+            problem_id=problem.problem_id,
+            result=Result(int(rng.integers(6))),
+            tags=problem.tags,
+            timestamp=start + dt.timedelta(minutes=int(idx) * 30)))
+    gateway = Mock(spec=DBGatewayInterface)  # read-only, serving the above
+    gateway.get_data_version.return_value = (num_problems, num_logs)
+    gateway.get_problems.return_value = problems
+    gateway.get_problem_logs.return_value = logs
+    return gateway
+
+
+def list_full(gateway: DBGatewayInterface) -> pd.DataFrame:
+    combos = ProblemGetter(db_gateway=gateway, presenter=CliPresenter()) \
+        .get_problem_tag_combos(sorted_by=['KS'])
+    return CliPresenter.format_df(df=combos, ordered_cols=ORDERED_COLS,
+                                  index_col='tag')
+
+
+def measure(gateway: DBGatewayInterface):
+    """ Returns the table, its peak and result memory [B] and time [s] """
+    list_full(gateway)  # warm up imports and caches
+    tracemalloc.start()
+    start = time.perf_counter()
+    table = list_full(gateway)
+    duration = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return table, peak, current, duration
+
+
+def main():
+    num_problems = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    num_logs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    gateway = create_gateway(num_problems=num_problems, num_logs=num_logs)
+
+    with copying_path():
+        copying_table, *copying = measure(gateway)
+    table, *current = measure(gateway)
+    # same combos (of equal KS, possibly in another order)
+    pd.testing.assert_frame_equal(*(
+        df.reset_index().sort_values(['problem_id', 'tag'], ignore_index=True)
+        for df in [copying_table, table]))
+
+    print(f'{num_problems} problems, {num_logs} logs -> {len(table)} combos')
+    print(f'{"":14}{"copying":>10}{"current":>10}')
+    for label, unit, scale, idx in [('peak memory:', 'MiB', 2**20, 0),
+                                    ('result:', 'MiB', 2**20, 1),
+                                    ('time:', 's', 1, 2)]:
+        print(f'{label:14}{copying[idx] / scale:10.2f}'
+              f'{current[idx] / scale:10.2f} {unit}')
+
+
+if __name__ == "__main__":
+    main()
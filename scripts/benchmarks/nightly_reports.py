@@ -0,0 +1,83 @@
+"""Benchmark: throughput of 'srep report' (the reports of many learners)
+with 1 .. N worker processes.
+
+Usage (from the repository root):
+  python -m scripts.benchmarks.nightly_reports [num_learners] [num_problems] [num_logs]"""
+
+# pylint: disable=C0413
+
+import datetime as dt
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# sets up django on a temporary database
+from scripts.benchmarks.concurrent_reads import TMP_DIR
+
+import numpy as np
+from dateutil.tz import gettz
+from django.core.management import call_command
+
+from spaced_repetition.controllers.report import summarize, write_reports
+from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.gateways.django_gateway.django_project.apps.problem.models import (
+    Problem as OrmProblem,
+    ProblemLog as OrmProblemLog,
+    Tag as OrmTag)
+
+NUM_TAGS = 10
+
+
+def create_learner(name: str, num_problems: int, num_logs: int,
+                   rng: np.random.Generator):
+    learner_id = DjangoGateway.get_or_create_learner_id(name=name)
+    tags = OrmTag.objects.bulk_create(
+        [OrmTag(learner_id=learner_id, name=f'tag_{idx}')
+         for idx in range(NUM_TAGS)])
+    problems = OrmProblem.objects.bulk_create(
+        [OrmProblem(learner_id=learner_id, name=f'problem_{idx}',
+                    difficulty=idx % 3 + 1)
+         for idx in range(num_problems)])
+    problem_tags = {problem.pk: tags[idx % NUM_TAGS].pk
+                    for idx, problem in enumerate(problems)}
+    OrmProblem.tags.through.objects.bulk_create(
+        [OrmProblem.tags.through(problem_id=problem_id, tag_id=tag_id)
+         for problem_id, tag_id in problem_tags.items()])
+
+    start = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+    logs = OrmProblemLog.objects.bulk_create(
+        [OrmProblemLog(learner_id=learner_id, problem_id=int(problem_id),
+                       result=int(rng.integers(6)),
+                       timestamp=start + dt.timedelta(hours=idx))
+         for idx, problem_id in enumerate(
+             rng.choice(list(problem_tags), size=num_logs))])
+    OrmProblemLog.tags.through.objects.bulk_create(
+        [OrmProblemLog.tags.through(problemlog_id=log.pk,
+                                    tag_id=problem_tags[log.problem_id])
+         for log in logs])
+
+
+def main():
+    num_learners = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    num_problems = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    num_logs = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    call_command('migrate', verbosity=0)
+    rng = np.random.default_rng(0)
+    for idx in range(num_learners):
+        create_learner(name=f'learner_{idx}', num_problems=num_problems,
+                       num_logs=num_logs, rng=rng)
+
+    print(f'{num_learners} learners with {num_problems} problems and '
+          f'{num_logs} logs each, {os.cpu_count()} cpus:')
+    directory = Path(tempfile.mkdtemp(dir=TMP_DIR))
+    for workers in sorted({1, 2, os.cpu_count()}):
+        latencies, duration = write_reports(directory=directory,
+                                            workers=workers)
+        print(f'{workers} workers: {summarize(latencies, duration)}')
+    shutil.rmtree(TMP_DIR)
+
+
+if __name__ == "__main__":
+    main()
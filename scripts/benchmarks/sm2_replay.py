@@ -0,0 +1,52 @@
+"""Benchmark: full SM2 replay of a long log history, sharded by problem_id
+over 1 .. N worker processes.
+
+Usage (from the repository root):
+  python -m scripts.benchmarks.sm2_replay [num_logs] [max_workers]"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from spaced_repetition.domain.problem_log import Result
+from spaced_repetition.use_cases.get_problem_log import SuperMemo2
+
+
+def create_log_data(num_logs: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    results = list(Result)
+    return pd.DataFrame(data={
+        'problem_id': rng.integers(0, max(num_logs // 50, 1), num_logs),
+        'tag': [f'tag_{idx}' for idx in rng.integers(0, 20, num_logs)],
+        'result': [results[idx] for idx in rng.integers(0, 6, num_logs)],
+        'ts_logged': pd.Timestamp('2021-01-01', tz='UTC')
+                     + pd.to_timedelta(rng.permutation(num_logs), unit='min')})
+
+
+def main():
+    num_logs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    log_data = create_log_data(num_logs)
+
+    reference, durations = None, {}
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        res = SuperMemo2.add_spacing_data(log_data=log_data, workers=workers)
+        durations[workers] = time.perf_counter() - start
+        if reference is None:
+            reference = res
+        else:
+            assert_frame_equal(reference, res)
+
+    print(f'{num_logs} logs, {os.cpu_count()} cpus')
+    for workers, duration in durations.items():
+        print(f'{workers:3d} workers: {duration:7.2f} s '
+              f'({durations[1] / duration:.2f}x)')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: rendering a large problem-tag-combo table (as printed by
+'srep list-full') with tabulate vs. with the github_table renderer.
+
+Usage (from the repository root):
+  python -m scripts.benchmarks.table_rendering [num_rows]"""
+
+import datetime as dt
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from spaced_repetition.domain.problem import Difficulty
+from spaced_repetition.domain.problem_log import Result
+from spaced_repetition.presenters import github_table
+from spaced_repetition.presenters.cli_presenter import CliPresenter
+
+ORDERED_COLS = ['tag', 'problem', 'problem_id', 'difficulty', 'last_access',
+                'last_result', 'KS', 'RF', 'url', 'ease', 'interval']
+
+
+def create_combos(num_rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    logged = rng.random(num_rows) < 0.9
+    return pd.DataFrame(data={
+        'tag': [f'tag_{idx % 20}' for idx in range(num_rows)],
+        'problem': [f'problem_{idx}' for idx in range(num_rows)],
+        'problem_id': np.arange(num_rows),
+        'difficulty': [Difficulty(idx % 3 + 1) for idx in range(num_rows)],
+        'ts_logged': pd.Series(
+            pd.Timestamp(dt.datetime(2021, 1, 1), tz='UTC')
+            + pd.to_timedelta(rng.integers(0, 10**8, num_rows), unit='s')
+        ).where(logged),
+        'result': pd.Series([Result(idx % 6) for idx in range(num_rows)])
+                  .where(logged),
+        'KS': np.where(logged, rng.random(num_rows) * 5, np.nan),
+        'RF': np.where(logged, rng.random(num_rows), np.nan),
+        'url': '',
+        'ease': np.where(logged, 2.5, np.nan),
+        'interval': np.where(logged, rng.integers(1, 100, num_rows), np.nan)})
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    combos = create_combos(num_rows)
+    formatted, t_format = timed(lambda: CliPresenter.format_df(
+        df=combos, ordered_cols=ORDERED_COLS, index_col='tag'))
+
+    expected, t_tabulate = timed(lambda: tabulate(
+        formatted, headers='keys', tablefmt='github'))
+    rendered, t_render = timed(lambda: github_table.render(formatted))
+    assert rendered == expected, 'outputs differ'
+
+    print(f'{num_rows} rows, format_df: {t_format:.3f} s')
+    print(f'tabulate:     {t_tabulate:7.3f} s')
+    print(f'github_table: {t_render:7.3f} s '
+          f'({t_tabulate / t_render:.1f}x faster, identical output)')
+
+
+if __name__ == "__main__":
+    main()
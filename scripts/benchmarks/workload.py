@@ -0,0 +1,61 @@
+"""Benchmark: 'srep workload' binning of a very large catalog's due dates
+into days, in total and per tag.
+
+Usage (from the repository root):
+  python -m scripts.benchmarks.workload [num_combos] [num_tags] [days]"""
+
+import datetime as dt
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import gettz
+
+from spaced_repetition.use_cases.due_date_index import due_counts_per_day
+
+REPETITIONS = 5
+
+
+def create_log_data(num_combos: int, num_tags: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    start = np.datetime64('2021-01-01', 'ns')
+    return pd.DataFrame(data={
+        'interval': rng.uniform(1, 60, size=num_combos),
+        'tag': pd.Categorical.from_codes(
+            rng.integers(num_tags, size=num_combos),
+            categories=[f'tag_{idx}' for idx in range(num_tags)]),
+        'ts_logged': pd.to_datetime(
+            start + rng.integers(0, 90 * 24 * 3600, size=num_combos)
+            .astype('timedelta64[s]')).tz_localize('UTC')})
+
+
+def best_of(func) -> float:
+    durations = []
+    for _ in range(REPETITIONS):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main():
+    num_combos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    num_tags = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 28
+    log_data = create_log_data(num_combos=num_combos, num_tags=num_tags)
+    ts = dt.datetime(2021, 3, 1, tzinfo=gettz('UTC'))
+    tags = pd.Categorical(log_data.tag)
+
+    total = best_of(lambda: due_counts_per_day(log_data, ts=ts, days=days))
+    per_tag = best_of(lambda: due_counts_per_day(
+        log_data, ts=ts, days=days, group_codes=tags.codes,
+        num_groups=len(tags.categories)))
+    print(f'{num_combos} combos, {num_tags} tags, {days} days, '
+          f'best of {REPETITIONS}:')
+    print(f'total:   {1000 * total:7.1f} ms')
+    print(f'per tag: {1000 * per_tag:7.1f} ms')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark: logging throughput of a burst of problem logs, written one by
+one via the DjangoGateway vs. via the WriteBehindGateway.
+
+Usage (from the repository root):
+  python -m scripts.benchmarks.write_behind [num_logs]"""
+
+# pylint: disable=C0413
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+
+os.environ.setdefault(
+    'DJANGO_SETTINGS_MODULE',
+    'spaced_repetition.gateways.django_gateway.django_project.django_project.settings')
+
+TMP_DIR = tempfile.mkdtemp()
+settings.DATABASES['default']['NAME'] = Path(TMP_DIR) / 'db.sqlite3'
+django.setup()
+
+from spaced_repetition.domain.problem import Difficulty, ProblemCreator
+from spaced_repetition.domain.problem_log import ProblemLogCreator, Result
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.gateways.write_behind_gateway import WriteBehindGateway
+
+
+def create_logs(num_logs: int):
+    tag = DjangoGateway().create_tag(TagCreator.create(name='tag'))
+    problem = DjangoGateway().create_problem(ProblemCreator.create(
+        difficulty=Difficulty.EASY, name='problem', tags=[tag]))
+    return [ProblemLogCreator.create(problem_id=problem.problem_id,
+                                     result=Result(idx % 6),
+                                     tags=[tag])
+            for idx in range(num_logs)]
+
+
+def main():
+    num_logs = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    call_command('migrate', verbosity=0)
+    problem_logs = create_logs(num_logs)
+
+    start = time.perf_counter()
+    for problem_log in problem_logs:
+        DjangoGateway().create_problem_log(problem_log=problem_log)
+    direct = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gateway = WriteBehindGateway(gateway=DjangoGateway(),
+                                 journal_path=Path(TMP_DIR) / 'srep.journal')
+    for problem_log in problem_logs:
+        gateway.create_problem_log(problem_log=problem_log)
+    acknowledged = time.perf_counter() - start
+    gateway.close()
+    write_behind = time.perf_counter() - start
+
+    print(f'{num_logs} logs (database in {TMP_DIR})')
+    print(f'direct:       {num_logs / direct:10.0f} logs/s')
+    print(f'write-behind: {num_logs / acknowledged:10.0f} logs/s acknowledged, '
+          f'{num_logs / write_behind:.0f} logs/s incl. final flush')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,26 @@
 """Script to start command line interface"""
 
-# pylint: disable=E402
+# pylint: disable=C0415
 
-import django
 import os
+import sys
+
 os.environ['DJANGO_SETTINGS_MODULE'] = \
     'spaced_repetition.gateways.django_gateway.django_project.django_project.settings'
-django.setup()
 
-from spaced_repetition.controllers.cli_controller import main
+
+def main():
+    # a running 'srep daemon' answers list commands without starting Django
+    from spaced_repetition.controllers.daemon_client import forward
+    status = forward(sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
+
+    import django
+    django.setup()
+
+    from spaced_repetition.controllers.cli_controller import main as cli_main
+    cli_main()
 
 
 if __name__ == "__main__":
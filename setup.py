@@ -8,7 +8,7 @@ setup(
     author_email='marcel.blistein@gmail.com',
     url='https://github.com/MBlistein/spaced-repetition',
     packages=find_packages(exclude=('test*', '*.db', '*.utils')),
-    install_requires=['Django',
+    install_requires=['Django>=5.1',
                       'numpy',
                       'pandas',
                       'tabulate',
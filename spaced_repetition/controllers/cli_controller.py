@@ -1,32 +1,83 @@
 """Command line controller / user interface"""
 
 import argparse
+import shlex
+from contextlib import contextmanager
+from pathlib import Path
 from typing import List
 
+from spaced_repetition.controllers.daemon_client import (journal_path,
+                                                         learner_file_name,
+                                                         learner_name,
+                                                         socket_path)
+from spaced_repetition.controllers.report import summarize, write_reports
 from spaced_repetition.domain.problem import Difficulty
 from spaced_repetition.domain.problem_log import (MAX_COMMENT_LENGTH, Result)
 from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.gateways.pickle_cache import PickleCache
+from spaced_repetition.gateways.write_behind_gateway import (WriteBehindGateway,
+                                                             replay_journal)
 from spaced_repetition.presenters.cli_presenter import CliPresenter
+from spaced_repetition.presenters.stream_presenter import FORMATS, StreamPresenter
 from spaced_repetition.use_cases.add_problem import ProblemAdder
 from spaced_repetition.use_cases.add_tag import TagAdder
+from spaced_repetition.use_cases.db_gateway_interface import DBGatewayInterface
+from spaced_repetition.use_cases.get_dashboard import DashboardGetter
 from spaced_repetition.use_cases.get_problem import ProblemGetter
 from spaced_repetition.use_cases.get_tag import TagGetter
+from spaced_repetition.use_cases.knowledge_snapshot import KnowledgeSnapshotCache
 from spaced_repetition.use_cases.log_problem import ProblemLogger
+from spaced_repetition.use_cases.study_session import StudySession
 
 
 # pylint: disable=too-few-public-methods
 
 
+class UnknownLearnerError(LookupError):
+    """ $SREP_LEARNER names a learner who has no data yet """
+
+
+def non_negative_int(value: str) -> int:
+    """ argparse type of counts that may be 0, e.g. --offset """
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f'{number} must not be negative')
+    return number
+
+
+def positive_int(value: str) -> int:
+    """ argparse type of counts of at least 1, e.g. -k """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'{number} must be positive')
+    return number
+
+
 class CliController:
     DESCRIPTION = """This is the spaced-repetition CLI"""
+    CACHE_DIR_NAME = 'cache'
+    REPORT_DIR_NAME = 'reports'
+
+    _gateway = None
+    _snapshot_cache = None
+
+    @classmethod
+    def run(cls, argv: List[str] = None):
+        cls._dispatch(cls._parse_args(argv))
+
+    @staticmethod
+    def _dispatch(args):
+        try:
+            args.func(args)
+        except UnknownLearnerError as err:
+            print(err)
 
     @classmethod
-    def run(cls):
-        args = cls._parse_args()
-        args.func(args)
+    def _parse_args(cls, argv: List[str] = None):
+        return cls._build_parser().parse_args(argv)
 
     @classmethod
-    def _parse_args(cls):
+    def _build_parser(cls) -> argparse.ArgumentParser:
         parser = argparse.ArgumentParser(prog='spaced-repetition',
                                          description=CliController.DESCRIPTION)
         sub_parsers = parser.add_subparsers(title='Options')
@@ -35,7 +86,7 @@ class CliController:
         add_parser = sub_parsers.add_parser('add-problem',
                                             aliases=['add', 'ap'],
                                             help='Add new problem')
-        add_parser.set_defaults(func=cls._add_problem)
+        add_parser.set_defaults(func=cls._add_problem, writes=True)
 
         # list problems
         list_parser = sub_parsers.add_parser('list-problems',
@@ -57,6 +108,9 @@ class CliController:
                                  nargs='+',
                                  help='Provide space-separated attribute(s) to '
                                       'sort listed problems by')
+        cls._add_page_arguments(list_parser)
+        cls._add_format_argument(list_parser)
+        cls._add_concurrency_argument(list_parser)
         list_parser.set_defaults(func=cls._list_problems)
 
         # list problem-tag-combos
@@ -76,8 +130,36 @@ class CliController:
                                   nargs='+',
                                   help='Provide space-separated attribute(s) to '
                                        'sort listed problems by')
+        cls._add_page_arguments(combo_parser)
+        cls._add_format_argument(combo_parser)
+        cls._add_concurrency_argument(combo_parser)
         combo_parser.set_defaults(func=cls._list_problem_tag_combos)
 
+        # next problem-tag-combos to study
+        next_parser = sub_parsers.add_parser(
+            'next',
+            aliases=['n'],
+            help='Show the problem-tag-combos to study next')
+        next_parser.add_argument('-k',
+                                 type=positive_int,
+                                 default=1,
+                                 help='Number of problem-tag-combos to show')
+        next_parser.add_argument('-t', '--tag',
+                                 help='Show only problem-tag-combos of this tag')
+        cls._add_format_argument(next_parser)
+        cls._add_concurrency_argument(next_parser)
+        next_parser.set_defaults(func=cls._list_next)
+
+        # study session
+        session_parser = sub_parsers.add_parser(
+            'session',
+            aliases=['s'],
+            help='Study the most urgent problem-tag-combos one after another')
+        session_parser.add_argument('-t', '--tag',
+                                    help='Study only problem-tag-combos of '
+                                         'this tag')
+        session_parser.set_defaults(func=cls._run_study_session, writes=True)
+
         # show problem history
         add_parser = sub_parsers.add_parser('show-history',
                                             aliases=['sh'],
@@ -88,7 +170,7 @@ class CliController:
         add_parser = sub_parsers.add_parser('add-tag',
                                             aliases=['at'],
                                             help='Add new tag')
-        add_parser.set_defaults(func=cls._add_tag)
+        add_parser.set_defaults(func=cls._add_tag, writes=True)
 
         # list tags
         tag_parser = sub_parsers.add_parser('list-tags',
@@ -102,22 +184,291 @@ class CliController:
                                 nargs='+',
                                 help='Provide space-separated attribute(s) to '
                                      'sort listed problems by')
+        cls._add_page_arguments(tag_parser)
+        cls._add_format_argument(tag_parser)
+        cls._add_concurrency_argument(tag_parser)
         tag_parser.set_defaults(func=cls._list_tags)
 
+        # forecast of the tag knowledge
+        forecast_parser = sub_parsers.add_parser(
+            'forecast',
+            aliases=['fc'],
+            help='Show how the knowledge per tag decays over the next days '
+                 'without studying')
+        forecast_parser.add_argument('--days',
+                                     type=positive_int,
+                                     default=7,
+                                     help='Number of days to forecast')
+        cls._add_format_argument(forecast_parser)
+        cls._add_concurrency_argument(forecast_parser)
+        forecast_parser.set_defaults(func=cls._show_forecast)
+
+        # due problem-tag-combos per day
+        workload_parser = sub_parsers.add_parser(
+            'workload',
+            aliases=['wl'],
+            help='Show how many problem-tag-combos come due on each of the '
+                 'next days')
+        workload_parser.add_argument('--days',
+                                     type=positive_int,
+                                     default=28,
+                                     help='Number of days to show')
+        workload_parser.add_argument('--by-tag',
+                                     action='store_true',
+                                     help='Break the counts down by tag')
+        cls._add_format_argument(workload_parser)
+        cls._add_concurrency_argument(workload_parser)
+        workload_parser.set_defaults(func=cls._show_workload)
+
+        # dashboard
+        dashboard_parser = sub_parsers.add_parser(
+            'dashboard',
+            aliases=['d'],
+            help='List tags, problems and problem-tag-combos at once')
+        cls._add_concurrency_argument(dashboard_parser)
+        dashboard_parser.set_defaults(func=cls._show_dashboard)
+
         # log problem execution
         log_parser = sub_parsers.add_parser('add-log',
                                             aliases=['log', 'al'],
                                             help='Add new problem log')
-        log_parser.set_defaults(func=cls._add_problem_log)
+        log_parser.set_defaults(func=cls._add_problem_log, writes=True)
+
+        # interactive shell
+        shell_parser = sub_parsers.add_parser(
+            'shell',
+            help='Run several commands in one process, reusing cached data')
+        shell_parser.set_defaults(func=cls._run_shell)
+
+        # background daemon
+        daemon_parser = sub_parsers.add_parser(
+            'daemon',
+            help='Keep data loaded in a background process that answers '
+                 'list commands')
+        daemon_parser.set_defaults(func=cls._run_daemon)
+
+        # reports of all learners
+        report_parser = sub_parsers.add_parser(
+            'report',
+            help='Write the prioritized tags and the next problem-tag-combos '
+                 'of every learner to one JSON file per learner')
+        report_parser.add_argument('-d', '--directory',
+                                   type=Path,
+                                   help='Directory of the reports (default: '
+                                        f"'{cls.REPORT_DIR_NAME}' next to "
+                                        'the database)')
+        report_parser.add_argument('-k',
+                                   type=positive_int,
+                                   default=10,
+                                   help='Number of problem-tag-combos to '
+                                        'study next per learner')
+        report_parser.add_argument('-w', '--workers',
+                                   type=int,
+                                   help='Number of processes (default: one '
+                                        'per CPU)')
+        report_parser.add_argument('--replay-workers',
+                                   type=positive_int,
+                                   help='Replay the logs of each learner '
+                                        'sharded over this many processes; '
+                                        'then the learners are reported one '
+                                        'after the other (unless --workers '
+                                        'is given)')
+        report_parser.set_defaults(func=cls._write_reports)
+
+        return parser
+
+    @staticmethod
+    def _add_page_arguments(parser: argparse.ArgumentParser):
+        parser.add_argument('--limit',
+                            type=non_negative_int,
+                            help='Show at most this many rows')
+        parser.add_argument('--offset',
+                            type=non_negative_int,
+                            default=0,
+                            help='Skip this many rows (after sorting)')
+
+    @staticmethod
+    def _add_format_argument(parser: argparse.ArgumentParser):
+        parser.add_argument('--format',
+                            choices=['table'] + FORMATS,
+                            default='table',
+                            help='Output format; csv, json and jsonl are '
+                                 'streamed row by row')
+
+    @staticmethod
+    def _add_concurrency_argument(parser: argparse.ArgumentParser):
+        parser.add_argument('--concurrent-reads',
+                            action='store_true',
+                            help='Fetch tags, problems and logs from the '
+                                 'database at the same time')
+
+    @staticmethod
+    def _get_list_presenter(args):
+        if args.format == 'table':
+            return CliPresenter()
+        return StreamPresenter(fmt=args.format)
+
+    @staticmethod
+    def _get_page_kwargs(args) -> dict:
+        kwargs = {}
+        if args.limit is not None:
+            kwargs['limit'] = args.limit
+        if args.offset:
+            kwargs['offset'] = args.offset
+        return kwargs
+
+    @classmethod
+    def _get_snapshot_cache(cls) -> KnowledgeSnapshotCache:
+        """ Knowledge status cache, persisted next to the database file
+        (per learner: the cache keeps only the latest state) """
+        if cls._snapshot_cache is None:
+            persistent_cache = None
+            db_file = DjangoGateway.get_db_file()
+            if db_file is not None:
+                persistent_cache = PickleCache(
+                    directory=db_file.parent / learner_file_name(
+                        cls.CACHE_DIR_NAME))
+            cls._snapshot_cache = KnowledgeSnapshotCache(
+                persistent_cache=persistent_cache)
+        return cls._snapshot_cache
+
+    @classmethod
+    def _get_gateway(cls, create_learner: bool = False) -> DBGatewayInterface:
+        return cls._gateway or cls._get_learner_gateway(create=create_learner)
+
+    @staticmethod
+    def _get_learner_gateway(create: bool = False) -> DjangoGateway:
+        """ Gateway to the data of $SREP_LEARNER. Only writes ('create')
+        create the learner: creating takes the database's write lock,
+        looking the learner up doesn't. Logs left behind in the learner's
+        journal by a crashed process are stored first. """
+        name = learner_name()
+        if name is None:
+            gateway = DjangoGateway()
+        elif create:
+            gateway = DjangoGateway(
+                learner_id=DjangoGateway.get_or_create_learner_id(name=name))
+        else:
+            learner_id = DjangoGateway.get_learner_id(name=name)
+            if learner_id is None:
+                raise UnknownLearnerError(
+                    f"Unknown learner '{name}': add a problem or a tag first.")
+            gateway = DjangoGateway(learner_id=learner_id)
+
+        replay_journal(gateway=gateway, journal_path=journal_path(
+            db_file=DjangoGateway.get_db_file(), learner=name))
+        return gateway
+
+    @classmethod
+    @contextmanager
+    def _write_behind(cls):
+        """ Within this context, problem logs are journaled and written to
+        the database in batches. For long-running commands only: the logs
+        are stored for good when the context is left. """
+        db_file = DjangoGateway.get_db_file()
+        if cls._gateway is not None or db_file is None:
+            yield  # already batching, or nowhere to put the journal
+            return
+        try:
+            gateway = WriteBehindGateway(
+                gateway=cls._get_learner_gateway(),
+                journal_path=journal_path(db_file=db_file,
+                                          learner=learner_name()))
+        except (BlockingIOError,  # another process is batching its logs
+                UnknownLearnerError):  # nothing to batch for yet
+            yield
+            return
+        except OSError as err:  # the journal can't be opened: unbatched
+            print(f'Writing logs unbatched: {err}')
+            yield
+            return
+
+        cls._gateway = gateway
+        try:
+            yield
+        finally:
+            cls._gateway = None
+            gateway.close()
+
+    # -------------------- shell --------------------
+    SHELL_PROMPT = 'srep> '
+    SHELL_EXIT = ('exit', 'quit')
+
+    @classmethod
+    def _run_shell(cls, _):
+        """Read-eval-print loop over the CLI commands. The knowledge
+        snapshot stays cached between commands and is dropped on writes."""
+        with cls._write_behind():
+            cls._shell_loop()
+
+    @classmethod
+    def _shell_loop(cls):
+        parser = cls._build_parser()
+        print("Enter commands as on the command line (e.g. 'list-tags -s "
+              f"tag'), 'help' or '{cls.SHELL_EXIT[0]}'.")
+        while True:
+            try:
+                argv = shlex.split(input(cls.SHELL_PROMPT))
+            except EOFError:
+                return
+            except ValueError as err:
+                print(err)
+                continue
+
+            if not argv:
+                continue
+            if argv[0] in cls.SHELL_EXIT:
+                return
+            if argv[0] == 'help':
+                parser.print_help()
+                continue
+
+            try:
+                args = parser.parse_args(argv)
+            except SystemExit:  # argparse has already printed the reason
+                continue
+            if args.func == cls._run_shell:  # pylint: disable=comparison-with-callable
+                print('Already running a shell.')
+                continue
+
+            cls._dispatch(args)
+            if getattr(args, 'writes', False):
+                cls._get_snapshot_cache().invalidate()
+
+    # -------------------- daemon --------------------
+    @staticmethod
+    def _run_daemon(_):
+        """Answer forwarded list commands until interrupted"""
+        from .daemon import serve  # pylint: disable=import-outside-toplevel  # (cyclic)
+
+        path = socket_path()
+        if path is None:
+            print('The daemon needs a database file or $SREP_SOCKET.')
+            return
+        serve(path=path)
 
-        return parser.parse_args()
+    # -------------------- reports --------------------
+    @classmethod
+    def _write_reports(cls, args):
+        directory = args.directory
+        if directory is None:
+            db_file = DjangoGateway.get_db_file()
+            if db_file is None:
+                print('Supply --directory for the reports.')
+                return
+            directory = db_file.parent / cls.REPORT_DIR_NAME
+        latencies, duration = write_reports(
+            directory=directory, k=args.k, workers=args.workers,
+            replay_workers=args.replay_workers)
+        print(summarize(latencies=latencies, duration=duration))
 
     # -------------------- add problem --------------------
     @classmethod
     def _add_problem(cls, _):
         """Record a new problem"""
-        prob_adder = ProblemAdder(db_gateway=DjangoGateway(),
-                                  presenter=CliPresenter())
+        prob_adder = ProblemAdder(
+            db_gateway=cls._get_gateway(create_learner=True),
+            presenter=CliPresenter())
         user_input = cls._record_problem_data()
         try:
             prob_adder.add_problem(
@@ -149,8 +500,9 @@ class CliController:
             return
         comment = cls._get_comment()
 
-        prob_logger = ProblemLogger(db_gateway=DjangoGateway(),
-                                    presenter=CliPresenter())
+        prob_logger = ProblemLogger(
+            db_gateway=cls._get_gateway(create_learner=True),
+            presenter=CliPresenter())
         try:
             prob_logger.log_problem(comment=comment,
                                     problem_name=problem_name,
@@ -159,11 +511,45 @@ class CliController:
         except ValueError as err:
             print(err)
 
+    # -------------------- study session --------------------
+    SESSION_SKIP = 's'
+    SESSION_QUIT = 'q'
+
+    @classmethod
+    def _run_study_session(cls, args):
+        """Offer the most urgent problem-tag-combo until the user quits"""
+        with cls._write_behind():
+            cls._study(session=StudySession(
+                db_gateway=cls._get_gateway(create_learner=True),
+                presenter=CliPresenter(),
+                snapshot_cache=cls._get_snapshot_cache(),
+                tag=args.tag))
+
+    @classmethod
+    def _study(cls, session: StudySession):
+        cls._print_result_options()
+        while session.show_next():
+            user_choice = cls._clean_input(input(
+                f"Result (int), '{cls.SESSION_SKIP}' to skip, "
+                f"'{cls.SESSION_QUIT}' to quit: "))
+            if user_choice == cls.SESSION_QUIT:
+                return
+            if user_choice == cls.SESSION_SKIP:
+                session.skip()
+                continue
+            try:
+                result = Result(int(user_choice))
+            except ValueError as err:
+                print(f"\nSupplied invalid Result!\n{err}")
+                continue
+            session.log_result(result=result, comment=cls._get_comment())
+        print('Nothing left to study.')
+
     # -------------------- add tag --------------------
     @classmethod
     def _add_tag(cls, _):
         """Create new Tag"""
-        tag_adder = TagAdder(db_gateway=DjangoGateway(),
+        tag_adder = TagAdder(db_gateway=cls._get_gateway(create_learner=True),
                              presenter=CliPresenter())
         tag_adder.add_tag(name=cls._clean_input(input('Tag name: ')))
 
@@ -185,13 +571,17 @@ class CliController:
 
     @classmethod
     def _get_user_input_result(cls) -> Result:
-        print('\nThe following Result options exist:')
-        for res in Result:
-            print(f'{res.value}: {res.name}')
+        cls._print_result_options()
 
         user_choice = cls._clean_input(input('Choose one (int): '))
         return Result(int(user_choice))
 
+    @staticmethod
+    def _print_result_options():
+        print('\nThe following Result options exist:')
+        for res in Result:
+            print(f'{res.value}: {res.name}')
+
     @staticmethod
     def _clean_input(user_input: str) -> str:
         return user_input.strip()
@@ -211,11 +601,13 @@ class CliController:
             'url': cls._clean_input(input("Url (optional): "))}
 
     # -------------------- display elements --------------------
-    @staticmethod
-    def _list_problems(args):
-        prob_getter = ProblemGetter(db_gateway=DjangoGateway(),
-                                    presenter=CliPresenter())
-        kwargs = {}
+    @classmethod
+    def _list_problems(cls, args):
+        prob_getter = ProblemGetter(db_gateway=cls._get_gateway(),
+                                    presenter=cls._get_list_presenter(args),
+                                    snapshot_cache=cls._get_snapshot_cache(),
+                                    concurrent_reads=args.concurrent_reads)
+        kwargs = cls._get_page_kwargs(args)
         if args.filter_name:
             kwargs['name_substr'] = args.filter_name
         if args.filter_tags_all:
@@ -226,35 +618,78 @@ class CliController:
             kwargs['sorted_by'] = args.sort_by
         prob_getter.list_problems(**kwargs)
 
-    @staticmethod
-    def _list_problem_tag_combos(args):
-        kwargs = {}
+    @classmethod
+    def _list_problem_tag_combos(cls, args):
+        kwargs = cls._get_page_kwargs(args)
         if args.sort_by:
             kwargs['sorted_by'] = args.sort_by
         if args.filter_tags:
             kwargs['tag_substr'] = args.filter_tags
         if args.filter_problems:
             kwargs['problem_substr'] = args.filter_problems
-        prob_getter = ProblemGetter(db_gateway=DjangoGateway(),
-                                    presenter=CliPresenter())
+        prob_getter = ProblemGetter(db_gateway=cls._get_gateway(),
+                                    presenter=cls._get_list_presenter(args),
+                                    snapshot_cache=cls._get_snapshot_cache(),
+                                    concurrent_reads=args.concurrent_reads)
         prob_getter.list_problem_tag_combos(**kwargs)
 
-    @staticmethod
-    def _list_tags(args):
-        kwargs = {}
+    @classmethod
+    def _list_next(cls, args):
+        prob_getter = ProblemGetter(db_gateway=cls._get_gateway(),
+                                    presenter=cls._get_list_presenter(args),
+                                    snapshot_cache=cls._get_snapshot_cache(),
+                                    concurrent_reads=args.concurrent_reads)
+        prob_getter.list_next(k=args.k, tag=args.tag)
+
+    @classmethod
+    def _list_tags(cls, args):
+        kwargs = cls._get_page_kwargs(args)
         if args.filter:
             kwargs['sub_str'] = args.filter
         if args.sort_by:
             kwargs['sorted_by'] = args.sort_by
 
-        tag_getter = TagGetter(db_gateway=DjangoGateway(),
-                               presenter=CliPresenter())
+        tag_getter = TagGetter(db_gateway=cls._get_gateway(),
+                               presenter=cls._get_list_presenter(args),
+                               snapshot_cache=cls._get_snapshot_cache(),
+                               concurrent_reads=args.concurrent_reads)
         tag_getter.list_tags(**kwargs)
 
+    @classmethod
+    def _show_forecast(cls, args):
+        tag_getter = TagGetter(db_gateway=cls._get_gateway(),
+                               presenter=cls._get_list_presenter(args),
+                               snapshot_cache=cls._get_snapshot_cache(),
+                               concurrent_reads=args.concurrent_reads)
+        try:
+            tag_getter.list_forecast(days=args.days)
+        except ValueError as err:
+            print(err)
+
+    @classmethod
+    def _show_workload(cls, args):
+        prob_getter = ProblemGetter(db_gateway=cls._get_gateway(),
+                                    presenter=cls._get_list_presenter(args),
+                                    snapshot_cache=cls._get_snapshot_cache(),
+                                    concurrent_reads=args.concurrent_reads)
+        try:
+            prob_getter.list_workload(days=args.days, by_tag=args.by_tag)
+        except ValueError as err:
+            print(err)
+
+    @classmethod
+    def _show_dashboard(cls, args):
+        dashboard_getter = DashboardGetter(
+            db_gateway=cls._get_gateway(),
+            presenter=CliPresenter(),
+            snapshot_cache=cls._get_snapshot_cache(),
+            concurrent_reads=args.concurrent_reads)
+        dashboard_getter.show_dashboard()
+
     @classmethod
     def _show_problem_history(cls, _):
         problem_name = cls._get_problem_name()
-        prob_getter = ProblemGetter(db_gateway=DjangoGateway(),
+        prob_getter = ProblemGetter(db_gateway=cls._get_gateway(),
                                     presenter=CliPresenter())
         try:
             prob_getter.show_problem_history(name=problem_name)
@@ -0,0 +1,64 @@
+"""Background process that runs CLI commands for the thin daemon client.
+
+The daemon keeps Django, the DB connection and the knowledge snapshot cache
+warm. Requests are handled one at a time, so no command ever competes for
+the cache or the connection."""
+
+import io
+import json
+import os
+import socketserver
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import List
+
+from .cli_controller import CliController
+from .daemon_client import FORWARDED_COMMANDS
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        response = execute(argv=request['argv'])
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+
+
+def execute(argv: List[str]) -> dict:
+    """ Runs a non-interactive CLI command, capturing its output """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    status = 0
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        if not argv or argv[0] not in FORWARDED_COMMANDS:
+            print(f'The daemon does not run {argv[:1]}.', file=stderr)
+            status = 2
+        else:
+            try:
+                CliController.run(argv=argv)
+            except SystemExit as err:  # e.g. argparse errors or '-h'
+                status = err.code if isinstance(err.code, int) else 1
+            except Exception:  # pylint: disable=broad-except
+                traceback.print_exc()
+                status = 1
+    return {'status': status,
+            'stdout': stdout.getvalue(),
+            'stderr': stderr.getvalue()}
+
+
+def serve(path: Path) -> None:
+    """ Serves requests on the Unix socket 'path' until interrupted """
+    if path.exists():
+        path.unlink()  # left behind by a daemon that was killed
+
+    # warm up: the first request should already hit a cached snapshot
+    execute(argv=['dashboard'])
+
+    with socketserver.UnixStreamServer(str(path), _CommandHandler) as server:
+        os.chmod(path, 0o600)
+        print(f'srep daemon listening on {path}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            path.unlink(missing_ok=True)
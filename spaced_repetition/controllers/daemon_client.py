@@ -0,0 +1,120 @@
+"""Thin client for the 'srep daemon'.
+
+Forwards non-interactive commands to a running daemon over its Unix socket.
+This module must stay cheap to import: it is used before Django is set up,
+and must import neither Django nor pandas."""
+
+import hashlib
+import importlib
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import List, Union
+from urllib.parse import quote
+
+
+LEARNER_ENV_VAR = 'SREP_LEARNER'
+SOCKET_ENV_VAR = 'SREP_SOCKET'
+SOCKET_NAME = 'srep.sock'
+JOURNAL_NAME = 'srep.journal'
+MAX_ESCAPED_LEARNER_LENGTH = 64  # longer ones are hashed (64 hex digits)
+
+# commands (incl. aliases) that don't read user input
+FORWARDED_COMMANDS = {
+    'list-problems', 'l', 'list', 'lp',
+    'list-problem-tag-combos', 'list-full', 'lf',
+    'next', 'n',
+    'list-tags', 'lt', 'tags',
+    'forecast', 'fc',
+    'workload', 'wl',
+    'dashboard', 'd'}
+
+
+def learner_name() -> Union[str, None]:
+    """ $SREP_LEARNER, None for the database's default learner """
+    return os.environ.get(LEARNER_ENV_VAR) or None
+
+
+def learner_file_name(file_name: str) -> str:
+    """ Name of the learner's own copy of a file or directory, e.g.
+    'srep.alice.sock' for 'srep.sock' and 'cache.alice' for 'cache' """
+    return _file_name_of(file_name=file_name, learner=learner_name())
+
+
+def journal_path(db_file: Union[Path, None],
+                 learner: Union[str, None]) -> Union[Path, None]:
+    """ The learner's write-behind journal next to the database file (None
+    for the default learner), None for in-memory databases """
+    if db_file is None:
+        return None
+    return db_file.parent / _file_name_of(file_name=JOURNAL_NAME,
+                                          learner=learner)
+
+
+def _file_name_of(file_name: str, learner: Union[str, None]) -> str:
+    if learner is None:
+        return file_name
+    learner = _escape(learner)
+    if '.' not in file_name:
+        return f'{file_name}.{learner}'
+    stem, dot, suffix = file_name.rpartition('.')
+    return f'{stem}.{learner}{dot}{suffix}'
+
+
+def _escape(learner: str) -> str:
+    """ The learner's name as part of a file name: quoted like the names of
+    reports, such that e.g. '/' or '..' can't leave the directory - hashed if
+    that gets too long """
+    escaped = quote(learner, safe='')
+    if len(escaped) > MAX_ESCAPED_LEARNER_LENGTH:
+        return hashlib.sha256(learner.encode()).hexdigest()
+    return escaped
+
+
+def socket_path() -> Union[Path, None]:
+    """ $SREP_SOCKET, else 'srep.sock' (per learner) next to the sqlite
+    database file configured in the Django settings (which are imported,
+    not set up) """
+    if os.environ.get(SOCKET_ENV_VAR):
+        return Path(os.environ[SOCKET_ENV_VAR])
+
+    settings_module = os.environ.get('DJANGO_SETTINGS_MODULE')
+    if not settings_module:
+        return None
+    db_name = importlib.import_module(settings_module) \
+        .DATABASES['default']['NAME']
+    if str(db_name) == ':memory:':
+        return None
+    return Path(db_name).parent / learner_file_name(SOCKET_NAME)
+
+
+def send_request(path: Path, request: dict) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(path))
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile('rb') as response:
+            return json.loads(response.readline())
+
+
+def forward(argv: List[str]) -> Union[int, None]:
+    """ Runs the command in the daemon and prints its output. Returns the
+    exit status, or None if the command must be run in-process (interactive
+    command, or no daemon running). """
+    if not argv or argv[0] not in FORWARDED_COMMANDS:
+        return None
+    path = socket_path()
+    if path is None or not path.exists():
+        return None
+
+    try:
+        response = send_request(path=path, request={'argv': argv})
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None  # stale socket file of a daemon that is gone
+
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    return response['status']
+
@@ -0,0 +1,227 @@
+"""JSON HTTP API, served by Django (see django_project/urls.py).
+
+GET responses carry an ETag derived from the data version and the
+evaluation time bucket of the knowledge snapshot: polling clients that send
+'If-None-Match' get a 304 response without any recomputation.
+
+The views are async and use the gateway's async methods: served by an ASGI
+server, one worker handles many concurrent requests while they wait for the
+database.
+
+Every endpoint takes '?learner=<name>' to serve that learner's data
+(unknown learners get a 404); without it, the data of the database's
+default learner is served."""
+
+import hashlib
+import json
+from functools import lru_cache, wraps
+from typing import Awaitable, Callable, List, Union
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from spaced_repetition.controllers.daemon_client import journal_path
+from spaced_repetition.domain.problem_log import Result
+from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.gateways.write_behind_gateway import (journal_has_logs,
+                                                             replay_journal)
+from spaced_repetition.presenters.json_presenter import JsonPresenter
+from spaced_repetition.use_cases.get_problem import AsyncProblemGetter
+from spaced_repetition.use_cases.get_tag import AsyncTagGetter
+from spaced_repetition.use_cases.knowledge_snapshot import (KnowledgeSnapshotCache,
+                                                            evaluation_ts)
+from spaced_repetition.use_cases.log_problem import AsyncProblemLogger
+
+
+PROBLEM_SORT_KEYS = ['KS', 'problem', 'problem_id', 'RF']
+COMBO_SORT_KEYS = ['KS', 'problem', 'RF', 'tag', 'ts_logged']
+TAG_SORT_KEYS = ['tag', 'priority', 'num_problems']
+
+# shared by all requests; concurrent requests for the same snapshot views
+# await a single computation (see KnowledgeSnapshot.aview)
+SNAPSHOT_CACHE = KnowledgeSnapshotCache()
+MAX_LEARNER_SNAPSHOT_CACHES = 256
+
+
+@lru_cache(maxsize=MAX_LEARNER_SNAPSHOT_CACHES)
+def snapshot_cache(learner_id: Union[int, None]) -> KnowledgeSnapshotCache:
+    """ One cache per learner (of the recently active ones), such that
+    learners don't evict each other's snapshots """
+    if learner_id is None:
+        return SNAPSHOT_CACHE
+    return KnowledgeSnapshotCache()
+
+
+def learner_view(view: Callable[..., Awaitable[HttpResponse]]):
+    """ Passes the gateway to the data of the '?learner=' to the view.
+    Logs left behind in the learner's journal by a crashed CLI process are
+    stored first. """
+    @wraps(view)
+    async def inner(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        learner_id = None
+        name = request.GET.get('learner')
+        if name is not None:
+            learner_id = await DjangoGateway.aget_learner_id(name=name)
+            if learner_id is None:
+                return JsonResponse({'error': f"Unknown learner '{name}'!"},
+                                    status=404)
+        gateway = DjangoGateway(learner_id=learner_id)
+        journal = journal_path(db_file=DjangoGateway.get_db_file(),
+                               learner=name)
+        if journal_has_logs(journal):
+            await sync_to_async(replay_journal)(gateway=gateway,
+                                                journal_path=journal)
+        return await view(request, *args, gateway=gateway, **kwargs)
+    return inner
+
+
+async def knowledge_etag(gateway: DjangoGateway) -> str:
+    """ Changes whenever the learner's data or the evaluation time bucket
+    change """
+    return hashlib.sha256(repr(
+        (await gateway.aget_data_version(), evaluation_ts())).encode()
+    ).hexdigest()
+
+
+def knowledge_condition(view: Callable[..., Awaitable[HttpResponse]]):
+    """ Like django's condition(etag_func=knowledge_etag), whose etag_func
+    cannot be a coroutine. Goes below learner_view. """
+    @wraps(view)
+    async def inner(request: HttpRequest, *args, gateway: DjangoGateway,
+                    **kwargs) -> HttpResponse:
+        etag = quote_etag(await knowledge_etag(gateway=gateway))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await view(request, *args, gateway=gateway, **kwargs)
+        response.headers.setdefault('ETag', etag)
+        return response
+    return inner
+
+
+async def _present(
+        use_case: Callable[[JsonPresenter], Awaitable[None]]) -> JsonResponse:
+    presenter = JsonPresenter()
+    try:
+        await use_case(presenter)
+    except ValueError as err:
+        return JsonResponse({'error': str(err)}, status=400)
+    return JsonResponse(presenter.data, safe=False)
+
+
+def _get_int(request: HttpRequest, name: str, default: int = None,
+             minimum: int = None) -> int:
+    value = request.GET.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError as err:
+        raise ValueError(f"'{name}' must be an integer!") from err
+    if minimum is not None and number < minimum:
+        raise ValueError(f"'{name}' must be at least {minimum}!")
+    return number
+
+
+def _get_sort_keys(request: HttpRequest, allowed: List[str]) -> List[str]:
+    sort_keys = request.GET.getlist('sort') or None
+    if sort_keys and not set(sort_keys).issubset(allowed):
+        raise ValueError(f"'sort' must be one of {allowed}!")
+    return sort_keys
+
+
+@require_GET
+@learner_view
+@knowledge_condition
+async def list_problems(request: HttpRequest,
+                        gateway: DjangoGateway) -> JsonResponse:
+    """ ?name=&tags_any=&tags_all=&sort=&limit=&offset= """
+    return await _present(lambda presenter: AsyncProblemGetter(
+        db_gateway=gateway,
+        presenter=presenter,
+        snapshot_cache=snapshot_cache(gateway.learner_id)).alist_problems(
+            name_substr=request.GET.get('name'),
+            sorted_by=_get_sort_keys(request, allowed=PROBLEM_SORT_KEYS),
+            tags_any=request.GET.getlist('tags_any') or None,
+            tags_all=request.GET.getlist('tags_all') or None,
+            limit=_get_int(request, 'limit', minimum=0),
+            offset=_get_int(request, 'offset', default=0, minimum=0)))
+
+
+@require_GET
+@learner_view
+@knowledge_condition
+async def list_problem_tag_combos(request: HttpRequest,
+                                  gateway: DjangoGateway) -> JsonResponse:
+    """ ?tag=&problem=&sort=&limit=&offset= (tag, problem: substrings) """
+    return await _present(lambda presenter: AsyncProblemGetter(
+        db_gateway=gateway,
+        presenter=presenter,
+        snapshot_cache=snapshot_cache(gateway.learner_id)).alist_problem_tag_combos(
+            sorted_by=_get_sort_keys(request, allowed=COMBO_SORT_KEYS),
+            tag_substr=request.GET.get('tag'),
+            problem_substr=request.GET.get('problem'),
+            limit=_get_int(request, 'limit', minimum=0),
+            offset=_get_int(request, 'offset', default=0, minimum=0)))
+
+
+@require_GET
+@learner_view
+@knowledge_condition
+async def list_next(request: HttpRequest,
+                    gateway: DjangoGateway) -> JsonResponse:
+    """ ?k=&tag= """
+    return await _present(lambda presenter: AsyncProblemGetter(
+        db_gateway=gateway,
+        presenter=presenter,
+        snapshot_cache=snapshot_cache(gateway.learner_id)).alist_next(
+            k=_get_int(request, 'k', default=1, minimum=1),
+            tag=request.GET.get('tag')))
+
+
+@require_GET
+@learner_view
+@knowledge_condition
+async def list_tags(request: HttpRequest,
+                    gateway: DjangoGateway) -> JsonResponse:
+    """ ?filter=&sort=&limit=&offset= """
+    return await _present(lambda presenter: AsyncTagGetter(
+        db_gateway=gateway,
+        presenter=presenter,
+        snapshot_cache=snapshot_cache(gateway.learner_id)).alist_tags(
+            sorted_by=_get_sort_keys(request, allowed=TAG_SORT_KEYS),
+            sub_str=request.GET.get('filter'),
+            limit=_get_int(request, 'limit', minimum=0),
+            offset=_get_int(request, 'offset', default=0, minimum=0)))
+
+
+@csrf_exempt
+@require_POST
+@learner_view
+async def add_log(request: HttpRequest,
+                  gateway: DjangoGateway) -> JsonResponse:
+    """ JSON body: {"problem": name, "result": name or value,
+    "tags": [names], "comment": optional} """
+    try:
+        body = json.loads(request.body)
+        result = body['result']
+        result = Result[result] if isinstance(result, str) else Result(result)
+        if not isinstance(body['tags'], list):
+            raise TypeError("'tags' must be a list of tag names")
+        log_kwargs = {'comment': body.get('comment', ''),
+                      'problem_name': body['problem'],
+                      'result': result,
+                      'tags': body['tags']}
+    except (ValueError, KeyError, TypeError) as err:
+        return JsonResponse({'error': f'Invalid request body: {err!r}'},
+                            status=400)
+
+    response = await _present(lambda presenter: AsyncProblemLogger(
+        db_gateway=gateway,
+        presenter=presenter).alog_problem(**log_kwargs))
+    if response.status_code == 200:
+        response.status_code = 201
+    return response
@@ -0,0 +1,111 @@
+"""Batch reports: the prioritized tags and the next problem-tag-combos of
+every learner, e.g. generated nightly.
+
+The learners' knowledge snapshots are computed in a pool of processes,
+each with its own database connection. Every report is written to
+'<directory>/<learner>.json', replacing the previous one atomically."""
+
+import datetime as dt
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, Tuple
+from urllib.parse import quote
+
+import django
+import numpy as np
+from dateutil.tz import gettz
+from django.db import connections
+
+from spaced_repetition.controllers.daemon_client import journal_path
+from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.gateways.write_behind_gateway import replay_journal
+from spaced_repetition.presenters.json_presenter import JsonPresenter
+from spaced_repetition.use_cases.get_problem import ProblemGetter
+from spaced_repetition.use_cases.get_tag import TagGetter
+from spaced_repetition.use_cases.knowledge_snapshot import KnowledgeSnapshotCache
+
+LATENCY_PERCENTILES = [50, 95, 99]
+
+
+def report_path(directory: Path, learner: str) -> Path:
+    return directory / f"{quote(learner, safe='')}.json"
+
+
+def write_report(learner_id: int, learner: str, directory: Path,
+                 k: int, replay_workers: int = None) -> float:
+    """ Writes the learner's report, returns the time it took [s].
+    'replay_workers': see ProblemLogGetter. """
+    start = time.perf_counter()
+    gateway = DjangoGateway(learner_id=learner_id)
+    replay_journal(gateway=gateway, journal_path=journal_path(
+        db_file=DjangoGateway.get_db_file(), learner=learner))
+    snapshot_cache = KnowledgeSnapshotCache()  # shared by both getters
+    tags, next_combos = JsonPresenter(), JsonPresenter()
+    # the next combos are listed first: they build the spacing state,
+    # which the tags reuse from the snapshot
+    ProblemGetter(db_gateway=gateway, presenter=next_combos,
+                  snapshot_cache=snapshot_cache,
+                  replay_workers=replay_workers).list_next(k=k)
+    TagGetter(db_gateway=gateway, presenter=tags,
+              snapshot_cache=snapshot_cache).list_tags()
+
+    report = {'learner': learner,
+              'created': dt.datetime.now(tz=gettz('UTC')).isoformat(),
+              'tags': tags.data,
+              'next': next_combos.data}
+    with tempfile.NamedTemporaryFile('w', dir=directory, delete=False) \
+            as tmp_file:
+        json.dump(report, tmp_file)
+    os.replace(tmp_file.name, report_path(directory=directory,
+                                          learner=learner))
+    return time.perf_counter() - start
+
+
+def write_reports(directory: Path, k: int = 10, workers: int = None,
+                  replay_workers: int = None) -> Tuple[Dict[str, float], float]:
+    """ Writes the reports of all learners, with up to 'workers' processes
+    (default: one per CPU). Returns the time per learner and in total [s].
+    In-memory databases can't be opened by other processes: their reports
+    are written in this process. With 'replay_workers', each learner's
+    logs are replayed by that many processes instead: the reports are
+    written one after the other, unless 'workers' is given, too. """
+    directory.mkdir(parents=True, exist_ok=True)
+    learners = DjangoGateway.get_learners()
+    learner_ids = [learner_id for learner_id, _ in learners]
+    names = [name for _, name in learners]
+
+    start = time.perf_counter()
+    if workers == 1 or len(learners) < 2 \
+            or DjangoGateway.get_db_file() is None \
+            or (workers is None and replay_workers is not None):
+        latencies = list(map(write_report, learner_ids, names,
+                             repeat(directory), repeat(k),
+                             repeat(replay_workers)))
+    else:
+        workers = min(workers or os.cpu_count(), len(learners))
+        connections.close_all()  # not to be shared with forked workers
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=django.setup) as executor:
+            latencies = list(executor.map(
+                write_report, learner_ids, names, repeat(directory),
+                repeat(k), repeat(replay_workers), chunksize=max(1, len(learners) // (4 * workers))))
+    return dict(zip(names, latencies)), time.perf_counter() - start
+
+
+def summarize(latencies: Dict[str, float], duration: float) -> str:
+    """ Throughput and latency percentiles of write_reports """
+    if not latencies:
+        return 'No learners to report on.'
+    latencies_ms = 1000 * np.fromiter(latencies.values(), dtype=float)
+    percentiles = ', '.join(
+        f'p{pct} {value:.0f} ms' for pct, value in zip(
+            LATENCY_PERCENTILES,
+            np.percentile(latencies_ms, LATENCY_PERCENTILES)))
+    return f'{len(latencies)} reports in {duration:.2f} s ' \
+        f'({len(latencies) / duration:.1f} learners/s); per learner: ' \
+        f'{percentiles}, max {latencies_ms.max():.0f} ms'
@@ -1,49 +1,230 @@
-from typing import List, Union
+import itertools
+import random
+import time
+from functools import wraps
+from itertools import islice
+from pathlib import Path
+from typing import (AsyncIterator, Callable, Iterator, List, Tuple, TypeVar,
+                    Union)
 
-from django.db.models import Count, Q, QuerySet
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Count, Max, Q, QuerySet
+from django.db.models.functions import Lower
 
 from spaced_repetition.domain.problem import Difficulty, Problem, ProblemCreator
 from spaced_repetition.domain.problem_log import (ProblemLog, ProblemLogCreator,
                                                   Result)
 from spaced_repetition.domain.tag import Tag, TagCreator
-from spaced_repetition.use_cases.db_gateway_interface import DBGatewayInterface
+from spaced_repetition.use_cases.db_gateway_interface import (
+    AsyncDBGatewayInterface, DBGatewayInterface, DuplicateNameError,
+    ProblemLogStreamInterface)
 
-from .django_project.apps.problem.models import (Problem as OrmProblem,
+from .django_project.apps.problem.models import (Learner as OrmLearner,
+                                                 Problem as OrmProblem,
                                                  ProblemLog as OrmProblemLog,
                                                  Tag as OrmTag)
 
 
-class DjangoGateway(DBGatewayInterface):
-    @classmethod
-    def create_problem(cls, problem: Problem) -> Problem:
+# defaults of the settings DB_BUSY_TIMEOUT and DB_WRITE_RETRIES
+DEFAULT_BUSY_TIMEOUT = 5.0  # seconds
+DEFAULT_WRITE_RETRIES = 5
+WRITE_RETRY_BASE_DELAY = 0.05  # seconds, doubled per retry
+WRITE_RETRY_MAX_DELAY = 2.0
+# position of the problem logs' (count, max pk) in data versions
+LOGS_IN_DATA_VERSION = 3
+
+
+def configure_sqlite(sender, connection, **kwargs):  # pylint: disable=redefined-outer-name, unused-argument
+    """ Write-ahead logging for sqlite database files: readers, e.g. the
+    threads of concurrent reads, don't block each other or a writer.
+    Writers wait up to DB_BUSY_TIMEOUT seconds for the write lock, which
+    they take when their transaction begins (transaction_mode IMMEDIATE in
+    the database OPTIONS) instead of upgrading a read lock, which fails at
+    once if another writer got in between. """
+    if connection.vendor != 'sqlite':
+        return
+    busy_timeout = getattr(settings, 'DB_BUSY_TIMEOUT', DEFAULT_BUSY_TIMEOUT)
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout * 1000)}')
+        if not connection.is_in_memory_db():
+            cursor.execute('PRAGMA journal_mode=WAL')
+
+
+connection_created.connect(configure_sqlite)
+
+T = TypeVar('T')
+
+
+def atomic_write(write: Callable[..., T]) -> Callable[..., T]:
+    """ Runs 'write' in a transaction. If the database stays locked by
+    other writers for longer than the busy timeout, the transaction is
+    retried after an exponentially growing, randomized delay, at most
+    DB_WRITE_RETRIES times. Within an outer transaction, the error is
+    left to its owner, which has to retry it as a whole. """
+    @wraps(write)
+    def inner(*args, **kwargs) -> T:
+        retries = getattr(settings, 'DB_WRITE_RETRIES', DEFAULT_WRITE_RETRIES)
+        for attempt in itertools.count():
+            try:
+                with transaction.atomic():
+                    return write(*args, **kwargs)
+            except OperationalError as err:
+                if connection.in_atomic_block or attempt >= retries \
+                        or 'locked' not in str(err):
+                    raise
+            time.sleep(random.uniform(0.5, 1) * min(
+                WRITE_RETRY_MAX_DELAY, WRITE_RETRY_BASE_DELAY * 2 ** attempt))
+    return inner
+
+
+class DjangoGateway(DBGatewayInterface, ProblemLogStreamInterface,
+                    AsyncDBGatewayInterface):
+    """ Problems, tags and logs of one learner, or without 'learner_id' of
+    no learner (a personal database). Every query is filtered by the
+    learner, which leads the composite indexes of the tables. """
+    # pylint: disable=too-many-public-methods
+    PROBLEM_ORDERINGS = {'name': (Lower('name'), 'pk'),
+                         'problem_id': ('pk',)}
+    LOG_STREAM_CHUNK_SIZE = 2000
+
+    def __init__(self, learner_id: int = None):
+        self.learner_id = learner_id
+
+    @staticmethod
+    def get_learner_id(name: str) -> Union[int, None]:
+        """ Id of the learner with the given name, None if there is none """
+        return OrmLearner.objects \
+            .filter(name=name) \
+            .values_list('pk', flat=True) \
+            .first()
+
+    @staticmethod
+    @atomic_write
+    def get_or_create_learner_id(name: str) -> int:
+        return OrmLearner.objects.get_or_create(name=name)[0].pk
+
+    @staticmethod
+    def get_learners() -> List[Tuple[int, str]]:
+        """ Ids and names of all learners, ordered by name """
+        return list(OrmLearner.objects
+                    .order_by('name')
+                    .values_list('pk', 'name'))
+
+    def _problems(self) -> QuerySet:
+        return OrmProblem.objects.filter(learner_id=self.learner_id)
+
+    def _problem_logs(self) -> QuerySet:
+        return OrmProblemLog.objects.filter(learner_id=self.learner_id)
+
+    def _tags(self) -> QuerySet:
+        return OrmTag.objects.filter(learner_id=self.learner_id)
+
+    def get_data_version(self) -> tuple:
+        """ Changes whenever the learner's problems, problem logs or tags
+        are created or deleted. Includes the database name and the learner,
+        such that versions of different databases or learners never
+        collide. """
+        return self._data_version(stats=[
+            qs.aggregate(count=Count('pk'), max_pk=Max('pk'))
+            for qs in self._tables()])
+
+    def _data_version(self, stats: List[dict]) -> tuple:
+        return (str(connection.settings_dict['NAME']), self.learner_id) \
+            + tuple((stat['count'], stat['max_pk'] or 0) for stat in stats)
+
+    def _tables(self) -> List[QuerySet]:
+        return [self._problems(), self._problem_logs(), self._tags()]
+
+    def _rows_up_to(self, since: Union[tuple, None],
+                    until: tuple) -> List[QuerySet]:
+        """ Per table, the learner's rows up to the max pks of data version
+        'since', if that is of the same database and learner as 'until' """
+        if since is None or since[:2] != until[:2]:
+            return []
+        return [qs.filter(pk__lte=max_pk)
+                for qs, (_, max_pk) in zip(self._tables(), since[2:])]
+
+    @staticmethod
+    def _log_ids_between(since: Union[tuple, None], until: tuple,
+                         kept_counts: List[int]) -> Union[Tuple[int, int], None]:
+        """ Ids (after, up to] of the logs created after data version
+        'since' up to data version 'until'. None unless rows were only added
+        since 'since', i.e. all of its rows are kept ('kept_counts' of the
+        rows up to its max pks, per table). """
+        (_, max_log_pk) = until[LOGS_IN_DATA_VERSION]
+        if since is None:
+            return 0, max_log_pk
+        if since[:2] != until[:2]:  # other database or learner
+            return None
+        if kept_counts != [count for count, _ in since[2:]]:
+            return None
+        return since[LOGS_IN_DATA_VERSION][1], max_log_pk
+
+    @staticmethod
+    def get_db_file() -> Union[Path, None]:
+        """ Path of the sqlite database file, None for in-memory databases
+        (e.g. during tests) """
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            return None
+        return Path(connection.settings_dict['NAME'])
+
+    @atomic_write
+    def create_problem(self, problem: Problem) -> Problem:
+        # within the IMMEDIATE transaction: no other writer can add the
+        # name between the check and the insert
+        if self._problems().filter(name=problem.name).exists():
+            raise DuplicateNameError(problem.name)
         orm_problem = OrmProblem.objects.create(
             difficulty=problem.difficulty.value,
+            learner_id=self.learner_id,
             url=problem.url,
             name=problem.name)
 
-        orm_problem.tags.set(OrmTag.objects.filter(
+        orm_problem.tags.set(self._tags().filter(
             name__in=[t.name for t in problem.tags]))
         orm_problem.save()
 
-        return cls._format_problems(problems=[orm_problem])[0]
+        return self._format_problems(problems=[orm_problem])[0]
 
-    @classmethod
-    def get_problems(cls, name: Union[str, None] = None,
+    def get_problems(self, name: Union[str, None] = None,
                      name_substr: str = None,
                      tags_any: List[str] = None,
-                     tags_all: List[str] = None) -> List[Problem]:
-        return cls._format_problems(
-            problems=cls._query_problems(name=name,
-                                         name_substr=name_substr,
-                                         tags_any=tags_any,
-                                         tags_all=tags_all))
+                     tags_all: List[str] = None,
+                     order_by: str = None,
+                     limit: int = None,
+                     offset: int = 0) -> List[Problem]:
+        return self._format_problems(problems=self._query_problem_page(
+            name=name, name_substr=name_substr, tags_any=tags_any,
+            tags_all=tags_all, order_by=order_by, limit=limit, offset=offset))
 
-    @staticmethod
-    def _query_problems(name: str = None,
+    def _query_problem_page(self, name: Union[str, None] = None,  # pylint: disable=too-many-arguments
+                            name_substr: str = None,
+                            tags_any: List[str] = None,
+                            tags_all: List[str] = None,
+                            order_by: str = None,
+                            limit: int = None,
+                            offset: int = 0) -> QuerySet:
+        qs = self._query_problems(name=name,
+                                  name_substr=name_substr,
+                                  tags_any=tags_any,
+                                  tags_all=tags_all)
+        if order_by is not None:
+            qs = qs.order_by(*self.PROBLEM_ORDERINGS[order_by])
+        if limit is not None:
+            if order_by is None:
+                raise ValueError("Supply 'order_by' to select a page!")
+            qs = qs[offset:offset + limit]
+        return qs
+
+    def _query_problems(self, name: str = None,
                         name_substr: str = None,
                         tags_any: List[str] = None,
                         tags_all: List[str] = None) -> QuerySet:
-        qs = OrmProblem.objects.all()
+        qs = self._problems().prefetch_related('tags')
         if name is not None:
             qs = qs.filter(name=name)
         if name_substr:
@@ -71,36 +252,120 @@ class DjangoGateway(DBGatewayInterface):
                   for tag in p.tags.all()],
             url=p.url) for p in problems]
 
-    @staticmethod
-    def problem_exists(problem_id: int = None, name: str = None) -> bool:
+    def problem_exists(self, problem_id: int = None, name: str = None) -> bool:
+        return self._query_problem_exists(problem_id=problem_id,
+                                          name=name).exists()
+
+    def _query_problem_exists(self, problem_id: int = None,
+                              name: str = None) -> QuerySet:
         if bool(problem_id) == bool(name):
             raise ValueError("Supply exactly one of 'problem_id' or 'name'!")
         if problem_id:
-            return OrmProblem.objects.filter(pk=problem_id).exists()
-        return OrmProblem.objects.filter(name=name).exists()
+            return self._problems().filter(pk=problem_id)
+        return self._problems().filter(name=name)
 
-    @classmethod
-    def create_problem_log(cls, problem_log: ProblemLog) -> None:
+    @atomic_write
+    def create_problem_log(self, problem_log: ProblemLog) -> None:
         log = OrmProblemLog.objects.create(
             comment=problem_log.comment,
-            problem=OrmProblem.objects.get(pk=problem_log.problem_id),
+            learner_id=self.learner_id,
+            problem=self._problems().get(pk=problem_log.problem_id),
             result=problem_log.result.value,
             timestamp=problem_log.timestamp)
 
-        log.tags.set(cls._query_tags(
+        log.tags.set(self._query_tags(
             names=[tag.name for tag in problem_log.tags], sub_str=None))
 
-    @classmethod
-    def get_problem_logs(cls, problem_ids: List[int] = None) -> List[ProblemLog]:
-        return cls._format_problem_logs(
-            problem_log_qs=cls._query_problem_logs(problem_ids=problem_ids))
+    @atomic_write
+    def create_problem_logs(self, problem_logs: List[ProblemLog]) -> None:
+        """ Stores all logs in a single transaction. The logs' problems
+        must be the learner's. """
+        tag_pks = dict(self._tags()
+                       .filter(name__in={tag.name for p_l in problem_logs
+                                         for tag in p_l.tags})
+                       .values_list('name', 'pk'))
+        through_model = OrmProblemLog.tags.through
+
+        orm_logs = OrmProblemLog.objects.bulk_create([
+            OrmProblemLog(comment=p_l.comment,
+                          learner_id=self.learner_id,
+                          problem_id=p_l.problem_id,
+                          result=p_l.result.value,
+                          timestamp=p_l.timestamp)
+            for p_l in problem_logs])
+        through_model.objects.bulk_create([
+            through_model(problemlog_id=orm_log.pk,
+                          tag_id=tag_pks[tag.name])
+            for orm_log, p_l in zip(orm_logs, problem_logs)
+            for tag in p_l.tags if tag.name in tag_pks])
+
+    def get_problem_logs(self, problem_ids: List[int] = None,
+                         tags_any: List[str] = None) -> List[ProblemLog]:
+        return self._format_problem_logs(
+            problem_log_qs=self._query_problem_logs(problem_ids=problem_ids,
+                                                    tags_any=tags_any))
+
+    def iter_problem_tag_logs(self, problem_ids: List[int] = None,
+                              tags_any: List[str] = None) -> Iterator[ProblemLog]:
+        """ Reads the problem-log-tag rows in chunks from a database
+        cursor, such that only one chunk is held in memory at a time """
+        return self._iter_problem_tag_rows(self._query_problem_tag_logs(
+            problem_ids=problem_ids, tags_any=tags_any))
+
+    def iter_problem_tag_logs_between(
+            self, since: Union[tuple, None],
+            until: tuple) -> Union[Iterator[ProblemLog], None]:
+        log_ids = self._log_ids_between(since=since, until=until, kept_counts=[
+            qs.count() for qs in self._rows_up_to(since=since, until=until)])
+        if log_ids is None:
+            return None
+        return self._iter_problem_tag_rows(
+            self._query_problem_tag_logs(log_ids=log_ids))
+
+    def _iter_problem_tag_rows(self, qs: QuerySet) -> Iterator[ProblemLog]:
+        for row in qs.iterator(chunk_size=self.LOG_STREAM_CHUNK_SIZE):
+            yield self._format_problem_tag_log(*row)
+
+    def _query_problem_tag_logs(self, problem_ids: List[int] = None,
+                                tags_any: List[str] = None,
+                                log_ids: Tuple[int, int] = None) -> QuerySet:
+        """ 'log_ids': range (after, up to] of the logs' ids """
+        qs = OrmProblemLog.tags.through.objects.filter(
+            problemlog__learner_id=self.learner_id)
+        if log_ids is not None:
+            qs = qs.filter(problemlog_id__gt=log_ids[0],
+                           problemlog_id__lte=log_ids[1])
+        if problem_ids is not None:
+            qs = qs.filter(problemlog__problem_id__in=problem_ids)
+        if tags_any is not None:
+            qs = qs.filter(tag__name__in=tags_any)
+        return qs \
+            .order_by('problemlog__problem_id', 'tag__name',
+                      'problemlog__timestamp', 'problemlog_id') \
+            .values_list('problemlog__comment', 'problemlog__problem_id',
+                         'problemlog__result', 'tag__name', 'tag_id',
+                         'problemlog__timestamp')
 
     @staticmethod
-    def _query_problem_logs(problem_ids: List[int] = None):
-        qs = OrmProblemLog.objects.all()
+    def _format_problem_tag_log(comment, problem_id, result, tag_name,  # pylint: disable=too-many-arguments
+                                tag_id, timestamp) -> ProblemLog:
+        return ProblemLogCreator.create(
+            comment=comment,
+            problem_id=problem_id,
+            result=Result(result),
+            tags=[TagCreator.create(name=tag_name, tag_id=tag_id)],
+            timestamp=timestamp)
+
+    def _query_problem_logs(self, problem_ids: List[int] = None,
+                            tags_any: List[str] = None):
+        qs = self._problem_logs().prefetch_related('tags')
 
-        if problem_ids:
+        if problem_ids is not None:
             qs = qs.filter(problem__pk__in=problem_ids)
+        if tags_any is not None:
+            qs = qs \
+                .filter(tags__name__in=tags_any) \
+                .distinct()
 
         return qs
 
@@ -110,7 +375,7 @@ class DjangoGateway(DBGatewayInterface):
         for p_l in problem_log_qs:
             res.append(ProblemLogCreator.create(
                 comment=p_l.comment,
-                problem_id=p_l.problem.pk,
+                problem_id=p_l.problem_id,
                 result=Result(p_l.result),
                 tags=[TagCreator.create(name=tag.name, tag_id=tag.pk)
                       for tag in p_l.tags.all()],
@@ -118,19 +383,21 @@ class DjangoGateway(DBGatewayInterface):
 
         return res
 
-    @classmethod
-    def create_tag(cls, tag: Tag) -> Tag:
-        orm_tag = OrmTag.objects.create(name=tag.name)
-        return cls._format_tags(tags=[orm_tag])[0]
+    @atomic_write
+    def create_tag(self, tag: Tag) -> Tag:
+        if self._tags().filter(name=tag.name).exists():  # see create_problem
+            raise DuplicateNameError(tag.name)
+        orm_tag = OrmTag.objects.create(learner_id=self.learner_id,
+                                        name=tag.name)
+        return self._format_tags(tags=[orm_tag])[0]
 
-    @classmethod
-    def get_tags(cls, names: List[str] = None, sub_str: str = None):
-        return cls._format_tags(tags=cls._query_tags(names=names,
-                                                     sub_str=sub_str))
+    def get_tags(self, names: List[str] = None, sub_str: str = None):
+        return self._format_tags(tags=self._query_tags(names=names,
+                                                       sub_str=sub_str))
 
-    @staticmethod
-    def _query_tags(names: Union[List[str], None], sub_str: Union[str, None]):
-        qs = OrmTag.objects.all()
+    def _query_tags(self, names: Union[List[str], None],
+                    sub_str: Union[str, None]):
+        qs = self._tags().order_by('pk')
         if names is not None:
             qs = qs.filter(name__in=names)
         if sub_str:
@@ -142,6 +409,102 @@ class DjangoGateway(DBGatewayInterface):
         return [TagCreator.create(name=tag.name, tag_id=tag.pk)
                 for tag in tags]
 
+    def tag_exists(self, name: str) -> bool:
+        return self._tags().filter(name=name).exists()
+
     @staticmethod
-    def tag_exists(name: str) -> bool:
-        return OrmTag.objects.filter(name=name).exists()
+    def close_thread_connection() -> None:
+        connection.close()
+
+    # -------------------- async --------------------
+    # Django's async ORM interfaces; the rows are formatted like above,
+    # after all related objects have been prefetched.
+    @staticmethod
+    async def aget_learner_id(name: str) -> Union[int, None]:
+        return await OrmLearner.objects \
+            .filter(name=name) \
+            .values_list('pk', flat=True) \
+            .afirst()
+
+    async def aget_data_version(self) -> tuple:
+        return self._data_version(stats=[
+            await qs.aaggregate(count=Count('pk'), max_pk=Max('pk'))
+            for qs in self._tables()])
+
+    async def acreate_problem(self, problem: Problem) -> Problem:
+        """ The writes run in a thread: transaction.atomic has no async
+        counterpart """
+        return await sync_to_async(self.create_problem)(problem=problem)
+
+    async def aget_problems(self, name: Union[str, None] = None,
+                            name_substr: str = None,
+                            tags_any: List[str] = None,
+                            tags_all: List[str] = None,
+                            order_by: str = None,
+                            limit: int = None,
+                            offset: int = 0) -> List[Problem]:
+        return self._format_problems(problems=[
+            p async for p in self._query_problem_page(
+                name=name, name_substr=name_substr, tags_any=tags_any,
+                tags_all=tags_all, order_by=order_by, limit=limit,
+                offset=offset)])
+
+    async def aproblem_exists(self, problem_id: int = None,
+                              name: str = None) -> bool:
+        return await self._query_problem_exists(problem_id=problem_id,
+                                                name=name).aexists()
+
+    async def acreate_problem_log(self, problem_log: ProblemLog) -> None:
+        await sync_to_async(self.create_problem_log)(problem_log=problem_log)
+
+    async def acreate_problem_logs(self,
+                                   problem_logs: List[ProblemLog]) -> None:
+        await sync_to_async(self.create_problem_logs)(problem_logs=problem_logs)
+
+    async def aget_problem_logs(self, problem_ids: List[int] = None,
+                                tags_any: List[str] = None) -> List[ProblemLog]:
+        return self._format_problem_logs(problem_log_qs=[
+            p_l async for p_l in self._query_problem_logs(
+                problem_ids=problem_ids, tags_any=tags_any)])
+
+    def aiter_problem_tag_logs(self, problem_ids: List[int] = None,
+                               tags_any: List[str] = None) -> AsyncIterator[ProblemLog]:
+        return self._aiter_problem_tag_rows(self._query_problem_tag_logs(
+            problem_ids=problem_ids, tags_any=tags_any))
+
+    async def aiter_problem_tag_logs_between(
+            self, since: Union[tuple, None],
+            until: tuple) -> Union[AsyncIterator[ProblemLog], None]:
+        log_ids = self._log_ids_between(since=since, until=until, kept_counts=[
+            await qs.acount()
+            for qs in self._rows_up_to(since=since, until=until)])
+        if log_ids is None:
+            return None
+        return self._aiter_problem_tag_rows(
+            self._query_problem_tag_logs(log_ids=log_ids))
+
+    async def _aiter_problem_tag_rows(
+            self, qs: QuerySet) -> AsyncIterator[ProblemLog]:
+        """ QuerySet.aiterator would run the query of values_list() in the
+        event loop: the chunks are read from the sync iterator in a thread """
+        rows = qs.iterator(chunk_size=self.LOG_STREAM_CHUNK_SIZE)
+        next_chunk = sync_to_async(
+            lambda: list(islice(rows, self.LOG_STREAM_CHUNK_SIZE)))
+        try:
+            while chunk := await next_chunk():
+                for row in chunk:
+                    yield self._format_problem_tag_log(*row)
+        finally:
+            await sync_to_async(rows.close)()
+
+    async def acreate_tag(self, tag: Tag) -> Tag:
+        return await sync_to_async(self.create_tag)(tag=tag)
+
+    async def aget_tags(self, names: List[str] = None,
+                        sub_str: str = None) -> List[Tag]:
+        return self._format_tags(tags=[
+            tag async for tag in self._query_tags(names=names,
+                                                  sub_str=sub_str)])
+
+    async def atag_exists(self, name: str) -> bool:
+        return await self._tags().filter(name=name).aexists()
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problem', '0004_auto_20210427_1438'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Learner',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='learner',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='problems', to='problem.learner'),
+        ),
+        migrations.AddField(
+            model_name='problemlog',
+            name='learner',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='problem_logs', to='problem.learner'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='learner',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='problem.learner'),
+        ),
+        migrations.AddIndex(
+            model_name='problem',
+            index=models.Index(fields=['learner', 'name'], name='problem_pro_learner_857f03_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='problemlog',
+            index=models.Index(fields=['learner', 'problem', 'timestamp'], name='problem_pro_learner_cd74ec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['learner', 'name'], name='problem_tag_learner_ca41ec_idx'),
+        ),
+    ]
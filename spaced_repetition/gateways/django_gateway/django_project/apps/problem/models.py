@@ -6,13 +6,34 @@ from spaced_repetition.domain.problem import (Difficulty,
 from spaced_repetition.domain.problem_log import Result
 from spaced_repetition.domain.tag import MAX_TAG_LENGTH
 
+MAX_LEARNER_NAME_LENGTH = 100
+
+
+class Learner(models.Model):
+    """ Owner of problems, tags and logs. Rows without a learner belong to
+    the single, implicit learner of a personal database. """
+    name = models.CharField(blank=False,
+                            max_length=MAX_LEARNER_NAME_LENGTH,
+                            null=False,
+                            unique=True)
+
+    def __str__(self):
+        return self.name
+
 
 class Tag(models.Model):
+    learner = models.ForeignKey(Learner,
+                                null=True,
+                                on_delete=models.CASCADE,
+                                related_name='tags')
     name = models.CharField(
         blank=False,
         max_length=MAX_TAG_LENGTH,
         null=False)
 
+    class Meta:
+        indexes = [models.Index(fields=['learner', 'name'])]
+
     def __str__(self):
         return self.name
 
@@ -20,6 +41,10 @@ class Tag(models.Model):
 class Problem(models.Model):
     difficulty = models.IntegerField(
         choices=((o.value, o.name) for o in Difficulty))
+    learner = models.ForeignKey(Learner,
+                                null=True,
+                                on_delete=models.CASCADE,
+                                related_name='problems')
     name = models.CharField(blank=False,
                             max_length=MAX_NAME_LENGTH,
                             null=False)
@@ -29,6 +54,9 @@ class Problem(models.Model):
                            max_length=MAX_URL_LENGTH,
                            null=False)
 
+    class Meta:
+        indexes = [models.Index(fields=['learner', 'name'])]
+
     def __str__(self):
         return f"Problem '{self.name}'," \
             f" difficulty '{self.get_difficulty_display()}', url '{self.url}'"
@@ -36,6 +64,10 @@ class Problem(models.Model):
 
 class ProblemLog(models.Model):
     comment = models.CharField(max_length=255, blank=True, null=False)
+    learner = models.ForeignKey(Learner,
+                                null=True,
+                                on_delete=models.CASCADE,
+                                related_name='problem_logs')
     problem = models.ForeignKey(Problem,
                                 on_delete=models.CASCADE,
                                 related_name='logs')
@@ -44,6 +76,9 @@ class ProblemLog(models.Model):
                                   related_name='problem_logs')
     timestamp = models.DateTimeField(null=False)
 
+    class Meta:
+        indexes = [models.Index(fields=['learner', 'problem', 'timestamp'])]
+
     def __str__(self):
         return f"Problem '{self.problem.name}' attempted at {self.timestamp} " \
             f"with result {self.result} and tags " \
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,7 +51,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-# ROOT_URLCONF = 'django_project.urls'
+ROOT_URLCONF = 'spaced_repetition.gateways.django_gateway.django_project.django_project.urls'
 
 TEMPLATES = [
     {
@@ -78,9 +79,20 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR.parent.parent.parent / 'db/db.sqlite3',
+        'OPTIONS': {
+            # writers take the write lock when their transaction begins
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+
+# Concurrent writers (sqlite): seconds a writer waits for the write lock,
+# and how often a write is retried after that (see DjangoGateway)
+DB_BUSY_TIMEOUT = float(os.environ.get('SREP_DB_BUSY_TIMEOUT', 5))
+DB_WRITE_RETRIES = int(os.environ.get('SREP_DB_WRITE_RETRIES', 5))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
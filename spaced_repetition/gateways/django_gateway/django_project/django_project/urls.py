@@ -0,0 +1,14 @@
+"""URL configuration of the JSON API"""
+
+from django.urls import path
+
+from spaced_repetition.controllers import http_controller
+
+
+urlpatterns = [
+    path('problems', http_controller.list_problems),
+    path('combos', http_controller.list_problem_tag_combos),
+    path('next', http_controller.list_next),
+    path('tags', http_controller.list_tags),
+    path('logs', http_controller.add_log),
+]
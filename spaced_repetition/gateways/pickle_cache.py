@@ -0,0 +1,39 @@
+"""Persists cached DataFrames as pickle files, one file per cache entry name.
+Only the latest key per name is kept."""
+
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Union
+
+import pandas as pd
+
+from spaced_repetition.use_cases.cache_interface import CacheInterface
+
+
+class PickleCache(CacheInterface):
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+
+    def load(self, name: str, key: str) -> Union[pd.DataFrame, None]:
+        try:
+            with open(self._path(name), 'rb') as cache_file:
+                stored_key, df = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, ValueError):
+            return None  # missing, corrupt or outdated cache file
+
+        return df if stored_key == key else None
+
+    def save(self, name: str, key: str, df: pd.DataFrame) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # write to a temporary file first: readers never see partial writes
+        with tempfile.NamedTemporaryFile(dir=self.directory, delete=False) \
+                as tmp_file:
+            pickle.dump((key, df), tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file.name, self._path(name))
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f'{name}.pkl'
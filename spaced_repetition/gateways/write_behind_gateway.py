@@ -0,0 +1,207 @@
+"""Write-behind buffer for problem logs, for long-running processes.
+
+A log counts as stored as soon as it has been appended (and fsync'ed) to a
+local append-only journal. It is written to the wrapped gateway later,
+together with other buffered logs, in one transaction. Reads that depend
+on the logs flush the buffer first.
+The journal is locked by one process at a time. After a crash, the next
+WriteBehindGateway opening it stores the leftover logs, as does
+replay_journal, which processes reading the data call first."""
+
+import datetime as dt
+import fcntl
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Hashable, Iterator, List, Union
+
+from spaced_repetition.domain.problem import Problem
+from spaced_repetition.domain.problem_log import (ProblemLog, ProblemLogCreator,
+                                                  Result)
+from spaced_repetition.domain.tag import Tag, TagCreator
+from spaced_repetition.use_cases.db_gateway_interface import (
+    DBGatewayInterface, ProblemLogStreamInterface)
+
+
+DEFAULT_BATCH_SIZE = 100
+
+
+def journal_has_logs(journal_path: Union[str, Path, None]) -> bool:
+    """ Cheap check, e.g. before each request """
+    try:
+        return journal_path is not None and os.path.getsize(journal_path) > 0
+    except OSError:  # e.g. no journal yet
+        return False
+
+
+def replay_journal(gateway: DBGatewayInterface,
+                   journal_path: Union[str, Path, None]) -> None:
+    """ Stores the logs left behind in the journal by a crashed process,
+    such that reads see them. A journal held by a running process is left
+    to it. """
+    if not journal_has_logs(journal_path):
+        return
+    try:
+        WriteBehindGateway(gateway=gateway, journal_path=journal_path).close()
+    except BlockingIOError:
+        pass
+
+
+class WriteBehindGateway(DBGatewayInterface, ProblemLogStreamInterface):
+    # pylint: disable=arguments-differ, too-many-public-methods
+    def __init__(self, gateway: DBGatewayInterface,
+                 journal_path: Union[str, Path],
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        """ Raises BlockingIOError if another process holds the journal """
+        self.gateway = gateway
+        self.batch_size = batch_size
+        self._buffer: List[ProblemLog] = []
+        # journal and buffer change together: writes and flushes (e.g. by
+        # reads in other threads) must not interleave
+        self._lock = threading.RLock()
+
+        self._journal = open(journal_path, 'a+')  # pylint: disable=consider-using-with
+        try:
+            fcntl.flock(self._journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._journal.close()
+            raise
+        self._replay_journal()
+
+    # -------------------- buffered writes --------------------
+    def create_problem_log(self, problem_log: ProblemLog) -> None:
+        self.create_problem_logs(problem_logs=[problem_log])
+
+    def create_problem_logs(self, problem_logs: List[ProblemLog]) -> None:
+        with self._lock:
+            self._journal.writelines(
+                json.dumps(self._log_to_entry(p_l)) + '\n'
+                for p_l in problem_logs)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+            self._buffer.extend(problem_logs)
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """ Writes all buffered logs in one transaction, then empties
+        the journal """
+        with self._lock:
+            if self._buffer:
+                self.gateway.create_problem_logs(problem_logs=self._buffer)
+                self._buffer = []
+            self._clear_journal()
+
+    def close(self) -> None:
+        self.flush()
+        fcntl.flock(self._journal, fcntl.LOCK_UN)
+        self._journal.close()
+
+    # -------------------- reads depending on logs --------------------
+    def get_data_version(self) -> Hashable:
+        self.flush()
+        return self.gateway.get_data_version()
+
+    def get_problem_logs(self, problem_ids: List[int] = None,
+                         tags_any: List[str] = None) -> List[ProblemLog]:
+        self.flush()
+        return self.gateway.get_problem_logs(problem_ids=problem_ids,
+                                             tags_any=tags_any)
+
+    def iter_problem_tag_logs(self, problem_ids: List[int] = None,
+                              tags_any: List[str] = None) -> Iterator[ProblemLog]:
+        """ Requires the wrapped gateway to stream problem logs, too """
+        self.flush()
+        return self.gateway.iter_problem_tag_logs(problem_ids=problem_ids,
+                                                  tags_any=tags_any)
+
+    def iter_problem_tag_logs_between(
+            self, since: Union[Hashable, None],
+            until: Hashable) -> Union[Iterator[ProblemLog], None]:
+        self.flush()
+        return self.gateway.iter_problem_tag_logs_between(since=since,
+                                                          until=until)
+
+    # -------------------- passed through --------------------
+    def create_problem(self, problem: Problem) -> Problem:
+        return self.gateway.create_problem(problem=problem)
+
+    def get_problems(self, name: Union[str, None] = None,
+                     name_substr: str = None,
+                     tags_any: List[str] = None,
+                     tags_all: List[str] = None,
+                     order_by: str = None,
+                     limit: int = None,
+                     offset: int = 0) -> List[Problem]:
+        return self.gateway.get_problems(name=name,
+                                         name_substr=name_substr,
+                                         tags_any=tags_any,
+                                         tags_all=tags_all,
+                                         order_by=order_by,
+                                         limit=limit,
+                                         offset=offset)
+
+    def problem_exists(self, problem_id: int = None,
+                       name: str = None) -> bool:
+        return self.gateway.problem_exists(problem_id=problem_id, name=name)
+
+    def create_tag(self, tag: Tag) -> Tag:
+        return self.gateway.create_tag(tag=tag)
+
+    def get_tags(self, names: List[str] = None, sub_str: str = None):
+        return self.gateway.get_tags(names=names, sub_str=sub_str)
+
+    def tag_exists(self, name: str) -> bool:
+        return self.gateway.tag_exists(name=name)
+
+    def close_thread_connection(self) -> None:
+        self.gateway.close_thread_connection()
+
+    # -------------------- journal --------------------
+    def _replay_journal(self) -> None:
+        """ Stores logs left behind by a crashed process. Logs that were
+        already stored right before the crash are skipped. """
+        self._journal.seek(0)
+        entries = []
+        for line in self._journal:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break  # incomplete last line, never acknowledged
+        if not entries:
+            self._clear_journal()
+            return
+
+        problem_logs = [self._entry_to_log(entry) for entry in entries]
+        stored = {(p_l.problem_id, p_l.timestamp)
+                  for p_l in self.gateway.get_problem_logs(
+                      problem_ids=list({p_l.problem_id
+                                        for p_l in problem_logs}))}
+        self._buffer = [p_l for p_l in problem_logs
+                        if (p_l.problem_id, p_l.timestamp) not in stored]
+        self.flush()
+
+    def _clear_journal(self) -> None:
+        self._journal.truncate(0)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    @staticmethod
+    def _log_to_entry(problem_log: ProblemLog) -> dict:
+        return {'comment': problem_log.comment,
+                'problem_id': problem_log.problem_id,
+                'result': problem_log.result.value,
+                'tags': [[tag.name, tag.tag_id] for tag in problem_log.tags],
+                'timestamp': problem_log.timestamp.isoformat()}
+
+    @staticmethod
+    def _entry_to_log(entry: dict) -> ProblemLog:
+        return ProblemLogCreator.create(
+            comment=entry['comment'],
+            problem_id=entry['problem_id'],
+            result=Result(entry['result']),
+            tags=[TagCreator.create(name=name, tag_id=tag_id)
+                  for name, tag_id in entry['tags']],
+            timestamp=dt.datetime.fromisoformat(entry['timestamp']))
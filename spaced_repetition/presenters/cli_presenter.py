@@ -1,11 +1,13 @@
-from typing import List
+import sys
+from typing import Callable, Dict, List
 
+import numpy as np
 import pandas as pd
-from tabulate import tabulate
 
 from spaced_repetition.domain.problem import Problem
 from spaced_repetition.domain.problem_log import ProblemLog
 from spaced_repetition.domain.tag import Tag
+from spaced_repetition.presenters import github_table
 from spaced_repetition.use_cases.presenter_interface import PresenterInterface
 from spaced_repetition.use_cases.helpers import serialize_ts
 
@@ -45,8 +47,7 @@ class CliPresenter(PresenterInterface):
         formatted_df = cls.format_df(df=problems,
                                      ordered_cols=ordered_cols,
                                      index_col='problem_id')
-        tabulated_df = cls.tabulate_df(df=formatted_df)
-        print(tabulated_df)
+        cls.print_table(df=formatted_df)
 
     @classmethod
     def list_problem_tag_combos(cls, problem_tag_combos: pd.DataFrame) -> None:
@@ -55,8 +56,7 @@ class CliPresenter(PresenterInterface):
         formatted_df = cls.format_df(df=problem_tag_combos,
                                      ordered_cols=ordered_cols,
                                      index_col='tag')
-        tabulated_df = cls.tabulate_df(df=formatted_df)
-        print(tabulated_df)
+        cls.print_table(df=formatted_df)
 
     @classmethod
     def show_problem_history(cls, problem: Problem,
@@ -68,13 +68,13 @@ class CliPresenter(PresenterInterface):
 
         history_df.result = cls._format_result(history_df.result)
         history_df.ts_logged = cls._format_timestamp(history_df.ts_logged)
-        print(cls.tabulate_df(history_df))
+        cls.print_table(history_df)
 
     @staticmethod
-    def tabulate_df(df: pd.DataFrame):
-        return tabulate(df,
-                        headers='keys',
-                        tablefmt='github')
+    def print_table(df: pd.DataFrame):
+        """ Writes the table in chunks, without joining it into one string """
+        for chunk in github_table.render_chunks(df):
+            sys.stdout.write(chunk)
 
     @classmethod
     def format_df(cls, df: pd.DataFrame, ordered_cols: List[str],
@@ -82,17 +82,39 @@ class CliPresenter(PresenterInterface):
         """Needs at least a column named 'problem_id'"""
         name_mapper = {'result': 'last_result',
                        'ts_logged': 'last_access'}
-        df = df \
-            .rename(columns=name_mapper) \
-            .reindex(columns=ordered_cols) \
-            .set_index(index_col)  # avoid printing some integer index
-
-        df.difficulty = cls._format_difficulty(df.difficulty)
-        if 'last_result' in ordered_cols:
-            df.last_result = cls._format_result(df.last_result)
-        if 'last_access' in ordered_cols:
-            df.last_access = cls._format_timestamp(df.last_access)
-        return df
+        formatters = {'difficulty': cls._format_difficulty,
+                      'last_result': cls._format_result,
+                      'last_access': cls._format_timestamp}
+        # avoid printing some integer index
+        return cls._select_columns(df, ordered_cols=ordered_cols,
+                                   index_col=index_col,
+                                   name_mapper=name_mapper,
+                                   formatters=formatters)
+
+    @staticmethod
+    def _select_columns(df: pd.DataFrame, ordered_cols: List[str],
+                        index_col: str, name_mapper: Dict[str, str] = None,
+                        formatters: Dict[str, Callable] = None):
+        """ Like df.rename(columns=name_mapper).reindex(columns=ordered_cols)
+        .set_index(index_col), then applying the formatters per column.
+        The result is built once from the selected columns, instead of
+        copying the whole frame in each step. """
+        name_mapper = name_mapper or {}
+        formatters = formatters or {}
+        source = {name_mapper.get(col, col): df[col] for col in df.columns}
+
+        columns = {}
+        for col in ordered_cols:
+            series = source.get(col)
+            if series is None:
+                series = pd.Series(np.nan, index=df.index)
+            if col in formatters:
+                series = formatters[col](series)
+            columns[col] = series.rename(col)
+
+        index = pd.Index(columns.pop(index_col), name=index_col)
+        return pd.concat(list(columns.values()), axis=1, copy=False) \
+            .set_axis(index, copy=False)
 
     @staticmethod
     def _format_difficulty(difficulty: pd.Series):
@@ -110,14 +132,29 @@ class CliPresenter(PresenterInterface):
     @classmethod
     def list_tags(cls, tags: pd.DataFrame) -> None:
         formatted_df = cls.format_tag_df(df=tags)
-        tabulated_df = cls.tabulate_df(df=formatted_df)
-        print(tabulated_df)
+        cls.print_table(df=formatted_df)
 
-    @staticmethod
-    def format_tag_df(df: pd.DataFrame):
+    @classmethod
+    def format_tag_df(cls, df: pd.DataFrame):
         order = ['tag', 'priority', 'KS (weighted avg)', 'experience',
                  'num_problems']
 
-        return df \
-            .reindex(columns=order) \
-            .set_index('tag')
+        return cls._select_columns(df, ordered_cols=order, index_col='tag')
+
+    @classmethod
+    def list_tag_forecast(cls, forecast: pd.DataFrame) -> None:
+        cls.print_table(df=forecast.set_index('tag'))
+
+    @classmethod
+    def list_workload(cls, workload: pd.DataFrame) -> None:
+        cls.print_table(df=workload.set_index('date'))
+
+    @classmethod
+    def show_dashboard(cls, tags: pd.DataFrame, problems: pd.DataFrame,
+                       problem_tag_combos: pd.DataFrame) -> None:
+        print('Tags:')
+        cls.list_tags(tags)
+        print('\nProblems:')
+        cls.list_problems(problems)
+        print('\nProblem-tag-combos:')
+        cls.list_problem_tag_combos(problem_tag_combos)
@@ -0,0 +1,224 @@
+"""Renders DataFrames as GitHub-style tables, for large outputs.
+
+The output is the same as that of tabulate(df, headers='keys',
+tablefmt='github'). tabulate infers the type of every single cell and
+formats, measures and pads each cell through several generic helpers. Here,
+numeric columns are typed by their dtype and each column is processed in
+one pass of builtin string operations (which, for columns of short strings,
+are faster than pandas' or numpy's string accessors). Only cells of object
+columns are typed one by one, and a column stops being inspected once it is
+known to hold text.
+Tables with other than printable ASCII characters (wide characters, colour
+codes, line breaks) are handed to tabulate itself."""
+
+import math
+import re
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+DEFAULT_CHUNK_SIZE = 1000
+MIN_PADDING = 2  # tabulate pads headers by at least two characters
+
+# tabulate's cell types, from least to most generic
+_NONE, _BOOL, _INT, _FLOAT, _STR = range(5)
+
+_FLOAT_WITH_THOUSANDS_SEPARATORS = re.compile(
+    r"^(([+-]?[0-9]{1,3})(?:,([0-9]{3}))*)?(?(1)\.[0-9]*|\.[0-9]+)?$")
+
+
+class _Unsupported(Exception):
+    """ The table has to be rendered by tabulate """
+
+
+def render_chunks(df: pd.DataFrame,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """ Yields the table in pieces of at most 'chunk_size' lines, each
+    ending with a line break """
+    try:
+        header, lines = _render(df)
+    except _Unsupported:
+        yield tabulate(df, headers='keys', tablefmt='github') + '\n'
+        return
+
+    yield '\n'.join(header) + '\n'
+    for start in range(0, len(lines[0]) if lines else 0, chunk_size):
+        yield '\n'.join('| ' + ' | '.join(cells) + ' |'
+                        for cells in zip(*(col[start:start + chunk_size]
+                                           for col in lines))) + '\n'
+
+
+def render(df: pd.DataFrame) -> str:
+    """ The whole table, like tabulate """
+    return ''.join(render_chunks(df))[:-1]
+
+
+def _render(df: pd.DataFrame) -> Tuple[List[str], List[List[str]]]:
+    """ Header lines and the padded cells, column by column """
+    if df.shape[1] == 0 or df.columns.nlevels > 1 or df.index.nlevels > 1:
+        raise _Unsupported
+    headers = [str(col) for col in df.columns]
+    if df.empty:
+        if df.index.name is not None:
+            headers.insert(0, str(df.index.name))
+        widths = [len(h) + MIN_PADDING for h in headers]
+        _require_plain_text(headers)
+        return _header_lines(headers, widths, ['left'] * len(headers)), []
+    headers.insert(0, '' if df.index.name is None else str(df.index.name))
+
+    columns = [_formatted_column(*_index_values(df.index))]
+    columns.extend(_formatted_column(values, kind)
+                   for values, kind in _data_values(df))
+    _require_plain_text(headers)
+    for strings, _ in columns:
+        _require_plain_text(strings)
+
+    padded, widths, aligns = [], [], []
+    for header, (strings, col_type) in zip(headers, columns):
+        numeric = col_type in (_INT, _FLOAT)
+        if col_type == _FLOAT:  # ints have no decimals to align
+            strings = _pad_decimals(strings)
+        elif not numeric:
+            strings = [string.strip() for string in strings]
+        width = max(len(header) + MIN_PADDING, max(map(len, strings)))
+        padded.append([string.rjust(width) for string in strings] if numeric
+                      else [string.ljust(width) for string in strings])
+        widths.append(width)
+        aligns.append('right' if numeric else 'left')
+    return _header_lines(headers, widths, aligns), padded
+
+
+def _header_lines(headers: List[str], widths: List[int],
+                  aligns: List[str]) -> List[str]:
+    cells = [h.rjust(w) if align == 'right' else h.ljust(w)
+             for h, w, align in zip(headers, widths, aligns)]
+    return [('| ' + ' | '.join(cells) + ' |').rstrip(),
+            '|' + '|'.join('-' * (w + 2) for w in widths) + '|']
+
+
+def _require_plain_text(strings: List[str]) -> None:
+    text = ''.join(strings)
+    if not (text.isascii() and text.isprintable()):
+        raise _Unsupported
+
+
+# -------------------- values as tabulate sees them --------------------
+def _index_values(index: pd.Index) -> Tuple[np.ndarray, str]:
+    if index.dtype.kind in 'if':
+        return index.to_numpy(), index.dtype.kind
+    if index.dtype.kind == 'b':
+        raise _Unsupported
+    return index.to_numpy(dtype=object), 'O'
+
+
+def _data_values(df: pd.DataFrame) -> Iterator[Tuple[np.ndarray, str]]:
+    """ Columns of df.values (tabulate's input), with the kind of values
+    they hold: 'i'nt, 'f'loat or 'O'bject (requiring inspection) """
+    values = df.to_numpy()
+    if values.dtype.kind in 'if':
+        for idx in range(values.shape[1]):
+            yield values[:, idx], values.dtype.kind
+    elif values.dtype.kind == 'O':
+        # numbers of numeric columns are stored as python ints or floats
+        for idx, dtype in enumerate(df.dtypes):
+            kind = dtype.kind if dtype.kind in 'iuf' else 'O'
+            yield values[:, idx], 'i' if kind == 'u' else kind
+    else:  # e.g. numpy bools or unsigned ints, which tabulate treats as floats
+        raise _Unsupported
+
+
+def _formatted_column(values: np.ndarray, kind: str) -> Tuple[List[str], int]:
+    """ Cells formatted like tabulate does, and the column's type """
+    if kind == 'i':
+        return list(map(str, values.tolist())), _INT
+    if kind == 'f':
+        return ['%g' % value for value in values.astype(float).tolist()], _FLOAT
+
+    col_type = _column_type(values)
+    if col_type == _FLOAT:
+        strings = [_format_float(value) for value in values]
+    else:
+        strings = ['' if value is None else f'{value}' for value in values]
+    return strings, col_type
+
+
+def _column_type(values: np.ndarray) -> int:
+    col_type = _BOOL
+    for value in values:
+        col_type = max(col_type, _cell_type(value))
+        if col_type == _STR:
+            break
+    return col_type
+
+
+def _cell_type(value) -> int:
+    # pylint: disable=too-many-return-statements
+    if value is None:
+        return _NONE
+    if isinstance(value, str):
+        return _str_type(value)
+    if isinstance(value, bytes):
+        raise _Unsupported
+    if hasattr(value, 'isoformat'):  # timestamps
+        return _STR
+    if type(value) is bool:  # pylint: disable=unidiomatic-typecheck
+        return _BOOL
+    if type(value) is int or isinstance(value, np.signedinteger):  # pylint: disable=unidiomatic-typecheck
+        return _INT
+    return _FLOAT if _is_convertible(float, value) else _STR
+
+
+def _str_type(value: str) -> int:
+    if not value:
+        return _NONE
+    if value in ('True', 'False'):
+        return _BOOL
+    thousands = _FLOAT_WITH_THOUSANDS_SEPARATORS.match(value) is not None
+    if _is_convertible(int, value) or (thousands and '.' not in value):
+        return _INT
+    if _is_convertible(float, value):
+        number = float(value)
+        if not (math.isinf(number) or math.isnan(number)) \
+                or value.lower() in ('inf', '-inf', 'nan'):
+            return _FLOAT
+    return _FLOAT if thousands else _STR
+
+
+def _is_convertible(conv, value) -> bool:
+    try:
+        conv(value)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def _format_float(value) -> str:
+    if value is None or (isinstance(value, str) and not value):
+        return ''
+    try:
+        return format(float(value.replace(',', '') if isinstance(value, str)
+                            else value), 'g')
+    except (ValueError, TypeError):
+        return f'{value}'
+
+
+def _pad_decimals(strings: List[str]) -> List[str]:
+    """ Aligns formatted floats at their decimal points (or exponents), by
+    padding them on the right """
+    decimals = [_decimals(string) for string in strings]
+    max_decimals = max(decimals)
+    return [string + ' ' * (max_decimals - decs)
+            for string, decs in zip(strings, decimals)]
+
+
+def _decimals(string: str) -> int:
+    """ Symbols after the decimal point (or exponent), -1 if there is none """
+    point = string.rfind('.')
+    if point < 0:
+        point = string.rfind('e')
+    # e.g. 'True' in a float column is not a number, and has no decimals
+    if point < 0 or not _is_convertible(float, string):
+        return -1
+    return len(string) - point - 1
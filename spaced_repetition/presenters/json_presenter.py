@@ -0,0 +1,104 @@
+import json
+from typing import List
+
+import pandas as pd
+
+from spaced_repetition.domain.problem import Problem
+from spaced_repetition.domain.problem_log import ProblemLog
+from spaced_repetition.domain.tag import Tag
+from spaced_repetition.use_cases.presenter_interface import PresenterInterface
+
+
+PROBLEM_COLUMNS = ['problem_id', 'problem', 'difficulty', 'tags', 'KS', 'RF',
+                   'url']
+PROBLEM_TAG_COMBO_COLUMNS = ['tag', 'problem', 'problem_id', 'difficulty',
+                             'last_access', 'last_result', 'KS', 'RF', 'url',
+                             'ease', 'interval']
+TAG_COLUMNS = ['tag', 'priority', 'KS (weighted avg)', 'experience',
+               'num_problems']
+
+
+class JsonPresenter(PresenterInterface):
+    """ Collects the results of a use case as JSON-serializable data in
+    'self.data', instead of printing them """
+
+    # pylint: disable=arguments-differ
+    def __init__(self):
+        self.data = None
+
+    # ------------------ confirm data creation -----------------------------
+    def confirm_problem_created(self, problem: Problem):
+        self.data = self.problem_to_dict(problem)
+
+    def confirm_problem_logged(self, problem: Problem, problem_log: ProblemLog):
+        self.data = {'problem': problem.name,
+                     'problem_id': problem_log.problem_id,
+                     'result': problem_log.result.name,
+                     'tags': [tag.name for tag in problem_log.tags],
+                     'timestamp': problem_log.timestamp.isoformat(),
+                     'comment': problem_log.comment}
+
+    def confirm_tag_created(self, tag: Tag) -> None:
+        self.data = {'tag': tag.name, 'tag_id': tag.tag_id}
+
+    # -------------------- db contents ------------------------
+    def list_problems(self, problems: pd.DataFrame) -> None:
+        self.data = self.df_to_records(problems, columns=PROBLEM_COLUMNS)
+
+    def list_problem_tag_combos(self, problem_tag_combos: pd.DataFrame) -> None:
+        self.data = self.df_to_records(problem_tag_combos,
+                                       columns=PROBLEM_TAG_COMBO_COLUMNS)
+
+    def show_problem_history(self, problem: Problem,
+                             problem_log_info: pd.DataFrame) -> None:
+        history = problem_log_info \
+            .sort_values('ts_logged', ascending=False) \
+            .rename(columns={'ts_logged': 'timestamp'})
+        self.data = {
+            'problem': self.problem_to_dict(problem),
+            'history': self.df_to_records(
+                history, columns=['timestamp', 'result', 'comment', 'tags'])}
+
+    def list_tags(self, tags: pd.DataFrame) -> None:
+        self.data = self.df_to_records(tags, columns=TAG_COLUMNS)
+
+    def list_tag_forecast(self, forecast: pd.DataFrame) -> None:
+        self.data = self.df_to_records(forecast,
+                                       columns=list(forecast.columns))
+
+    def list_workload(self, workload: pd.DataFrame) -> None:
+        self.data = self.df_to_records(workload,
+                                       columns=list(workload.columns))
+
+    def show_dashboard(self, tags: pd.DataFrame, problems: pd.DataFrame,
+                       problem_tag_combos: pd.DataFrame) -> None:
+        self.data = {
+            'tags': self.df_to_records(tags, columns=TAG_COLUMNS),
+            'problems': self.df_to_records(problems, columns=PROBLEM_COLUMNS),
+            'problem_tag_combos': self.df_to_records(
+                problem_tag_combos, columns=PROBLEM_TAG_COMBO_COLUMNS)}
+
+    # -------------------- formatting ------------------------
+    @staticmethod
+    def problem_to_dict(problem: Problem) -> dict:
+        return {'problem_id': problem.problem_id,
+                'problem': problem.name,
+                'difficulty': problem.difficulty.name,
+                'tags': [tag.name for tag in problem.tags],
+                'url': problem.url}
+
+    @staticmethod
+    def df_to_records(df: pd.DataFrame, columns: List[str]) -> List[dict]:
+        """ Rows as dicts: enums as names, timestamps in ISO format and
+        missing values as None """
+        df = df \
+            .rename(columns={'result': 'last_result',
+                             'ts_logged': 'last_access'}
+                    if 'last_access' in columns else {}) \
+            .reindex(columns=columns)
+        for col in ('difficulty', 'last_result', 'result'):
+            if col in df.columns:
+                df[col] = df[col].map(lambda x: x.name, na_action='ignore')
+
+        return json.loads(df.to_json(orient='records', date_format='iso',
+                                     date_unit='s'))
@@ -0,0 +1,147 @@
+import csv
+import datetime as dt
+import json
+import math
+import sys
+from enum import Enum
+from typing import Iterable, List, TextIO
+
+import pandas as pd
+
+from spaced_repetition.domain.problem import Problem
+from spaced_repetition.domain.problem_log import ProblemLog
+from spaced_repetition.domain.tag import Tag
+from spaced_repetition.presenters.json_presenter import (
+    JsonPresenter, PROBLEM_COLUMNS, PROBLEM_TAG_COMBO_COLUMNS, TAG_COLUMNS)
+from spaced_repetition.use_cases.presenter_interface import PresenterInterface
+
+
+FORMATS = ['csv', 'json', 'jsonl']
+
+
+class StreamPresenter(PresenterInterface):
+    """ Writes the results of a use case row by row, as csv, a json array
+    or json lines. Rows are converted one at a time while being written;
+    the formatted table as a whole is never held in memory. """
+
+    # pylint: disable=arguments-differ
+    def __init__(self, fmt: str, stream: TextIO = None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}', use one of {FORMATS}!")
+        self.fmt = fmt
+        self._stream = stream
+
+    @property
+    def stream(self) -> TextIO:
+        # resolved late, such that redirected stdout is respected
+        return self._stream or sys.stdout
+
+    # ------------------ confirm data creation -----------------------------
+    def confirm_problem_created(self, problem: Problem):
+        record = JsonPresenter.problem_to_dict(problem)
+        record['tags'] = ', '.join(record['tags'])
+        self._write_record(record)
+
+    def confirm_problem_logged(self, problem: Problem, problem_log: ProblemLog):
+        self._write_record({'problem': problem.name,
+                            'problem_id': problem_log.problem_id,
+                            'result': problem_log.result.name,
+                            'tags': ', '.join(t.name for t in problem_log.tags),
+                            'timestamp': problem_log.timestamp.isoformat(),
+                            'comment': problem_log.comment})
+
+    def confirm_tag_created(self, tag: Tag) -> None:
+        self._write_record({'tag': tag.name, 'tag_id': tag.tag_id})
+
+    # -------------------- db contents ------------------------
+    def list_problems(self, problems: pd.DataFrame) -> None:
+        self._write_df(problems, columns=PROBLEM_COLUMNS)
+
+    def list_problem_tag_combos(self, problem_tag_combos: pd.DataFrame) -> None:
+        self._write_df(problem_tag_combos, columns=PROBLEM_TAG_COMBO_COLUMNS)
+
+    def show_problem_history(self, problem: Problem,
+                             problem_log_info: pd.DataFrame) -> None:
+        history = problem_log_info \
+            .sort_values('ts_logged', ascending=False) \
+            .rename(columns={'ts_logged': 'timestamp'})
+        self._write_df(history,
+                       columns=['timestamp', 'result', 'comment', 'tags'])
+
+    def list_tags(self, tags: pd.DataFrame) -> None:
+        self._write_df(tags, columns=TAG_COLUMNS)
+
+    def list_tag_forecast(self, forecast: pd.DataFrame) -> None:
+        self._write_df(forecast, columns=list(forecast.columns))
+
+    def list_workload(self, workload: pd.DataFrame) -> None:
+        self._write_df(workload, columns=list(workload.columns))
+
+    def show_dashboard(self, tags: pd.DataFrame, problems: pd.DataFrame,
+                       problem_tag_combos: pd.DataFrame) -> None:
+        if self.fmt != 'json':
+            raise ValueError("The dashboard consists of several tables, "
+                             "use the 'json' format!")
+        tables = [('tags', tags, TAG_COLUMNS),
+                  ('problems', problems, PROBLEM_COLUMNS),
+                  ('problem_tag_combos', problem_tag_combos,
+                   PROBLEM_TAG_COMBO_COLUMNS)]
+        for idx, (name, df, columns) in enumerate(tables):
+            self.stream.write(('{' if idx == 0 else ',\n')
+                              + f'{json.dumps(name)}: ')
+            self._write_rows(self._iter_rows(df, columns=columns),
+                             columns=columns)
+        self.stream.write('}\n')
+
+    # -------------------- writing ------------------------
+    def _write_df(self, df: pd.DataFrame, columns: List[str]) -> None:
+        self._write_table(self._iter_rows(df, columns=columns),
+                          columns=columns)
+
+    def _write_record(self, record: dict) -> None:
+        self._write_table([tuple(record.values())], columns=list(record))
+
+    def _write_table(self, rows: Iterable[tuple], columns: List[str]) -> None:
+        if self.fmt == 'csv':
+            writer = csv.writer(self.stream)
+            writer.writerow(columns)
+            writer.writerows(rows)
+        elif self.fmt == 'jsonl':
+            self.stream.writelines(json.dumps(dict(zip(columns, row))) + '\n'
+                                   for row in rows)
+        else:
+            self._write_rows(rows, columns=columns)
+            self.stream.write('\n')
+
+    def _write_rows(self, rows: Iterable[tuple], columns: List[str]) -> None:
+        """ json array, one row per line """
+        self.stream.write('[')
+        for idx, row in enumerate(rows):
+            self.stream.write(('\n' if idx == 0 else ',\n')
+                              + json.dumps(dict(zip(columns, row))))
+        self.stream.write(']')
+
+    @classmethod
+    def _iter_rows(cls, df: pd.DataFrame, columns: List[str]):
+        """ Yields the rows as tuples of plain python values """
+        if 'last_access' in columns:
+            df = df.rename(columns={'result': 'last_result',
+                                    'ts_logged': 'last_access'})
+        for row in df.reindex(columns=columns).itertuples(index=False,
+                                                          name=None):
+            yield tuple(cls._to_plain(value) for value in row)
+
+    @staticmethod
+    def _to_plain(value):
+        """ Enums as names, timestamps in ISO format and missing values as
+        None """
+        if value is None or value is pd.NaT \
+                or (isinstance(value, float) and math.isnan(value)):
+            return None
+        if isinstance(value, Enum):
+            return value.name
+        if isinstance(value, dt.datetime):
+            return value.isoformat()
+        if hasattr(value, 'item'):  # numpy scalar
+            return value.item()
+        return value
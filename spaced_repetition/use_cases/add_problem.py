@@ -1,9 +1,8 @@
 from typing import List
 
-from spaced_repetition.domain.problem import (Difficulty,
-                                              Problem,
-                                              ProblemCreator)
-from spaced_repetition.use_cases.db_gateway_interface import DBGatewayInterface
+from spaced_repetition.domain.problem import Difficulty, ProblemCreator
+from spaced_repetition.use_cases.db_gateway_interface import (DBGatewayInterface,
+                                                              DuplicateNameError)
 from spaced_repetition.use_cases.presenter_interface import PresenterInterface
 from .get_tag import TagGetter
 
@@ -27,10 +26,9 @@ class ProblemAdder:
             tags=tag_getter.get_existing_tags(names=tags),
             url=url)
 
-        self._assert_is_unique(problem=problem)
-        created_problem = self.repo.create_problem(problem=problem)
+        try:  # the gateway checks the name in the same transaction
+            created_problem = self.repo.create_problem(problem=problem)
+        except DuplicateNameError as err:
+            raise ValueError(
+                f"Problem name '{problem.name}' is not unique!") from err
         self.presenter.confirm_problem_created(problem=created_problem)
-
-    def _assert_is_unique(self, problem: Problem):
-        if self.repo.problem_exists(name=problem.name):
-            raise ValueError(f"Problem name '{problem.name}' is not unique!")
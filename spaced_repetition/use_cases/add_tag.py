@@ -1,7 +1,8 @@
 """UseCase: Create new Tag"""
 
-from spaced_repetition.domain.tag import Tag, TagCreator
-from spaced_repetition.use_cases.db_gateway_interface import DBGatewayInterface
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.use_cases.db_gateway_interface import (DBGatewayInterface,
+                                                              DuplicateNameError)
 from spaced_repetition.use_cases.presenter_interface import PresenterInterface
 
 
@@ -14,10 +15,9 @@ class TagAdder:
     def add_tag(self, name: str):
         tag = TagCreator.create(name=name)
 
-        self._assert_is_unique(tag=tag)
-        new_tag = self.repo.create_tag(tag=tag)
+        try:  # the gateway checks the name in the same transaction
+            new_tag = self.repo.create_tag(tag=tag)
+        except DuplicateNameError as err:
+            raise ValueError(
+                f"Tag with name '{tag.name}' already exists!") from err
         self.presenter.confirm_tag_created(tag=new_tag)
-
-    def _assert_is_unique(self, tag: Tag):
-        if self.repo.tag_exists(name=tag.name):
-            raise ValueError(f"Tag with name '{tag.name}' already exists!")
@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+from typing import Union
+
+import pandas as pd
+
+
+class CacheInterface(ABC):
+    @abstractmethod
+    def load(self, name: str, key: str) -> Union[pd.DataFrame, None]:
+        """ Returns the DataFrame stored under 'name' if it has been stored
+        with the same 'key', else None """
+
+    @abstractmethod
+    def save(self, name: str, key: str, df: pd.DataFrame) -> None:
+        pass
@@ -0,0 +1,33 @@
+"""Runs the independent gateway reads of a use case at the same time.
+
+Each read runs in a thread of its own, with its own database connection,
+such that the database's I/O and the decoding of rows overlap with the
+pandas work of the other reads."""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, TypeVar
+
+from .db_gateway_interface import DBGatewayInterface
+
+
+T = TypeVar('T')
+
+
+def run_reads(repo: DBGatewayInterface, reads: List[Callable[[], T]],
+              concurrent: bool = False) -> List[T]:
+    """ Results of the 'reads', in order. Reads run concurrently only if
+    'concurrent': they must not depend on each other. """
+    if not concurrent or len(reads) < 2:
+        return [read() for read in reads]
+
+    with ThreadPoolExecutor(max_workers=len(reads)) as executor:
+        futures = [executor.submit(_read_in_thread, repo, read)
+                   for read in reads]
+        return [future.result() for future in futures]
+
+
+def _read_in_thread(repo: DBGatewayInterface, read: Callable[[], T]) -> T:
+    try:
+        return read()
+    finally:
+        repo.close_thread_connection()
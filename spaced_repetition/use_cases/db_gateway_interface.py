@@ -1,50 +1,154 @@
 from abc import ABC, abstractmethod
-from typing import List, Union
+from typing import AsyncIterator, Hashable, Iterator, List, Union
 
 from spaced_repetition.domain.problem import Problem
 from spaced_repetition.domain.problem_log import ProblemLog
 from spaced_repetition.domain.tag import Tag
 
 
+class DuplicateNameError(ValueError):
+    """ The learner has a problem or tag of that name already """
+
+
 class DBGatewayInterface(ABC):
-    @staticmethod
+    """ A gateway instance serves the data of a single learner: problems,
+    tags and logs of other learners are neither read nor written """
     @abstractmethod
-    def create_problem(problem: Problem) -> Problem:
-        pass
+    def get_data_version(self) -> Hashable:
+        """ Token that changes whenever the stored data changes """
 
-    @classmethod
     @abstractmethod
-    def get_problems(cls, name: Union[str, None] = None,
+    def create_problem(self, problem: Problem) -> Problem:
+        """ Raises DuplicateNameError if the learner has a problem of that
+        name: checked and inserted atomically, such that concurrent adds
+        can't both succeed """
+
+    @abstractmethod
+    def get_problems(self, name: Union[str, None] = None,
                      name_substr: str = None,
                      tags_any: List[str] = None,
-                     tags_all: List[str] = None) -> List[Problem]:
+                     tags_all: List[str] = None,
+                     order_by: str = None,
+                     limit: int = None,
+                     offset: int = 0) -> List[Problem]:
+        """ 'order_by' ('name' (case-insensitive) or 'problem_id') is
+        required to select a page via 'limit' and 'offset' """
+
+    @abstractmethod
+    def problem_exists(self, problem_id: int = None, name: str = None) -> bool:
+        pass
+
+    @abstractmethod
+    def create_problem_log(self, problem_log: ProblemLog) -> None:
+        pass
+
+    @abstractmethod
+    def create_problem_logs(self, problem_logs: List[ProblemLog]) -> None:
+        """ Stores several logs at once, in a single transaction """
+
+    @abstractmethod
+    def get_problem_logs(self, problem_ids: List[int] = None,
+                         tags_any: List[str] = None) -> List[ProblemLog]:
+        pass
+
+    @abstractmethod
+    def create_tag(self, tag: Tag) -> Tag:
+        """ Raises DuplicateNameError if the learner has a tag of that name,
+        like create_problem """
+
+    @abstractmethod
+    def get_tags(self, names: List[str] = None, sub_str: str = None):
+        pass
+
+    def tag_exists(self, name: str) -> bool:
+        pass
+
+    def close_thread_connection(self) -> None:
+        """ Releases the calling thread's database connection, if any. Called
+        by the threads of concurrent reads when they are done. """
+
+
+class ProblemLogStreamInterface(ABC):
+    """ Optional for gateways: stream the problem logs instead of loading
+    all of them at once """
+    @abstractmethod
+    def iter_problem_tag_logs(self, problem_ids: List[int] = None,
+                              tags_any: List[str] = None) -> Iterator[ProblemLog]:
+        """ One log per problem-log-tag, i.e. each carrying a single tag,
+        ordered by problem_id, tag name and timestamp. 'tags_any' restricts
+        the tags themselves, not only the logs. """
+
+    @abstractmethod
+    def iter_problem_tag_logs_between(
+            self, since: Union[Hashable, None],
+            until: Hashable) -> Union[Iterator[ProblemLog], None]:
+        """ Like iter_problem_tag_logs, for the logs created after data
+        version 'since' (None: all logs) up to data version 'until' (both
+        as returned by get_data_version). None if data may have been
+        deleted in between: then the logs since 'since' can't be told
+        apart. """
+
+
+class AsyncDBGatewayInterface(ABC):
+    """ Counterparts of the DBGatewayInterface's methods that don't block
+    an event loop, e.g. for serving the use cases from an ASGI app """
+    @abstractmethod
+    async def aget_data_version(self) -> Hashable:
+        pass
+
+    @abstractmethod
+    async def acreate_problem(self, problem: Problem) -> Problem:
         pass
 
-    @staticmethod
     @abstractmethod
-    def problem_exists(problem_id: int = None, name: str = None) -> bool:
+    async def aget_problems(self, name: Union[str, None] = None,
+                            name_substr: str = None,
+                            tags_any: List[str] = None,
+                            tags_all: List[str] = None,
+                            order_by: str = None,
+                            limit: int = None,
+                            offset: int = 0) -> List[Problem]:
         pass
 
-    @staticmethod
     @abstractmethod
-    def create_problem_log(problem_log: ProblemLog) -> None:
+    async def aproblem_exists(self, problem_id: int = None,
+                              name: str = None) -> bool:
         pass
 
-    @classmethod
     @abstractmethod
-    def get_problem_logs(cls, problem_ids: List[int] = None) -> List[ProblemLog]:
+    async def acreate_problem_log(self, problem_log: ProblemLog) -> None:
         pass
 
-    @classmethod
     @abstractmethod
-    def create_tag(cls, tag: Tag) -> Tag:
+    async def acreate_problem_logs(self,
+                                   problem_logs: List[ProblemLog]) -> None:
         pass
 
-    @classmethod
     @abstractmethod
-    def get_tags(cls, names: List[str] = None, sub_str: str = None):
+    async def aget_problem_logs(self, problem_ids: List[int] = None,
+                                tags_any: List[str] = None) -> List[ProblemLog]:
         pass
 
-    @staticmethod
-    def tag_exists(name: str) -> bool:
+    @abstractmethod
+    def aiter_problem_tag_logs(self, problem_ids: List[int] = None,
+                               tags_any: List[str] = None) -> AsyncIterator[ProblemLog]:
+        """ Like ProblemLogStreamInterface.iter_problem_tag_logs """
+
+    @abstractmethod
+    async def aiter_problem_tag_logs_between(
+            self, since: Union[Hashable, None],
+            until: Hashable) -> Union[AsyncIterator[ProblemLog], None]:
+        """ Like ProblemLogStreamInterface.iter_problem_tag_logs_between """
+
+    @abstractmethod
+    async def acreate_tag(self, tag: Tag) -> Tag:
+        pass
+
+    @abstractmethod
+    async def aget_tags(self, names: List[str] = None,
+                        sub_str: str = None) -> List[Tag]:
+        pass
+
+    @abstractmethod
+    async def atag_exists(self, name: str) -> bool:
         pass
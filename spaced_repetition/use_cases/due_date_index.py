@@ -0,0 +1,110 @@
+""" Index of problem-tag-combos sorted by their due date, i.e. the date of
+the next scheduled repetition (ts_logged + interval).
+
+Before its due date, a combo's retention factor RF is exactly 1. Hence only
+the combos due before the evaluation time need any computation: they form
+a prefix of the index, which is found via binary search."""
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+
+NS_PER_DAY = 24 * 3600 * 10**9
+
+
+def to_utc_ns(timestamps: pd.Series) -> np.ndarray:
+    """ Nanoseconds since epoch (UTC); naive timestamps are taken as UTC """
+    return pd.to_datetime(timestamps, utc=True) \
+        .to_numpy(dtype='datetime64[ns]') \
+        .view('int64')
+
+
+def ts_to_utc_ns(ts: dt.datetime) -> int:
+    timestamp = pd.Timestamp(ts)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.value
+
+
+def due_ns(logged_ns: np.ndarray, interval: np.ndarray) -> np.ndarray:
+    """ Due dates (ns since epoch) of logs with the given intervals (days) """
+    return logged_ns + (interval * NS_PER_DAY).astype('int64')
+
+
+class DueDateIndex:
+    def __init__(self, log_data: pd.DataFrame):
+        """ log_data needs the columns 'ts_logged' and 'interval' (days) """
+        self.logged_ns = to_utc_ns(log_data.ts_logged)
+        self.interval = log_data.interval.to_numpy(dtype=float)
+        self.due_ns = due_ns(logged_ns=self.logged_ns, interval=self.interval)
+
+        if np.all(self.due_ns[1:] >= self.due_ns[:-1]):
+            self.order = np.arange(len(self.due_ns))  # e.g. pre-sorted state
+        else:
+            self.order = np.argsort(self.due_ns, kind='stable')
+        self.sorted_due_ns = self.due_ns[self.order]
+
+    def __len__(self):
+        return len(self.due_ns)
+
+    def overdue(self, ts: dt.datetime) -> np.ndarray:
+        """ Row positions of all combos due before ts, most overdue first """
+        cutoff = np.searchsorted(self.sorted_due_ns, ts_to_utc_ns(ts),
+                                 side='left')
+        return self.order[:cutoff]
+
+    def days_overdue(self, positions: np.ndarray,
+                     ts: dt.datetime) -> np.ndarray:
+        return (ts_to_utc_ns(ts) - self.due_ns[positions]) / NS_PER_DAY
+
+
+def days_overdue(log_data: pd.DataFrame, ts: dt.datetime) -> np.ndarray:
+    """ Days since the scheduled repetition per row (negative if not due
+    yet), NaN for rows without log """
+    logged = log_data.ts_logged.notna().to_numpy()
+    res = np.full(len(log_data), np.nan)
+    if logged.any():
+        res[logged] = DueDateIndex(log_data[logged]).days_overdue(
+            positions=np.arange(logged.sum()), ts=ts)
+    return res
+
+
+def due_counts_per_day(log_data: pd.DataFrame, ts: dt.datetime, days: int,
+                       group_codes: np.ndarray = None,
+                       num_groups: int = 1) -> np.ndarray:
+    """ Number of rows due on each of 'days' (UTC) days, starting with the
+    day of ts (rows: days, columns: the groups of 'group_codes', e.g. tag
+    codes, -1 for none). Rows that are overdue count as due on the first
+    day, rows without log are not counted. """
+    logged = log_data.ts_logged.notna().to_numpy()
+    if group_codes is None:
+        group_codes = np.zeros(len(log_data), dtype='int64')
+    log_data = log_data[logged]
+    day = due_ns(logged_ns=to_utc_ns(log_data.ts_logged),
+                 interval=log_data.interval.to_numpy(dtype=float)) \
+        // NS_PER_DAY - ts_to_utc_ns(ts) // NS_PER_DAY
+    day = np.maximum(day, 0)
+    group_codes = group_codes[logged]
+
+    counted = (day < days) & (group_codes >= 0)
+    return np.bincount(day[counted] * num_groups + group_codes[counted],
+                       minlength=days * num_groups) \
+        .reshape(days, num_groups)
+
+
+def utc_dates(ts: dt.datetime, days: int) -> np.ndarray:
+    """ The 'days' (UTC) dates as 'YYYY-MM-DD', starting with the day of ts """
+    first_day = ts_to_utc_ns(ts) // NS_PER_DAY
+    return np.arange(first_day, first_day + days) \
+        .astype('datetime64[D]') \
+        .astype(str)
+
+
+def sort_by_due_date(log_data: pd.DataFrame) -> pd.DataFrame:
+    """ Pre-sorts log_data, such that building its DueDateIndex
+    needs no sorting """
+    if log_data.empty:
+        return log_data
+    return log_data.iloc[DueDateIndex(log_data).order]
@@ -0,0 +1,34 @@
+"""UseCase: show the tag-, problem- and problem-tag-combo-overviews,
+derived from a single knowledge status computation"""
+
+from .db_gateway_interface import DBGatewayInterface
+from .get_problem import ProblemGetter
+from .get_tag import TagGetter
+from .knowledge_snapshot import KnowledgeSnapshotCache
+from .presenter_interface import PresenterInterface
+
+
+class DashboardGetter:
+    def __init__(self, db_gateway: DBGatewayInterface,
+                 presenter: PresenterInterface,
+                 snapshot_cache: KnowledgeSnapshotCache = None,
+                 concurrent_reads: bool = False):
+        self.repo = db_gateway
+        self.presenter = presenter
+        self.snapshot_cache = snapshot_cache or KnowledgeSnapshotCache()
+        self.concurrent_reads = concurrent_reads
+
+    def show_dashboard(self):
+        problem_getter = ProblemGetter(db_gateway=self.repo,
+                                       presenter=self.presenter,
+                                       snapshot_cache=self.snapshot_cache,
+                                       concurrent_reads=self.concurrent_reads)
+        tag_getter = TagGetter(db_gateway=self.repo,
+                               presenter=self.presenter,
+                               snapshot_cache=self.snapshot_cache,
+                               concurrent_reads=self.concurrent_reads)
+
+        self.presenter.show_dashboard(
+            tags=tag_getter.get_prioritized_tags(),
+            problems=problem_getter.get_problem_knowledge(),
+            problem_tag_combos=problem_getter.get_problem_tag_combos())
@@ -1,45 +1,118 @@
+import asyncio
 import dataclasses
+import datetime as dt
+from functools import partial
 from typing import List
 
 import numpy as np
 import pandas as pd
 
 from spaced_repetition.domain.problem import Problem
-from .db_gateway_interface import DBGatewayInterface
-from .get_problem_log import ProblemLogGetter
-from .helpers_pandas import add_missing_columns, denormalize_tags, case_insensitive_sort
+from .concurrent_reads import run_reads
+from .db_gateway_interface import AsyncDBGatewayInterface, DBGatewayInterface
+from .due_date_index import (NS_PER_DAY, days_overdue, due_counts_per_day,
+                             due_ns, to_utc_ns, ts_to_utc_ns, utc_dates)
+from .get_problem_log import (RESULT_VALUES, AsyncProblemLogGetter,
+                              ProblemLogGetter, SuperMemo2)
+from .helpers_pandas import (add_missing_columns, denormalize_tags,
+                             k_smallest_positions, sort_page)
+from .knowledge_snapshot import KnowledgeSnapshot, KnowledgeSnapshotCache
 from .presenter_interface import PresenterInterface
 
 
+KNOWLEDGE_STATUS_VIEW = 'knowledge_status'
+NEXT_COMBOS_INDEX = 'next_combos_index'
+PROBLEMS_VIEW = 'problems'
+UNLOGGED = -1  # 'result_value' of unlogged combos in the next combos index
+# sort keys the gateway can order by, such that paging can be pushed down
+GATEWAY_ORDER_BY = {'problem': 'name', 'problem_id': 'problem_id'}
+
+
 class ProblemGetter:
     def __init__(self, db_gateway: DBGatewayInterface,
-                 presenter: PresenterInterface):
+                 presenter: PresenterInterface,
+                 snapshot_cache: KnowledgeSnapshotCache = None,
+                 concurrent_reads: bool = False,
+                 replay_workers: int = None):
+        """ With 'concurrent_reads', problems and logs are fetched at the
+        same time, in separate threads. 'replay_workers': see
+        ProblemLogGetter. """
         self.presenter = presenter
         self.repo = db_gateway
+        self.snapshot_cache = snapshot_cache or KnowledgeSnapshotCache()
+        self.concurrent_reads = concurrent_reads
         self.plg = ProblemLogGetter(db_gateway=self.repo,
-                                    presenter=self.presenter)
+                                    presenter=self.presenter,
+                                    snapshot_cache=self.snapshot_cache,
+                                    replay_workers=replay_workers)
 
     def list_problems(self, name_substr: str = None,
                       sorted_by: List[str] = None,
                       tags_any: List[str] = None,
-                      tags_all: List[str] = None):
-        knowledge_status = self.get_knowledge_status()
-        problem_knowledge = self.aggregate_problems(knowledge_status)
+                      tags_all: List[str] = None,
+                      limit: int = None,
+                      offset: int = 0):
+        self.presenter.list_problems(
+            self.get_problem_knowledge(name_substr=name_substr,
+                                       sorted_by=sorted_by,
+                                       tags_any=tags_any,
+                                       tags_all=tags_all,
+                                       limit=limit,
+                                       offset=offset))
+
+    def get_problem_knowledge(self, name_substr: str = None,
+                              sorted_by: List[str] = None,
+                              tags_any: List[str] = None,
+                              tags_all: List[str] = None,
+                              limit: int = None,
+                              offset: int = 0) -> pd.DataFrame:
+        """ Knowledge status per problem, sorted by 'sorted_by'
+        (default: KS). If a page ('limit', 'offset') is requested and the
+        problems are sorted by name or id only, the page is selected by
+        the gateway and only its knowledge status is computed. """
+        sorted_by = sorted_by or ['KS']
+        if self._gateway_can_page(sorted_by=sorted_by, limit=limit):
+            problems = self._get_problems(
+                name_substr=name_substr,
+                tags_all=tags_all,
+                tags_any=tags_any,
+                order_by=GATEWAY_ORDER_BY[sorted_by[0]],
+                limit=limit,
+                offset=offset)
+            knowledge_status = self.get_knowledge_status(problems=problems)
+            limit, offset = None, 0
+        elif name_substr or tags_any or tags_all:
+            problems = self._get_problems(name_substr=name_substr,
+                                          tags_all=tags_all,
+                                          tags_any=tags_any)
+            knowledge_status = self.get_knowledge_status(problems=problems)
+        else:
+            problems = self._get_all_problems()
+            knowledge_status = self.get_knowledge_status()
+        return self._problem_knowledge_page(
+            problems=problems, knowledge_status=knowledge_status,
+            sorted_by=sorted_by, limit=limit, offset=offset)
+
+    @staticmethod
+    def _gateway_can_page(sorted_by: List[str], limit: int) -> bool:
+        return limit is not None and len(sorted_by) == 1 \
+            and sorted_by[0] in GATEWAY_ORDER_BY
+
+    @classmethod
+    def _problem_knowledge_page(cls, problems: pd.DataFrame,
+                                knowledge_status: pd.DataFrame,
+                                sorted_by: List[str], limit: int,
+                                offset: int) -> pd.DataFrame:
+        problem_knowledge = cls.aggregate_problems(knowledge_status)
 
-        problems = self._get_problems(name_substr=name_substr,
-                                      tags_all=tags_all,
-                                      tags_any=tags_any)
         problem_df = pd.merge(
             problems,
             problem_knowledge,
             on='problem_id',
             how='left')  # allow filtering for specific problems
 
-        problem_df.sort_values(by=sorted_by or 'KS',
-                               inplace=True,
-                               key=case_insensitive_sort,
-                               na_position='first')
-        self.presenter.list_problems(problem_df)
+        return sort_page(problem_df, sorted_by=sorted_by,
+                         limit=limit, offset=offset)
 
     @staticmethod
     def aggregate_problems(knowledge_status: pd.DataFrame) -> pd.DataFrame:
@@ -67,23 +140,260 @@ class ProblemGetter:
 
     def list_problem_tag_combos(self, sorted_by: List[str] = None,
                                 tag_substr: str = None,
-                                problem_substr: str = None):
+                                problem_substr: str = None,
+                                limit: int = None,
+                                offset: int = 0):
+        self.presenter.list_problem_tag_combos(
+            self.get_problem_tag_combos(sorted_by=sorted_by,
+                                        tag_substr=tag_substr,
+                                        problem_substr=problem_substr,
+                                        limit=limit,
+                                        offset=offset))
+
+    def get_problem_tag_combos(self, sorted_by: List[str] = None,
+                               tag_substr: str = None,
+                               problem_substr: str = None,
+                               limit: int = None,
+                               offset: int = 0) -> pd.DataFrame:
+        if not (tag_substr or problem_substr):
+            knowledge_status = self.get_knowledge_status()
+        else:
+            knowledge_status = self._get_filtered_knowledge_status(
+                tag_substr=tag_substr, problem_substr=problem_substr)
+        return self._problem_tag_combos_page(
+            knowledge_status=knowledge_status, sorted_by=sorted_by,
+            tag_substr=tag_substr, problem_substr=problem_substr,
+            limit=limit, offset=offset)
+
+    @classmethod
+    def _problem_tag_combos_page(cls, knowledge_status: pd.DataFrame,
+                                 sorted_by: List[str], tag_substr: str,
+                                 problem_substr: str, limit: int,
+                                 offset: int) -> pd.DataFrame:
+        df = cls._filter_tags(df=knowledge_status, tag_substr=tag_substr)
+        df = cls._filter_problems(df=df, problem_substr=problem_substr)
+        return sort_page(df, sorted_by=sorted_by or 'KS',
+                         limit=limit, offset=offset)
+
+    def _get_filtered_knowledge_status(self, tag_substr: str,
+                                       problem_substr: str) -> pd.DataFrame:
+        """ Only the logs of the matching tags (and problems) are replayed.
+        The problems are matched by name only, the logs are restricted by
+        tag: a combo may be logged under a tag its problem doesn't carry. """
+        tag_names = None
+        if tag_substr:
+            tag_names = [t.name for t in self.repo.get_tags(sub_str=tag_substr)]
+        problems = None
+        if problem_substr:
+            problems = self._get_problems(name_substr=problem_substr)
+
+        return self.get_knowledge_status(problems=problems,
+                                         tag_names=tag_names)
+
+    def list_next(self, k: int = 1, tag: str = None):
+        self.presenter.list_problem_tag_combos(
+            self.get_next_combos(k=k, tag=tag))
+
+    def get_next_combos(self, k: int = 1, tag: str = None) -> pd.DataFrame:
+        """ The k problem-tag-combos that select_next_combos would select
+        from the knowledge status, selected from the next combos index
+        (cached like the spacing state) instead: only the overdue combos
+        and the first k combos per result are evaluated. """
+        snapshot = self.snapshot_cache.get(repo=self.repo)
+        index = snapshot.state(
+            NEXT_COMBOS_INDEX,
+            partial(self._compute_next_combos_index, snapshot=snapshot),
+            key=SuperMemo2.config_hash())
+        return self.select_from_next_combos_index(index=index, k=k,
+                                                  ts=snapshot.ts, tag=tag)
+
+    def _compute_next_combos_index(
+            self, snapshot: KnowledgeSnapshot) -> pd.DataFrame:
+        return self.next_combos_index(self._combine_knowledge_status(
+            problems=self._get_all_problems(),
+            knowledge_status=self.plg.spacing_state(snapshot=snapshot),
+            tag_names=None))
+
+    @staticmethod
+    def next_combos_index(combos: pd.DataFrame) -> pd.DataFrame:
+        """ Problem-tag-combos (knowledge status without RF and KS), sorted
+        by 'result_value' (UNLOGGED first), then by due date ('due_ns').
+        Until its due date, a combo's KS is its result value: per result,
+        the combos that are not due yet are in the order in which they are
+        studied next. Only changes with the data, not with time. """
+        logged = combos.ts_logged.notna().to_numpy()
+        result_value = np.full(len(combos), UNLOGGED, dtype=np.int8)
+        result_value[logged] = combos.result[logged].map(RESULT_VALUES)
+        due = np.full(len(combos), np.iinfo(np.int64).max)
+        due[logged] = due_ns(
+            logged_ns=to_utc_ns(combos.ts_logged[logged]),
+            interval=combos.interval[logged].to_numpy(dtype=float))
+
+        order = np.lexsort((due, result_value))
+        return combos.iloc[order] \
+            .assign(tag=pd.Categorical(combos.tag.to_numpy()[order]),
+                    result_value=result_value[order],
+                    due_ns=due[order]) \
+            .reset_index(drop=True)
+
+    @classmethod
+    def select_from_next_combos_index(cls, index: pd.DataFrame, k: int,
+                                      ts: dt.datetime,
+                                      tag: str = None) -> pd.DataFrame:
+        """ Like select_next_combos on the knowledge status (of 'tag'). The
+        result values are found by binary search; a tag costs one pass over
+        the integer tag codes. """
+        positions = np.arange(len(index))
+        if tag is not None:
+            tags = index.tag.cat
+            positions = np.flatnonzero(tags.codes.to_numpy() == (
+                tags.categories.get_loc(tag) if tag in tags.categories
+                else -2))
+        result_value = index.result_value.to_numpy()
+        due = index.due_ns.to_numpy()
+        ts_ns = ts_to_utc_ns(ts)
+        candidates = positions[cls._next_candidates(
+            result_value=result_value[positions], due=due[positions],
+            ts_ns=ts_ns, k=k)]
+
+        # unlogged combos count as KS = 0 and as not overdue
+        logged = result_value[candidates] != UNLOGGED
+        days_over = np.zeros(len(candidates))
+        days_over[logged] = (ts_ns - due[candidates[logged]]) / NS_PER_DAY
+        retention = np.full(len(candidates), np.nan)
+        knowledge = np.full(len(candidates), np.nan)
+        retention[logged], knowledge[logged] = ProblemLogGetter.knowledge_scores(
+            days_over=days_over[logged],
+            interval=index.interval.to_numpy(dtype=float)[candidates[logged]],
+            result_value=result_value[candidates[logged]])
+
+        selected = k_smallest_positions(primary=np.nan_to_num(knowledge),
+                                        secondary=-days_over, k=k)
+        res = index.iloc[candidates[selected]] \
+            .drop(columns=['result_value', 'due_ns'])
+        return res.assign(tag=res.tag.astype(object),
+                          RF=retention[selected],
+                          KS=knowledge[selected])
+
+    @staticmethod
+    def _next_candidates(result_value: np.ndarray, due: np.ndarray,
+                         ts_ns: int, k: int) -> np.ndarray:
+        """ Positions (sorted by result value, then due date) of all overdue
+        combos and of the first k combos per result that are not due yet:
+        these include the k combos to study next """
+        values = [UNLOGGED] + sorted(RESULT_VALUES.values())
+        starts = np.searchsorted(result_value, values, side='left')
+        ends = np.searchsorted(result_value, values, side='right')
+        return np.concatenate([
+            np.arange(start, min(end, start + k + np.searchsorted(
+                due[start:end], ts_ns, side='left')))
+            for start, end in zip(starts, ends)]).astype(int)
+
+    @staticmethod
+    def select_next_combos(knowledge_status: pd.DataFrame, k: int,
+                           ts: dt.datetime) -> pd.DataFrame:
+        """ The k problem-tag-combos to study next: lowest KS first, where
+        unlogged combos count as KS = 0, then the most overdue ones. """
+        positions = k_smallest_positions(
+            primary=knowledge_status.KS.fillna(0).to_numpy(dtype=float),
+            secondary=-np.nan_to_num(days_overdue(knowledge_status, ts=ts)),
+            k=k)
+        return knowledge_status.iloc[positions]
+
+    def list_workload(self, days: int, by_tag: bool = False):
+        self.presenter.list_workload(
+            self.get_workload(days=days, by_tag=by_tag))
+
+    def get_workload(self, days: int, by_tag: bool = False) -> pd.DataFrame:
+        """ Number of problem-tag-combos due ('due') on each of the next
+        'days' days ('date', from today), with 'by_tag' also per tag (one
+        column each). Overdue combos count as due today. """
+        if days < 1:
+            raise ValueError("'days' must be positive!")
         knowledge_status = self.get_knowledge_status()
-        knowledge_status.sort_values(by=sorted_by or 'KS',
-                                     inplace=True,
-                                     key=case_insensitive_sort,
-                                     na_position='first')
-        df = self._filter_tags(df=knowledge_status, tag_substr=tag_substr)
-        df = self._filter_problems(df=df, problem_substr=problem_substr)
-        self.presenter.list_problem_tag_combos(df)
-
-    def get_knowledge_status(self) -> pd.DataFrame:
-        problems = self._get_problems()
+        ts = self.snapshot_cache.get(repo=self.repo).ts
+        if not by_tag:
+            return pd.DataFrame(data={
+                'date': utc_dates(ts=ts, days=days),
+                'due': due_counts_per_day(log_data=knowledge_status, ts=ts,
+                                          days=days)[:, 0]})
+
+        tags = pd.Categorical(knowledge_status.tag)
+        counts = due_counts_per_day(log_data=knowledge_status, ts=ts,
+                                    days=days, group_codes=tags.codes,
+                                    num_groups=len(tags.categories))
+        return pd.concat(
+            [pd.DataFrame(data={'date': utc_dates(ts=ts, days=days),
+                                'due': counts.sum(axis=1)}),
+             pd.DataFrame(data=counts, columns=tags.categories)],
+            axis=1)
+
+    def get_knowledge_status(self, problems: pd.DataFrame = None,
+                             tag_names: List[str] = None) -> pd.DataFrame:
+        """ Knowledge status per problem-tag-combo.
+
+        Filters are pushed down to the gateway: if 'problems' (as returned
+        by _get_problems) is given, only the logs of these problems are
+        fetched and replayed. 'tag_names' restricts the result to combos of
+        the given tags.
+        Without filters, the result is shared via the KnowledgeSnapshot and
+        must not be modified in place. """
+        if problems is None and tag_names is None:
+            return self.snapshot_cache \
+                .get(repo=self.repo) \
+                .view(KNOWLEDGE_STATUS_VIEW, self._compute_knowledge_status)
+        return self._compute_knowledge_status(problems=problems,
+                                              tag_names=tag_names)
+
+    def _compute_knowledge_status(self, problems: pd.DataFrame = None,
+                                  tag_names: List[str] = None) -> pd.DataFrame:
+        if problems is not None:
+            knowledge_status = self.plg.get_last_log_per_problem_tag_combo(
+                problem_ids=problems.problem_id.to_list(), tags_any=tag_names)
+        else:
+            # problems and logs are independent reads; all problems, as
+            # combos may be logged under tags their problem doesn't carry
+            problems, knowledge_status = run_reads(
+                repo=self.repo,
+                reads=[self._get_all_problems,
+                       partial(self.plg.get_last_log_per_problem_tag_combo,
+                               problem_ids=None, tags_any=tag_names)],
+                concurrent=self.concurrent_reads)
+        return self._combine_knowledge_status(
+            problems=problems, knowledge_status=knowledge_status,
+            tag_names=tag_names)
+
+    @classmethod
+    def _combine_knowledge_status(cls, problems: pd.DataFrame,
+                                  knowledge_status: pd.DataFrame,
+                                  tag_names: List[str]) -> pd.DataFrame:
+        """ Problems (denormalized by tag) with the last log per combo """
         problems_denormalized = denormalize_tags(df=problems)
-        knowledge_status = self.plg.get_last_log_per_problem_tag_combo()
+        if tag_names is not None:
+            problems_denormalized = problems_denormalized[
+                problems_denormalized.tag.isin(tag_names)]
 
-        return self._merge_problem_and_log_data(
+        combos = cls._merge_problem_and_log_data(
             problem_data=problems_denormalized, log_data=knowledge_status)
+        return cls._add_data_of_problems_not_carrying_tag(combos=combos,
+                                                          problems=problems)
+
+    @staticmethod
+    def _add_data_of_problems_not_carrying_tag(
+            combos: pd.DataFrame, problems: pd.DataFrame) -> pd.DataFrame:
+        """ Combos logged under a tag their problem doesn't carry only
+        come from the logs: their problem's columns are taken from
+        'problems' """
+        missing = combos.problem.isna() \
+            & combos.problem_id.isin(problems.problem_id)
+        if not missing.any():
+            return combos
+
+        problem_data = problems.drop(columns='tags').set_index('problem_id')
+        for col in problem_data.columns:
+            combos.loc[missing, col] = combos.problem_id[missing] \
+                .map(problem_data[col])
+        return combos
 
     @staticmethod
     def _merge_problem_and_log_data(problem_data: pd.DataFrame,
@@ -94,25 +404,42 @@ class ProblemGetter:
 
     @staticmethod
     def _filter_tags(df: pd.DataFrame, tag_substr: str):
-        if tag_substr:
-            df = df[df.tag.str.contains(tag_substr)]
+        """ An empty frame (nothing matched the pushed-down filters) may
+        lack string columns """
+        if tag_substr and not df.empty:
+            df = df[df.tag.str.contains(tag_substr, na=False)]
         return df
 
     @staticmethod
     def _filter_problems(df: pd.DataFrame, problem_substr: str):
-        if problem_substr:
-            df = df[df.problem.str.contains(problem_substr)]
+        """ Like _filter_tags """
+        if problem_substr and not df.empty:
+            df = df[df.problem.str.contains(problem_substr, na=False)]
         return df
 
+    def _get_all_problems(self) -> pd.DataFrame:
+        return self.snapshot_cache \
+            .get(repo=self.repo) \
+            .view(PROBLEMS_VIEW, self._get_problems)
+
     def _get_problems(self, name_substr: str = None,
                       tags_any: List[str] = None,
-                      tags_all: List[str] = None) -> pd.DataFrame:
-        output_columns = ['difficulty', 'problem', 'problem_id', 'tags', 'url']
-        problems = self.repo.get_problems(name_substr=name_substr,
-                                          tags_any=tags_any,
-                                          tags_all=tags_all)
+                      tags_all: List[str] = None,
+                      order_by: str = None,
+                      limit: int = None,
+                      offset: int = 0) -> pd.DataFrame:
+        return self._problems_to_df(self.repo.get_problems(
+            name_substr=name_substr,
+            tags_any=tags_any,
+            tags_all=tags_all,
+            order_by=order_by,
+            limit=limit,
+            offset=offset))
 
-        df = pd.DataFrame(data=map(self.problem_to_row_content, problems))
+    @classmethod
+    def _problems_to_df(cls, problems: List[Problem]) -> pd.DataFrame:
+        output_columns = ['difficulty', 'problem', 'problem_id', 'tags', 'url']
+        df = pd.DataFrame(data=map(cls.problem_to_row_content, problems))
         return add_missing_columns(df, required_columns=output_columns)
 
     @staticmethod
@@ -121,3 +448,167 @@ class ProblemGetter:
         problem_row['problem'] = problem_row.pop('name')
         problem_row['tags'] = ', '.join(sorted([t.name for t in problem.tags]))
         return problem_row
+
+
+class AsyncProblemGetter(ProblemGetter):
+    """ ProblemGetter for gateways with async methods (web deployments):
+    while a request waits for the database, the event loop serves others.
+    Problems and logs are fetched at the same time. """
+    def __init__(self, db_gateway: AsyncDBGatewayInterface,
+                 presenter: PresenterInterface,
+                 snapshot_cache: KnowledgeSnapshotCache = None):
+        super().__init__(db_gateway=db_gateway, presenter=presenter,
+                         snapshot_cache=snapshot_cache)
+        self.plg = AsyncProblemLogGetter(db_gateway=self.repo,
+                                         presenter=self.presenter,
+                                         snapshot_cache=self.snapshot_cache)
+
+    async def alist_problems(self, name_substr: str = None,
+                             sorted_by: List[str] = None,
+                             tags_any: List[str] = None,
+                             tags_all: List[str] = None,
+                             limit: int = None,
+                             offset: int = 0):
+        self.presenter.list_problems(
+            await self.aget_problem_knowledge(name_substr=name_substr,
+                                              sorted_by=sorted_by,
+                                              tags_any=tags_any,
+                                              tags_all=tags_all,
+                                              limit=limit,
+                                              offset=offset))
+
+    async def aget_problem_knowledge(self, name_substr: str = None,
+                                     sorted_by: List[str] = None,
+                                     tags_any: List[str] = None,
+                                     tags_all: List[str] = None,
+                                     limit: int = None,
+                                     offset: int = 0) -> pd.DataFrame:
+        sorted_by = sorted_by or ['KS']
+        if self._gateway_can_page(sorted_by=sorted_by, limit=limit):
+            problems = await self._aget_problems(
+                name_substr=name_substr,
+                tags_all=tags_all,
+                tags_any=tags_any,
+                order_by=GATEWAY_ORDER_BY[sorted_by[0]],
+                limit=limit,
+                offset=offset)
+            knowledge_status = await self.aget_knowledge_status(
+                problems=problems)
+            limit, offset = None, 0
+        elif name_substr or tags_any or tags_all:
+            problems = await self._aget_problems(name_substr=name_substr,
+                                                 tags_all=tags_all,
+                                                 tags_any=tags_any)
+            knowledge_status = await self.aget_knowledge_status(
+                problems=problems)
+        else:
+            problems, knowledge_status = await asyncio.gather(
+                self._aget_all_problems(), self.aget_knowledge_status())
+        return self._problem_knowledge_page(
+            problems=problems, knowledge_status=knowledge_status,
+            sorted_by=sorted_by, limit=limit, offset=offset)
+
+    async def alist_problem_tag_combos(self, sorted_by: List[str] = None,
+                                       tag_substr: str = None,
+                                       problem_substr: str = None,
+                                       limit: int = None,
+                                       offset: int = 0):
+        self.presenter.list_problem_tag_combos(
+            await self.aget_problem_tag_combos(sorted_by=sorted_by,
+                                               tag_substr=tag_substr,
+                                               problem_substr=problem_substr,
+                                               limit=limit,
+                                               offset=offset))
+
+    async def aget_problem_tag_combos(self, sorted_by: List[str] = None,
+                                      tag_substr: str = None,
+                                      problem_substr: str = None,
+                                      limit: int = None,
+                                      offset: int = 0) -> pd.DataFrame:
+        if not (tag_substr or problem_substr):
+            knowledge_status = await self.aget_knowledge_status()
+        else:
+            knowledge_status = await self._aget_filtered_knowledge_status(
+                tag_substr=tag_substr, problem_substr=problem_substr)
+        return self._problem_tag_combos_page(
+            knowledge_status=knowledge_status, sorted_by=sorted_by,
+            tag_substr=tag_substr, problem_substr=problem_substr,
+            limit=limit, offset=offset)
+
+    async def _aget_filtered_knowledge_status(
+            self, tag_substr: str, problem_substr: str) -> pd.DataFrame:
+        """ Like _get_filtered_knowledge_status """
+        tag_names = None
+        if tag_substr:
+            tag_names = [t.name for t in
+                         await self.repo.aget_tags(sub_str=tag_substr)]
+        problems = None
+        if problem_substr:
+            problems = await self._aget_problems(name_substr=problem_substr)
+
+        return await self.aget_knowledge_status(problems=problems,
+                                                tag_names=tag_names)
+
+    async def alist_next(self, k: int = 1, tag: str = None):
+        self.presenter.list_problem_tag_combos(
+            await self.aget_next_combos(k=k, tag=tag))
+
+    async def aget_next_combos(self, k: int = 1,
+                               tag: str = None) -> pd.DataFrame:
+        snapshot = await self.snapshot_cache.aget(repo=self.repo)
+
+        async def compute() -> pd.DataFrame:
+            problems, spacing_state = await asyncio.gather(
+                self._aget_all_problems(),
+                self.plg.aspacing_state(snapshot=snapshot))
+            return self.next_combos_index(self._combine_knowledge_status(
+                problems=problems, knowledge_status=spacing_state,
+                tag_names=None))
+
+        index = await snapshot.astate(NEXT_COMBOS_INDEX, compute,
+                                      key=SuperMemo2.config_hash())
+        return self.select_from_next_combos_index(index=index, k=k,
+                                                  ts=snapshot.ts, tag=tag)
+
+    async def aget_knowledge_status(self, problems: pd.DataFrame = None,
+                                    tag_names: List[str] = None) -> pd.DataFrame:
+        """ Like get_knowledge_status """
+        if problems is None and tag_names is None:
+            snapshot = await self.snapshot_cache.aget(repo=self.repo)
+            return await snapshot.aview(KNOWLEDGE_STATUS_VIEW,
+                                        self._acompute_knowledge_status)
+        return await self._acompute_knowledge_status(problems=problems,
+                                                     tag_names=tag_names)
+
+    async def _acompute_knowledge_status(
+            self, problems: pd.DataFrame = None,
+            tag_names: List[str] = None) -> pd.DataFrame:
+        if problems is not None:
+            knowledge_status = await self.plg.aget_last_log_per_problem_tag_combo(
+                problem_ids=problems.problem_id.to_list(), tags_any=tag_names)
+        else:
+            problems, knowledge_status = await asyncio.gather(
+                self._aget_all_problems(),
+                self.plg.aget_last_log_per_problem_tag_combo(
+                    problem_ids=None, tags_any=tag_names))
+        return self._combine_knowledge_status(
+            problems=problems, knowledge_status=knowledge_status,
+            tag_names=tag_names)
+
+    async def _aget_all_problems(self) -> pd.DataFrame:
+        snapshot = await self.snapshot_cache.aget(repo=self.repo)
+        return await snapshot.aview(PROBLEMS_VIEW, self._aget_problems)
+
+    async def _aget_problems(self, name_substr: str = None,
+                             tags_any: List[str] = None,
+                             tags_all: List[str] = None,
+                             order_by: str = None,
+                             limit: int = None,
+                             offset: int = 0) -> pd.DataFrame:
+        return self._problems_to_df(await self.repo.aget_problems(
+            name_substr=name_substr,
+            tags_any=tags_any,
+            tags_all=tags_all,
+            order_by=order_by,
+            limit=limit,
+            offset=offset))
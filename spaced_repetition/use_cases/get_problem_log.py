@@ -1,57 +1,170 @@
 import dataclasses
 import datetime as dt
-from math import exp, log
-from typing import List
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import AsyncIterable, Dict, Iterable, List, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from dateutil.tz import gettz
 
 from spaced_repetition.domain.problem_log import ProblemLog, Result
-from spaced_repetition.use_cases.db_gateway_interface import DBGatewayInterface
+from spaced_repetition.use_cases.db_gateway_interface import (
+    AsyncDBGatewayInterface, DBGatewayInterface, ProblemLogStreamInterface)
 from spaced_repetition.use_cases.presenter_interface import PresenterInterface
+from .due_date_index import (DueDateIndex, days_overdue, sort_by_due_date,
+                             to_utc_ns)
 from .helpers_pandas import add_missing_columns, denormalize_tags
+from .knowledge_snapshot import KnowledgeSnapshot, KnowledgeSnapshotCache
 
 
+LAST_LOG_VIEW = 'last_log_per_problem_tag_combo'
+SPACING_STATE = 'spacing_state'
+RESULT_VALUES = {res: res.value for res in Result}
+RESULTS_BY_VALUE = {res.value: res for res in Result}
 RETENTION_FRACTION_PER_T = 0.5  # Fraction of remembered content after time T
 
 
 class ProblemLogGetter:
     def __init__(self, db_gateway: DBGatewayInterface,
-                 presenter: PresenterInterface):
+                 presenter: PresenterInterface,
+                 snapshot_cache: KnowledgeSnapshotCache = None,
+                 replay_workers: int = None):
+        """ With 'replay_workers', full rebuilds of the spacing state replay
+        all logs sharded over that many processes (see
+        SuperMemo2.add_spacing_data), instead of folding the log stream """
         self.repo = db_gateway
         self.presenter = presenter
-
-    def get_last_log_per_problem_tag_combo(self) -> pd.DataFrame:
-        """ Get the last recorded status per problem-log-combo """
-        problem_log_data = self._get_problem_log_data()
+        self.snapshot_cache = snapshot_cache or KnowledgeSnapshotCache()
+        self.replay_workers = replay_workers
+
+    def get_last_log_per_problem_tag_combo(
+            self, problem_ids: List[int] = None,
+            tags_any: List[str] = None) -> pd.DataFrame:
+        """ Get the last recorded status per problem-log-combo, optionally
+        only for the given problems and / or tags """
+        snapshot = self.snapshot_cache.get(repo=self.repo)
+        if problem_ids is None and tags_any is None:
+            return snapshot.view(
+                LAST_LOG_VIEW,
+                lambda: self._add_knowledge_scores(
+                    log_data=self.spacing_state(snapshot=snapshot),
+                    ts=snapshot.ts))
 
         return self._add_knowledge_scores(
-            log_data=self._last_entry_per_problem_tag_combo(problem_log_data))
+            log_data=self._compute_last_entry_per_problem_tag_combo(
+                problem_ids=problem_ids, tags_any=tags_any),
+            ts=snapshot.ts)
+
+    def spacing_state(self, snapshot: KnowledgeSnapshot) -> pd.DataFrame:
+        """ Ease, interval and last log of all problem-tag-combos, sorted by
+        due date. Shared by the snapshots of a data version: read-only. """
+        return snapshot.state(SPACING_STATE,
+                              partial(self._compute_spacing_state,
+                                      snapshot=snapshot),
+                              key=SuperMemo2.config_hash())
+
+    def _compute_spacing_state(self,
+                               snapshot: KnowledgeSnapshot) -> pd.DataFrame:
+        """ The logs added since the previous data version are folded into
+        its spacing state, if that is held and nothing was deleted since.
+        Else all logs up to the snapshot's data version are folded (or
+        replayed, with 'replay_workers'). """
+        if not isinstance(self.repo, ProblemLogStreamInterface):
+            return self._compute_last_entry_per_problem_tag_combo()
+
+        previous = snapshot.previous_state(SPACING_STATE,
+                                           key=SuperMemo2.config_hash())
+        if previous is not None:
+            previous_version, state = previous
+            new_logs = self.repo.iter_problem_tag_logs_between(
+                since=previous_version, until=snapshot.data_version)
+            if new_logs is not None:
+                state = SuperMemo2.fold_into(state=state,
+                                             problem_tag_logs=new_logs)
+                if state is not None:
+                    return sort_by_due_date(state)
+
+        problem_tag_logs = self.repo.iter_problem_tag_logs_between(
+            since=None, until=snapshot.data_version)
+        if self.replay_workers is None:
+            return sort_by_due_date(SuperMemo2.fold(problem_tag_logs))
+        return self._last_entry_per_problem_tag_combo(
+            SuperMemo2.add_spacing_data(
+                log_data=self._problem_tag_log_data(problem_tag_logs),
+                workers=self.replay_workers))
+
+    def _compute_last_entry_per_problem_tag_combo(
+            self, problem_ids: List[int] = None,
+            tags_any: List[str] = None) -> pd.DataFrame:
+        """ Ease, interval and last log per problem-tag-combo: this only
+        depends on the stored logs, not on the evaluation time. Gateways
+        that stream the logs are folded over, such that memory only grows
+        with the number of combos, not with the length of the history. """
+        if isinstance(self.repo, ProblemLogStreamInterface):
+            return sort_by_due_date(SuperMemo2.fold(
+                self.repo.iter_problem_tag_logs(problem_ids=problem_ids,
+                                                tags_any=tags_any)))
+
+        problem_log_data = self._get_problem_log_data(problem_ids=problem_ids,
+                                                      tags_any=tags_any)
+        return self._last_entry_per_problem_tag_combo(problem_log_data)
 
     @staticmethod
     def _last_entry_per_problem_tag_combo(plog_df: pd.DataFrame) -> pd.DataFrame:
         columns = ['problem_id', 'tag', 'ts_logged', 'result', 'ease',
                    'interval']
+        present = [col for col in columns if col in plog_df.columns]
+        if plog_df.empty:
+            return add_missing_columns(df=plog_df.loc[:, present],
+                                       required_columns=columns)
+
+        # find the last log per combo on the key columns, then take only
+        # these rows (instead of sorting and grouping copies of all logs)
+        by_ts = np.argsort(to_utc_ns(plog_df.ts_logged), kind='stable')
+        is_last = ~pd.DataFrame({'problem_id': plog_df.problem_id.to_numpy()[by_ts],
+                                 'tag': plog_df.tag.to_numpy()[by_ts]}) \
+            .duplicated(keep='last') \
+            .to_numpy()
         df = add_missing_columns(
-            df=plog_df.loc[:, [col for col in columns if col in plog_df.columns]],
+            df=plog_df.iloc[by_ts[is_last],
+                            [plog_df.columns.get_loc(col) for col in present]],
             required_columns=columns)
 
-        return df \
-            .sort_values('ts_logged') \
-            .groupby(['problem_id', 'tag']) \
-            .tail(1)
+        # sorted by due date for a quick DueDateIndex
+        return sort_by_due_date(df)
 
-    def get_problem_logs(self, problem_ids: List[int] = None) -> pd.DataFrame:
-        problem_logs = self.repo.get_problem_logs(problem_ids=problem_ids)
+    def get_problem_logs(self, problem_ids: List[int] = None,
+                         tags_any: List[str] = None) -> pd.DataFrame:
+        problem_logs = self.repo.get_problem_logs(problem_ids=problem_ids,
+                                                  tags_any=tags_any)
         df = pd.DataFrame(data=map(self._log_to_row, problem_logs))
 
         return add_missing_columns(df, required_columns=[
             'problem_id', 'result', 'tags', 'comment', 'ts_logged'])
 
-    def _get_problem_log_data(self) -> pd.DataFrame:
-        log_df = self.get_problem_logs()
+    def _get_problem_log_data(self, problem_ids: List[int] = None,
+                              tags_any: List[str] = None) -> pd.DataFrame:
+        log_df = self.get_problem_logs(problem_ids=problem_ids,
+                                       tags_any=tags_any)
         problem_tag_combo_df = denormalize_tags(df=log_df)
-        return SuperMemo2.add_spacing_data(log_data=problem_tag_combo_df)
+        if tags_any is not None:
+            # matching logs may carry further tags, whose history is incomplete
+            problem_tag_combo_df = problem_tag_combo_df[
+                problem_tag_combo_df.tag.isin(tags_any)]
+        return SuperMemo2.add_spacing_data(log_data=problem_tag_combo_df,
+                                           workers=self.replay_workers)
+
+    @staticmethod
+    def _problem_tag_log_data(
+            problem_tag_logs: Iterable[ProblemLog]) -> pd.DataFrame:
+        """ One row per log of a single tag each, like the rows of
+        _get_problem_log_data before the replay """
+        return pd.DataFrame.from_records(
+            ((p_l.problem_id, p_l.tags[0].name, p_l.timestamp, p_l.result)
+             for p_l in problem_tag_logs),
+            columns=['problem_id', 'tag', 'ts_logged', 'result'])
 
     @staticmethod
     def _log_to_row(p_log: ProblemLog) -> dict:
@@ -61,33 +174,124 @@ class ProblemLogGetter:
         return row_content
 
     @classmethod
-    def _add_knowledge_scores(
-            cls, log_data: pd.DataFrame,
-            ts: dt.datetime = dt.datetime.now(tz=gettz('UTC'))) -> pd.DataFrame:
+    def _add_knowledge_scores(cls, log_data: pd.DataFrame,
+                              ts: dt.datetime = None) -> pd.DataFrame:
         """Calculates the knowledge score 'KS' per log-entry (= log_data row)"""
-        df = log_data.copy()
+        ts = ts or dt.datetime.now(tz=gettz('UTC'))
+        if log_data.empty:
+            return add_missing_columns(log_data, required_columns=['KS', 'RF'])
+
+        # combos that are not due yet keep RF = 1 without any computation
+        due_date_index = DueDateIndex(log_data)
+        overdue = due_date_index.overdue(ts=ts)
+        retention = np.ones(len(log_data))
+        retention[overdue] = cls._retention_score(
+            days_over=due_date_index.days_overdue(positions=overdue, ts=ts),
+            interval=due_date_index.interval[overdue])
+
+        # log_data's columns are shared, not copied: it is left unchanged
+        scores = pd.DataFrame(
+            data={'RF': retention,
+                  'KS': retention * log_data.result.map(RESULT_VALUES)
+                                                   .to_numpy(dtype=float)},
+            index=log_data.index)
+        return pd.concat([log_data, scores], axis=1, copy=False)
 
-        if df.empty:
-            return add_missing_columns(df, required_columns=['KS', 'RF'])
+    @classmethod
+    def knowledge_scores(cls, days_over: np.ndarray, interval: np.ndarray,
+                         result_value: np.ndarray) -> Tuple[np.ndarray,
+                                                             np.ndarray]:
+        """ RF and KS of logged combos, 'days_over' days after their
+        scheduled repetition (RF = 1 until then) """
+        retention = np.ones(len(days_over))
+        overdue = days_over > 0
+        retention[overdue] = cls._retention_score(days_over=days_over[overdue],
+                                                  interval=interval[overdue])
+        return retention, retention * result_value
 
-        df['RF'] = df.apply(cls._retention_score,  # noqa --> pycharm bug, remove noqa in v2021.1
-                            axis='columns',
-                            args=(ts,))
-        df['KS'] = df.RF * df.result.map(lambda x: x.value)
-        return df
+    @classmethod
+    def forecast_knowledge_scores(cls, log_data: pd.DataFrame,
+                                  ts: dt.datetime,
+                                  days: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ RF and KS per log-entry (rows) at ts and on each of the
+        following 'days' days (columns), if nothing is studied until then.
+        Evaluated in one broadcast over log-entries x days; NaN for rows
+        without log. """
+        days_over = days_overdue(log_data, ts=ts)[:, np.newaxis] \
+            + np.arange(days + 1)
+        retention = cls._retention_score(
+            days_over=np.maximum(days_over, 0.),  # not due yet: RF = 1
+            interval=log_data.interval.to_numpy(dtype=float)[:, np.newaxis])
+        knowledge = retention * log_data.result.map(RESULT_VALUES) \
+            .to_numpy(dtype=float)[:, np.newaxis]
+        return retention, knowledge
 
     @staticmethod
-    def _retention_score(df_row: pd.Series, ts: dt.datetime) -> float:
-        """Calculates the 'retention score' 0 <= RF <= 1,
-        the percentage of knowledge retained at time ts"""
-        days_since_last_study = (ts - df_row.ts_logged.to_pydatetime()) \
-            .total_seconds() \
-            / 3600 / 24
+    def _retention_score(days_over: np.ndarray,
+                         interval: np.ndarray) -> np.ndarray:
+        """Calculates the 'retention score' 0 <= RF <= 1, the percentage of
+        knowledge retained 'days_over' days after the scheduled repetition"""
+        return np.exp(np.log(RETENTION_FRACTION_PER_T) * days_over / interval)
+
+
+class AsyncProblemLogGetter(ProblemLogGetter):
+    """ ProblemLogGetter for gateways with async methods (web deployments):
+    the logs are streamed without blocking the event loop """
+    def __init__(self, db_gateway: AsyncDBGatewayInterface,
+                 presenter: PresenterInterface,
+                 snapshot_cache: KnowledgeSnapshotCache = None):
+        super().__init__(db_gateway=db_gateway, presenter=presenter,
+                         snapshot_cache=snapshot_cache)
+
+    async def aget_last_log_per_problem_tag_combo(
+            self, problem_ids: List[int] = None,
+            tags_any: List[str] = None) -> pd.DataFrame:
+        snapshot = await self.snapshot_cache.aget(repo=self.repo)
+        if problem_ids is None and tags_any is None:
+            async def compute():
+                return self._add_knowledge_scores(
+                    log_data=await self.aspacing_state(snapshot=snapshot),
+                    ts=snapshot.ts)
+            return await snapshot.aview(LAST_LOG_VIEW, compute)
 
-        # negative days_over would make RF > 1
-        days_over = max(0, days_since_last_study - df_row.interval)
-
-        return exp(log(RETENTION_FRACTION_PER_T) * days_over / df_row.interval)
+        return self._add_knowledge_scores(
+            log_data=await self._acompute_last_entry_per_problem_tag_combo(
+                problem_ids=problem_ids, tags_any=tags_any),
+            ts=snapshot.ts)
+
+    async def aspacing_state(self,
+                             snapshot: KnowledgeSnapshot) -> pd.DataFrame:
+        """ Like spacing_state """
+        return await snapshot.astate(
+            SPACING_STATE, partial(self._acompute_spacing_state,
+                                   snapshot=snapshot),
+            key=SuperMemo2.config_hash())
+
+    async def _acompute_spacing_state(
+            self, snapshot: KnowledgeSnapshot) -> pd.DataFrame:
+        """ Like _compute_spacing_state """
+        previous = snapshot.previous_state(SPACING_STATE,
+                                           key=SuperMemo2.config_hash())
+        if previous is not None:
+            previous_version, state = previous
+            new_logs = await self.repo.aiter_problem_tag_logs_between(
+                since=previous_version, until=snapshot.data_version)
+            if new_logs is not None:
+                state = await SuperMemo2.afold_into(state=state,
+                                                    problem_tag_logs=new_logs)
+                if state is not None:
+                    return sort_by_due_date(state)
+
+        return sort_by_due_date(await SuperMemo2.afold(
+            await self.repo.aiter_problem_tag_logs_between(
+                since=None, until=snapshot.data_version)))
+
+    async def _acompute_last_entry_per_problem_tag_combo(
+            self, problem_ids: List[int] = None,
+            tags_any: List[str] = None) -> pd.DataFrame:
+        return sort_by_due_date(await SuperMemo2.afold(
+            self.repo.aiter_problem_tag_logs(problem_ids=problem_ids,
+                                             tags_any=tags_any)))
 
 
 class SuperMemo2:
@@ -111,12 +315,180 @@ class SuperMemo2:
         Result.SOLVED_OPTIMALLY_IN_UNDER_25: INTERVAL_SOLVED_OPTIMALLY_IN_UNDER_25}
 
     @classmethod
-    def add_spacing_data(cls, log_data: pd.DataFrame) -> pd.DataFrame:
-        """ The log_data DataFrame needs a column 'result' of type Result"""
+    def config_hash(cls) -> str:
+        """ Changes whenever one of the algorithm's parameters changes,
+        which invalidates previously computed spacing data """
+        params = (cls.DEFAULT_EASE, cls.EASE_DELTA, cls.MINIMUM_EASE,
+                  cls.INTERVAL_NON_OPTIMAL_SOLUTION,
+                  sorted((res.name, intv)
+                         for res, intv in cls.INITIAL_INTERVALS.items()))
+        return hashlib.sha256(repr(params).encode()).hexdigest()
+
+    @classmethod
+    def next_state(cls, prev_ease: float, prev_interval: float,
+                   result: Result) -> Tuple[float, int]:
+        """ Ease and interval after logging 'result' for a problem-tag-combo
+        whose last log left it at 'prev_ease' and 'prev_interval' (NaN or
+        None if it has never been logged) """
+        if prev_interval is None or pd.isna(prev_interval):
+            return cls.DEFAULT_EASE, cls._initial_interval(result)
+
+        ease = cls._next_ease(prev_ease=prev_ease, result=result)
+        return ease, cls._next_interval(ease=ease,
+                                        prev_interval=prev_interval,
+                                        result=result)
+
+    @classmethod
+    def fold(cls, problem_tag_logs: Iterable[ProblemLog]) -> pd.DataFrame:
+        """ Last log, ease and interval per problem-tag-combo, like
+        add_spacing_data on all logs followed by taking each combo's last
+        row. The logs must carry a single tag each and be ordered by
+        problem_id, tag and timestamp: only the current combo's state is
+        kept while folding. """
+        folded = _Fold(sm2=cls)
+        for p_l in problem_tag_logs:
+            folded.add(p_l)
+        return folded.to_df()
+
+    @classmethod
+    async def afold(cls, problem_tag_logs: AsyncIterable[ProblemLog]) \
+            -> pd.DataFrame:
+        """ fold, over logs that are streamed asynchronously """
+        folded = _Fold(sm2=cls)
+        async for p_l in problem_tag_logs:
+            folded.add(p_l)
+        return folded.to_df()
+
+    @classmethod
+    def fold_into(cls, state: pd.DataFrame,
+                  problem_tag_logs: Iterable[ProblemLog]) \
+            -> Union[pd.DataFrame, None]:
+        """ Resumes fold: 'state' (as returned by fold) updated with logs
+        that came after the folded ones, ordered like for fold. None if a
+        log precedes its combo's last folded log in time: then the combo's
+        history has to be folded anew. """
+        return cls._fold_into(state=state,
+                              problem_tag_logs=list(problem_tag_logs))
+
+    @classmethod
+    async def afold_into(cls, state: pd.DataFrame,
+                         problem_tag_logs: AsyncIterable[ProblemLog]) \
+            -> Union[pd.DataFrame, None]:
+        """ fold_into, over logs that are streamed asynchronously """
+        return cls._fold_into(
+            state=state,
+            problem_tag_logs=[p_l async for p_l in problem_tag_logs])
+
+    @classmethod
+    def _fold_into(cls, state: pd.DataFrame,
+                   problem_tag_logs: List[ProblemLog]) \
+            -> Union[pd.DataFrame, None]:
+        if not problem_tag_logs:
+            return state
+
+        touched = pd.MultiIndex.from_arrays([state.problem_id, state.tag]) \
+            .isin(list({(p_l.problem_id, p_l.tags[0].name)
+                        for p_l in problem_tag_logs}))
+        folded = _Fold(sm2=cls, initial={
+            tuple(row[:2]): tuple(row[2:])
+            for row in state.loc[touched, _Fold.COLUMNS].itertuples(
+                index=False, name=None)})
+        for p_l in problem_tag_logs:
+            folded.add(p_l)
+        if not folded.in_order:
+            return None
+
+        untouched = state.loc[~touched, _Fold.COLUMNS]
+        if untouched.empty:
+            return folded.to_df()
+        return pd.concat([untouched, folded.to_df()], ignore_index=True)
+
+    @classmethod
+    def add_spacing_data(cls, log_data: pd.DataFrame,
+                         workers: int = None) -> pd.DataFrame:
+        """ The log_data DataFrame needs a column 'result' of type Result.
+        With 'workers', the combos are sharded by problem_id and replayed
+        by that many processes (in this process, if workers=1). """
+        if log_data.empty:
+            return add_missing_columns(log_data,
+                                       required_columns=['ease', 'interval'])
+        if workers is not None:
+            return cls._add_spacing_data_sharded(log_data=log_data,
+                                                 workers=workers)
+
         return log_data \
-            .groupby(['problem_id', 'tag']) \
+            .groupby(['problem_id', 'tag'], group_keys=False) \
             .apply(cls._add_spacing_data)
 
+    @classmethod
+    def _add_spacing_data_sharded(cls, log_data: pd.DataFrame,
+                                  workers: int) -> pd.DataFrame:
+        """ Like the groupby-apply replay (rows ordered by combo, then by
+        time). Shards are sent to the workers as two compact arrays: where
+        a new combo starts and the result values. The workers' states are
+        written back by position, such that the output doesn't depend on
+        the number of workers. """
+        if workers < 1:
+            raise ValueError("'workers' must be at least 1!")
+        problem_ids = log_data.problem_id.to_numpy(dtype=np.int64)
+        tag_codes, _ = pd.factorize(log_data.tag, sort=True)
+        order = np.lexsort((to_utc_ns(log_data.ts_logged), tag_codes,
+                            problem_ids))
+        combo_starts = np.ones(len(order), dtype=bool)
+        combo_starts[1:] = (np.diff(problem_ids[order]) != 0) \
+            | (np.diff(tag_codes[order]) != 0)
+        results = log_data.result.map(RESULT_VALUES) \
+            .to_numpy(dtype=np.int8)[order]
+
+        shard_of = cls._shard(problem_ids[order], num_shards=workers)
+        shards = [np.flatnonzero(shard_of == shard) for shard in range(workers)]
+        args = ([combo_starts[pos] for pos in shards],
+                [results[pos] for pos in shards])
+        if workers == 1:
+            states = map(cls._replay, *args)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                states = list(executor.map(cls._replay, *args))
+
+        ease = np.empty(len(order))
+        interval = np.empty(len(order), dtype=np.int64)
+        for positions, (shard_ease, shard_interval) in zip(shards, states):
+            ease[positions] = shard_ease
+            interval[positions] = shard_interval
+
+        res = log_data.iloc[order].copy()
+        res['ease'] = ease
+        res['interval'] = interval
+        return res
+
+    @staticmethod
+    def _shard(problem_ids: np.ndarray, num_shards: int) -> np.ndarray:
+        """ Multiplicative hash of the problem_ids, such that consecutive
+        ids are spread over the shards """
+        hashed = (problem_ids.astype(np.uint64) * np.uint64(2654435761)) \
+            % np.uint64(2**32)
+        return (hashed % np.uint64(num_shards)).astype(np.int64)
+
+    @classmethod
+    def _replay(cls, combo_starts: np.ndarray,
+                results: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ Ease and interval after each log, for logs ordered by combo and
+        time """
+        ease = np.empty(len(results))
+        interval = np.empty(len(results), dtype=np.int64)
+        prev_ease, prev_interval = None, None
+        for idx, (start, result) in enumerate(zip(combo_starts.tolist(),
+                                                  results.tolist())):
+            if start:
+                prev_ease, prev_interval = None, None
+            prev_ease, prev_interval = cls.next_state(
+                prev_ease=prev_ease,
+                prev_interval=prev_interval,
+                result=RESULTS_BY_VALUE[result])
+            ease[idx] = prev_ease
+            interval[idx] = prev_interval
+        return ease, interval
+
     @classmethod
     def _add_spacing_data(cls, group_df: pd.DataFrame) -> pd.DataFrame:
         group_df.sort_values('ts_logged', inplace=True)
@@ -136,18 +508,21 @@ class SuperMemo2:
         group_df['ease'] = cls.DEFAULT_EASE
 
         for idx in range(1, len(group_df)):
-            ease = cls.DEFAULT_EASE
-            prev_ease = group_df.ease.iloc[idx-1]
-            if group_df.result.iloc[idx] == Result.KNEW_BY_HEART:
-                ease = prev_ease + cls.EASE_DELTA
-            elif group_df.result.iloc[idx] == Result.SOLVED_OPTIMALLY_IN_UNDER_25:
-                ease = prev_ease
-            elif group_df.result.iloc[idx] == Result.SOLVED_OPTIMALLY_SLOWER:
-                ease = max(prev_ease - cls.EASE_DELTA, cls.MINIMUM_EASE)
-
-            group_df.iloc[idx, group_df.columns.get_loc('ease')] = ease
+            group_df.iloc[idx, group_df.columns.get_loc('ease')] = \
+                cls._next_ease(prev_ease=group_df.ease.iloc[idx-1],
+                               result=group_df.result.iloc[idx])
         return group_df
 
+    @classmethod
+    def _next_ease(cls, prev_ease: float, result: Result) -> float:
+        if result == Result.KNEW_BY_HEART:
+            return prev_ease + cls.EASE_DELTA
+        if result == Result.SOLVED_OPTIMALLY_IN_UNDER_25:
+            return prev_ease
+        if result == Result.SOLVED_OPTIMALLY_SLOWER:
+            return max(prev_ease - cls.EASE_DELTA, cls.MINIMUM_EASE)
+        return cls.DEFAULT_EASE
+
     @classmethod
     def _add_interval(cls, group_df: pd.DataFrame) -> pd.DataFrame:
         """Part of 'SuperMemo2': If a problem was solved optimally, the spacing
@@ -157,25 +532,68 @@ class SuperMemo2:
 
         # initial attempt
         group_df.iloc[0, group_df.columns.get_loc('interval')] = \
-            cls.INITIAL_INTERVALS.get(group_df.result.iloc[0],
-                                      cls.INTERVAL_NON_OPTIMAL_SOLUTION)
+            cls._initial_interval(group_df.result.iloc[0])
 
         # follow-up attempts
         for idx in range(1, len(group_df)):
-            result = group_df.result.iloc[idx]
-            if result.value >= Result.SOLVED_OPTIMALLY_SLOWER.value:
-                # eventually reached the optimal result without help
-                new_interval = round(
-                    group_df.ease.iloc[idx] * group_df.interval.iloc[idx-1])
-
-                # don't repeat too soon just because last time was bad
-                new_interval = max(new_interval, cls.INITIAL_INTERVALS[result])
-
-                group_df.iloc[idx, group_df.columns.get_loc('interval')] = \
-                    new_interval
-            else:
-                # did not find the optimal solution (without hint) -> start over
-                group_df.iloc[idx, group_df.columns.get_loc('interval')] = \
-                    cls.INTERVAL_NON_OPTIMAL_SOLUTION
+            group_df.iloc[idx, group_df.columns.get_loc('interval')] = \
+                cls._next_interval(ease=group_df.ease.iloc[idx],
+                                   prev_interval=group_df.interval.iloc[idx-1],
+                                   result=group_df.result.iloc[idx])
 
         return group_df
+
+    @classmethod
+    def _initial_interval(cls, result: Result) -> int:
+        return cls.INITIAL_INTERVALS.get(result,
+                                         cls.INTERVAL_NON_OPTIMAL_SOLUTION)
+
+    @classmethod
+    def _next_interval(cls, ease: float, prev_interval: int,
+                       result: Result) -> int:
+        if result.value >= Result.SOLVED_OPTIMALLY_SLOWER.value:
+            # eventually reached the optimal result without help
+            new_interval = round(ease * prev_interval)
+
+            # don't repeat too soon just because last time was bad
+            return max(new_interval, cls.INITIAL_INTERVALS[result])
+
+        # did not find the optimal solution (without hint) -> start over
+        return cls.INTERVAL_NON_OPTIMAL_SOLUTION
+
+
+class _Fold:
+    """ State of SuperMemo2.fold: the final rows of the finished combos and
+    the running state of the current one. Combos in 'initial' resume from
+    the given state (ts_logged, result, ease, interval). """
+    COLUMNS = ['problem_id', 'tag', 'ts_logged', 'result', 'ease', 'interval']
+
+    def __init__(self, sm2: type,
+                 initial: Dict[Tuple[int, str], tuple] = None):
+        self.sm2 = sm2
+        self.initial = initial or {}
+        self.rows = []
+        self.combo = None
+        self.state = None
+        self.in_order = True
+
+    def add(self, p_l: ProblemLog) -> None:
+        if (p_l.problem_id, p_l.tags[0].name) != self.combo:
+            if self.combo is not None:
+                self.rows.append(self.combo + self.state)
+            self.combo = (p_l.problem_id, p_l.tags[0].name)
+            self.state = self.initial.get(self.combo, (None, None, None, None))
+        if self.state[0] is not None and p_l.timestamp < self.state[0]:
+            self.in_order = False
+        ease, interval = self.sm2.next_state(prev_ease=self.state[2],
+                                             prev_interval=self.state[3],
+                                             result=p_l.result)
+        self.state = (p_l.timestamp, p_l.result, ease, interval)
+
+    def to_df(self) -> pd.DataFrame:
+        rows = self.rows if self.combo is None \
+            else self.rows + [self.combo + self.state]
+        if not rows:
+            return add_missing_columns(pd.DataFrame(),
+                                       required_columns=self.COLUMNS)
+        return pd.DataFrame.from_records(rows, columns=self.COLUMNS)
@@ -3,7 +3,10 @@ priority and passes the data on to the presenter.
 
 Details on per-tag priority are described in the README"""
 
+import asyncio
 import dataclasses
+import datetime as dt
+from functools import partial
 from typing import List
 
 import numpy as np
@@ -11,33 +14,74 @@ import pandas as pd
 
 from spaced_repetition.domain.problem import Difficulty
 from spaced_repetition.domain.tag import Tag
-from .db_gateway_interface import DBGatewayInterface
-from .get_problem import ProblemGetter
-from .helpers_pandas import add_missing_columns, case_insensitive_sort
+from .concurrent_reads import run_reads
+from .db_gateway_interface import AsyncDBGatewayInterface, DBGatewayInterface
+from .get_problem import AsyncProblemGetter, ProblemGetter
+from .get_problem_log import ProblemLogGetter
+from .helpers_pandas import add_missing_columns, sort_page
+from .knowledge_snapshot import KnowledgeSnapshotCache
 from .presenter_interface import PresenterInterface
 
 
+DIFFICULTY_WEIGHTS = {Difficulty.EASY: 0.5,
+                      Difficulty.MEDIUM: 0.75,
+                      Difficulty.HARD: 1.0}
+PRIORITIZED_TAGS_VIEW = 'prioritized_tags'
+
+
 class TagGetter:
     def __init__(self, db_gateway: DBGatewayInterface,
-                 presenter: PresenterInterface):
+                 presenter: PresenterInterface,
+                 snapshot_cache: KnowledgeSnapshotCache = None,
+                 concurrent_reads: bool = False):
+        """ With 'concurrent_reads', tags, problems and logs are fetched at
+        the same time, in separate threads """
         self.repo = db_gateway
         self.presenter = presenter
+        self.snapshot_cache = snapshot_cache or KnowledgeSnapshotCache()
+        self.concurrent_reads = concurrent_reads
+
+    def list_tags(self, sorted_by: List[str] = None, sub_str: str = None,
+                  limit: int = None, offset: int = 0):
+        self.presenter.list_tags(
+            self.get_prioritized_tags(sorted_by=sorted_by, sub_str=sub_str,
+                                      limit=limit, offset=offset))
+
+    def get_prioritized_tags(self, sorted_by: List[str] = None,
+                             sub_str: str = None, limit: int = None,
+                             offset: int = 0) -> pd.DataFrame:
+        if sub_str:
+            tag_df = self._get_prioritized_tags(sub_str=sub_str)
+        else:
+            tag_df = self.snapshot_cache \
+                .get(repo=self.repo) \
+                .view(PRIORITIZED_TAGS_VIEW, self._get_prioritized_tags)
 
-    def list_tags(self, sorted_by: List[str] = None, sub_str: str = None):
-        tag_df = self._get_prioritized_tags(sub_str=sub_str)
+        return sort_page(tag_df, sorted_by=sorted_by or 'priority',
+                         limit=limit, offset=offset)
 
-        tag_df.sort_values(by=sorted_by or 'priority',
-                           inplace=True,
-                           key=case_insensitive_sort,
-                           na_position='first')
+    def list_forecast(self, days: int):
+        self.presenter.list_tag_forecast(self.get_forecast(days=days))
 
-        self.presenter.list_tags(tag_df)
+    def get_forecast(self, days: int) -> pd.DataFrame:
+        """ Tag knowledge (= priority) per tag today and on each of the
+        next 'days' days (one column per date), if no problem is studied
+        until then. Lowest knowledge at the end of the forecast first. """
+        if days < 0:
+            raise ValueError("'days' must not be negative!")
+        return self._forecast_tags(
+            tag_data=self._get_tag_data(),
+            ts=self.snapshot_cache.get(repo=self.repo).ts,
+            days=days)
 
     def get_existing_tags(self, names: List[str]) -> List[Tag]:
         """ Returns tags with the given names, and raises ValueError
         if at least one of them does not exist. """
-        tags = self.repo.get_tags(names=names)
+        return self._check_existing(tags=self.repo.get_tags(names=names),
+                                    names=names)
 
+    @staticmethod
+    def _check_existing(tags: List[Tag], names: List[str]) -> List[Tag]:
         if len(tags) < len(names):
             existing_tags = {tag.name for tag in tags}
             non_existing_tags = set(names).difference(existing_tags)
@@ -46,17 +90,30 @@ class TagGetter:
         return tags
 
     def _get_prioritized_tags(self, sub_str: str = None) -> pd.DataFrame:
-        tag_df = self._get_tags(sub_str=sub_str)
+        return self._prioritize_tags(tag_data=self._get_tag_data(
+            sub_str=sub_str))
 
+    def _get_tag_data(self, sub_str: str = None) -> pd.DataFrame:
+        """ Tags with the knowledge status of their problem-tag-combos """
         problem_getter = ProblemGetter(db_gateway=self.repo,
-                                       presenter=self.presenter)
-        knowledge_status = problem_getter.get_knowledge_status()
-
-        tag_data = self._merge_tag_and_knowledge_data(
+                                       presenter=self.presenter,
+                                       snapshot_cache=self.snapshot_cache,
+                                       concurrent_reads=self.concurrent_reads)
+        if sub_str:
+            tag_df = self._get_tags(sub_str=sub_str)
+            knowledge_status = problem_getter.get_knowledge_status(
+                tag_names=tag_df.tag.to_list())
+        else:
+            # all tags and the knowledge status are independent reads
+            tag_df, knowledge_status = run_reads(
+                repo=self.repo,
+                reads=[partial(self._get_tags, sub_str=None),
+                       partial(problem_getter.get_knowledge_status,
+                               tag_names=None)],
+                concurrent=self.concurrent_reads)
+        return self._merge_tag_and_knowledge_data(
             tag_data=tag_df, knowledge_data=knowledge_status)
 
-        return self._prioritize_tags(tag_data=tag_data)
-
     @staticmethod
     def _merge_tag_and_knowledge_data(tag_data: pd.DataFrame,
                                       knowledge_data: pd.DataFrame) -> pd.DataFrame:
@@ -66,8 +123,10 @@ class TagGetter:
                         how='left')  # to allow filtering for specific tags
 
     def _get_tags(self, sub_str: str = None) -> pd.DataFrame:
-        tags = self.repo.get_tags(sub_str=sub_str)
+        return self._tags_to_df(self.repo.get_tags(sub_str=sub_str))
 
+    @staticmethod
+    def _tags_to_df(tags: List[Tag]) -> pd.DataFrame:
         tag_df = pd.DataFrame(data=[dataclasses.asdict(tag) for tag in tags]) \
             .rename(columns={'name': 'tag'})
         return add_missing_columns(tag_df,
@@ -80,41 +139,132 @@ class TagGetter:
                 df=pd.DataFrame(),
                 required_columns=['experience', 'KW (weighted avg)',
                                   'num_problems', 'priority', 'tags'])
-        return tag_data \
+
+        counts = tag_data \
             .groupby('tag') \
-            .apply(cls._prioritize) \
+            .agg(num_problems=('problem', 'count'),
+                 num_logged=('ts_logged', 'count'))
+
+        weighted_ks = cls._weighted_knowledge_score(tag_data=tag_data) \
+            .reindex(counts.index, fill_value=0.0)
+        experience = cls._experience(num_logged=counts.num_logged)
+
+        return pd.DataFrame(
+            data={'experience': experience.astype(float),
+                  'KS (weighted avg)': weighted_ks,
+                  'num_problems': counts.num_problems.astype('int64'),
+                  'priority': weighted_ks * experience}) \
             .reset_index() \
             .sort_values(['priority', 'KS (weighted avg)'])
 
+    @staticmethod
+    def _experience(num_logged: pd.Series) -> pd.Series:
+        return np.minimum(1.0, num_logged / 5)
+
     @classmethod
-    def _prioritize(cls, group_df: pd.DataFrame) -> pd.Series:
-        easy_avg_ks = cls._mean_knowledge_score(df=group_df,
-                                                difficulty=Difficulty.EASY)
-        med_avg_ks = cls._mean_knowledge_score(df=group_df,
-                                               difficulty=Difficulty.MEDIUM)
-        hard_avg_ks = cls._mean_knowledge_score(df=group_df,
-                                                difficulty=Difficulty.HARD)
-
-        weighted_ks = max(0.5 * easy_avg_ks,
-                          0.75 * med_avg_ks,
-                          hard_avg_ks)
-        experience = min(1.0, group_df.ts_logged.count() / 5)
-        priority = weighted_ks * experience
-
-        return pd.Series(
-            data={
-                'experience': experience,
-                'KS (weighted avg)': weighted_ks,
-                'num_problems': group_df.problem.count(),
-                'priority': priority
-            },
-            dtype='object')
+    def _weighted_knowledge_score(cls, tag_data: pd.DataFrame) -> pd.Series:
+        """ max(0.5 * avg_easy_ks, 0.75 * avg_med_ks, avg_hard_ks) per tag,
+        where problems that have never been done are ignored. """
+        return cls._weighted_knowledge_scores(tags=tag_data.tag,
+                                              difficulty=tag_data.difficulty,
+                                              knowledge=tag_data[['KS']]).KS
 
     @staticmethod
-    def _mean_knowledge_score(df: pd.DataFrame, difficulty: Difficulty):
-        # problems that have never been done should be ignored
-        ks = df \
-            .loc[df.difficulty == difficulty, 'KS'] \
+    def _weighted_knowledge_scores(tags: pd.Series, difficulty: pd.Series,
+                                   knowledge: pd.DataFrame) -> pd.DataFrame:
+        """ _weighted_knowledge_score of each column of KS values """
+        weights = difficulty.map(DIFFICULTY_WEIGHTS).rename('weight')
+
+        # rows: (tag, difficulty weight), values: mean KS
+        mean_ks = knowledge \
+            .groupby([tags, weights]) \
             .mean()
 
-        return ks if ks is not np.nan else 0
+        return mean_ks \
+            .mul(mean_ks.index.get_level_values('weight').to_numpy(dtype=float),
+                 axis='index') \
+            .groupby(level='tag') \
+            .max() \
+            .fillna(0.0) \
+            .astype(float)
+
+    @classmethod
+    def _forecast_tags(cls, tag_data: pd.DataFrame, ts: dt.datetime,
+                       days: int) -> pd.DataFrame:
+        """ Like _prioritize_tags, for KS and RF forecast over the dates """
+        dates = [(ts + dt.timedelta(days=day)).strftime('%Y-%m-%d')
+                 for day in range(days + 1)]
+        if tag_data.empty:
+            return add_missing_columns(df=pd.DataFrame(),
+                                       required_columns=['tag'] + dates)
+
+        _, knowledge = ProblemLogGetter.forecast_knowledge_scores(
+            log_data=tag_data, ts=ts, days=days)
+        num_logged = tag_data \
+            .groupby('tag') \
+            .ts_logged \
+            .count()
+        weighted_ks = cls._weighted_knowledge_scores(
+            tags=tag_data.tag, difficulty=tag_data.difficulty,
+            knowledge=pd.DataFrame(knowledge, columns=dates,
+                                   index=tag_data.index)) \
+            .reindex(num_logged.index, fill_value=0.0)
+
+        return weighted_ks \
+            .mul(cls._experience(num_logged=num_logged), axis='index') \
+            .reset_index() \
+            .sort_values([dates[-1], 'tag'])
+
+
+class AsyncTagGetter(TagGetter):
+    """ TagGetter for gateways with async methods (web deployments) """
+    def __init__(self, db_gateway: AsyncDBGatewayInterface,
+                 presenter: PresenterInterface,
+                 snapshot_cache: KnowledgeSnapshotCache = None):
+        super().__init__(db_gateway=db_gateway, presenter=presenter,
+                         snapshot_cache=snapshot_cache)
+
+    async def alist_tags(self, sorted_by: List[str] = None,
+                         sub_str: str = None, limit: int = None,
+                         offset: int = 0):
+        self.presenter.list_tags(
+            await self.aget_prioritized_tags(sorted_by=sorted_by,
+                                             sub_str=sub_str,
+                                             limit=limit, offset=offset))
+
+    async def aget_prioritized_tags(self, sorted_by: List[str] = None,
+                                    sub_str: str = None, limit: int = None,
+                                    offset: int = 0) -> pd.DataFrame:
+        if sub_str:
+            tag_df = await self._aget_prioritized_tags(sub_str=sub_str)
+        else:
+            snapshot = await self.snapshot_cache.aget(repo=self.repo)
+            tag_df = await snapshot.aview(PRIORITIZED_TAGS_VIEW,
+                                          self._aget_prioritized_tags)
+
+        return sort_page(tag_df, sorted_by=sorted_by or 'priority',
+                         limit=limit, offset=offset)
+
+    async def aget_existing_tags(self, names: List[str]) -> List[Tag]:
+        """ Like get_existing_tags """
+        return self._check_existing(
+            tags=await self.repo.aget_tags(names=names), names=names)
+
+    async def _aget_prioritized_tags(self,
+                                     sub_str: str = None) -> pd.DataFrame:
+        problem_getter = AsyncProblemGetter(db_gateway=self.repo,
+                                            presenter=self.presenter,
+                                            snapshot_cache=self.snapshot_cache)
+        if sub_str:
+            tag_df = await self._aget_tags(sub_str=sub_str)
+            knowledge_status = await problem_getter.aget_knowledge_status(
+                tag_names=tag_df.tag.to_list())
+        else:
+            tag_df, knowledge_status = await asyncio.gather(
+                self._aget_tags(sub_str=None),
+                problem_getter.aget_knowledge_status(tag_names=None))
+        return self._prioritize_tags(tag_data=self._merge_tag_and_knowledge_data(
+            tag_data=tag_df, knowledge_data=knowledge_status))
+
+    async def _aget_tags(self, sub_str: str = None) -> pd.DataFrame:
+        return self._tags_to_df(await self.repo.aget_tags(sub_str=sub_str))
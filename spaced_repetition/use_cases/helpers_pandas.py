@@ -1,8 +1,11 @@
 """Time serialization"""
 
-from typing import List
+from itertools import chain
+from typing import List, Union
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
 
 
 TYPE_MAPPER = {
@@ -20,25 +23,35 @@ TYPE_MAPPER = {
 
 
 def add_missing_columns(df, required_columns: List[str]):
-    """ Adds missing columns of expected type """
-    df = df.copy()
-    for col in required_columns:
-        if col not in df.columns:
-            df[col] = pd.Series(dtype=TYPE_MAPPER.get(col, float))
-    return df
+    """ Adds missing columns of expected type. The columns of 'df' are
+    shared, not copied: 'df' itself is returned if no column is missing. """
+    missing = [col for col in required_columns if col not in df.columns]
+    if not missing:
+        return df
+    return pd.concat(
+        [df] + [pd.Series(dtype=TYPE_MAPPER.get(col, float), name=col)
+                .reindex(df.index) for col in missing],
+        axis=1,
+        copy=False)
 
 
 def denormalize_tags(df: pd.DataFrame) -> pd.DataFrame:
     """ For a DataFrame with a column 'tags' that contains comma-space-separated
     tags, denormalize the 'tags' column. """
     if df.empty:
-        return add_missing_columns(df, required_columns=['tag'])
+        return add_missing_columns(df.drop(columns='tags', errors='ignore'),
+                                   required_columns=['tag'])
 
-    df = df.copy()
-    df['tags'] = df['tags'].str.split(', ')
-    return df \
-        .explode('tags', ignore_index=True) \
-        .rename(columns={'tags': 'tag'})
+    # like df.explode('tags'), but taking each row once, without the
+    # intermediate copies of explode and rename
+    tags = df['tags'].str.split(', ')
+    num_tags = tags.str.len().fillna(1).to_numpy(dtype=int)
+    res = df.take(np.repeat(np.arange(len(df)), num_tags))
+    res['tags'] = list(chain.from_iterable(
+        tag_list if isinstance(tag_list, list) else [tag_list]
+        for tag_list in tags))
+    res.index = pd.RangeIndex(len(res))
+    return res.rename(columns={'tags': 'tag'}, copy=False)
 
 
 def case_insensitive_sort(col):
@@ -46,3 +59,53 @@ def case_insensitive_sort(col):
     if col.dtype == 'object':
         return col.str.lower()
     return col
+
+
+def sort_page(df: pd.DataFrame, sorted_by: Union[str, List[str]],
+              limit: int = None, offset: int = 0) -> pd.DataFrame:
+    """ Rows offset .. offset + limit of 'df', sorted case-insensitively by
+    'sorted_by' with NaN first. With a limit and a numeric first sort
+    column, only the rows that can end up on the page are sorted. """
+    if (limit is not None and limit < 0) or offset < 0:
+        raise ValueError("'limit' and 'offset' must not be negative!")
+    sorted_by = [sorted_by] if isinstance(sorted_by, str) else list(sorted_by)
+    end = None if limit is None else offset + limit
+
+    if end is not None and end < len(df) \
+            and is_numeric_dtype(df[sorted_by[0]]):
+        primary = df[sorted_by[0]].to_numpy(dtype=float)
+        primary = np.where(np.isnan(primary), -np.inf, primary)  # NaN first
+        df = df[_k_smallest_candidates(primary=primary, k=end)]
+
+    # sort only the key columns, then take the page's rows once
+    order = df[sorted_by] \
+        .reset_index(drop=True) \
+        .sort_values(by=sorted_by,
+                     key=case_insensitive_sort,
+                     kind='mergesort',
+                     na_position='first') \
+        .index
+    return df.iloc[order[offset:end]]
+
+
+def k_smallest_positions(primary: np.ndarray, secondary: np.ndarray,
+                         k: int) -> np.ndarray:
+    """ Positions of the k smallest entries, ordered by 'primary', then
+    'secondary' - without sorting all entries: O(n + m log m), where m is
+    k plus the number of entries tied with the k-th smallest primary value.
+    NaN entries must be filled beforehand. """
+    if k <= 0 or len(primary) == 0:
+        return np.array([], dtype=int)
+
+    candidates = np.flatnonzero(_k_smallest_candidates(primary=primary, k=k))
+    order = np.lexsort((secondary[candidates], primary[candidates]))
+    return candidates[order[:k]]
+
+
+def _k_smallest_candidates(primary: np.ndarray, k: int) -> np.ndarray:
+    """ Mask of the k smallest entries, including all entries tied with
+    the k-th smallest one (argpartition-style selection, O(n)) """
+    if k >= len(primary):
+        return np.ones(len(primary), dtype=bool)
+    kth_value = np.partition(primary, k - 1)[k - 1]
+    return primary <= kth_value
@@ -0,0 +1,211 @@
+""" The knowledge status of all problem-tag-combos at one point in time.
+
+Deriving it means fetching all problems and logs and replaying SuperMemo2
+over the whole log history. A KnowledgeSnapshot holds the computed views
+for one data version and evaluation timestamp, such that the problem-, tag-
+and combo-views can be derived from a single computation.
+
+Time-independent state (e.g. the SuperMemo2 spacing data per combo) only
+depends on the data version. It is carried over to later snapshots of the
+same data version and, if a cache is configured, persisted across
+processes. The states of the previous data version are kept, too, such that
+a state can be updated with the data added since instead of recomputed.
+Coroutines share computations, too: a view or state that is being computed
+is awaited by all coroutines that need it (on the same event loop)."""
+
+import asyncio
+import datetime as dt
+import hashlib
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, Union
+
+import pandas as pd
+from dateutil.tz import gettz
+
+from .cache_interface import CacheInterface
+from .db_gateway_interface import AsyncDBGatewayInterface, DBGatewayInterface
+
+
+SNAPSHOT_RESOLUTION = dt.timedelta(minutes=1)
+
+
+def evaluation_ts(ts: dt.datetime = None) -> dt.datetime:
+    """ Current time, floored to SNAPSHOT_RESOLUTION. Within that time
+    bucket, snapshots are reused (RF hardly changes within a minute). """
+    if ts is not None:
+        return ts
+
+    now = dt.datetime.now(tz=gettz('UTC'))
+    epoch = dt.datetime(1970, 1, 1, tzinfo=gettz('UTC'))
+    return now - (now - epoch) % SNAPSHOT_RESOLUTION
+
+
+States = Dict[Tuple[str, str], pd.DataFrame]
+
+
+class KnowledgeSnapshot:
+    def __init__(self, data_version: Hashable, ts: dt.datetime,
+                 states: States = None,
+                 persistent_cache: CacheInterface = None,
+                 previous: Tuple[Hashable, States] = None):
+        """ 'previous': an earlier data version and its states """
+        self.data_version = data_version
+        self.ts = ts
+        self._persistent_cache = persistent_cache
+        self._states = states if states is not None else {}
+        self._previous = previous
+        self._views: Dict[str, pd.DataFrame] = {}
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    def has_view(self, name: str) -> bool:
+        return name in self._views
+
+    def view(self, name: str,
+             compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """ Returns the named view, computing it on first access.
+        Views are shared between getters: treat them as read-only. """
+        if name not in self._views:
+            self._views[name] = compute()
+        return self._views[name]
+
+    def state(self, name: str, compute: Callable[[], pd.DataFrame],
+              key: str = '') -> pd.DataFrame:
+        """ Returns the named time-independent state, valid for this data
+        version and 'key' (e.g. a hash of the algorithm's parameters).
+        It is loaded from the persistent cache if possible, else computed
+        and stored. Treat it as read-only. """
+        cache_key = self._cache_key(key=key)
+        if (name, cache_key) in self._states:
+            return self._states[(name, cache_key)]
+
+        df = None
+        if self._persistent_cache is not None:
+            df = self._persistent_cache.load(name=name, key=cache_key)
+        if df is None:
+            df = compute()
+            if self._persistent_cache is not None:
+                self._persistent_cache.save(name=name, key=cache_key, df=df)
+
+        self._states[(name, cache_key)] = df
+        return df
+
+    def previous_state(self, name: str, key: str = '') \
+            -> Union[Tuple[Hashable, pd.DataFrame], None]:
+        """ The earlier data version and its named state for 'key', if
+        that is held: to update it instead of computing the state anew.
+        Treat it as read-only. """
+        if self._previous is None:
+            return None
+
+        data_version, states = self._previous
+        df = states.get(
+            (name, self._cache_key(key=key, data_version=data_version)))
+        return None if df is None else (data_version, df)
+
+    async def aview(self, name: str,
+                    compute: Callable[[], Awaitable[pd.DataFrame]]) -> pd.DataFrame:
+        """ Like view, for a coroutine function 'compute' """
+        if name not in self._views:
+            self._views[name] = await self._single_flight(
+                ('view', name), compute)
+        return self._views[name]
+
+    async def astate(self, name: str,
+                     compute: Callable[[], Awaitable[pd.DataFrame]],
+                     key: str = '') -> pd.DataFrame:
+        """ Like state, for a coroutine function 'compute' """
+        cache_key = self._cache_key(key=key)
+        if (name, cache_key) in self._states:
+            return self._states[(name, cache_key)]
+
+        async def load_or_compute() -> pd.DataFrame:
+            df = None
+            if self._persistent_cache is not None:
+                df = self._persistent_cache.load(name=name, key=cache_key)
+            if df is None:
+                df = await compute()
+                if self._persistent_cache is not None:
+                    self._persistent_cache.save(name=name, key=cache_key,
+                                                df=df)
+            return df
+
+        self._states[(name, cache_key)] = await self._single_flight(
+            ('state', name, cache_key), load_or_compute)
+        return self._states[(name, cache_key)]
+
+    async def _single_flight(self, key: Hashable,
+                             compute: Callable[[], Awaitable[pd.DataFrame]]):
+        """ Runs 'compute' once for all coroutines awaiting 'key' at the
+        same time """
+        pending = self._pending.get(key)
+        if pending is None \
+                or pending.get_loop() is not asyncio.get_running_loop():
+            pending = asyncio.ensure_future(compute())
+            self._pending[key] = pending
+
+            def forget(future: asyncio.Future):
+                if self._pending.get(key) is future:
+                    del self._pending[key]
+            pending.add_done_callback(forget)
+        # a cancelled waiter doesn't cancel the computation for the others
+        return await asyncio.shield(pending)
+
+    def _cache_key(self, key: str, data_version: Hashable = None) -> str:
+        if data_version is None:
+            data_version = self.data_version
+        return hashlib.sha256(
+            repr((data_version, key)).encode()).hexdigest()
+
+
+class KnowledgeSnapshotCache:
+    """ Holds the latest KnowledgeSnapshot and replaces it as soon as the
+    data version or the evaluation timestamp change. Share one instance
+    between getters to compute the knowledge status only once. """
+
+    def __init__(self, persistent_cache: CacheInterface = None):
+        self._persistent_cache = persistent_cache
+        self._snapshot = None
+        self._previous = None
+
+    def get(self, repo: DBGatewayInterface,
+            ts: dt.datetime = None) -> KnowledgeSnapshot:
+        return self._snapshot_for(data_version=repo.get_data_version(),
+                                  ts=evaluation_ts(ts))
+
+    async def aget(self, repo: AsyncDBGatewayInterface,
+                   ts: dt.datetime = None) -> KnowledgeSnapshot:
+        return self._snapshot_for(data_version=await repo.aget_data_version(),
+                                  ts=evaluation_ts(ts))
+
+    def _snapshot_for(self, data_version: Hashable,
+                      ts: dt.datetime) -> KnowledgeSnapshot:
+        if self._snapshot is not None \
+                and self._snapshot.data_version == data_version \
+                and self._snapshot.ts == ts:
+            return self._snapshot
+
+        states = None
+        if self._snapshot is not None \
+                and self._snapshot.data_version == data_version:
+            states = self._snapshot._states  # pylint: disable=protected-access
+        else:
+            self._keep_previous()
+        self._snapshot = KnowledgeSnapshot(
+            data_version=data_version,
+            ts=ts,
+            states=states,
+            persistent_cache=self._persistent_cache,
+            previous=self._previous)
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        """ Drops the snapshot. Its states may still be updated to the
+        next data version. """
+        self._keep_previous()
+        self._snapshot = None
+
+    def _keep_previous(self) -> None:
+        """ Keeps the states of the snapshot as the previous ones, unless
+        it has none (e.g. if only views were derived from it) """
+        if self._snapshot is not None and self._snapshot._states:  # pylint: disable=protected-access
+            self._previous = (self._snapshot.data_version,
+                              self._snapshot._states)  # pylint: disable=protected-access
@@ -1,9 +1,10 @@
 from typing import List, Union
 
+from spaced_repetition.domain.problem import Problem
 from spaced_repetition.domain.problem_log import (ProblemLog, ProblemLogCreator,
                                                   Result)
-from .db_gateway_interface import DBGatewayInterface
-from .get_tag import TagGetter
+from .db_gateway_interface import AsyncDBGatewayInterface, DBGatewayInterface
+from .get_tag import AsyncTagGetter, TagGetter
 from .presenter_interface import PresenterInterface
 
 
@@ -14,23 +15,58 @@ class ProblemLogger:
         self.presenter = presenter
 
     def log_problem(self, comment: str, problem_name: str, result: Result,
-                    tags: List[str]):
+                    tags: List[str]) -> ProblemLog:
+        problem = self._first_problem(
+            problems=self.repo.get_problems(name=problem_name),
+            problem_name=problem_name)
+
+        tag_getter = TagGetter(db_gateway=self.repo, presenter=self.presenter)
+
+        problem_log = ProblemLogCreator.create(
+            comment=comment,
+            problem_id=problem.problem_id,
+            result=result,
+            tags=tag_getter.get_existing_tags(names=tags))
+
+        self.repo.create_problem_log(problem_log=problem_log)
+
+        self.presenter.confirm_problem_logged(problem=problem,
+                                              problem_log=problem_log)
+        return problem_log
+
+    @staticmethod
+    def _first_problem(problems: List[Problem], problem_name: str) -> Problem:
         try:
-            problem = self.repo.get_problems(name=problem_name)[0]
+            return problems[0]
         except IndexError:
             raise ValueError(
                 f"Problem with name '{problem_name}' does not exist, "
                 "try searching for similar problems.")
 
-        tag_getter = TagGetter(db_gateway=self.repo, presenter=self.presenter)
+
+class AsyncProblemLogger(ProblemLogger):
+    """ ProblemLogger for gateways with async methods (web deployments) """
+    def __init__(self, db_gateway: AsyncDBGatewayInterface,
+                 presenter: PresenterInterface):
+        super().__init__(db_gateway=db_gateway, presenter=presenter)
+
+    async def alog_problem(self, comment: str, problem_name: str,
+                           result: Result, tags: List[str]) -> ProblemLog:
+        problem = self._first_problem(
+            problems=await self.repo.aget_problems(name=problem_name),
+            problem_name=problem_name)
+
+        tag_getter = AsyncTagGetter(db_gateway=self.repo,
+                                    presenter=self.presenter)
 
         problem_log = ProblemLogCreator.create(
             comment=comment,
             problem_id=problem.problem_id,
             result=result,
-            tags=tag_getter.get_existing_tags(names=tags))
+            tags=await tag_getter.aget_existing_tags(names=tags))
 
-        self.repo.create_problem_log(problem_log=problem_log)
+        await self.repo.acreate_problem_log(problem_log=problem_log)
 
         self.presenter.confirm_problem_logged(problem=problem,
                                               problem_log=problem_log)
+        return problem_log
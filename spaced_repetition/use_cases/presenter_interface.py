@@ -43,3 +43,20 @@ class PresenterInterface(ABC):
     @abstractmethod
     def list_tags(cls, tags: pd.DataFrame) -> None:
         pass
+
+    @classmethod
+    @abstractmethod
+    def list_tag_forecast(cls, forecast: pd.DataFrame) -> None:
+        """ 'forecast': column 'tag' and one column per date """
+
+    @classmethod
+    @abstractmethod
+    def list_workload(cls, workload: pd.DataFrame) -> None:
+        """ 'workload': column 'date', the total 'due' and optionally one
+        column per tag """
+
+    @classmethod
+    @abstractmethod
+    def show_dashboard(cls, tags: pd.DataFrame, problems: pd.DataFrame,
+                       problem_tag_combos: pd.DataFrame) -> None:
+        pass
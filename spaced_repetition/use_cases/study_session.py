@@ -0,0 +1,103 @@
+""" A study session repeatedly offers the most urgent problem-tag-combo and
+records the results.
+
+The knowledge status is loaded once. Logging a result stores the ProblemLog
+and then only advances the affected combo's SM2 state, RF and KS in memory.
+The full log history does not need to be replayed again."""
+
+from typing import Set
+
+import pandas as pd
+
+from spaced_repetition.domain.problem_log import Result
+from .db_gateway_interface import DBGatewayInterface
+from .get_problem import ProblemGetter
+from .get_problem_log import RESULT_VALUES, SuperMemo2
+from .knowledge_snapshot import KnowledgeSnapshotCache, evaluation_ts
+from .log_problem import ProblemLogger
+from .presenter_interface import PresenterInterface
+
+
+class StudySession:
+    def __init__(self, db_gateway: DBGatewayInterface,
+                 presenter: PresenterInterface,
+                 snapshot_cache: KnowledgeSnapshotCache = None,
+                 tag: str = None):
+        self.repo = db_gateway
+        self.presenter = presenter
+        self.snapshot_cache = snapshot_cache or KnowledgeSnapshotCache()
+        self.tag = tag
+
+        self._combos = None
+        self._current = None
+        self._skipped: Set = set()
+
+    def show_next(self) -> bool:
+        """ Presents the most urgent problem-tag-combo, returns False if
+        there is none left """
+        next_combo = self._get_next_combo()
+        if next_combo.empty:
+            self._current = None
+            return False
+
+        self._current = next_combo.index[0]
+        self.presenter.list_problem_tag_combos(next_combo)
+        return True
+
+    def skip(self) -> None:
+        """ Don't offer the current combo again in this session """
+        self._skipped.add(self._require_current())
+
+    def log_result(self, result: Result, comment: str = '') -> None:
+        """ Logs the result for the current combo and updates it in memory """
+        current = self._require_current()
+        combo = self._combos.loc[current]
+
+        problem_log = ProblemLogger(db_gateway=self.repo,
+                                    presenter=self.presenter) \
+            .log_problem(comment=comment,
+                         problem_name=combo.problem,
+                         result=result,
+                         tags=[combo.tag])
+
+        ease, interval = SuperMemo2.next_state(prev_ease=combo.ease,
+                                               prev_interval=combo.interval,
+                                               result=result)
+        updates = {'ts_logged': pd.Timestamp(problem_log.timestamp)
+                                  .tz_convert('UTC'),
+                   'result': result,
+                   'ease': ease,
+                   'interval': interval,
+                   'RF': 1.0,  # just repeated
+                   'KS': float(RESULT_VALUES[result])}
+        for col, value in updates.items():
+            self._combos.at[current, col] = value
+
+    def _get_next_combo(self) -> pd.DataFrame:
+        combos = self._get_combos()
+        if self._skipped:
+            combos = combos[~combos.index.isin(self._skipped)]
+
+        return ProblemGetter.select_next_combos(knowledge_status=combos,
+                                                k=1,
+                                                ts=evaluation_ts())
+
+    def _get_combos(self) -> pd.DataFrame:
+        if self._combos is None:
+            problem_getter = ProblemGetter(db_gateway=self.repo,
+                                           presenter=self.presenter,
+                                           snapshot_cache=self.snapshot_cache)
+            if self.tag is None:
+                knowledge_status = problem_getter.get_knowledge_status()
+            else:
+                knowledge_status = problem_getter.get_knowledge_status(
+                    tag_names=[self.tag])
+
+            # the snapshot's views are shared and read-only
+            self._combos = knowledge_status.reset_index(drop=True)
+        return self._combos
+
+    def _require_current(self):
+        if self._current is None:
+            raise ValueError('No problem-tag-combo is being studied!')
+        return self._current
@@ -1,34 +1,31 @@
 """
-DEPRECATED after v0.1 --> to be revived in the future
-
-This script serves a simulator for different learning paths.
-Given a series of problem solving results, it plots the ease and spacing
-interval development.
-The produced plots can be used to understand and calibrate the spaced
+Simulator for learning paths, to understand and calibrate the spaced
 repetition algorithm's parameters.
+
+Many synthetic learners (or result sequences) are run through the SM2 state
+transitions at once: one NumPy operation per repetition for all of them.
+'distributions' summarizes the resulting ease and interval per repetition.
+To calibrate, simulate a subclass of SuperMemo2 with modified constants:
+
+    class Calibrated(SuperMemo2):
+        EASE_DELTA = 0.1
+
+    ease, interval = simulate(random_results(10000, 8), sm2=Calibrated)
+
+Plotting needs matplotlib and seaborn, which are only imported to plot.
 """
 
-import matplotlib.pyplot as plt
+import sys
+from typing import Sequence, Tuple
+
+import numpy as np
 import pandas as pd
-import seaborn as sns
-from matplotlib.gridspec import GridSpec
 from tabulate import tabulate
 
-from spaced_repetition.domain.problem_log import (
-    ProblemLogCreator,
-    Result)
-from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.domain.problem_log import Result
 from spaced_repetition.use_cases.get_problem_log import SuperMemo2
 
-DEFAULT_INTERVAL = {
-    Result.KNEW_BY_HEART: SuperMemo2.INTERVAL_KNEW_BY_HEART,
-    Result.SOLVED_OPTIMALLY_IN_UNDER_25: SuperMemo2.INTERVAL_SOLVED_OPTIMALLY_IN_UNDER_25,
-    Result.SOLVED_OPTIMALLY_SLOWER: SuperMemo2.INTERVAL_SOLVED_OPTIMALLY_SLOWER,
-    Result.SOLVED_OPTIMALLY_WITH_HINT: SuperMemo2.INTERVAL_NON_OPTIMAL_SOLUTION,
-    Result.SOLVED_SUBOPTIMALLY: SuperMemo2.INTERVAL_NON_OPTIMAL_SOLUTION,
-    Result.NO_IDEA: SuperMemo2.INTERVAL_NON_OPTIMAL_SOLUTION
-}
-
+PERCENTILES = [5, 25, 50, 75, 95]
 
 new_topic_path = [
     Result.NO_IDEA,
@@ -47,37 +44,115 @@ known_topic_path = [
 
 
 def run():
-    data = spacing_data(new_topic_path)
-    plot_spacing(data)
-
-
-def spacing_data(repetition_results) -> pd.DataFrame:
-    data = []
-    last_log = None
-    current_day = 0
-    repetition_cnt = 0
-
-    for result in repetition_results:
-        print(f'\n----------------{result}-----------------')
-        last_log = ProblemLogCreator.create(
-            problem_id=1,
-            result=result,
-            tags=[TagCreator.create('dummy_tag')])
-        data.append({'day': current_day,
-                     'repetition': repetition_cnt,
-                     'result': last_log.result})
-
-        repetition_cnt += 1
-
-    print(tabulate(data, headers='keys'))
-    return pd.DataFrame(data=data)
+    """ Usage: python -m spaced_repetition.utils.calibration
+    [num_learners] [repetitions] """
+    num_learners = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    ease, interval = simulate(random_results(num_learners=num_learners,
+                                             repetitions=repetitions))
+    stats = distributions(ease=ease, interval=interval)
+    print(tabulate(stats.to_dict('list'), headers='keys', floatfmt='.2f'))
+
+    try:
+        plot_spacing(spacing_data(new_topic_path))
+        plot_distributions(stats)
+    except ImportError as err:
+        print(f'Not plotting: {err}')
+
+
+def random_results(num_learners: int, repetitions: int,
+                   probabilities: Sequence[float] = None,
+                   seed: int = 0) -> np.ndarray:
+    """ Result values (learners x repetitions), drawn independently with
+    'probabilities' per Result (ordered by value, default: uniform) """
+    rng = np.random.default_rng(seed)
+    return rng.choice([res.value for res in Result],
+                      size=(num_learners, repetitions),
+                      p=probabilities).astype(np.int8)
+
+
+def simulate(results: np.ndarray,
+             sm2: type = SuperMemo2) -> Tuple[np.ndarray, np.ndarray]:
+    """ Ease and interval after each repetition (learners x repetitions),
+    given the Result values of each learner's repetitions. Applies the same
+    transitions as sm2.next_state, to all learners at once. """
+    results = np.atleast_2d(results)
+    initial_interval = np.array(
+        [sm2.INITIAL_INTERVALS.get(res, sm2.INTERVAL_NON_OPTIMAL_SOLUTION)
+         for res in sorted(Result, key=lambda res: res.value)])
+
+    ease = np.empty(results.shape)
+    interval = np.empty(results.shape, dtype=np.int64)
+    if results.shape[1] == 0:
+        return ease, interval
+
+    ease[:, 0] = sm2.DEFAULT_EASE
+    interval[:, 0] = initial_interval[results[:, 0]]
+    for rep in range(1, results.shape[1]):
+        result = results[:, rep]
+        ease[:, rep] = np.select(
+            [result == Result.KNEW_BY_HEART.value,
+             result == Result.SOLVED_OPTIMALLY_IN_UNDER_25.value,
+             result == Result.SOLVED_OPTIMALLY_SLOWER.value],
+            [ease[:, rep - 1] + sm2.EASE_DELTA,
+             ease[:, rep - 1],
+             np.maximum(ease[:, rep - 1] - sm2.EASE_DELTA, sm2.MINIMUM_EASE)],
+            default=sm2.DEFAULT_EASE)
+        interval[:, rep] = np.where(
+            result >= Result.SOLVED_OPTIMALLY_SLOWER.value,
+            np.maximum(np.round(ease[:, rep] * interval[:, rep - 1]),
+                       initial_interval[result]),
+            sm2.INTERVAL_NON_OPTIMAL_SOLUTION)
+    return ease, interval
+
+
+def review_days(interval: np.ndarray) -> np.ndarray:
+    """ Day of each repetition, if every repetition happens when due """
+    days = np.zeros(interval.shape, dtype=np.int64)
+    np.cumsum(interval[:, :-1], axis=1, out=days[:, 1:])
+    return days
+
+
+def distributions(ease: np.ndarray, interval: np.ndarray,
+                  percentiles: Sequence[int] = None) -> pd.DataFrame:
+    """ Mean and percentiles of ease, interval and the review day over all
+    learners, one row per repetition """
+    percentiles = PERCENTILES if percentiles is None else percentiles
+    stats = {'repetition': np.arange(ease.shape[1])}
+    for name, values in [('ease', ease), ('interval', interval),
+                         ('day', review_days(interval))]:
+        stats[f'{name}_mean'] = values.mean(axis=0)
+        for pct, row in zip(percentiles,
+                            np.percentile(values, percentiles, axis=0)):
+            stats[f'{name}_p{pct}'] = row
+    return pd.DataFrame(data=stats)
+
+
+def spacing_data(repetition_results: Sequence[Result],
+                 sm2: type = SuperMemo2) -> pd.DataFrame:
+    """ Day, result, ease and interval of each repetition of a single
+    learning path """
+    ease, interval = simulate(
+        np.array([[res.value for res in repetition_results]], dtype=np.int8),
+        sm2=sm2)
+    return pd.DataFrame(data={
+        'day': review_days(interval)[0],
+        'repetition': np.arange(len(repetition_results)),
+        'result': [res.name for res in repetition_results],
+        'ease': ease[0],
+        'interval': interval[0]})
 
 
 def plot_spacing(df):
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+    import seaborn as sns  # pylint: disable=import-outside-toplevel
+    from matplotlib.gridspec import GridSpec  # pylint: disable=import-outside-toplevel
+
     fig = plt.figure(figsize=(14, 8))
     fig.suptitle('Spacing development')
     g_s = GridSpec(nrows=2, ncols=2, figure=fig,
-                  hspace=0.3, wspace=0.25)
+                   hspace=0.3, wspace=0.25)
 
     ax0 = fig.add_subplot(g_s[0, 0])
     ax1 = plt.subplot(g_s.new_subplotspec((0, 1), colspan=1))
@@ -112,6 +187,26 @@ def plot_spacing(df):
     plt.show()
 
 
+def plot_distributions(stats: pd.DataFrame):
+    """ Median and 25-75 / 5-95 percentile bands of ease and interval per
+    repetition, as computed by 'distributions' """
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+
+    fig, axes = plt.subplots(ncols=2, figsize=(14, 5))
+    fig.suptitle('Distribution over learners')
+    for ax, name in zip(axes, ['ease', 'interval']):
+        for low, high in [(5, 95), (25, 75)]:
+            ax.fill_between(stats.repetition, stats[f'{name}_p{low}'],
+                            stats[f'{name}_p{high}'], alpha=0.2,
+                            color='tab:blue', label=f'p{low}-p{high}')
+        ax.plot(stats.repetition, stats[f'{name}_p50'], label='median')
+        ax.set_title(name)
+        ax.set_xlabel('repetition')
+        ax.legend()
+
+    plt.show()
+
+
 def style_background_line(ax):
     ax.lines[0].set_linestyle('dotted')
     ax.lines[0].set_color('grey')
@@ -1,13 +1,29 @@
 
+import datetime as dt
+import fcntl
+import io
+import os
 import sys
+import tempfile
+from pathlib import Path
 from unittest.mock import patch
 
-from django.test import TestCase as DjangoTestCase
+from dateutil.tz import gettz
+from django.test import TestCase as DjangoTestCase, TransactionTestCase
+from pandas.testing import assert_frame_equal
 
 from spaced_repetition.controllers.cli_controller import CliController
+from spaced_repetition.domain.problem_log import ProblemLogCreator, Result
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.gateways.pickle_cache import PickleCache
+from spaced_repetition.gateways.write_behind_gateway import WriteBehindGateway
 from spaced_repetition.gateways.django_gateway.django_project.apps.problem.models import (
     Problem as OrmProblem,
+    ProblemLog as OrmProblemLog,
     Tag as OrmTag)
+from spaced_repetition.presenters.cli_presenter import CliPresenter
+from spaced_repetition.use_cases.get_tag import TagGetter
 
 # pylint: disable=no-self-use
 
@@ -25,6 +41,71 @@ class TestCliControllerFullExecution(DjangoTestCase):
         with patch.object(sys, 'argv', new=['_', 'l']):
             CliController.run()
 
+    def test_list_problems_page(self):
+        """ smoke test """
+        with patch.object(sys, 'argv', new=['_', 'l', '-s', 'problem',
+                                            '--limit', '1', '--offset', '1']):
+            CliController.run()
+
+    def test_list_problem_tag_combos_csv(self):
+        """ smoke test """
+        with patch.object(sys, 'argv', new=['_', 'lf', '--format', 'csv']):
+            CliController.run()
+
+    def test_list_problem_tag_combos_matching_nothing(self):
+        for filters in [['-fp', 'zzz'], ['-ft', 'tag_1', '-fp', 'zzz']]:
+            with self.subTest(filters=filters), \
+                    patch.object(sys, 'argv', new=['_', 'lf'] + filters):
+                CliController.run()
+
+    def test_dashboard(self):
+        """ smoke test """
+        with patch.object(sys, 'argv', new=['_', 'dashboard']):
+            CliController.run()
+
+    def test_next(self):
+        """ smoke test """
+        with patch.object(sys, 'argv', new=['_', 'next', '-k', '3']):
+            CliController.run()
+
+    def test_forecast(self):
+        """ smoke test """
+        with patch.object(sys, 'argv', new=['_', 'forecast', '--days', '3']):
+            CliController.run()
+
+    def test_forecast_json(self):
+        """ smoke test """
+        with patch.object(sys, 'argv', new=['_', 'fc', '--format', 'json']):
+            CliController.run()
+
+    def test_workload(self):
+        """ smoke test """
+        with patch.object(sys, 'argv', new=['_', 'workload', '--by-tag']):
+            CliController.run()
+
+    def test_session(self):
+        with patch.object(sys, 'argv', new=['_', 'session']):
+            with patch('builtins.input', side_effect=['5', 'a comment', 'q']):
+                CliController.run()
+
+                logs = OrmProblemLog.objects.all()
+                self.assertEqual(1, len(logs))
+                self.assertEqual('prob_1', logs[0].problem.name)
+                self.assertEqual(5, logs[0].result)
+
+    def test_shell(self):
+        commands = ['lt', 'add-tag', 'new_tag_name', 'lt -f new', 'lt -s x',
+                    'shell', 'exit']
+        with patch.object(sys, 'argv', new=['_', 'shell']):
+            with patch('builtins.input', side_effect=commands):
+                with patch.object(CliController, '_list_tags',
+                                  wraps=CliController._list_tags) as list_tags:
+                    CliController.run()
+
+                    self.assertEqual(2, list_tags.call_count)
+                    self.assertEqual(
+                        1, OrmTag.objects.filter(name='new_tag_name').count())
+
     def test_add_tag(self):
         with patch.object(sys, 'argv', new=['_', 'add-tag']):
             with patch('builtins.input', return_value='new_tag_name'):
@@ -33,3 +114,202 @@ class TestCliControllerFullExecution(DjangoTestCase):
                 tags = OrmTag.objects.filter(name='new_tag_name')
                 self.assertEqual(1, len(tags))
                 self.assertEqual('new_tag_name', tags[0].name)
+
+    def test_add_tag_of_learner(self):
+        with patch.dict(os.environ, {'SREP_LEARNER': 'alice'}), \
+                patch.object(sys, 'argv', new=['_', 'add-tag']), \
+                patch('builtins.input', return_value='tag_1'):
+            CliController.run()  # the default learner's tag_1 is no duplicate
+
+        tag = OrmTag.objects.get(learner__name='alice')
+        self.assertEqual('tag_1', tag.name)
+
+    def test_reads_only_look_the_learner_up(self):
+        learner_id = DjangoGateway.get_or_create_learner_id(name='alice')
+        OrmTag.objects.create(learner_id=learner_id, name='tag_2')
+
+        with patch.dict(os.environ, {'SREP_LEARNER': 'alice'}), \
+                patch.object(sys, 'argv', new=['_', 'lt', '--format', 'csv']), \
+                patch.object(DjangoGateway, 'get_or_create_learner_id') \
+                as get_or_create, \
+                patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            CliController.run()
+
+        get_or_create.assert_not_called()
+        self.assertIn('tag_2', mock_stdout.getvalue())
+        self.assertNotIn('tag_1', mock_stdout.getvalue())
+
+    def test_read_of_unknown_learner(self):
+        with patch.dict(os.environ, {'SREP_LEARNER': 'carol'}), \
+                patch.object(sys, 'argv', new=['_', 'l']), \
+                patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            CliController.run()
+
+        self.assertEqual("Unknown learner 'carol': add a problem or a tag "
+                         "first.\n", mock_stdout.getvalue())
+        self.assertIsNone(DjangoGateway.get_learner_id(name='carol'))
+
+
+class TestLearnerCaches(DjangoTestCase):
+    """ Every learner's knowledge status is cached in a directory of its
+    own, such that learners don't evict each other's cached state """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        for name in ['alice', 'bob']:
+            learner_id = DjangoGateway.get_or_create_learner_id(name=name)
+            tag = OrmTag.objects.create(learner_id=learner_id, name='tag_1')
+            problem = OrmProblem.objects.create(learner_id=learner_id,
+                                                name=f'{name}_prob',
+                                                difficulty=1)
+            problem.tags.add(tag)
+            log = OrmProblemLog.objects.create(
+                learner_id=learner_id, problem=problem, result=5,
+                timestamp=dt.datetime(2021, 1, 1, tzinfo=gettz('UTC')))
+            log.tags.add(tag)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _list_problems(self, learner: str) -> list:
+        """ 'l' as a new process would run it, returns whether each cache
+        lookup was a hit """
+        hits = []
+        load = PickleCache.load
+
+        def spy(cache, name, key):
+            df = load(cache, name=name, key=key)
+            hits.append(df is not None)
+            return df
+
+        with patch.dict(os.environ, {'SREP_LEARNER': learner}), \
+                patch.object(CliController, '_snapshot_cache', None), \
+                patch.object(DjangoGateway, 'get_db_file',
+                             return_value=Path(self.tmp_dir.name) / 'db.sqlite3'), \
+                patch.object(PickleCache, 'load', new=spy), \
+                patch.object(sys, 'argv', new=['_', 'l']), \
+                patch('sys.stdout'):
+            CliController.run()
+        return hits
+
+    def test_alternating_learners_hit_their_caches(self):
+        for learner in ['alice', 'bob']:
+            self.assertNotIn(True, self._list_problems(learner=learner))
+
+        for learner in ['alice', 'bob', 'alice']:
+            hits = self._list_problems(learner=learner)
+            self.assertTrue(hits)
+            self.assertNotIn(False, hits)
+        self.assertEqual(['cache.alice', 'cache.bob'],
+                         sorted(path.name for path
+                                in Path(self.tmp_dir.name).iterdir()))
+
+
+class TestJournalReplay(DjangoTestCase):
+    """ Logs journaled by a process that crashed before storing them are
+    seen by the next command of the learner """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.db_file = Path(self.tmp_dir.name) / 'db.sqlite3'
+        self.learner_id = DjangoGateway.get_or_create_learner_id(name='alice')
+        tag = OrmTag.objects.create(learner_id=self.learner_id, name='tag_1')
+        problem = OrmProblem.objects.create(learner_id=self.learner_id,
+                                            name='alice_prob', difficulty=1)
+        problem.tags.add(tag)
+        self.problem_log = ProblemLogCreator.create(
+            problem_id=problem.pk, result=Result.KNEW_BY_HEART,
+            tags=[TagCreator.create(name=tag.name, tag_id=tag.pk)],
+            timestamp=dt.datetime(2021, 1, 1, tzinfo=gettz('UTC')))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _crash_after_logging(self):
+        gateway = WriteBehindGateway(
+            gateway=DjangoGateway(learner_id=self.learner_id),
+            journal_path=Path(self.tmp_dir.name) / 'srep.alice.journal')
+        gateway.create_problem_log(problem_log=self.problem_log)
+        fcntl.flock(gateway._journal, fcntl.LOCK_UN)  # pylint: disable=protected-access
+        gateway._journal.close()  # pylint: disable=protected-access
+
+    def test_list_sees_journaled_logs(self):
+        self._crash_after_logging()
+
+        with patch.dict(os.environ, {'SREP_LEARNER': 'alice'}), \
+                patch.object(CliController, '_snapshot_cache', None), \
+                patch.object(DjangoGateway, 'get_db_file',
+                             return_value=self.db_file), \
+                patch.object(sys, 'argv', new=['_', 'lf', '--format', 'csv']), \
+                patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            CliController.run()
+
+        self.assertEqual(1, OrmProblemLog.objects.count())
+        self.assertIn('2021-01-01', mock_stdout.getvalue())
+
+    def test_journal_of_learner_with_slash(self):
+        learner_id = DjangoGateway.get_or_create_learner_id(name='../bob')
+        tag = OrmTag.objects.create(learner_id=learner_id, name='tag_1')
+        OrmProblem.objects.create(learner_id=learner_id, name='bob_prob',
+                                  difficulty=1).tags.add(tag)
+        db_file = Path(self.tmp_dir.name) / 'db' / 'db.sqlite3'
+        db_file.parent.mkdir()
+
+        with patch.dict(os.environ, {'SREP_LEARNER': '../bob'}), \
+                patch.object(CliController, '_snapshot_cache', None), \
+                patch.object(DjangoGateway, 'get_db_file',
+                             return_value=db_file), \
+                patch.object(sys, 'argv', new=['_', 'session']), \
+                patch('builtins.input', side_effect=['5', '', 'q']), \
+                patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            CliController.run()
+
+        self.assertNotIn('unbatched', mock_stdout.getvalue())
+        self.assertEqual(1, OrmProblemLog.objects.filter(
+            learner_id=learner_id).count())
+        self.assertEqual(['cache...%2Fbob', 'srep...%2Fbob.journal'],
+                         sorted(path.name for path in db_file.parent.iterdir()))
+        self.assertEqual(['db'], [path.name for path
+                                  in Path(self.tmp_dir.name).iterdir()])
+
+    def test_journal_of_other_learner_is_left(self):
+        self._crash_after_logging()
+
+        with patch.object(DjangoGateway, 'get_db_file',
+                          return_value=self.db_file), \
+                patch.object(sys, 'argv', new=['_', 'lt']), \
+                patch('sys.stdout'):
+            CliController.run()  # the default learner
+
+        self.assertEqual(0, OrmProblemLog.objects.count())
+
+
+class TestConcurrentReads(TransactionTestCase):
+    """ Reads in other threads use connections of their own, which only
+    see committed data """
+    def setUp(self) -> None:
+        tags = [OrmTag.objects.create(name=f'tag_{idx}') for idx in range(3)]
+        for idx in range(5):
+            problem = OrmProblem.objects.create(name=f'prob_{idx}',
+                                                difficulty=idx % 3 + 1)
+            problem.tags.set(tags[:idx % 3 + 1])
+            log = OrmProblemLog.objects.create(
+                problem=problem,
+                result=idx,
+                timestamp=dt.datetime(2021, 1, 1 + idx, tzinfo=gettz('UTC')))
+            log.tags.set(tags[:idx % 3 + 1])
+
+    def test_same_result_as_sequential_reads(self):
+        sequential = TagGetter(db_gateway=DjangoGateway(),
+                               presenter=CliPresenter()) \
+            .get_prioritized_tags()
+        concurrent = TagGetter(db_gateway=DjangoGateway(),
+                               presenter=CliPresenter(),
+                               concurrent_reads=True) \
+            .get_prioritized_tags()
+
+        assert_frame_equal(sequential, concurrent)
+
+    def test_dashboard(self):
+        """ smoke test """
+        with patch.object(sys, 'argv',
+                          new=['_', 'dashboard', '--concurrent-reads']):
+            CliController.run()
@@ -1,4 +1,6 @@
 
+import contextlib
+import io
 import unittest
 from unittest.mock import patch
 
@@ -34,6 +36,25 @@ class TestInputFormatting(unittest.TestCase):
                          'test name')
 
 
+class TestArgumentParsing(unittest.TestCase):
+    def test_page_arguments(self):
+        args = CliController._parse_args(['lf', '--limit', '0', '--offset', '2'])
+
+        self.assertEqual((0, 2), (args.limit, args.offset))
+
+    def test_invalid_counts_are_rejected(self):
+        for argv in [['lf', '--limit', '-1'], ['lp', '--offset', '-1'],
+                     ['lt', '--limit', 'many'], ['next', '-k', '0'],
+                     ['report', '-k', '-3'], ['workload', '--days', '0'],
+                     ['wl', '--days', '-7'], ['forecast', '--days', '0'],
+                     ['fc', '--days', '-1']]:
+            with self.subTest(argv=argv), \
+                    contextlib.redirect_stderr(io.StringIO()) as stderr, \
+                    self.assertRaises(SystemExit):
+                CliController._parse_args(argv)
+            self.assertIn('error: argument', stderr.getvalue())
+
+
 class TestUserInput(unittest.TestCase):
     @patch('builtins.input', return_value=' 0')
     def test_get_user_input_result(self, _):
@@ -0,0 +1,123 @@
+import io
+import os
+import socketserver
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import TestCase as DjangoTestCase
+
+from spaced_repetition.controllers import daemon, daemon_client
+from spaced_repetition.gateways.django_gateway.django_project.apps.problem.models import \
+    Tag as OrmTag
+
+# pylint: disable=protected-access
+
+
+class TestExecute(DjangoTestCase):
+    def setUp(self):
+        OrmTag.objects.create(name='tag_1')
+
+    def test_execute(self):
+        res = daemon.execute(argv=['lt'])
+
+        self.assertEqual(0, res['status'])
+        self.assertIn('tag_1', res['stdout'])
+        self.assertEqual('', res['stderr'])
+
+    def test_execute_parse_error(self):
+        res = daemon.execute(argv=['lt', '-s', 'unknown'])
+
+        self.assertEqual(2, res['status'])
+        self.assertIn('invalid choice', res['stderr'])
+
+    def test_execute_refuses_interactive_commands(self):
+        res = daemon.execute(argv=['add-tag'])
+
+        self.assertEqual(2, res['status'])
+        self.assertEqual(0, OrmTag.objects.filter(name='').count())
+
+
+class TestForward(DjangoTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = Path(self.tmp_dir.name) / 'srep.sock'
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_forward_round_trip(self):
+        response = {'status': 0, 'stdout': 'some table\n', 'stderr': ''}
+        with socketserver.UnixStreamServer(str(self.path),
+                                           daemon._CommandHandler) as server, \
+                patch.object(daemon, 'execute',
+                             return_value=response) as mock_execute, \
+                patch.dict(os.environ, {'SREP_SOCKET': str(self.path)}), \
+                patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            thread = threading.Thread(target=server.handle_request)
+            thread.start()
+
+            status = daemon_client.forward(['lt', '-s', 'tag'])
+            thread.join()
+
+        self.assertEqual(0, status)
+        self.assertEqual('some table\n', stdout.getvalue())
+        mock_execute.assert_called_once_with(argv=['lt', '-s', 'tag'])
+
+    def test_no_forward_of_interactive_commands(self):
+        self.path.touch()
+        with patch.dict(os.environ, {'SREP_SOCKET': str(self.path)}):
+            self.assertIsNone(daemon_client.forward(['add-log']))
+
+    def test_no_forward_without_daemon(self):
+        with patch.dict(os.environ, {'SREP_SOCKET': str(self.path)}):
+            self.assertIsNone(daemon_client.forward(['lt']))
+
+    def test_no_forward_with_stale_socket(self):
+        self.path.touch()
+        with patch.dict(os.environ, {'SREP_SOCKET': str(self.path)}):
+            self.assertIsNone(daemon_client.forward(['lt']))
+
+    def test_socket_path_next_to_db(self):
+        with patch.dict(os.environ, {'SREP_SOCKET': '',
+                                     'SREP_LEARNER': '',
+                                     'DJANGO_SETTINGS_MODULE': 'fake_settings'}), \
+                patch('importlib.import_module') as mock_import:
+            mock_import.return_value.DATABASES = {
+                'default': {'NAME': Path('/some/dir/db.sqlite3')}}
+
+            self.assertEqual(Path('/some/dir/srep.sock'),
+                             daemon_client.socket_path())
+            mock_import.assert_called_once_with('fake_settings')
+
+    def test_socket_path_per_learner(self):
+        with patch.dict(os.environ, {'SREP_SOCKET': '',
+                                     'SREP_LEARNER': 'alice',
+                                     'DJANGO_SETTINGS_MODULE': 'fake_settings'}), \
+                patch('importlib.import_module') as mock_import:
+            mock_import.return_value.DATABASES = {
+                'default': {'NAME': Path('/some/dir/db.sqlite3')}}
+
+            self.assertEqual(Path('/some/dir/srep.alice.sock'),
+                             daemon_client.socket_path())
+
+    def test_learner_file_name(self):
+        with patch.dict(os.environ, {'SREP_LEARNER': 'alice'}):
+            self.assertEqual('srep.alice.journal',
+                             daemon_client.learner_file_name('srep.journal'))
+            self.assertEqual('cache.alice',
+                             daemon_client.learner_file_name('cache'))
+        with patch.dict(os.environ, {'SREP_LEARNER': ''}):
+            self.assertEqual('cache', daemon_client.learner_file_name('cache'))
+
+    def test_learner_file_name_is_escaped(self):
+        for learner, expected in [('a/b', 'srep.a%2Fb.journal'),
+                                  ('../..', 'srep...%2F...journal')]:
+            with patch.dict(os.environ, {'SREP_LEARNER': learner}):
+                self.assertEqual(expected,
+                                 daemon_client.learner_file_name('srep.journal'))
+
+        with patch.dict(os.environ, {'SREP_LEARNER': 'ü' * 20}):
+            self.assertEqual(len('cache.') + 64,
+                             len(daemon_client.learner_file_name('cache')))
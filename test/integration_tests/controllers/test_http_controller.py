@@ -0,0 +1,195 @@
+import datetime as dt
+import fcntl
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from dateutil.tz import gettz
+from django.test import TestCase
+
+from spaced_repetition.controllers import http_controller
+from spaced_repetition.domain.problem_log import ProblemLogCreator, Result
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.gateways.django_gateway.django_project.apps.problem.models import (
+    Problem as OrmProblem,
+    ProblemLog as OrmProblemLog,
+    Tag as OrmTag)
+from spaced_repetition.gateways.write_behind_gateway import WriteBehindGateway
+
+
+class TestHttpApi(TestCase):
+    def setUp(self):
+        http_controller.SNAPSHOT_CACHE.invalidate()
+        http_controller.snapshot_cache.cache_clear()
+
+        self.tag = OrmTag.objects.create(name='tag_1')
+        for name in ['prob_1', 'prob_2']:
+            OrmProblem.objects.create(difficulty=1, name=name, url='') \
+                .tags.set([self.tag])
+        log = OrmProblemLog.objects.create(
+            problem=OrmProblem.objects.get(name='prob_1'),
+            result=Result.KNEW_BY_HEART.value,
+            timestamp=dt.datetime.now(tz=gettz('UTC')))
+        log.tags.set([self.tag])
+
+    def test_list_problems(self):
+        response = self.client.get('/problems', {'sort': 'problem',
+                                                 'limit': 1, 'offset': 1})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(['prob_2'], [p['problem'] for p in response.json()])
+        self.assertEqual('EASY', response.json()[0]['difficulty'])
+
+    def test_list_problem_tag_combos(self):
+        response = self.client.get('/combos', {'problem': 'prob_1'})
+
+        combos = response.json()
+        self.assertEqual(1, len(combos))
+        self.assertEqual('KNEW_BY_HEART', combos[0]['last_result'])
+        self.assertEqual(5., combos[0]['KS'])
+
+    def test_list_problem_tag_combos_matching_nothing(self):
+        for params in [{'problem': 'zzz'}, {'tag': 'tag_1', 'problem': 'zzz'}]:
+            with self.subTest(params=params):
+                response = self.client.get('/combos', params)
+
+                self.assertEqual(200, response.status_code)
+                self.assertEqual([], response.json())
+
+    def test_journaled_logs_of_crashed_process(self):
+        problem = OrmProblem.objects.get(name='prob_2')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            gateway = WriteBehindGateway(
+                gateway=DjangoGateway(),
+                journal_path=Path(tmp_dir) / 'srep.journal')
+            gateway.create_problem_log(problem_log=ProblemLogCreator.create(
+                problem_id=problem.pk, result=Result.NO_IDEA,
+                tags=[TagCreator.create(name='tag_1', tag_id=self.tag.pk)]))
+            fcntl.flock(gateway._journal, fcntl.LOCK_UN)  # pylint: disable=protected-access
+            gateway._journal.close()  # pylint: disable=protected-access
+
+            with patch.object(DjangoGateway, 'get_db_file',
+                              return_value=Path(tmp_dir) / 'db.sqlite3'):
+                response = self.client.get('/combos', {'problem': 'prob_2'})
+
+        self.assertEqual(['NO_IDEA'],
+                         [c['last_result'] for c in response.json()])
+
+    def test_next(self):
+        response = self.client.get('/next', {'k': 1})
+
+        self.assertEqual(['prob_2'], [c['problem'] for c in response.json()])
+
+    def test_list_tags(self):
+        response = self.client.get('/tags')
+
+        self.assertEqual(['tag_1'], [t['tag'] for t in response.json()])
+
+    def test_invalid_parameters(self):
+        for url, params in [('/problems', {'sort': 'unknown'}),
+                            ('/tags', {'limit': 'many'}),
+                            ('/combos', {'offset': -1}),
+                            ('/next', {'k': 0})]:
+            with self.subTest(url=url, params=params):
+                response = self.client.get(url, params)
+
+                self.assertEqual(400, response.status_code)
+                self.assertIn('error', response.json())
+
+    def test_conditional_get(self):
+        etag = self.client.get('/tags')['ETag']
+
+        response = self.client.get('/tags', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+
+    def test_etag_changes_with_data(self):
+        etag = self.client.get('/tags')['ETag']
+        OrmTag.objects.create(name='tag_2')
+
+        response = self.client.get('/tags', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(response.json()))
+
+    def test_add_log(self):
+        response = self.client.post(
+            '/logs',
+            data=json.dumps({'problem': 'prob_2',
+                             'result': 'SOLVED_OPTIMALLY_SLOWER',
+                             'tags': ['tag_1'],
+                             'comment': 'via api'}),
+            content_type='application/json')
+
+        self.assertEqual(201, response.status_code)
+        self.assertEqual('prob_2', response.json()['problem'])
+        log = OrmProblemLog.objects.get(comment='via api')
+        self.assertEqual(Result.SOLVED_OPTIMALLY_SLOWER.value, log.result)
+
+    def test_add_log_invalid(self):
+        for body in ['no json',
+                     json.dumps({'problem': 'prob_2', 'result': 'bad',
+                                 'tags': ['tag_1']}),
+                     json.dumps({'problem': 'prob_2', 'result': 0,
+                                 'tags': 'tag_1'}),
+                     json.dumps({'problem': 'unknown', 'result': 0,
+                                 'tags': ['tag_1']})]:
+            with self.subTest(body=body):
+                response = self.client.post('/logs', data=body,
+                                            content_type='application/json')
+
+                self.assertEqual(400, response.status_code)
+        self.assertEqual(1, OrmProblemLog.objects.count())
+
+    def test_methods(self):
+        self.assertEqual(405, self.client.get('/logs').status_code)
+        self.assertEqual(405, self.client.post('/tags').status_code)
+
+
+class TestHttpApiLearners(TestCase):
+    def setUp(self):
+        http_controller.SNAPSHOT_CACHE.invalidate()
+        http_controller.snapshot_cache.cache_clear()
+
+        OrmTag.objects.create(name='default_tag')
+        self.learner_id = DjangoGateway.get_or_create_learner_id(name='alice')
+        tag = OrmTag.objects.create(learner_id=self.learner_id, name='tag_1')
+        OrmProblem.objects.create(difficulty=1, learner_id=self.learner_id,
+                                  name='prob_1', url='').tags.set([tag])
+
+    def test_list_tags_of_learner(self):
+        response = self.client.get('/tags', {'learner': 'alice'})
+
+        self.assertEqual(['tag_1'], [t['tag'] for t in response.json()])
+        self.assertEqual(['default_tag'],
+                         [t['tag'] for t in self.client.get('/tags').json()])
+
+    def test_unknown_learner(self):
+        for response in [self.client.get('/tags', {'learner': 'bob'}),
+                         self.client.post('/logs?learner=bob', data='{}',
+                                          content_type='application/json')]:
+            self.assertEqual(404, response.status_code)
+            self.assertIn('error', response.json())
+
+    def test_etag_per_learner(self):
+        etag = self.client.get('/tags', {'learner': 'alice'})['ETag']
+
+        self.assertNotEqual(etag, self.client.get('/tags')['ETag'])
+
+    def test_add_log_of_learner(self):
+        response = self.client.post(
+            '/logs?learner=alice',
+            data=json.dumps({'problem': 'prob_1', 'result': 'NO_IDEA',
+                             'tags': ['tag_1']}),
+            content_type='application/json')
+
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(self.learner_id,
+                         OrmProblemLog.objects.get().learner_id)
+        self.assertEqual(400, self.client.post(
+            '/logs',
+            data=json.dumps({'problem': 'prob_1', 'result': 'NO_IDEA',
+                             'tags': ['tag_1']}),
+            content_type='application/json').status_code)
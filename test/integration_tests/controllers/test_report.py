@@ -0,0 +1,128 @@
+import datetime as dt
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from dateutil.tz import gettz
+from django.test import TestCase
+
+from spaced_repetition.controllers import report
+from spaced_repetition.domain.problem_log import Result
+from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.gateways.django_gateway.django_project.apps.problem.models import (
+    Problem as OrmProblem,
+    ProblemLog as OrmProblemLog,
+    Tag as OrmTag)
+
+ROOT = Path(__file__).resolve().parents[3]
+SETTINGS = 'spaced_repetition.gateways.django_gateway.django_project.django_project.settings'
+
+SCRIPT = '''
+import sys
+from pathlib import Path
+
+import django
+from django.conf import settings
+
+settings.DATABASES['default']['NAME'] = sys.argv[1]
+django.setup()
+
+from django.core.management import call_command
+
+from spaced_repetition.controllers.report import write_reports
+from test.integration_tests.controllers.test_report import create_learner
+
+call_command('migrate', verbosity=0)
+for name in ['alice', 'bob', 'carol']:
+    create_learner(name=name)
+latencies, _ = write_reports(directory=Path(sys.argv[2]), workers=2)
+print(sorted(latencies))
+'''
+
+
+def create_learner(name: str):
+    """ A learner with two problems, of which one was logged """
+    learner_id = DjangoGateway.get_or_create_learner_id(name=name)
+    tag = OrmTag.objects.create(learner_id=learner_id, name=f'{name}_tag')
+    for idx in range(2):
+        problem = OrmProblem.objects.create(
+            difficulty=1, learner_id=learner_id, name=f'{name}_{idx}', url='')
+        problem.tags.set([tag])
+    log = OrmProblemLog.objects.create(
+        learner_id=learner_id, problem=problem,
+        result=Result.KNEW_BY_HEART.value,
+        timestamp=dt.datetime(2021, 1, 1, tzinfo=gettz('UTC')))
+    log.tags.set([tag])
+
+
+class TestReports(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.directory = Path(self.tmp_dir.name) / 'reports'
+        for name in ['alice', 'b/o b']:
+            create_learner(name=name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_reports(self):
+        latencies, duration = report.write_reports(directory=self.directory,
+                                                   k=1)
+
+        self.assertEqual(['alice', 'b/o b'], sorted(latencies))
+        self.assertLessEqual(sum(latencies.values()), duration)
+        self.assertEqual(['alice.json', 'b%2Fo%20b.json'],
+                         sorted(path.name for path in self.directory.iterdir()))
+        alice = json.loads(report.report_path(directory=self.directory,
+                                              learner='alice').read_text())
+        self.assertEqual('alice', alice['learner'])
+        self.assertEqual(['alice_tag'], [t['tag'] for t in alice['tags']])
+        self.assertEqual(['alice_0'], [c['problem'] for c in alice['next']])
+
+    def test_write_reports_with_sharded_replay(self):
+        def read_report() -> dict:
+            data = json.loads(report.report_path(
+                directory=self.directory, learner='alice').read_text())
+            return {key: data[key] for key in ['tags', 'next']}
+
+        report.write_reports(directory=self.directory, k=1)
+        expected = read_report()
+
+        latencies, _ = report.write_reports(directory=self.directory, k=1,
+                                            replay_workers=2)
+
+        self.assertEqual(['alice', 'b/o b'], sorted(latencies))
+        self.assertEqual(expected, read_report())
+
+    def test_summarize(self):
+        summary = report.summarize(latencies={'alice': 0.01, 'bob': 0.03},
+                                   duration=0.05)
+
+        self.assertIn('2 reports in 0.05 s (40.0 learners/s)', summary)
+        self.assertIn('p50 20 ms', summary)
+        self.assertIn('max 30 ms', summary)
+        self.assertEqual('No learners to report on.',
+                         report.summarize(latencies={}, duration=0.))
+
+
+class TestReportsInProcessPool(TestCase):
+    def test_reports_of_all_learners(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            directory = Path(tmp_dir) / 'reports'
+            result = subprocess.run(
+                [sys.executable, '-c', SCRIPT,
+                 str(Path(tmp_dir) / 'db.sqlite3'), str(directory)],
+                env=dict(os.environ, DJANGO_SETTINGS_MODULE=SETTINGS,
+                         PYTHONPATH=str(ROOT)),
+                cwd=ROOT, capture_output=True, text=True, check=False)
+
+            self.assertEqual(0, result.returncode, result.stderr)
+            self.assertEqual("['alice', 'bob', 'carol']",
+                             result.stdout.strip())
+            for name in ['alice', 'bob', 'carol']:
+                data = json.loads((directory / f'{name}.json').read_text())
+                self.assertEqual([f'{name}_tag'],
+                                 [t['tag'] for t in data['tags']])
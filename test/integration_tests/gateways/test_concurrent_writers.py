@@ -0,0 +1,90 @@
+"""Stress test: several processes log problems into one sqlite database at
+the same time, with a short busy timeout such that writes are retried."""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[3]
+SETTINGS = 'spaced_repetition.gateways.django_gateway.django_project.django_project.settings'
+
+WRITERS = 4
+LOGS_PER_WRITER = 20
+
+SCRIPT = '''
+import sys
+
+import django
+from django.conf import settings
+
+settings.DATABASES['default']['NAME'] = sys.argv[1]
+django.setup()
+
+from django.core.management import call_command
+
+from spaced_repetition.domain.problem import Difficulty, ProblemCreator
+from spaced_repetition.domain.problem_log import Result
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.presenters.json_presenter import JsonPresenter
+from spaced_repetition.use_cases.log_problem import ProblemLogger
+
+if sys.argv[2] == 'setup':
+    call_command('migrate', verbosity=0)
+    tags = [DjangoGateway().create_tag(TagCreator.create(name=name))
+            for name in ('tag_1', 'tag_2')]
+    DjangoGateway().create_problem(ProblemCreator.create(
+        difficulty=Difficulty.EASY, name='prob_1', tags=tags, url=''))
+else:
+    logger = ProblemLogger(db_gateway=DjangoGateway(), presenter=JsonPresenter())
+    for idx in range(int(sys.argv[3])):
+        logger.log_problem(comment=f'{sys.argv[2]}_{idx}', problem_name='prob_1',
+                           result=Result.NO_IDEA, tags=['tag_1', 'tag_2'])
+'''
+
+
+class TestConcurrentWriters(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.db_path = Path(self.tmp_dir.name) / 'db.sqlite3'
+        self.env = dict(os.environ,
+                        DJANGO_SETTINGS_MODULE=SETTINGS,
+                        PYTHONPATH=str(ROOT),
+                        SREP_DB_BUSY_TIMEOUT='0.01',
+                        SREP_DB_WRITE_RETRIES='50')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _run(self, *args) -> subprocess.Popen:
+        return subprocess.Popen(  # pylint: disable=consider-using-with
+            [sys.executable, '-c', SCRIPT, str(self.db_path), *args],
+            env=self.env, cwd=ROOT,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def test_every_log_lands_with_its_tags(self):
+        setup = self._run('setup')
+        self.assertEqual(0, setup.wait(), setup.stderr.read().decode())
+
+        writers = [self._run(f'writer_{idx}', str(LOGS_PER_WRITER))
+                   for idx in range(WRITERS)]
+        for writer in writers:
+            self.assertEqual(0, writer.wait(), writer.stderr.read().decode())
+            writer.stderr.close()
+        setup.stderr.close()
+
+        with sqlite3.connect(self.db_path) as db:
+            tags_per_log = dict(db.execute(
+                'SELECT comment, COUNT(tag_id) FROM problem_problemlog '
+                'LEFT JOIN problem_problemlog_tags '
+                'ON problem_problemlog.id = problemlog_id '
+                'GROUP BY problem_problemlog.id').fetchall())
+        db.close()
+
+        self.assertEqual({f'writer_{writer}_{idx}': 2
+                          for writer in range(WRITERS)
+                          for idx in range(LOGS_PER_WRITER)}, tags_per_log)
@@ -1,19 +1,25 @@
 """Test postgres gateway"""
 
 import datetime as dt
+import threading
+import time
 from unittest.mock import patch
 
+from asgiref.sync import sync_to_async
 from dateutil.tz import tzlocal, gettz
-from django.test import TestCase
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
 
 from spaced_repetition.domain.problem import Difficulty, Problem, ProblemCreator
 from spaced_repetition.domain.problem_log import (ProblemLogCreator, Result)
 from spaced_repetition.domain.tag import Tag, TagCreator
 from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
 from spaced_repetition.gateways.django_gateway.django_project.apps.problem.models import (
+    Learner as OrmLearner,
     Problem as OrmProblem,
     ProblemLog as OrmProblemLog,
     Tag as OrmTag)
+from spaced_repetition.use_cases.db_gateway_interface import DuplicateNameError
 
 # pylint: disable=protected-access, no-self-use
 
@@ -44,6 +50,14 @@ class TestProblemCreation(TestCase):
         self.assertEqual(orm_problem.url, 'https://testurl.com')
         self.assertEqual([t.name for t in orm_problem.tags.all()], ['tag1'])
 
+    def test_create_problem_with_duplicate_name(self):
+        DjangoGateway().create_problem(problem=self.problem)
+
+        with self.assertRaises(DuplicateNameError):
+            DjangoGateway().create_problem(problem=self.problem)
+
+        self.assertEqual(1, OrmProblem.objects.count())
+
 
 class TestProblemQuerying(TestCase):
     def setUp(self):
@@ -70,19 +84,19 @@ class TestProblemQuerying(TestCase):
         prob_many_tags.tags.set([tag_1, tag_2, tag_3, tag_4])
 
     def test_query_all(self):
-        self.assertEqual(4, len(DjangoGateway._query_problems(name=None)))
+        self.assertEqual(4, len(DjangoGateway()._query_problems(name=None)))
 
     def test_query_filter_by_name(self):
-        self.assertEqual(1, len(DjangoGateway._query_problems(name='prob_1')))
+        self.assertEqual(1, len(DjangoGateway()._query_problems(name='prob_1')))
 
     def test_query_filter_by_substring(self):
-        self.assertEqual(2, len(DjangoGateway._query_problems(name_substr='pro')))
-        self.assertEqual(1, len(DjangoGateway._query_problems(name_substr='_1')))
+        self.assertEqual(2, len(DjangoGateway()._query_problems(name_substr='pro')))
+        self.assertEqual(1, len(DjangoGateway()._query_problems(name_substr='_1')))
 
     def test_query_filter_for_tags_all(self):
         required_tags = ['tag1', 'tag2']
 
-        res = DjangoGateway._query_problems(tags_all=required_tags)
+        res = DjangoGateway()._query_problems(tags_all=required_tags)
 
         self.assertEqual(len(res), 3)
         self.assertEqual(sorted([prob.name for prob in res]),
@@ -91,7 +105,7 @@ class TestProblemQuerying(TestCase):
     def test_query_filter_for_tags_any(self):
         tags = ['tag3', 'tag4']
 
-        res = DjangoGateway._query_problems(tags_any=tags)
+        res = DjangoGateway()._query_problems(tags_any=tags)
 
         self.assertEqual(len(res), 2)
         self.assertEqual(sorted([prob.name for prob in res]),
@@ -104,11 +118,11 @@ class TestProblemQuerying(TestCase):
 
         for kwargs, expected_res in params:
             with self.subTest(kwargs=kwargs, expected_res=expected_res):
-                res = DjangoGateway.get_problems(**kwargs)
+                res = DjangoGateway().get_problems(**kwargs)
                 self.assertEqual(res, expected_res)
 
     def test_query_combined(self):
-        res = DjangoGateway._query_problems(
+        res = DjangoGateway()._query_problems(
             name_substr='b',  # exclude 'many_tags'
             tags_all=['tag1', 'tag2'])  # exclude 'single_tag'
 
@@ -142,40 +156,62 @@ class TestProblemGetting(TestCase):
         self.assertEqual(problems[0].url, 'www.test_url.com')
 
     def test_get_problems(self):
-        problems = DjangoGateway.get_problems()
+        problems = DjangoGateway().get_problems()
         self.assertEqual(2, len(problems))
 
     def test_get_problems_filter_tags_all_and_name(self):
-        res = DjangoGateway.get_problems(name_substr='e',
+        res = DjangoGateway().get_problems(name_substr='e',
                                          tags_all=['tag1', 'tag2'])
 
         self.assertEqual(['name1', 'name2'],
                          sorted([p.name for p in res]))
 
+    def test_get_problems_page(self):
+        OrmProblem.objects.create(difficulty=1, name='Name0', url='') \
+            .tags.set([self.tag_1])
+
+        params = [
+            ({'order_by': 'name'}, ['Name0', 'name1', 'name2']),
+            ({'order_by': 'name', 'limit': 2, 'offset': 1}, ['name1', 'name2']),
+            ({'order_by': 'problem_id', 'limit': 2}, ['name2', 'name1']),
+        ]
+
+        for kwargs, expected_res in params:
+            with self.subTest(kwargs=kwargs, expected_res=expected_res):
+                res = DjangoGateway().get_problems(**kwargs)
+                self.assertEqual(expected_res, [p.name for p in res])
+
+    def test_get_problems_page_requires_order(self):
+        with self.assertRaises(ValueError) as context:
+            DjangoGateway().get_problems(limit=1)
+
+        self.assertEqual(str(context.exception),
+                         "Supply 'order_by' to select a page!")
+
     def test_problem_exists_via_name(self):
-        self.assertTrue(DjangoGateway.problem_exists(name='name1'))
+        self.assertTrue(DjangoGateway().problem_exists(name='name1'))
 
     def test_problem_does_not_exist_via_name(self):
-        self.assertFalse(DjangoGateway.problem_exists(name='not there'))
+        self.assertFalse(DjangoGateway().problem_exists(name='not there'))
 
     def test_problem_exists_via_problem_id(self):
         problem_id = OrmProblem.objects.last().pk
 
-        self.assertTrue(DjangoGateway.problem_exists(problem_id=problem_id))
+        self.assertTrue(DjangoGateway().problem_exists(problem_id=problem_id))
 
     def test_problem_does_not_exist_problem_id(self):
-        self.assertFalse(DjangoGateway.problem_exists(problem_id=99999999))
+        self.assertFalse(DjangoGateway().problem_exists(problem_id=99999999))
 
     def test_problem_exists_raises_when_no_input(self):
         with self.assertRaises(ValueError) as context:
-            DjangoGateway.problem_exists()
+            DjangoGateway().problem_exists()
 
         self.assertEqual(str(context.exception),
                          "Supply exactly one of 'problem_id' or 'name'!")
 
     def test_problem_exists_raises_when_all_inputs(self):
         with self.assertRaises(ValueError) as context:
-            DjangoGateway.problem_exists(name='test', problem_id=1)
+            DjangoGateway().problem_exists(name='test', problem_id=1)
 
         self.assertEqual(str(context.exception),
                          "Supply exactly one of 'problem_id' or 'name'!")
@@ -213,6 +249,114 @@ class TestProblemLogCreation(TestCase):
         self.assertEqual(orm_log.timestamp, ts)
         self.assertEqual(orm_log.comment, 'test comment')
 
+    def test_create_problem_logs(self):
+        tag_2 = OrmTag.objects.create(name='test-tag-2')
+        logs = [ProblemLogCreator.create(
+            problem_id=self.problem.pk,
+            result=result,
+            tags=[TagCreator.create(name=self.tag.name),
+                  TagCreator.create(name=tag_2.name)])
+            for result in [Result.NO_IDEA, Result.KNEW_BY_HEART]]
+
+        with self.assertNumQueries(5):  # incl. tag lookup and savepoint
+            DjangoGateway().create_problem_logs(problem_logs=logs)
+
+        orm_logs = OrmProblemLog.objects.order_by('pk')
+        self.assertEqual([Result.NO_IDEA.value, Result.KNEW_BY_HEART.value],
+                         [orm_log.result for orm_log in orm_logs])
+        for orm_log in orm_logs:
+            self.assertEqual(['test-tag', 'test-tag-2'],
+                             sorted(t.name for t in orm_log.tags.all()))
+
+
+
+class TestAtomicWrites(TransactionTestCase):
+    def setUp(self):
+        self.problem = OrmProblem.objects.create(difficulty=1, name='prob_1')
+        self.tag = OrmTag.objects.create(name='tag_1')
+        self.log = ProblemLogCreator.create(
+            problem_id=self.problem.pk,
+            result=Result.NO_IDEA,
+            tags=[TagCreator.create(name='tag_1')])
+
+    def test_log_without_tags_is_rolled_back(self):
+        with patch.object(DjangoGateway, '_query_tags',
+                          side_effect=RuntimeError('crash')):
+            with self.assertRaises(RuntimeError):
+                DjangoGateway().create_problem_log(problem_log=self.log)
+
+        self.assertEqual(0, OrmProblemLog.objects.count())
+
+    @patch('spaced_repetition.gateways.django_gateway.django_gateway.time.sleep')
+    def test_locked_database_is_retried(self, mock_sleep):
+        query_tags = DjangoGateway()._query_tags
+        with patch.object(DjangoGateway, '_query_tags', side_effect=[
+                OperationalError('database is locked'),
+                OperationalError('database is locked'),
+                query_tags(names=['tag_1'], sub_str=None)]):
+            DjangoGateway().create_problem_log(problem_log=self.log)
+
+        self.assertEqual(2, mock_sleep.call_count)
+        self.assertLess(mock_sleep.call_args_list[0][0][0],
+                        mock_sleep.call_args_list[1][0][0])
+        orm_log = OrmProblemLog.objects.get()
+        self.assertEqual(['tag_1'], [t.name for t in orm_log.tags.all()])
+
+    @override_settings(DB_WRITE_RETRIES=2)
+    @patch('spaced_repetition.gateways.django_gateway.django_gateway.time.sleep')
+    def test_retries_are_bounded(self, mock_sleep):
+        with patch.object(DjangoGateway, '_query_tags',
+                          side_effect=OperationalError('database is locked')) \
+                as mock_query_tags:
+            with self.assertRaises(OperationalError):
+                DjangoGateway().create_problem_log(problem_log=self.log)
+
+        self.assertEqual(3, mock_query_tags.call_count)
+        self.assertEqual(2, mock_sleep.call_count)
+        self.assertEqual(0, OrmProblemLog.objects.count())
+
+    def test_other_errors_are_not_retried(self):
+        with patch.object(DjangoGateway, '_query_tags',
+                          side_effect=OperationalError('no such table')) \
+                as mock_query_tags:
+            with self.assertRaises(OperationalError):
+                DjangoGateway().create_problem_log(problem_log=self.log)
+
+        mock_query_tags.assert_called_once()
+
+class TestConcurrentAdds(TransactionTestCase):
+    def test_concurrent_adds_of_a_name_create_it_once(self):
+        """ the second add waits for the first one's transaction, then sees
+        the name: check and insert don't interleave """
+        inserting, create = threading.Event(), OrmTag.objects.create
+        results = []
+
+        def slow_create(**kwargs):
+            inserting.set()
+            time.sleep(0.2)  # the other add tries to write meanwhile
+            return create(**kwargs)
+
+        def add_tag():
+            try:
+                results.append(DjangoGateway().create_tag(Tag(name='tag_1')))
+            except DuplicateNameError as err:
+                results.append(err)
+            finally:
+                connection.close()
+
+        with patch.object(OrmTag.objects, 'create', side_effect=slow_create):
+            first = threading.Thread(target=add_tag)
+            first.start()
+            inserting.wait()
+            second = threading.Thread(target=add_tag)
+            second.start()
+            first.join()
+            second.join()
+
+        self.assertEqual(1, OrmTag.objects.filter(name='tag_1').count())
+        self.assertIsInstance(results[0], Tag)
+        self.assertIsInstance(results[1], DuplicateNameError)
+
 
 class TestProblemLogQuerying(TestCase):
     def setUp(self):
@@ -246,12 +390,30 @@ class TestProblemLogQuerying(TestCase):
         log_3.tags.add(self.tag)
 
     def test_query_all(self):
-        self.assertEqual(3, len(DjangoGateway._query_problem_logs()))
+        self.assertEqual(3, len(DjangoGateway()._query_problem_logs()))
 
     def test_query_for_problem(self):
         self.assertEqual(
             2,
-            len(DjangoGateway._query_problem_logs(problem_ids=[self.prob.pk])))
+            len(DjangoGateway()._query_problem_logs(problem_ids=[self.prob.pk])))
+
+    def test_query_for_no_problems(self):
+        self.assertEqual(
+            0, len(DjangoGateway()._query_problem_logs(problem_ids=[])))
+
+    def test_query_for_tags(self):
+        other_tag = OrmTag.objects.create(name='other_tag')
+        log = OrmProblemLog.objects.create(
+            problem_id=self.prob.pk,
+            result=Result.NO_IDEA.value,
+            timestamp=dt.datetime(2021, 1, 25, 10, tzinfo=gettz('UTC')))
+        log.tags.set([self.tag, other_tag])
+
+        self.assertEqual(
+            1, len(DjangoGateway()._query_problem_logs(tags_any=['other_tag'])))
+        self.assertEqual(
+            4, len(DjangoGateway()._query_problem_logs(
+                tags_any=['tag_1', 'other_tag'])))
 
     def test_format_problem_logs(self):
         expected_res = [
@@ -268,22 +430,146 @@ class TestProblemLogQuerying(TestCase):
 
         self.assertEqual(expected_res, res)
 
+    def test_iter_problem_tag_logs(self):
+        other_tag = OrmTag.objects.create(name='a_tag')
+        log = OrmProblemLog.objects.create(
+            problem_id=self.prob.pk,
+            result=Result.NO_IDEA.value,
+            timestamp=dt.datetime(2021, 1, 5, 10, tzinfo=gettz('UTC')))
+        log.tags.set([self.tag, other_tag])
+
+        res = [(p_l.problem_id, [t.name for t in p_l.tags], p_l.timestamp.day)
+               for p_l in DjangoGateway().iter_problem_tag_logs()]
+
+        self.assertEqual([(self.prob.pk, ['a_tag'], 5),
+                          (self.prob.pk, ['tag_1'], 5),
+                          (self.prob.pk, ['tag_1'], 10),
+                          (self.prob.pk, ['tag_1'], 20),
+                          (self.prob.pk + 1, ['tag_1'], 15)], res)
+
+    def test_iter_problem_tag_logs_filtered(self):
+        other_tag = OrmTag.objects.create(name='other_tag')
+        log = OrmProblemLog.objects.create(
+            problem_id=self.prob.pk,
+            result=Result.NO_IDEA.value,
+            timestamp=dt.datetime(2021, 1, 25, 10, tzinfo=gettz('UTC')))
+        log.tags.set([self.tag, other_tag])
+
+        res = list(DjangoGateway().iter_problem_tag_logs(
+            problem_ids=[self.prob.pk], tags_any=['other_tag']))
+
+        self.assertEqual([ProblemLogCreator.create(
+            problem_id=self.prob.pk,
+            result=Result.NO_IDEA,
+            tags=[TagCreator.create(name='other_tag', tag_id=other_tag.pk)],
+            timestamp=dt.datetime(2021, 1, 25, 10, tzinfo=gettz('UTC')))],
+            res)
+        self.assertEqual([], list(DjangoGateway().iter_problem_tag_logs(
+            problem_ids=[])))
+
     @patch.object(DjangoGateway, attribute='_format_problem_logs')
     @patch.object(DjangoGateway, attribute='_query_problem_logs')
     def test_get_problem_logs(self, mock_query_problem_logs,
                               mock_format_problem_logs):
         mock_query_problem_logs.return_value = 'fake_problems'
 
-        DjangoGateway.get_problem_logs()
+        DjangoGateway().get_problem_logs()
 
-        mock_query_problem_logs.assert_called_once_with(problem_ids=None)
+        mock_query_problem_logs.assert_called_once_with(problem_ids=None,
+                                                        tags_any=None)
         mock_format_problem_logs.assert_called_once_with(
             problem_log_qs='fake_problems')
 
 
+class TestSqliteConnection(TestCase):
+    def test_transactions_take_the_write_lock_at_once(self):
+        connection.ensure_connection()
+
+        self.assertEqual('IMMEDIATE', connection.transaction_mode)
+
+
+class TestDataVersion(TestCase):
+    def test_data_version_changes_on_create(self):
+        initial_version = DjangoGateway().get_data_version()
+
+        tag = OrmTag.objects.create(name='tag_1')
+        after_tag = DjangoGateway().get_data_version()
+        self.assertNotEqual(initial_version, after_tag)
+
+        problem = OrmProblem.objects.create(difficulty=1, name='prob_1')
+        problem.tags.add(tag)
+        after_problem = DjangoGateway().get_data_version()
+        self.assertNotEqual(after_tag, after_problem)
+
+        log = OrmProblemLog.objects.create(
+            problem=problem,
+            result=Result.NO_IDEA.value,
+            timestamp=dt.datetime(2021, 1, 1, tzinfo=gettz('UTC')))
+        log.tags.add(tag)
+        self.assertNotEqual(after_problem, DjangoGateway().get_data_version())
+
+    def test_data_version_stable_without_changes(self):
+        OrmTag.objects.create(name='tag_1')
+
+        self.assertEqual(DjangoGateway().get_data_version(),
+                         DjangoGateway().get_data_version())
+
+
+class TestProblemTagLogsBetweenVersions(TestCase):
+    def setUp(self):
+        self.gateway = DjangoGateway()
+        self.tag = OrmTag.objects.create(name='tag_1')
+        self.problem = OrmProblem.objects.create(difficulty=1, name='prob_1')
+        self._log(day=1)
+
+    def _log(self, day: int, learner: OrmLearner = None) -> OrmProblemLog:
+        log = OrmProblemLog.objects.create(
+            learner=learner,
+            problem=self.problem,
+            result=Result.NO_IDEA.value,
+            timestamp=dt.datetime(2021, 1, day, tzinfo=gettz('UTC')))
+        log.tags.add(self.tag)
+        return log
+
+    def _days_between(self, since: tuple, until: tuple) -> list:
+        return [p_l.timestamp.day for p_l in
+                self.gateway.iter_problem_tag_logs_between(since=since,
+                                                           until=until)]
+
+    def test_logs_created_between_versions(self):
+        since = self.gateway.get_data_version()
+        self._log(day=2)
+        self._log(day=3, learner=OrmLearner.objects.create(name='bob'))
+        self._log(day=4)
+        until = self.gateway.get_data_version()
+        self._log(day=5)
+
+        self.assertEqual([2, 4], self._days_between(since=since, until=until))
+        self.assertEqual([1, 2, 4], self._days_between(since=None,
+                                                       until=until))
+        self.assertEqual([], self._days_between(since=until, until=until))
+
+    def test_none_after_deletion(self):
+        since = self.gateway.get_data_version()
+        self._log(day=2)
+        OrmProblemLog.objects.filter(timestamp__day=1).delete()
+        self._log(day=3)
+
+        self.assertIsNone(self.gateway.iter_problem_tag_logs_between(
+            since=since, until=self.gateway.get_data_version()))
+
+    def test_none_for_other_learner(self):
+        since = self.gateway.get_data_version()
+        other_learner = DjangoGateway(
+            learner_id=OrmLearner.objects.create(name='bob').pk)
+
+        self.assertIsNone(other_learner.iter_problem_tag_logs_between(
+            since=since, until=other_learner.get_data_version()))
+
+
 class TestTagCreation(TestCase):
     def test_create_tag(self):
-        tag = DjangoGateway.create_tag(Tag(name='tag1'))
+        tag = DjangoGateway().create_tag(Tag(name='tag1'))
         self.assertIsInstance(tag, Tag)
         self.assertEqual(tag.name, 'tag1')
 
@@ -292,6 +578,17 @@ class TestTagCreation(TestCase):
         self.assertEqual(tags[0].name, 'tag1')
 
 
+    def test_create_tag_with_duplicate_name(self):
+        DjangoGateway().create_tag(Tag(name='tag1'))
+        learner_id = DjangoGateway.get_or_create_learner_id(name='alice')
+        DjangoGateway(learner_id=learner_id).create_tag(Tag(name='tag1'))
+
+        with self.assertRaises(DuplicateNameError):
+            DjangoGateway().create_tag(Tag(name='tag1'))
+
+        self.assertEqual(2, OrmTag.objects.count())
+
+
 class TestTagGetting(TestCase):
     def setUp(self):
         OrmTag.objects.create(name='tag2')
@@ -299,18 +596,18 @@ class TestTagGetting(TestCase):
         OrmTag.objects.create(name='t3')
 
     def test_query_tags(self):
-        tags = DjangoGateway._query_tags(names=None, sub_str=None)
+        tags = DjangoGateway()._query_tags(names=None, sub_str=None)
 
         self.assertIsInstance(tags[0], OrmTag)
         self.assertEqual([t.name for t in tags], ['tag2', 'Tag1', 't3'])
 
     def test_query_tag_filter_sub_str(self):
-        tags = DjangoGateway._query_tags(names=None, sub_str='ag')
+        tags = DjangoGateway()._query_tags(names=None, sub_str='ag')
 
         self.assertEqual([t.name for t in tags], ['tag2', 'Tag1'])
 
     def test_query_tag_filter_names(self):
-        tags = DjangoGateway._query_tags(names=['Tag1', 't3'], sub_str=None)
+        tags = DjangoGateway()._query_tags(names=['Tag1', 't3'], sub_str=None)
 
         self.assertEqual([t.name for t in tags], ['Tag1', 't3'])
 
@@ -326,13 +623,177 @@ class TestTagGetting(TestCase):
                          [OrmTag.objects.get(name=t.name).pk for t in tags])
 
     def test_get_tags(self):
-        tags = DjangoGateway.get_tags()
+        tags = DjangoGateway().get_tags()
 
         self.assertIsInstance(tags[0], Tag)
         self.assertEqual(len(tags), 3)
 
     def test_tag_exists(self):
-        self.assertTrue(DjangoGateway.tag_exists(name='Tag1'))
+        self.assertTrue(DjangoGateway().tag_exists(name='Tag1'))
 
     def test_tag_does_not_exist(self):
-        self.assertFalse(DjangoGateway.tag_exists(name='not there'))
+        self.assertFalse(DjangoGateway().tag_exists(name='not there'))
+
+
+class TestLearners(TestCase):
+    def setUp(self):
+        self.gateways = {
+            name: DjangoGateway(
+                learner_id=DjangoGateway.get_or_create_learner_id(name=name))
+            for name in ['alice', 'bob']}
+        self.gateways[None] = DjangoGateway()
+        for name, gateway in self.gateways.items():
+            tag = gateway.create_tag(tag=TagCreator.create(name='tag_1'))
+            problem = gateway.create_problem(problem=ProblemCreator.create(
+                difficulty=Difficulty.EASY, name='prob_1', tags=[tag], url=''))
+            gateway.create_problem_log(problem_log=ProblemLogCreator.create(
+                comment=str(name), problem_id=problem.problem_id,
+                result=Result.NO_IDEA, tags=[tag]))
+
+    def test_get_or_create_learner_id(self):
+        learner_id = DjangoGateway.get_or_create_learner_id(name='alice')
+
+        self.assertEqual(self.gateways['alice'].learner_id, learner_id)
+        self.assertEqual(learner_id, DjangoGateway.get_learner_id(name='alice'))
+        self.assertIsNone(DjangoGateway.get_learner_id(name='carol'))
+        self.assertEqual(2, OrmLearner.objects.count())
+
+    def test_rows_belong_to_their_learner(self):
+        for name, gateway in self.gateways.items():
+            with self.subTest(learner=name):
+                self.assertEqual(
+                    3, OrmTag.objects.filter(name='tag_1').count())
+                tag = OrmTag.objects.get(learner_id=gateway.learner_id)
+                log = OrmProblemLog.objects.get(learner_id=gateway.learner_id)
+                self.assertEqual(gateway.learner_id, log.problem.learner_id)
+                self.assertEqual([tag], list(log.problem.tags.all()))
+                self.assertEqual([tag], list(log.tags.all()))
+
+    def test_reads_are_isolated(self):
+        for name, gateway in self.gateways.items():
+            with self.subTest(learner=name):
+                problems = gateway.get_problems()
+                self.assertEqual(1, len(problems))
+                self.assertEqual(
+                    OrmProblem.objects.get(learner_id=gateway.learner_id).pk,
+                    problems[0].problem_id)
+                self.assertEqual(1, len(gateway.get_tags()))
+                self.assertEqual([str(name)], [
+                    p_l.comment for p_l in gateway.get_problem_logs()])
+                self.assertEqual([str(name)], [
+                    p_l.comment for p_l in gateway.iter_problem_tag_logs()])
+                self.assertTrue(gateway.tag_exists(name='tag_1'))
+                self.assertTrue(gateway.problem_exists(name='prob_1'))
+
+    def test_foreign_problem_is_not_found(self):
+        foreign_problem = OrmProblem.objects.get(
+            learner_id=self.gateways['bob'].learner_id)
+
+        self.assertFalse(self.gateways['alice'].problem_exists(
+            problem_id=foreign_problem.pk))
+        with self.assertRaises(OrmProblem.DoesNotExist):
+            self.gateways['alice'].create_problem_log(
+                problem_log=ProblemLogCreator.create(
+                    problem_id=foreign_problem.pk, result=Result.NO_IDEA,
+                    tags=[TagCreator.create(name='tag_1')]))
+
+    def test_data_version_per_learner(self):
+        versions = {name: gateway.get_data_version()
+                    for name, gateway in self.gateways.items()}
+        self.assertEqual(3, len(set(versions.values())))
+
+        self.gateways['bob'].create_tag(tag=TagCreator.create(name='tag_2'))
+
+        self.assertEqual(versions['alice'],
+                         self.gateways['alice'].get_data_version())
+        self.assertNotEqual(versions['bob'],
+                            self.gateways['bob'].get_data_version())
+
+    async def test_async_reads_are_isolated(self):
+        learner_id = await DjangoGateway.aget_learner_id(name='alice')
+        gateway = DjangoGateway(learner_id=learner_id)
+
+        self.assertEqual(self.gateways['alice'].learner_id, learner_id)
+        self.assertEqual(1, len(await gateway.aget_problems()))
+        self.assertEqual(['alice'], [
+            p_l.comment for p_l in await gateway.aget_problem_logs()])
+        self.assertEqual(
+            await sync_to_async(self.gateways['alice'].get_data_version)(),
+            await gateway.aget_data_version())
+
+
+class TestAsyncMethods(TestCase):
+    def setUp(self):
+        self.tag = OrmTag.objects.create(name='tag_1')
+        OrmTag.objects.create(name='other_tag')
+        self.prob = OrmProblem.objects.create(difficulty=1, name='prob_1',
+                                              url='www.test_url.com')
+        self.prob.tags.set([self.tag])
+        log = OrmProblemLog.objects.create(
+            problem_id=self.prob.pk,
+            result=Result.NO_IDEA.value,
+            timestamp=dt.datetime(2021, 1, 5, 10, tzinfo=gettz('UTC')))
+        log.tags.set([self.tag])
+
+    async def test_reads_match_sync_methods(self):
+        self.assertEqual(await sync_to_async(DjangoGateway().get_data_version)(),
+                         await DjangoGateway().aget_data_version())
+        self.assertEqual(
+            await sync_to_async(DjangoGateway().get_problems)(tags_any=['tag_1']),
+            await DjangoGateway().aget_problems(tags_any=['tag_1']))
+        self.assertEqual(
+            await sync_to_async(DjangoGateway().get_problem_logs)(),
+            await DjangoGateway().aget_problem_logs())
+        self.assertEqual(
+            await sync_to_async(DjangoGateway().get_tags)(sub_str='tag'),
+            await DjangoGateway().aget_tags(sub_str='tag'))
+        self.assertEqual(
+            await sync_to_async(
+                lambda: list(DjangoGateway().iter_problem_tag_logs()))(),
+            [p_l async for p_l in DjangoGateway().aiter_problem_tag_logs()])
+
+        self.assertTrue(await DjangoGateway().aproblem_exists(name='prob_1'))
+        self.assertFalse(await DjangoGateway().aproblem_exists(name='prob_2'))
+        self.assertTrue(await DjangoGateway().atag_exists(name='other_tag'))
+
+    async def test_aiter_problem_tag_logs_between(self):
+        gateway = DjangoGateway()
+        since = await gateway.aget_data_version()
+        log = await OrmProblemLog.objects.acreate(
+            problem_id=self.prob.pk,
+            result=Result.KNEW_BY_HEART.value,
+            timestamp=dt.datetime(2021, 1, 6, 10, tzinfo=gettz('UTC')))
+        await log.tags.aset([self.tag])
+
+        logs = await gateway.aiter_problem_tag_logs_between(
+            since=since, until=await gateway.aget_data_version())
+
+        self.assertEqual([Result.KNEW_BY_HEART],
+                         [p_l.result async for p_l in logs])
+
+    @patch.object(DjangoGateway, attribute='LOG_STREAM_CHUNK_SIZE', new=1)
+    async def test_aiter_problem_tag_logs_in_chunks(self):
+        log = await OrmProblemLog.objects.acreate(
+            problem_id=self.prob.pk,
+            result=Result.KNEW_BY_HEART.value,
+            timestamp=dt.datetime(2021, 1, 6, 10, tzinfo=gettz('UTC')))
+        await log.tags.aset([self.tag])
+
+        res = [p_l.result async for p_l in DjangoGateway().aiter_problem_tag_logs(
+            problem_ids=[self.prob.pk])]
+
+        self.assertEqual([Result.NO_IDEA, Result.KNEW_BY_HEART], res)
+
+    async def test_writes(self):
+        tag = await DjangoGateway().acreate_tag(Tag(name='new_tag'))
+        problem = await DjangoGateway().acreate_problem(ProblemCreator.create(
+            difficulty=Difficulty.HARD, name='prob_2', tags=[tag], url=''))
+        await DjangoGateway().acreate_problem_log(ProblemLogCreator.create(
+            problem_id=problem.problem_id,
+            result=Result.SOLVED_SUBOPTIMALLY,
+            tags=[tag]))
+
+        logs = await DjangoGateway().aget_problem_logs(tags_any=['new_tag'])
+        self.assertEqual([(problem.problem_id, Result.SOLVED_SUBOPTIMALLY)],
+                         [(p_l.problem_id, p_l.result) for p_l in logs])
+        self.assertEqual(['new_tag'], [t.name for t in problem.tags])
@@ -0,0 +1,40 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from spaced_repetition.domain.problem_log import Result
+from spaced_repetition.gateways.pickle_cache import PickleCache
+
+
+class TestPickleCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = PickleCache(directory=Path(self.tmp_dir.name) / 'cache')
+        self.df = pd.DataFrame({'problem_id': [1, 2],
+                                'result': [Result.NO_IDEA,
+                                           Result.KNEW_BY_HEART]})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_missing(self):
+        self.assertIsNone(self.cache.load(name='state', key='key'))
+
+    def test_save_and_load(self):
+        self.cache.save(name='state', key='key', df=self.df)
+
+        assert_frame_equal(self.df, self.cache.load(name='state', key='key'))
+
+    def test_load_outdated_key(self):
+        self.cache.save(name='state', key='old_key', df=self.df)
+
+        self.assertIsNone(self.cache.load(name='state', key='new_key'))
+
+    def test_load_corrupt_file(self):
+        self.cache.save(name='state', key='key', df=self.df)
+        (self.cache.directory / 'state.pkl').write_bytes(b'garbage')
+
+        self.assertIsNone(self.cache.load(name='state', key='key'))
@@ -0,0 +1,162 @@
+import datetime as dt
+import fcntl
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+from dateutil.tz import gettz
+from django.test import TestCase
+
+from spaced_repetition.domain.problem_log import ProblemLogCreator, Result
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.gateways.django_gateway.django_gateway import DjangoGateway
+from spaced_repetition.gateways.django_gateway.django_project.apps.problem.models import (
+    Problem as OrmProblem,
+    ProblemLog as OrmProblemLog,
+    Tag as OrmTag)
+from spaced_repetition.gateways.write_behind_gateway import WriteBehindGateway
+
+# pylint: disable=protected-access
+
+
+class TestWriteBehindGateway(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.journal_path = Path(self.tmp_dir.name) / 'srep.journal'
+
+        tag = OrmTag.objects.create(name='tag_1')
+        problem = OrmProblem.objects.create(difficulty=1, name='problem_1')
+        problem.tags.set([tag])
+        self.logs = [ProblemLogCreator.create(
+            problem_id=problem.pk,
+            result=Result.KNEW_BY_HEART,
+            tags=[TagCreator.create(name='tag_1', tag_id=tag.pk)],
+            timestamp=dt.datetime(2021, 1, day, tzinfo=gettz('UTC')))
+            for day in range(1, 4)]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _gateway(self, batch_size: int = 10) -> WriteBehindGateway:
+        return WriteBehindGateway(gateway=DjangoGateway(),
+                                  journal_path=self.journal_path,
+                                  batch_size=batch_size)
+
+    def _journal_entries(self) -> list:
+        return [json.loads(line)
+                for line in self.journal_path.read_text().splitlines()]
+
+    def _crash(self, gateway: WriteBehindGateway):
+        """ give up the journal without flushing """
+        fcntl.flock(gateway._journal, fcntl.LOCK_UN)
+        gateway._journal.close()
+
+    def test_logs_are_journaled_then_batched(self):
+        gateway = self._gateway()
+
+        gateway.create_problem_log(problem_log=self.logs[0])
+        gateway.create_problem_log(problem_log=self.logs[1])
+
+        self.assertEqual(0, OrmProblemLog.objects.count())
+        self.assertEqual(2, len(self._journal_entries()))
+
+        gateway.close()
+
+        self.assertEqual(2, OrmProblemLog.objects.count())
+        self.assertEqual([], self._journal_entries())
+
+    def test_full_batch_is_flushed(self):
+        gateway = self._gateway(batch_size=2)
+
+        gateway.create_problem_logs(problem_logs=self.logs[:2])
+
+        self.assertEqual(2, OrmProblemLog.objects.count())
+        self.assertEqual([], self._journal_entries())
+        gateway.close()
+
+    def test_reads_see_buffered_logs(self):
+        gateway = self._gateway()
+        version_before = gateway.get_data_version()
+
+        gateway.create_problem_log(problem_log=self.logs[0])
+
+        self.assertNotEqual(version_before, gateway.get_data_version())
+        self.assertEqual([self.logs[0]], gateway.get_problem_logs())
+        self.assertEqual(len(self.logs[0].tags),
+                         len(list(gateway.iter_problem_tag_logs())))
+        self.assertEqual(len(self.logs[0].tags), len(list(
+            gateway.iter_problem_tag_logs_between(
+                since=version_before, until=gateway.get_data_version()))))
+        gateway.close()
+
+    def test_replay_after_crash(self):
+        gateway = self._gateway()
+        gateway.create_problem_logs(problem_logs=self.logs)
+        DjangoGateway().create_problem_logs(problem_logs=self.logs[:1])  # stored right before the crash
+        self._crash(gateway)
+        with open(self.journal_path, 'a') as journal:
+            journal.write('{"incomplete')
+
+        self._gateway().close()
+
+        self.assertEqual(3, OrmProblemLog.objects.count())
+        self.assertEqual(
+            [log.timestamp for log in self.logs],
+            [log.timestamp for log in OrmProblemLog.objects.order_by('timestamp')])
+        self.assertEqual([], self._journal_entries())
+
+    def test_journal_is_locked(self):
+        gateway = self._gateway()
+
+        with self.assertRaises(BlockingIOError):
+            self._gateway()
+
+        gateway.close()
+        self._gateway().close()
+
+
+class TestWriteBehindGatewayThreads(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.journal_path = Path(self.tmp_dir.name) / 'srep.journal'
+        self.logs = [ProblemLogCreator.create(
+            problem_id=1,
+            result=Result.KNEW_BY_HEART,
+            tags=[TagCreator.create(name='tag_1', tag_id=1)],
+            timestamp=dt.datetime(2021, 1, day, tzinfo=gettz('UTC')))
+            for day in range(1, 3)]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_log_written_during_flush_is_kept(self):
+        """ A log written by another thread while the buffer is being
+        flushed stays journaled and buffered """
+        gateway = WriteBehindGateway(gateway=Mock(),
+                                     journal_path=self.journal_path)
+        stored, writers = [], []
+
+        def store_slowly(problem_logs):
+            if not writers:  # the first flush: log from another thread
+                writers.append(threading.Thread(
+                    target=gateway.create_problem_log, args=(self.logs[1],)))
+                writers[0].start()
+                writers[0].join(timeout=0.2)
+            stored.append(list(problem_logs))
+
+        gateway.gateway.create_problem_logs.side_effect = store_slowly
+        gateway.create_problem_log(problem_log=self.logs[0])
+        gateway.flush()
+        writers[0].join()
+
+        self.assertEqual([[self.logs[0]]], stored)
+        self.assertEqual([self.logs[1].timestamp.isoformat()],
+                         [json.loads(line)['timestamp'] for line
+                          in self.journal_path.read_text().splitlines()])
+
+        gateway.close()
+
+        self.assertEqual([[self.logs[0]], [self.logs[1]]], stored)
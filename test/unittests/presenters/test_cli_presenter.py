@@ -262,6 +262,53 @@ class TestPresentTags(unittest.TestCase):
         self.assertEqual(expected_output,
                          mock_stdout.getvalue())
 
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_list_tag_forecast(self, mock_stdout):
+        forecast = pd.DataFrame(data={'tag': ['tag_1'],
+                                      '2021-01-01': [4.0],
+                                      '2021-01-02': [2.5]})
+
+        CliPresenter.list_tag_forecast(forecast=forecast)
+
+        self.assertEqual(
+            "| tag   |   2021-01-01 |   2021-01-02 |\n"
+            "|-------|--------------|--------------|\n"
+            "| tag_1 |            4 |          2.5 |\n",
+            mock_stdout.getvalue())
+
+
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_list_workload(self, mock_stdout):
+        workload = pd.DataFrame(data={'date': ['2021-01-01', '2021-01-02'],
+                                      'due': [3, 0]})
+
+        CliPresenter.list_workload(workload=workload)
+
+        self.assertEqual(
+            "| date       |   due |\n"
+            "|------------|-------|\n"
+            "| 2021-01-01 |     3 |\n"
+            "| 2021-01-02 |     0 |\n",
+            mock_stdout.getvalue())
+
+
+class TestDashboard(unittest.TestCase):
+    @patch.object(CliPresenter, 'list_problem_tag_combos')
+    @patch.object(CliPresenter, 'list_problems')
+    @patch.object(CliPresenter, 'list_tags')
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_show_dashboard(self, mock_stdout, mock_list_tags,
+                            mock_list_problems, mock_list_combos):
+        CliPresenter.show_dashboard(tags='tag_df',
+                                    problems='problem_df',
+                                    problem_tag_combos='combo_df')
+
+        mock_list_tags.assert_called_once_with('tag_df')
+        mock_list_problems.assert_called_once_with('problem_df')
+        mock_list_combos.assert_called_once_with('combo_df')
+        self.assertEqual('Tags:\n\nProblems:\n\nProblem-tag-combos:\n',
+                         mock_stdout.getvalue())
+
 
 class TestCliPresentConfirmations(unittest.TestCase):
     def setUp(self) -> None:
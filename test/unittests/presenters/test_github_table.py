@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from spaced_repetition.presenters import github_table
+
+
+class TestRender(unittest.TestCase):
+    def assert_like_tabulate(self, df: pd.DataFrame):
+        self.assertEqual(tabulate(df, headers='keys', tablefmt='github'),
+                         github_table.render(df))
+
+    def test_mixed_columns(self):
+        df = pd.DataFrame(data={
+            'tag': ['tag_1', ' padded ', 'a_much_longer_tag'],
+            'problem_id': [1, 200, 30],
+            'KS': [0.5, np.nan, 5.42177e-135],
+            'last_result': ['NO_IDEA', np.nan, None],
+            'url': ['', '', ''],
+            'interval': [3., 10., np.nan]}).set_index('tag')
+
+        self.assert_like_tabulate(df)
+
+    def test_numeric_columns(self):
+        self.assert_like_tabulate(pd.DataFrame(data={
+            'priority': [0.25, 1e6, -3.],
+            'num_problems': [1, 15, 1234567]}))
+
+    def test_numbers_in_text_columns(self):
+        self.assert_like_tabulate(pd.DataFrame(data={
+            'ints': ['12', '1,000', None],
+            'floats': ['1.5', 'nan', '7'],
+            'bools_and_floats': ['True', '2.25', ''],
+            'text': ['12', 'twelve', '1e5']}))
+
+    def test_empty(self):
+        self.assert_like_tabulate(pd.DataFrame(columns=['KS', 'tag'])
+                                  .set_index('tag'))
+        self.assert_like_tabulate(pd.DataFrame(columns=['KS', 'tag']))
+
+    def test_falls_back_to_tabulate(self):
+        self.assert_like_tabulate(pd.DataFrame(data={
+            'problem': ['ünïcödé', '两数之和', 'multi\nline']}))
+
+    def test_render_chunks(self):
+        df = pd.DataFrame(data={'tag': [f'tag_{idx}' for idx in range(5)]})
+
+        chunks = list(github_table.render_chunks(df, chunk_size=2))
+
+        self.assertEqual(4, len(chunks))  # header + 3 chunks of rows
+        self.assertEqual(2, chunks[0].count('\n'))
+        self.assertEqual([2, 2, 1], [c.count('\n') for c in chunks[1:]])
+        self.assertEqual(tabulate(df, headers='keys', tablefmt='github')
+                         + '\n', ''.join(chunks))
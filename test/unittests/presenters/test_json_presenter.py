@@ -0,0 +1,123 @@
+import datetime as dt
+import unittest
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import gettz
+
+from spaced_repetition.domain.problem import Difficulty, ProblemCreator
+from spaced_repetition.domain.problem_log import ProblemLogCreator, Result
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.presenters.json_presenter import JsonPresenter
+
+# pylint: disable=protected-access, no-self-use
+
+
+class TestJsonPresenter(unittest.TestCase):
+    def setUp(self):
+        self.tag = TagCreator.create(name='tag_1', tag_id=3)
+        self.problem = ProblemCreator.create(difficulty=Difficulty.HARD,
+                                             name='prob_1',
+                                             problem_id=1,
+                                             tags=[self.tag],
+                                             url='www.test.com')
+
+    def test_list_problem_tag_combos(self):
+        combos = pd.DataFrame(data={
+            'difficulty': [Difficulty.EASY, Difficulty.HARD],
+            'ease': [2.5, np.nan],
+            'interval': [3, np.nan],
+            'KS': [1.5, np.nan],
+            'problem': ['prob_1', 'prob_2'],
+            'problem_id': [1, 2],
+            'result': [Result.SOLVED_OPTIMALLY_WITH_HINT, np.nan],
+            'RF': [0.75, np.nan],
+            'surplus_col': ['not returned'] * 2,
+            'tag': ['tag_1'] * 2,
+            'ts_logged': [dt.datetime(2021, 1, 10, 8, tzinfo=gettz('UTC')),
+                          pd.NaT],
+            'url': ['', '']})
+        presenter = JsonPresenter()
+
+        presenter.list_problem_tag_combos(combos)
+
+        self.assertEqual(
+            [{'tag': 'tag_1', 'problem': 'prob_1', 'problem_id': 1,
+              'difficulty': 'EASY', 'last_access': '2021-01-10T08:00:00Z',
+              'last_result': 'SOLVED_OPTIMALLY_WITH_HINT', 'KS': 1.5,
+              'RF': 0.75, 'url': '', 'ease': 2.5, 'interval': 3.0},
+             {'tag': 'tag_1', 'problem': 'prob_2', 'problem_id': 2,
+              'difficulty': 'HARD', 'last_access': None, 'last_result': None,
+              'KS': None, 'RF': None, 'url': '', 'ease': None,
+              'interval': None}],
+            presenter.data)
+
+    def test_list_tags(self):
+        presenter = JsonPresenter()
+
+        presenter.list_tags(pd.DataFrame(data={'tag': ['tag_1'],
+                                               'priority': [0.5],
+                                               'KS (weighted avg)': [0.5],
+                                               'experience': [1.],
+                                               'num_problems': [2]}))
+
+        self.assertEqual([{'tag': 'tag_1', 'priority': 0.5,
+                           'KS (weighted avg)': 0.5, 'experience': 1.,
+                           'num_problems': 2}],
+                         presenter.data)
+
+    def test_list_tag_forecast(self):
+        presenter = JsonPresenter()
+
+        presenter.list_tag_forecast(pd.DataFrame(data={'tag': ['tag_1'],
+                                                       '2021-01-01': [4.0],
+                                                       '2021-01-02': [2.5]}))
+
+        self.assertEqual([{'tag': 'tag_1', '2021-01-01': 4.0,
+                           '2021-01-02': 2.5}],
+                         presenter.data)
+
+    def test_list_workload(self):
+        presenter = JsonPresenter()
+
+        presenter.list_workload(pd.DataFrame(data={'date': ['2021-01-01'],
+                                                   'due': [3],
+                                                   'tag_1': [2]}))
+
+        self.assertEqual([{'date': '2021-01-01', 'due': 3, 'tag_1': 2}],
+                         presenter.data)
+
+    def test_confirm_problem_logged(self):
+        problem_log = ProblemLogCreator.create(
+            problem_id=1,
+            result=Result.NO_IDEA,
+            tags=[self.tag],
+            timestamp=dt.datetime(2021, 1, 10, 8, tzinfo=gettz('UTC')))
+        presenter = JsonPresenter()
+
+        presenter.confirm_problem_logged(problem=self.problem,
+                                         problem_log=problem_log)
+
+        self.assertEqual({'problem': 'prob_1',
+                          'problem_id': 1,
+                          'result': 'NO_IDEA',
+                          'tags': ['tag_1'],
+                          'timestamp': '2021-01-10T08:00:00+00:00',
+                          'comment': ''},
+                         presenter.data)
+
+    def test_show_problem_history(self):
+        history = pd.DataFrame(data={
+            'comment': ['first', 'second'],
+            'result': [Result.NO_IDEA, Result.KNEW_BY_HEART],
+            'tags': ['tag_1', 'tag_1'],
+            'ts_logged': [dt.datetime(2021, 1, 1, tzinfo=gettz('UTC')),
+                          dt.datetime(2021, 1, 2, tzinfo=gettz('UTC'))]})
+        presenter = JsonPresenter()
+
+        presenter.show_problem_history(problem=self.problem,
+                                       problem_log_info=history)
+
+        self.assertEqual('prob_1', presenter.data['problem']['problem'])
+        self.assertEqual(['KNEW_BY_HEART', 'NO_IDEA'],
+                         [log['result'] for log in presenter.data['history']])
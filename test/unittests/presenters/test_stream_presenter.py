@@ -0,0 +1,106 @@
+import datetime as dt
+import io
+import json
+import unittest
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import gettz
+
+from spaced_repetition.domain.problem import Difficulty, ProblemCreator
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.presenters.stream_presenter import StreamPresenter
+
+# pylint: disable=protected-access, no-self-use
+
+
+class TestStreamPresenter(unittest.TestCase):
+    def setUp(self):
+        self.combos = pd.DataFrame(data={
+            'difficulty': [Difficulty.EASY, Difficulty.HARD],
+            'ease': [2.5, np.nan],
+            'interval': [3, np.nan],
+            'KS': [1.5, np.nan],
+            'problem': ['prob_1', 'prob_2'],
+            'problem_id': [1, 2],
+            'result': [np.nan, np.nan],
+            'RF': [0.75, np.nan],
+            'surplus_col': ['not returned'] * 2,
+            'tag': ['tag_1'] * 2,
+            'ts_logged': [dt.datetime(2021, 1, 10, 8, tzinfo=gettz('UTC')),
+                          pd.NaT],
+            'url': ['', '']})
+        self.expected_records = [
+            {'tag': 'tag_1', 'problem': 'prob_1', 'problem_id': 1,
+             'difficulty': 'EASY', 'last_access': '2021-01-10T08:00:00+00:00',
+             'last_result': None, 'KS': 1.5, 'RF': 0.75, 'url': '',
+             'ease': 2.5, 'interval': 3.0},
+            {'tag': 'tag_1', 'problem': 'prob_2', 'problem_id': 2,
+             'difficulty': 'HARD', 'last_access': None, 'last_result': None,
+             'KS': None, 'RF': None, 'url': '', 'ease': None,
+             'interval': None}]
+
+    def present(self, fmt: str) -> str:
+        stream = io.StringIO()
+        StreamPresenter(fmt=fmt, stream=stream) \
+            .list_problem_tag_combos(self.combos)
+        return stream.getvalue()
+
+    def test_jsonl(self):
+        lines = self.present(fmt='jsonl').splitlines()
+
+        self.assertEqual(self.expected_records,
+                         [json.loads(line) for line in lines])
+
+    def test_json(self):
+        self.assertEqual(self.expected_records,
+                         json.loads(self.present(fmt='json')))
+
+    def test_csv(self):
+        self.assertEqual(
+            'tag,problem,problem_id,difficulty,last_access,last_result,KS,'
+            'RF,url,ease,interval\r\n'
+            'tag_1,prob_1,1,EASY,2021-01-10T08:00:00+00:00,,1.5,0.75,,2.5,3.0\r\n'
+            'tag_1,prob_2,2,HARD,,,,,,,\r\n',
+            self.present(fmt='csv'))
+
+    def test_json_empty(self):
+        self.combos = self.combos.iloc[:0]
+
+        self.assertEqual([], json.loads(self.present(fmt='json')))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            StreamPresenter(fmt='xml')
+
+    def test_confirm_problem_created(self):
+        stream = io.StringIO()
+        problem = ProblemCreator.create(
+            difficulty=Difficulty.HARD, name='prob_1', problem_id=1,
+            tags=[TagCreator.create(name='tag_1'),
+                  TagCreator.create(name='tag_2')],
+            url='www.test.com')
+
+        StreamPresenter(fmt='jsonl', stream=stream) \
+            .confirm_problem_created(problem)
+
+        self.assertEqual({'problem_id': 1, 'problem': 'prob_1',
+                          'difficulty': 'HARD', 'tags': 'tag_1, tag_2',
+                          'url': 'www.test.com'},
+                         json.loads(stream.getvalue()))
+
+    def test_show_dashboard(self):
+        stream = io.StringIO()
+        tags = pd.DataFrame(data={'tag': ['tag_1'], 'priority': [0.5],
+                                  'KS (weighted avg)': [0.5],
+                                  'experience': [1.], 'num_problems': [2]})
+
+        StreamPresenter(fmt='json', stream=stream).show_dashboard(
+            tags=tags, problems=pd.DataFrame(),
+            problem_tag_combos=self.combos)
+
+        dashboard = json.loads(stream.getvalue())
+        self.assertEqual(['tags', 'problems', 'problem_tag_combos'],
+                         list(dashboard))
+        self.assertEqual(self.expected_records, dashboard['problem_tag_combos'])
+        self.assertEqual([], dashboard['problems'])
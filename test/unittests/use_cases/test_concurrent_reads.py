@@ -0,0 +1,39 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+from spaced_repetition.use_cases.concurrent_reads import run_reads
+
+
+class TestRunReads(unittest.TestCase):
+    def setUp(self):
+        self.repo = Mock()
+
+    @staticmethod
+    def _thread_name():
+        return threading.current_thread().name
+
+    def test_sequential(self):
+        res = run_reads(repo=self.repo,
+                        reads=[lambda: 1, self._thread_name])
+
+        self.assertEqual([1, threading.current_thread().name], res)
+        self.repo.close_thread_connection.assert_not_called()
+
+    def test_concurrent(self):
+        res = run_reads(repo=self.repo,
+                        reads=[lambda: 1, self._thread_name],
+                        concurrent=True)
+
+        self.assertEqual(1, res[0])
+        self.assertNotEqual(threading.current_thread().name, res[1])
+        self.assertEqual(2, self.repo.close_thread_connection.call_count)
+
+    def test_concurrent_read_raises(self):
+        def fail():
+            raise ValueError('read failed')
+
+        with self.assertRaises(ValueError):
+            run_reads(repo=self.repo, reads=[lambda: 1, fail],
+                      concurrent=True)
+        self.assertEqual(2, self.repo.close_thread_connection.call_count)
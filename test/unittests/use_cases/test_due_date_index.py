@@ -0,0 +1,114 @@
+import datetime as dt
+import unittest
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import gettz
+
+from spaced_repetition.use_cases.due_date_index import (DueDateIndex,
+                                                        days_overdue,
+                                                        due_counts_per_day,
+                                                        sort_by_due_date,
+                                                        utc_dates)
+
+
+class TestDueDateIndex(unittest.TestCase):
+    def setUp(self):
+        self.ts_logged = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+        # due dates: Jan 31st, Jan 6th, Jan 11th, Jan 3rd
+        self.log_data = pd.DataFrame(data={
+            'interval': [30, 5, 10, 2],
+            'ts_logged': [self.ts_logged] * 4})
+
+    def test_overdue_most_overdue_first(self):
+        index = DueDateIndex(self.log_data)
+
+        res = index.overdue(ts=dt.datetime(2021, 1, 10, tzinfo=gettz('UTC')))
+
+        np.testing.assert_array_equal([3, 1], res)
+
+    def test_overdue_none(self):
+        index = DueDateIndex(self.log_data)
+
+        self.assertEqual(0, len(index.overdue(ts=self.ts_logged)))
+
+    def test_overdue_due_exactly_now(self):
+        index = DueDateIndex(self.log_data)
+
+        res = index.overdue(ts=dt.datetime(2021, 1, 3, tzinfo=gettz('UTC')))
+
+        self.assertEqual(0, len(res))
+
+    def test_naive_timestamps_are_utc(self):
+        log_data = self.log_data.assign(
+            ts_logged=self.ts_logged.replace(tzinfo=None))
+        index = DueDateIndex(log_data)
+
+        res = index.overdue(ts=dt.datetime(2021, 1, 4, tzinfo=gettz('UTC')))
+
+        np.testing.assert_array_equal([3], res)
+
+    def test_days_overdue(self):
+        index = DueDateIndex(self.log_data)
+        ts = dt.datetime(2021, 1, 10, 12, tzinfo=gettz('UTC'))
+
+        res = index.days_overdue(positions=index.overdue(ts=ts), ts=ts)
+
+        np.testing.assert_allclose([7.5, 4.5], res)
+
+    def test_sort_by_due_date(self):
+        res = sort_by_due_date(self.log_data)
+
+        self.assertEqual([2, 5, 10, 30], res.interval.to_list())
+        np.testing.assert_array_equal(np.arange(4),
+                                      DueDateIndex(res).order)
+
+
+class TestDaysOverdue(unittest.TestCase):
+    def test_days_overdue_with_unlogged_rows(self):
+        ts_logged = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+        log_data = pd.DataFrame(data={
+            'interval': [5, np.nan, 2],
+            'ts_logged': [ts_logged, pd.NaT, ts_logged]})
+
+        res = days_overdue(log_data,
+                           ts=dt.datetime(2021, 1, 4, tzinfo=gettz('UTC')))
+
+        np.testing.assert_allclose([-2, np.nan, 1], res)
+
+
+class TestDueCountsPerDay(unittest.TestCase):
+    def setUp(self):
+        ts_logged = dt.datetime(2021, 1, 1, 20, tzinfo=gettz('UTC'))
+        # due: Jan 2 20:00, Jan 6 20:00, Jan 3 08:00, -, Jan 2 02:00,
+        # Jan 31 20:00
+        self.log_data = pd.DataFrame(data={
+            'interval': [1, 5, 1.5, np.nan, 0.25, 30],
+            'ts_logged': [ts_logged] * 3 + [pd.NaT]
+                         + [ts_logged] * 2})
+        self.ts = dt.datetime(2021, 1, 2, 12, tzinfo=gettz('UTC'))
+
+    def test_due_counts_per_day(self):
+        res = due_counts_per_day(self.log_data, ts=self.ts, days=5)
+
+        # the overdue combo counts as due today; the unlogged one and the one
+        # due after the last day are not counted
+        np.testing.assert_array_equal([[2], [1], [0], [0], [1]], res)
+
+    def test_due_counts_per_day_per_group(self):
+        res = due_counts_per_day(self.log_data, ts=self.ts, days=2,
+                                 group_codes=np.array([0, 1, 1, 0, -1, 1]),
+                                 num_groups=2)
+
+        np.testing.assert_array_equal([[1, 0], [0, 1]], res)
+
+    def test_due_counts_per_day_no_data(self):
+        res = due_counts_per_day(self.log_data.iloc[:0], ts=self.ts, days=3)
+
+        np.testing.assert_array_equal([[0], [0], [0]], res)
+
+    def test_utc_dates(self):
+        ts = dt.datetime(2021, 1, 31, 23, tzinfo=gettz('America/New_York'))
+
+        self.assertEqual(['2021-02-01', '2021-02-02'],
+                         utc_dates(ts=ts, days=2).tolist())
@@ -0,0 +1,50 @@
+import datetime as dt
+import unittest
+from unittest.mock import Mock, patch
+
+from dateutil.tz import gettz
+
+from spaced_repetition.domain.problem import Difficulty, ProblemCreator
+from spaced_repetition.domain.problem_log import ProblemLogCreator, Result
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.use_cases.get_dashboard import DashboardGetter
+from spaced_repetition.use_cases.get_problem_log import SuperMemo2
+
+
+class TestDashboardGetter(unittest.TestCase):
+    def setUp(self):
+        tag_1 = TagCreator.create(name='tag_1')
+        tag_2 = TagCreator.create(name='tag_2')
+
+        self.repo = Mock()
+        self.repo.get_data_version.return_value = (1, 1, 2)
+        self.repo.get_tags.return_value = [tag_1, tag_2]
+        self.repo.get_problems.return_value = [ProblemCreator.create(
+            difficulty=Difficulty.EASY,
+            name='problem_1',
+            problem_id=1,
+            tags=[tag_1, tag_2])]
+        self.repo.get_problem_logs.return_value = [ProblemLogCreator.create(
+            problem_id=1,
+            result=Result.KNEW_BY_HEART,
+            tags=[tag_1],
+            timestamp=dt.datetime(2021, 1, 1, tzinfo=gettz('UTC')))]
+
+    def test_show_dashboard_computes_knowledge_once(self):
+        presenter = Mock()
+        dashboard_getter = DashboardGetter(db_gateway=self.repo,
+                                           presenter=presenter)
+
+        with patch.object(SuperMemo2, 'add_spacing_data',
+                          wraps=SuperMemo2.add_spacing_data) as mock_sm2:
+            dashboard_getter.show_dashboard()
+
+        mock_sm2.assert_called_once()
+        self.repo.get_problem_logs.assert_called_once()
+        self.repo.get_problems.assert_called_once()
+
+        kwargs = presenter.show_dashboard.call_args[1]
+        self.assertEqual(['tag_1', 'tag_2'],
+                         sorted(kwargs['tags'].tag.to_list()))
+        self.assertEqual(['problem_1'], kwargs['problems'].problem.to_list())
+        self.assertEqual(2, len(kwargs['problem_tag_combos']))
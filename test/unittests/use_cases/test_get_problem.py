@@ -1,16 +1,25 @@
+import asyncio
 import copy
+import dataclasses
 import datetime as dt
 import unittest
-from unittest.mock import Mock, patch
+from abc import ABC
+from unittest.mock import AsyncMock, Mock, call, patch
 
 import numpy as np
 import pandas as pd
+from dateutil.tz import gettz
 from pandas.testing import assert_frame_equal
 
 from spaced_repetition.domain.problem import Difficulty, ProblemCreator
+from spaced_repetition.domain.problem_log import ProblemLogCreator, Result
 from spaced_repetition.domain.tag import TagCreator
-from spaced_repetition.use_cases.get_problem import ProblemGetter
-from spaced_repetition.use_cases.get_problem_log import ProblemLogGetter
+from spaced_repetition.use_cases.db_gateway_interface import (
+    AsyncDBGatewayInterface, DBGatewayInterface, ProblemLogStreamInterface)
+from spaced_repetition.use_cases.get_problem import (AsyncProblemGetter,
+                                                     ProblemGetter)
+from spaced_repetition.use_cases.get_problem_log import (AsyncProblemLogGetter,
+                                                         ProblemLogGetter)
 from spaced_repetition.use_cases.helpers_pandas import add_missing_columns
 
 
@@ -90,7 +99,8 @@ class TestListProblemTagCombos(unittest.TestCase):
         expected_result = self.problem_df
 
         mock_repo.get_problems.assert_called_once_with(
-            name_substr='aa', tags_any=['bb'], tags_all=['cc'])
+            name_substr='aa', tags_any=['bb'], tags_all=['cc'],
+            order_by=None, limit=None, offset=0)
 
         assert_frame_equal(expected_result, problem_df,
                            check_like=True)  # no particular column order
@@ -106,27 +116,35 @@ class TestListProblemTagCombos(unittest.TestCase):
 
         assert_frame_equal(expected_df, res)
 
+    @patch.object(ProblemGetter, '_get_problems')
     @patch.object(ProblemGetter, 'get_knowledge_status')
     @patch.object(ProblemGetter, '_filter_tags')
     @patch.object(ProblemGetter, '_filter_problems')
     def test_list_problem_tag_combos(self, mock_filter_problems,
-                                     mock_filter_tags, mock_get_knowledge_status):
+                                     mock_filter_tags, mock_get_knowledge_status,
+                                     mock_get_problems):
+        mock_get_problems.return_value = 'fake_problem_df'
         mock_get_knowledge_status.return_value = self.problem_tag_combo_df
         mock_filter_tags.return_value = 'fake_tag_df'
-        mock_filter_problems.return_value = 'fake_res_prob'
+        mock_filter_problems.return_value = self.problem_tag_combo_df
 
         mock_presenter = Mock()
         p_g = ProblemGetter(db_gateway=Mock(), presenter=mock_presenter)
+        p_g.repo.get_tags.return_value = [self.tag_1, self.tag_2]
 
         # call
         p_g.list_problem_tag_combos(tag_substr='tag_substr',
                                     problem_substr='prob_substr')
 
-        mock_get_knowledge_status.assert_called_once()
+        # filters are pushed down before the knowledge status is computed
+        p_g.repo.get_tags.assert_called_once_with(sub_str='tag_substr')
+        mock_get_problems.assert_called_once_with(name_substr='prob_substr')
+        mock_get_knowledge_status.assert_called_once_with(
+            problems='fake_problem_df', tag_names=['tag_1', 'tag_2'])
 
         tag_filter_call_df = mock_filter_tags.call_args[1]['df']
         tag_filter_str = mock_filter_tags.call_args[1]['tag_substr']
-        assert_frame_equal(tag_filter_call_df, self.problem_tag_combo_df.sort_values('KS'))
+        assert_frame_equal(tag_filter_call_df, self.problem_tag_combo_df)
         self.assertEqual(tag_filter_str, 'tag_substr')
 
         prob_filter_call_df = mock_filter_problems.call_args[1]['df']
@@ -134,8 +152,11 @@ class TestListProblemTagCombos(unittest.TestCase):
         prob_filter_str = mock_filter_problems.call_args[1]['problem_substr']
         self.assertEqual(prob_filter_str, 'prob_substr')
 
-        mock_presenter.list_problem_tag_combos.assert_called_once_with(
-            'fake_res_prob')
+        # filtered results are sorted
+        mock_presenter.list_problem_tag_combos.assert_called_once()
+        assert_frame_equal(
+            self.problem_tag_combo_df.sort_values('KS'),
+            mock_presenter.list_problem_tag_combos.call_args[0][0])
 
     @patch.object(ProblemGetter, '_get_problems')
     @patch.object(ProblemLogGetter, 'get_last_log_per_problem_tag_combo')
@@ -267,6 +288,103 @@ class TestListProblems(unittest.TestCase):
     def setUp(self):
         self.time_1 = dt.datetime(2021, 1, 10, 1)
 
+    @patch.object(ProblemGetter, '_get_problems')
+    @patch.object(ProblemLogGetter, 'get_last_log_per_problem_tag_combo')
+    def test_get_knowledge_status_pushes_down_filters(self, mock_log_data_getter,
+                                                      mock_get_problems):
+        problem_df = pd.DataFrame(data={
+            'difficulty': [Difficulty.EASY],
+            'problem': ['problem_1'],
+            'problem_id': [1],
+            'tags': ['tag_1, tag_2'],
+            'url': ['some_url.com']})
+        mock_log_data_getter.return_value = add_missing_columns(
+            df=pd.DataFrame(),
+            required_columns=['problem_id', 'tag', 'ts_logged', 'result',
+                              'ease', 'interval', 'RF', 'KS'])
+        p_g = ProblemGetter(db_gateway=Mock(), presenter=Mock())
+
+        res = p_g.get_knowledge_status(problems=problem_df,
+                                       tag_names=['tag_2'])
+
+        mock_get_problems.assert_not_called()
+        mock_log_data_getter.assert_called_once_with(problem_ids=[1],
+                                                     tags_any=['tag_2'])
+        self.assertEqual(['tag_2'], res.tag.to_list())
+
+    @patch.object(ProblemGetter, '_get_problems')
+    @patch.object(ProblemGetter, 'get_knowledge_status')
+    def test_list_problems_filtered(self, mock_get_knowledge_status,
+                                    mock_get_problems):
+        problem_df = pd.DataFrame(data={
+            'difficulty': [Difficulty.EASY],
+            'problem': ['problem_1'],
+            'problem_id': [1],
+            'tags': ['tag_1'],
+            'url': ['some_url.com']})
+        mock_get_problems.return_value = problem_df
+        mock_get_knowledge_status.return_value = pd.DataFrame(data={
+            'problem_id': [1],
+            'KS': [5.],
+            'RF': [1.]})
+        p_g = ProblemGetter(db_gateway=Mock(), presenter=Mock())
+
+        p_g.list_problems(name_substr='prob')
+
+        mock_get_problems.assert_called_once_with(name_substr='prob',
+                                                  tags_all=None,
+                                                  tags_any=None)
+        mock_get_knowledge_status.assert_called_once_with(problems=problem_df)
+
+    @patch.object(ProblemGetter, '_get_problems')
+    @patch.object(ProblemGetter, 'get_knowledge_status')
+    def test_list_problems_page_pushed_down(self, mock_get_knowledge_status,
+                                            mock_get_problems):
+        problem_df = pd.DataFrame(data={
+            'difficulty': [Difficulty.EASY] * 2,
+            'problem': ['b_problem', 'a_problem'],
+            'problem_id': [1, 2],
+            'tags': ['tag_1'] * 2,
+            'url': ['some_url.com'] * 2})
+        mock_get_problems.return_value = problem_df
+        mock_get_knowledge_status.return_value = pd.DataFrame(data={
+            'problem_id': [1, 2],
+            'KS': [5., 1.],
+            'RF': [1., 1.]})
+        p_g = ProblemGetter(db_gateway=Mock(), presenter=Mock())
+
+        res = p_g.get_problem_knowledge(sorted_by=['problem'],
+                                        limit=2, offset=4)
+
+        mock_get_problems.assert_called_once_with(name_substr=None,
+                                                  tags_all=None,
+                                                  tags_any=None,
+                                                  order_by='name',
+                                                  limit=2,
+                                                  offset=4)
+        mock_get_knowledge_status.assert_called_once_with(problems=problem_df)
+        self.assertEqual(['a_problem', 'b_problem'], res.problem.to_list())
+
+    @patch.object(ProblemGetter, '_get_all_problems')
+    @patch.object(ProblemGetter, 'get_knowledge_status')
+    def test_list_problems_page_by_ks(self, mock_get_knowledge_status,
+                                      mock_get_all_problems):
+        mock_get_all_problems.return_value = pd.DataFrame(data={
+            'difficulty': [Difficulty.EASY] * 3,
+            'problem': ['a', 'b', 'c'],
+            'problem_id': [1, 2, 3],
+            'tags': ['tag_1'] * 3,
+            'url': [''] * 3})
+        mock_get_knowledge_status.return_value = pd.DataFrame(data={
+            'problem_id': [1, 2, 3],
+            'KS': [5., 1., 3.],
+            'RF': [1., 1., 1.]})
+        p_g = ProblemGetter(db_gateway=Mock(), presenter=Mock())
+
+        res = p_g.get_problem_knowledge(limit=1, offset=1)
+
+        self.assertEqual(['c'], res.problem.to_list())
+
     def test_aggregate_problems(self):
         knowledge_status = pd.DataFrame(data={
             'difficulty': [Difficulty.EASY] * 4,
@@ -337,3 +455,459 @@ class TestListProblems(unittest.TestCase):
         res = p_g.presenter.list_problems.call_args[0][0]
 
         assert_frame_equal(expected_res, res, check_like=True)
+
+
+class TestNext(unittest.TestCase):
+    def setUp(self):
+        self.ts = dt.datetime(2021, 1, 10, tzinfo=gettz('UTC'))
+        tags = [TagCreator.create(name=name) for name in ('tag_1', 'tag_2')]
+        problems = [ProblemCreator.create(difficulty=Difficulty.EASY,
+                                          problem_id=idx,
+                                          name=name,
+                                          tags=[tags[idx // 2]],
+                                          url='')
+                    for idx, name in enumerate('abcd')]
+        logs = [ProblemLogCreator.create(
+            problem_id=problem_id,
+            result=result,
+            tags=[tags[problem_id // 2]],
+            timestamp=dt.datetime(2021, 1, day, tzinfo=gettz('UTC')))
+            for problem_id, result, day in [
+                (0, Result.SOLVED_OPTIMALLY_SLOWER, 1),  # KS < 3, overdue
+                (1, Result.NO_IDEA, 1),  # KS 0, 6 days overdue
+                (3, Result.NO_IDEA, 5)]]  # KS 0, 2 days overdue
+        self.repo = sync_and_async_repo(problems=problems, logs=logs)
+
+    def _get_next_combos(self, p_g: ProblemGetter, ts: dt.datetime = None,
+                         **kwargs) -> pd.DataFrame:
+        with patch('spaced_repetition.use_cases.knowledge_snapshot.evaluation_ts',
+                   return_value=ts or self.ts):
+            return p_g.get_next_combos(**kwargs)
+
+    def test_get_next_combos(self):
+        p_g = ProblemGetter(db_gateway=self.repo, presenter=Mock())
+
+        res = self._get_next_combos(p_g, k=3)
+
+        # lowest KS first (unlogged counts as 0), then most overdue
+        self.assertEqual(['b', 'd', 'c'], res.problem.to_list())
+        self.assertEqual([0., 0.], res.KS.to_list()[:2])
+        self.assertTrue(np.isnan(res.KS.iloc[2]))
+        self.assertEqual(['a'],
+                         self._get_next_combos(p_g, k=4).problem.to_list()[3:])
+
+    def test_get_next_combos_of_tag(self):
+        p_g = ProblemGetter(db_gateway=self.repo, presenter=Mock())
+
+        res = self._get_next_combos(p_g, k=5, tag='tag_2')
+
+        self.assertEqual(['d', 'c'], res.problem.to_list())
+        self.assertEqual(['tag_2', 'tag_2'], res.tag.to_list())
+        self.assertTrue(self._get_next_combos(p_g, k=1, tag='unknown').empty)
+
+    def test_index_is_reused_over_time(self):
+        p_g = ProblemGetter(db_gateway=self.repo, presenter=Mock())
+        self._get_next_combos(p_g, k=1)
+
+        res = self._get_next_combos(
+            p_g, ts=dt.datetime(2021, 3, 1, tzinfo=gettz('UTC')), k=4)
+
+        # the overdue combos decay, 'a' (result 3) falls behind
+        self.assertEqual(['b', 'd', 'c', 'a'], res.problem.to_list())
+        self.repo.iter_problem_tag_logs_between.assert_called_once()
+        self.repo.get_problems.assert_called_once()
+
+    def test_same_as_selection_from_knowledge_status(self):
+        rng = np.random.default_rng(0)
+        tags = [TagCreator.create(name=f'tag_{idx}') for idx in range(3)]
+        problems = [ProblemCreator.create(
+            difficulty=Difficulty.EASY, problem_id=idx, name=f'problem_{idx}',
+            tags=[tags[idx % 3], tags[(idx + 1) % 3]][:1 + idx % 2], url='')
+            for idx in range(30)]
+        logs = [ProblemLogCreator.create(
+            problem_id=int(problem_id),
+            result=Result(int(result)),
+            tags=problems[problem_id].tags[:1] if idx % 5
+            else [tags[(problem_id + 2) % 3]],  # a tag the problem lacks
+            timestamp=dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+            + dt.timedelta(hours=idx))
+            for idx, (problem_id, result) in enumerate(zip(
+                rng.integers(25, size=200), rng.integers(6, size=200)))]
+        p_g = ProblemGetter(db_gateway=sync_and_async_repo(problems=problems,
+                                                           logs=logs),
+                            presenter=Mock())
+
+        for ts in [dt.datetime(2021, 1, 5, tzinfo=gettz('UTC')),
+                   dt.datetime(2021, 2, 1, tzinfo=gettz('UTC'))]:
+            for k, tag in [(1, None), (10, None), (40, None), (5, 'tag_1')]:
+                with self.subTest(ts=ts, k=k, tag=tag), \
+                        patch('spaced_repetition.use_cases.knowledge_snapshot.evaluation_ts',
+                              return_value=ts):
+                    knowledge_status = p_g.get_knowledge_status()
+                    if tag is not None:
+                        knowledge_status = knowledge_status[
+                            knowledge_status.tag == tag]
+                    expected = ProblemGetter.select_next_combos(
+                        knowledge_status=knowledge_status, k=k, ts=ts)
+
+                    res = p_g.get_next_combos(k=k, tag=tag)
+
+                    assert_frame_equal(expected.reset_index(drop=True),
+                                       res.reset_index(drop=True))
+
+    @patch.object(ProblemGetter, 'get_next_combos')
+    def test_list_next(self, mock_get_next_combos):
+        mock_get_next_combos.return_value = 'fake_combos'
+        p_g = ProblemGetter(db_gateway=Mock(), presenter=Mock())
+
+        p_g.list_next(k=2, tag='tag_1')
+
+        mock_get_next_combos.assert_called_once_with(k=2, tag='tag_1')
+        p_g.presenter.list_problem_tag_combos.assert_called_once_with(
+            'fake_combos')
+
+
+class TestWorkload(unittest.TestCase):
+    def setUp(self):
+        self.ts = dt.datetime(2021, 1, 10, 12, tzinfo=gettz('UTC'))
+        ts_logged = dt.datetime(2021, 1, 8, tzinfo=gettz('UTC'))
+        self.knowledge_status = pd.DataFrame(data={
+            'problem': ['a', 'b', 'c', 'd', 'e'],
+            'tag': ['tag_1', 'tag_1', 'tag_2', 'tag_2', 'tag_3'],
+            'interval': [1, 3, np.nan, 2.5, 4],
+            'ts_logged': [ts_logged, ts_logged, pd.NaT, ts_logged,
+                          ts_logged]})
+
+    @patch.object(ProblemGetter, 'get_knowledge_status')
+    def test_get_workload(self, mock_get_knowledge_status):
+        mock_get_knowledge_status.return_value = self.knowledge_status
+        p_g = ProblemGetter(db_gateway=Mock(), presenter=Mock())
+
+        with patch('spaced_repetition.use_cases.knowledge_snapshot.evaluation_ts',
+                   return_value=self.ts):
+            res = p_g.get_workload(days=3)
+
+        # 'a' is overdue, 'c' was never logged
+        expected = pd.DataFrame(data={
+            'date': ['2021-01-10', '2021-01-11', '2021-01-12'],
+            'due': [2, 1, 1]})
+        assert_frame_equal(expected, res, check_dtype=False)
+        mock_get_knowledge_status.assert_called_once_with()
+
+    @patch.object(ProblemGetter, 'get_knowledge_status')
+    def test_get_workload_by_tag(self, mock_get_knowledge_status):
+        mock_get_knowledge_status.return_value = self.knowledge_status
+        p_g = ProblemGetter(db_gateway=Mock(), presenter=Mock())
+
+        with patch('spaced_repetition.use_cases.knowledge_snapshot.evaluation_ts',
+                   return_value=self.ts):
+            res = p_g.get_workload(days=2, by_tag=True)
+
+        expected = pd.DataFrame(data={'date': ['2021-01-10', '2021-01-11'],
+                                      'due': [2, 1],
+                                      'tag_1': [1, 1],
+                                      'tag_2': [1, 0],
+                                      'tag_3': [0, 0]})
+        assert_frame_equal(expected, res, check_dtype=False)
+
+    def test_get_workload_invalid_days(self):
+        p_g = ProblemGetter(db_gateway=Mock(), presenter=Mock())
+
+        with self.assertRaises(ValueError):
+            p_g.get_workload(days=0)
+
+    @patch.object(ProblemGetter, 'get_workload')
+    def test_list_workload(self, mock_get_workload):
+        mock_get_workload.return_value = 'fake_workload'
+        p_g = ProblemGetter(db_gateway=Mock(), presenter=Mock())
+
+        p_g.list_workload(days=7, by_tag=True)
+
+        mock_get_workload.assert_called_once_with(days=7, by_tag=True)
+        p_g.presenter.list_workload.assert_called_once_with('fake_workload')
+
+
+class StreamingGateway(DBGatewayInterface, ProblemLogStreamInterface,
+                       AsyncDBGatewayInterface, ABC):
+    """ Spec of gateways with sync and async log streams, like DjangoGateway """
+
+
+def sync_and_async_repo(problems: list, logs: list) -> Mock:
+    """ Gateway mock whose async methods return the same data as the sync
+    ones; the logs are streamed one tag at a time. The data version counts
+    the problems and logs, which may be appended to. """
+    def tag_logs(problem_ids=None, tags_any=None, since=None, until=None):
+        new_logs = logs[since[1] if since else 0:until[1] if until else None]
+        return sorted((dataclasses.replace(p_l, tags=[tag])
+                       for p_l in new_logs for tag in p_l.tags
+                       if (problem_ids is None or p_l.problem_id in problem_ids)
+                       and (tags_any is None or tag.name in tags_any)),
+                      key=lambda p_l: (p_l.problem_id, p_l.tags[0].name,
+                                       p_l.timestamp))
+
+    async def async_tag_logs(**kwargs):
+        for p_l in tag_logs(**kwargs):
+            yield p_l
+
+    def data_version():
+        return len(problems), len(logs)
+
+    repo = Mock(spec=StreamingGateway)
+    repo.get_data_version.side_effect = data_version
+    repo.aget_data_version = AsyncMock(side_effect=data_version)
+    repo.get_problems.return_value = problems
+    repo.aget_problems = AsyncMock(return_value=problems)
+    repo.iter_problem_tag_logs.side_effect = tag_logs
+    repo.iter_problem_tag_logs_between.side_effect = tag_logs
+    repo.aiter_problem_tag_logs = Mock(side_effect=async_tag_logs)
+    repo.aiter_problem_tag_logs_between = AsyncMock(side_effect=async_tag_logs)
+    return repo
+
+
+class TestFilteredProblemTagCombos(unittest.TestCase):
+    def setUp(self):
+        tags = [TagCreator.create(name=name) for name in ('tag_1', 'tag_2')]
+        problems = [ProblemCreator.create(difficulty=Difficulty.EASY,
+                                          problem_id=idx,
+                                          name=name,
+                                          tags=[tags[idx]],
+                                          url='')
+                    for idx, name in enumerate('ab')]
+        logs = [ProblemLogCreator.create(
+            problem_id=problem_id,
+            result=Result.NO_IDEA,
+            tags=[tags[tag_idx]],
+            timestamp=dt.datetime(2021, 1, 1, tzinfo=gettz('UTC')))
+            for problem_id, tag_idx in [(0, 0), (0, 1), (1, 1)]]  # 'a' doesn't carry tag_2
+
+        def get_tags(sub_str):
+            return [tag for tag in tags if sub_str in tag.name]
+
+        def get_problems(name_substr=None, tags_any=None, **_):
+            return [prob for prob in problems
+                    if (name_substr is None or name_substr in prob.name)
+                    and (tags_any is None
+                         or any(tag.name in tags_any for tag in prob.tags))]
+
+        self.repo = sync_and_async_repo(problems=problems, logs=logs)
+        self.repo.get_tags.side_effect = get_tags
+        self.repo.aget_tags = AsyncMock(side_effect=get_tags)
+        self.repo.get_problems.side_effect = get_problems
+        self.repo.aget_problems = AsyncMock(side_effect=get_problems)
+
+    def test_tag_filter_keeps_combos_logged_under_other_tags(self):
+        p_g = AsyncProblemGetter(db_gateway=self.repo, presenter=Mock())
+        knowledge_status = p_g.get_knowledge_status()
+
+        for tag_substr in ['tag_1', 'tag_2', 'tag']:
+            with self.subTest(tag_substr=tag_substr):
+                expected = ProblemGetter._problem_tag_combos_page(
+                    knowledge_status=knowledge_status,
+                    sorted_by=['problem_id', 'tag'], tag_substr=tag_substr,
+                    problem_substr=None, limit=None, offset=0) \
+                    .reset_index(drop=True)
+
+                res = p_g.get_problem_tag_combos(
+                    sorted_by=['problem_id', 'tag'], tag_substr=tag_substr)
+                ares = asyncio.run(p_g.aget_problem_tag_combos(
+                    sorted_by=['problem_id', 'tag'], tag_substr=tag_substr))
+
+                assert_frame_equal(expected, res.reset_index(drop=True))
+                assert_frame_equal(expected, ares.reset_index(drop=True))
+        self.assertEqual([(0, 'tag_2'), (1, 'tag_2')], list(zip(
+            res.problem_id[res.tag == 'tag_2'], res.tag[res.tag == 'tag_2'])))
+
+    def test_both_filters_keep_combos_logged_under_other_tags(self):
+        p_g = AsyncProblemGetter(db_gateway=self.repo, presenter=Mock())
+
+        res = p_g.get_problem_tag_combos(tag_substr='tag_2', problem_substr='a')
+        ares = asyncio.run(p_g.aget_problem_tag_combos(tag_substr='tag_2',
+                                                       problem_substr='a'))
+
+        for combos in (res, ares):
+            self.assertEqual([('a', 'tag_2', Difficulty.EASY)], list(zip(
+                combos.problem, combos.tag, combos.difficulty)))
+            self.assertFalse(combos.ts_logged.isna().any())
+
+    def test_filters_matching_nothing(self):
+        p_g = AsyncProblemGetter(db_gateway=self.repo, presenter=Mock())
+
+        for tag_substr, problem_substr in [(None, 'zzz'), ('tag_1', 'zzz'),
+                                           ('zzz', None), ('zzz', 'a')]:
+            with self.subTest(tag_substr=tag_substr,
+                              problem_substr=problem_substr):
+                res = p_g.get_problem_tag_combos(
+                    tag_substr=tag_substr, problem_substr=problem_substr)
+                ares = asyncio.run(p_g.aget_problem_tag_combos(
+                    tag_substr=tag_substr, problem_substr=problem_substr))
+
+                self.assertTrue(res.empty)
+                self.assertTrue(ares.empty)
+
+
+class TestIncrementalSpacingState(unittest.TestCase):
+    def setUp(self):
+        self.tag = TagCreator.create(name='tag_1')
+        problems = [ProblemCreator.create(difficulty=Difficulty.EASY,
+                                          problem_id=idx,
+                                          name=f'problem_{idx}',
+                                          tags=[self.tag],
+                                          url='')
+                    for idx in range(3)]
+        self.logs = []
+        self.repo = sync_and_async_repo(problems=problems, logs=self.logs)
+        self.plg = AsyncProblemLogGetter(db_gateway=self.repo,
+                                         presenter=Mock())
+
+    def _log(self, problem_id: int, result: Result, day: int):
+        self.logs.append(ProblemLogCreator.create(
+            problem_id=problem_id,
+            result=result,
+            tags=[self.tag],
+            timestamp=dt.datetime(2021, 1, day, tzinfo=gettz('UTC'))))
+
+    def _spacing_state(self, plg: ProblemLogGetter = None) -> pd.DataFrame:
+        plg = plg or self.plg
+        return plg.spacing_state(plg.snapshot_cache.get(repo=self.repo)) \
+            .reset_index(drop=True)
+
+    def _rebuilt_spacing_state(self) -> pd.DataFrame:
+        return self._spacing_state(
+            ProblemLogGetter(db_gateway=self.repo, presenter=Mock()))
+
+    def test_new_logs_are_folded_into_the_state(self):
+        self._spacing_state()
+        self._log(0, Result.NO_IDEA, 1)
+        self._log(1, Result.KNEW_BY_HEART, 1)
+        self._spacing_state()
+        self._log(0, Result.SOLVED_OPTIMALLY_SLOWER, 2)
+        self._log(2, Result.NO_IDEA, 2)
+
+        res = self._spacing_state()
+
+        self.assertEqual(
+            [call(since=None, until=(3, 0)), call(since=(3, 0), until=(3, 2)),
+             call(since=(3, 2), until=(3, 4))],
+            self.repo.iter_problem_tag_logs_between.call_args_list)
+        assert_frame_equal(self._rebuilt_spacing_state(), res)
+
+    def test_earlier_log_refolds_all_logs(self):
+        self._log(0, Result.NO_IDEA, 2)
+        self._spacing_state()
+        self._log(0, Result.KNEW_BY_HEART, 1)
+
+        res = self._spacing_state()
+
+        self.assertEqual(
+            call(since=None, until=(3, 2)),
+            self.repo.iter_problem_tag_logs_between.call_args)
+        assert_frame_equal(self._rebuilt_spacing_state(), res)
+
+    def test_deletion_refolds_all_logs(self):
+        self._log(0, Result.NO_IDEA, 1)
+        self._spacing_state()
+        self._log(1, Result.NO_IDEA, 2)
+        self.repo.iter_problem_tag_logs_between.side_effect = [
+            None, iter(self.logs[1:])]
+
+        self._spacing_state()
+
+        self.assertEqual(
+            call(since=None, until=(3, 2)),
+            self.repo.iter_problem_tag_logs_between.call_args)
+
+    def test_rebuild_replays_logs_sharded(self):
+        self._log(0, Result.NO_IDEA, 1)
+        self._log(1, Result.KNEW_BY_HEART, 1)
+        self._log(0, Result.SOLVED_OPTIMALLY_SLOWER, 2)
+        self._log(2, Result.NO_IDEA, 2)
+
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                plg = ProblemLogGetter(db_gateway=self.repo, presenter=Mock(),
+                                       replay_workers=workers)
+                res = self._spacing_state(plg)
+
+                assert_frame_equal(self._rebuilt_spacing_state(), res)
+
+                # later logs are folded into the replayed state
+                self._log(1, Result.NO_IDEA, 3 + workers)
+                assert_frame_equal(self._rebuilt_spacing_state(),
+                                   self._spacing_state(plg))
+
+    def test_async_state_is_folded_incrementally(self):
+        async def spacing_state() -> pd.DataFrame:
+            snapshot = await self.plg.snapshot_cache.aget(repo=self.repo)
+            return (await self.plg.aspacing_state(snapshot)) \
+                .reset_index(drop=True)
+
+        self._log(0, Result.NO_IDEA, 1)
+        asyncio.run(spacing_state())
+        self._log(0, Result.KNEW_BY_HEART, 2)
+        self._log(1, Result.NO_IDEA, 2)
+
+        res = asyncio.run(spacing_state())
+
+        self.repo.aiter_problem_tag_logs_between.assert_awaited_with(
+            since=(3, 1), until=(3, 3))
+        assert_frame_equal(self._rebuilt_spacing_state(), res)
+
+
+class TestAsyncProblemGetter(unittest.TestCase):
+    def setUp(self):
+        tag_1 = TagCreator.create(name='tag_1')
+        tag_2 = TagCreator.create(name='tag_2')
+        problems = [ProblemCreator.create(difficulty=Difficulty.EASY,
+                                          problem_id=idx,
+                                          name=f'problem_{idx}',
+                                          tags=[tag_1, tag_2][:idx],
+                                          url='some_url.com')
+                    for idx in (1, 2)]
+        logs = [ProblemLogCreator.create(
+            problem_id=problem_id,
+            result=result,
+            tags=tags,
+            timestamp=dt.datetime(2021, 1, day, tzinfo=gettz('UTC')))
+            for problem_id, result, tags, day in [
+                (1, Result.NO_IDEA, [tag_1], 1),
+                (2, Result.KNEW_BY_HEART, [tag_1, tag_2], 2),
+                (1, Result.SOLVED_OPTIMALLY_SLOWER, [tag_1], 3)]]
+        self.repo = sync_and_async_repo(problems=problems, logs=logs)
+        self.ts = dt.datetime(2021, 1, 10, tzinfo=gettz('UTC'))
+
+    def test_async_use_cases_match_sync_ones(self):
+        p_g = ProblemGetter(db_gateway=self.repo, presenter=Mock())
+        a_p_g = AsyncProblemGetter(db_gateway=self.repo, presenter=Mock())
+
+        with patch('spaced_repetition.use_cases.knowledge_snapshot.evaluation_ts',
+                   return_value=self.ts):
+            for method, kwargs in [
+                    ('get_problem_knowledge', {}),
+                    ('get_problem_knowledge', {'sorted_by': ['problem'],
+                                               'limit': 1}),
+                    ('get_problem_tag_combos', {'sorted_by': ['tag']}),
+                    ('get_next_combos', {'k': 2}),
+                    ('get_next_combos', {'k': 2, 'tag': 'tag_2'})]:
+                with self.subTest(method=method, kwargs=kwargs):
+                    expected = getattr(p_g, method)(**kwargs)
+
+                    res = asyncio.run(getattr(a_p_g, 'a' + method)(**kwargs))
+
+                    assert_frame_equal(expected.reset_index(drop=True),
+                                       res.reset_index(drop=True),
+                                       check_like=True)
+
+    def test_concurrent_requests_share_the_snapshot(self):
+        a_p_g = AsyncProblemGetter(db_gateway=self.repo, presenter=Mock())
+
+        async def requests():
+            return await asyncio.gather(*(a_p_g.aget_knowledge_status()
+                                          for _ in range(3)))
+
+        res = asyncio.run(requests())
+
+        self.assertIs(res[0], res[1])
+        self.assertIs(res[0], res[2])
+        self.repo.aiter_problem_tag_logs_between.assert_awaited_once_with(
+            since=None, until=(2, 3))
+        self.repo.aget_problems.assert_awaited_once()
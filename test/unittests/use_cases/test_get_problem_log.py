@@ -1,8 +1,10 @@
+import asyncio
 import copy
 import datetime as dt
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, patch
 
+import numpy as np
 import pandas as pd
 from dateutil.tz import gettz
 from pandas.testing import assert_frame_equal
@@ -10,6 +12,8 @@ from pandas.testing import assert_frame_equal
 from spaced_repetition.domain.problem_log import (
     ProblemLogCreator,
     Result)
+from spaced_repetition.use_cases.db_gateway_interface import \
+    ProblemLogStreamInterface
 from spaced_repetition.use_cases.get_problem_log import (ProblemLogGetter,
                                                          SuperMemo2)
 from spaced_repetition.use_cases.helpers_pandas import add_missing_columns
@@ -147,7 +151,47 @@ class TestProblemLogDataRetrieval(unittest.TestCase):
 
         mock_get_problem_log_data.assert_called_once()
         mock_get_last_entry.assert_called_once_with('log_data')
-        mock_add_knowledge_scores.assert_called_once_with(log_data='last_entries')
+        mock_add_knowledge_scores.assert_called_once_with(log_data='last_entries',
+                                                          ts=ANY)
+
+    @patch.object(ProblemLogGetter, '_get_problem_log_data')
+    def test_get_last_log_per_problem_tag_combo_reuses_snapshot(
+            self, mock_get_problem_log_data):
+        mock_get_problem_log_data.return_value = pd.DataFrame(data=[
+            {**self.prob1_tag1_ts1_data,
+             'ts_logged': self.time_1.replace(tzinfo=gettz('UTC'))}])
+
+        first = self.plg.get_last_log_per_problem_tag_combo()
+        second = self.plg.get_last_log_per_problem_tag_combo()
+
+        mock_get_problem_log_data.assert_called_once()
+        self.assertIs(first, second)
+
+        # filtered queries are not cached
+        self.plg.get_last_log_per_problem_tag_combo(problem_ids=[1])
+        self.assertEqual(2, mock_get_problem_log_data.call_count)
+
+    @patch.object(ProblemLogGetter, '_get_problem_log_data')
+    def test_streaming_gateway_is_folded(self, mock_get_problem_log_data):
+        self.plg.repo = Mock(spec=ProblemLogStreamInterface)
+        self.plg.repo.iter_problem_tag_logs.return_value = iter([
+            ProblemLogCreator.create(problem_id=1,
+                                     result=Result.NO_IDEA,
+                                     tags=[self.tag_2],
+                                     timestamp=self.time_1),
+            self.problem_log_2])
+
+        res = self.plg._compute_last_entry_per_problem_tag_combo(
+            tags_any=['tag_2'])
+
+        self.plg.repo.iter_problem_tag_logs.assert_called_once_with(
+            problem_ids=None, tags_any=['tag_2'])
+        mock_get_problem_log_data.assert_not_called()
+        self.assertEqual([(1, 'tag_2', Result.SOLVED_OPTIMALLY_IN_UNDER_25,
+                           2.5, 14)],
+                         list(res[['problem_id', 'tag', 'result', 'ease',
+                                   'interval']].itertuples(index=False,
+                                                           name=None)))
 
 
 class TestKnowledgeScoreCalculation(unittest.TestCase):
@@ -176,8 +220,9 @@ class TestKnowledgeScoreCalculation(unittest.TestCase):
     def test_retention_score(self):
         interval = 5
         ts_logged = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
-        df_row = pd.Series(data={'interval': interval,
-                                 'ts_logged': pd.Timestamp(ts_logged)})
+        log_data = pd.DataFrame(data=[{'interval': interval,
+                                       'result': Result.KNEW_BY_HEART,
+                                       'ts_logged': ts_logged}])
 
         params = [
             (dt.timedelta(days=-interval), 1.0),
@@ -191,9 +236,28 @@ class TestKnowledgeScoreCalculation(unittest.TestCase):
             with self.subTest(time_passed=delta_t, expected_rf=expected_rf):
                 ts = ts_logged + delta_t
 
-                self.assertAlmostEqual(
-                    expected_rf,
-                    ProblemLogGetter._retention_score(df_row=df_row, ts=ts))
+                res = ProblemLogGetter._add_knowledge_scores(log_data=log_data,
+                                                             ts=ts)
+
+                self.assertAlmostEqual(expected_rf, res.RF.iloc[0])
+
+    def test_add_knowledge_scores_only_decays_overdue_rows(self):
+        ts_logged = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+        log_data = pd.DataFrame(data={
+            'interval': [30, 5, 10, 2],
+            'result': [Result.KNEW_BY_HEART] * 4,
+            'ts_logged': [ts_logged] * 4})
+        ts = ts_logged + dt.timedelta(days=10)
+
+        with patch.object(ProblemLogGetter, '_retention_score',
+                          wraps=ProblemLogGetter._retention_score) as mock_rf:
+            res = ProblemLogGetter._add_knowledge_scores(log_data=log_data,
+                                                         ts=ts)
+
+        # only the rows with intervals 2 and 5 are overdue
+        self.assertEqual(2, len(mock_rf.call_args[1]['interval']))
+        self.assertEqual([1.0, 0.5, 1.0, 0.5 ** 4], res.RF.to_list())
+        self.assertEqual([5.0, 2.5, 5.0, 5 * 0.5 ** 4], res.KS.to_list())
 
     def test_add_knowledge_scores(self):
         last_log_data = pd.DataFrame(data=[
@@ -233,7 +297,49 @@ class TestKnowledgeScoreCalculation(unittest.TestCase):
         assert_frame_equal(expected_df, res, check_like=True)
 
 
+    def test_forecast_knowledge_scores(self):
+        ts_logged = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+        log_data = pd.DataFrame(data={
+            'interval': [30, 5, 10, 2, np.nan],
+            'result': [Result.KNEW_BY_HEART] * 3
+                      + [Result.SOLVED_OPTIMALLY_SLOWER, np.nan],
+            'ts_logged': [ts_logged] * 4 + [np.nan]})
+        ts = ts_logged + dt.timedelta(days=4, hours=3)
+
+        retention, knowledge = ProblemLogGetter.forecast_knowledge_scores(
+            log_data=log_data, ts=ts, days=30)
+
+        self.assertEqual((5, 31), retention.shape)
+        for day in [0, 1, 7, 30]:
+            expected = ProblemLogGetter._add_knowledge_scores(
+                log_data=log_data.iloc[:4],
+                ts=ts + dt.timedelta(days=day))
+            np.testing.assert_allclose(expected.RF, retention[:4, day])
+            np.testing.assert_allclose(expected.KS, knowledge[:4, day])
+        self.assertTrue(np.isnan(retention[4]).all())
+        self.assertTrue(np.isnan(knowledge[4]).all())
+        self.assertTrue((np.diff(retention[:4], axis=1) <= 0).all())
+
+    def test_forecast_knowledge_scores_empty_input(self):
+        log_data = add_missing_columns(
+            df=pd.DataFrame(), required_columns=['ts_logged', 'result',
+                                                 'interval'])
+
+        retention, knowledge = ProblemLogGetter.forecast_knowledge_scores(
+            log_data=log_data, ts=dt.datetime(2021, 1, 1), days=3)
+
+        self.assertEqual((0, 4), retention.shape)
+        self.assertEqual((0, 4), knowledge.shape)
+
+
 class TestSuperMemo2(unittest.TestCase):
+    def test_config_hash(self):
+        initial_hash = SuperMemo2.config_hash()
+        self.assertEqual(initial_hash, SuperMemo2.config_hash())
+
+        with patch.object(SuperMemo2, 'EASE_DELTA', 0.2):
+            self.assertNotEqual(initial_hash, SuperMemo2.config_hash())
+
     def test_add_ease(self):
         test_params = [
             (Result.KNEW_BY_HEART, SuperMemo2.DEFAULT_EASE + SuperMemo2.EASE_DELTA),
@@ -399,3 +505,108 @@ class TestSuperMemo2(unittest.TestCase):
         res = SuperMemo2.add_spacing_data(log_data=log_df)
 
         assert_frame_equal(expected_result, res, check_like=True)
+
+    def test_next_state_matches_replay(self):
+        results = [Result.NO_IDEA,
+                   Result.SOLVED_OPTIMALLY_IN_UNDER_25,
+                   Result.KNEW_BY_HEART,
+                   Result.SOLVED_OPTIMALLY_SLOWER,
+                   Result.SOLVED_SUBOPTIMALLY,
+                   Result.KNEW_BY_HEART]
+        log_df = pd.DataFrame(data={
+            'problem_id': 1,
+            'tag': 'tag_1',
+            'result': results,
+            'ts_logged': pd.date_range('2021-01-01', periods=len(results))})
+        replayed = SuperMemo2.add_spacing_data(log_data=log_df)
+
+        ease, interval = None, None
+        for idx, result in enumerate(results):
+            ease, interval = SuperMemo2.next_state(prev_ease=ease,
+                                                   prev_interval=interval,
+                                                   result=result)
+            with self.subTest(idx=idx):
+                self.assertAlmostEqual(replayed.ease.iloc[idx], ease)
+                self.assertEqual(replayed.interval.iloc[idx], interval)
+
+    def test_add_spacing_data_sharded(self):
+        log_df = pd.DataFrame(data={
+            'problem_id': [3, 1, 2, 1, 3, 1, 2],
+            'tag': ['tag_1', 'tag_2', 'tag_1', 'tag_1', 'tag_1', 'tag_2',
+                    'tag_1'],
+            'result': [Result.KNEW_BY_HEART, Result.NO_IDEA,
+                       Result.SOLVED_OPTIMALLY_SLOWER, Result.KNEW_BY_HEART,
+                       Result.SOLVED_OPTIMALLY_IN_UNDER_25,
+                       Result.KNEW_BY_HEART, Result.KNEW_BY_HEART],
+            'ts_logged': pd.date_range('2021-01-01', periods=7)[::-1]})
+        expected = SuperMemo2.add_spacing_data(log_data=log_df)
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                assert_frame_equal(
+                    expected,
+                    SuperMemo2.add_spacing_data(log_data=log_df,
+                                                workers=workers))
+
+    def test_add_spacing_data_sharded_invalid_workers(self):
+        log_df = pd.DataFrame(data={'problem_id': [1],
+                                    'tag': ['tag_1'],
+                                    'result': [Result.NO_IDEA],
+                                    'ts_logged': [dt.datetime(2021, 1, 1)]})
+
+        with self.assertRaises(ValueError):
+            SuperMemo2.add_spacing_data(log_data=log_df, workers=0)
+
+    def test_fold_matches_replay(self):
+        tags = [TagCreator.create('tag_1'), TagCreator.create('tag_2')]
+        results = [Result.NO_IDEA,
+                   Result.SOLVED_OPTIMALLY_IN_UNDER_25,
+                   Result.KNEW_BY_HEART,
+                   Result.SOLVED_OPTIMALLY_SLOWER,
+                   Result.KNEW_BY_HEART]
+        logs = [ProblemLogCreator.create(
+            problem_id=problem_id,
+            result=result,
+            tags=[tag],
+            timestamp=dt.datetime(2021, 1, 1 + idx))
+            for problem_id in (1, 2)
+            for tag in tags
+            for idx, result in enumerate(results[problem_id - 1:])]
+        log_df = pd.DataFrame(data=[{'problem_id': p_l.problem_id,
+                                     'tag': p_l.tags[0].name,
+                                     'result': p_l.result,
+                                     'ts_logged': p_l.timestamp}
+                                    for p_l in logs])
+        expected = SuperMemo2.add_spacing_data(log_data=log_df) \
+            .groupby(['problem_id', 'tag']) \
+            .tail(1) \
+            .reset_index(drop=True)
+
+        res = SuperMemo2.fold(logs)
+
+        assert_frame_equal(expected, res, check_like=True)
+
+    def test_afold_matches_fold(self):
+        tag = TagCreator.create('tag_1')
+        logs = [ProblemLogCreator.create(
+            problem_id=problem_id,
+            result=result,
+            tags=[tag],
+            timestamp=dt.datetime(2021, 1, day))
+            for problem_id, result, day in [(1, Result.NO_IDEA, 1),
+                                            (1, Result.KNEW_BY_HEART, 2),
+                                            (2, Result.SOLVED_SUBOPTIMALLY, 1)]]
+
+        async def stream():
+            for p_l in logs:
+                yield p_l
+
+        assert_frame_equal(SuperMemo2.fold(logs),
+                           asyncio.run(SuperMemo2.afold(stream())))
+
+    def test_fold_no_logs(self):
+        res = SuperMemo2.fold(iter([]))
+
+        self.assertTrue(res.empty)
+        self.assertEqual({'problem_id', 'tag', 'ts_logged', 'result', 'ease',
+                          'interval'}, set(res.columns))
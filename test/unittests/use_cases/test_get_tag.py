@@ -1,16 +1,21 @@
+import asyncio
 import datetime as dt
 import unittest
-from unittest.mock import patch, Mock
+from unittest.mock import AsyncMock, patch, Mock
 
 import numpy as np
 import pandas as pd
+from dateutil.tz import gettz
 from pandas.testing import assert_frame_equal, assert_series_equal
 
 
 from spaced_repetition.domain.problem import Difficulty
+from spaced_repetition.domain.problem_log import Result
 from spaced_repetition.domain.tag import TagCreator
-from spaced_repetition.use_cases.get_tag import TagGetter
-from spaced_repetition.use_cases.get_problem import ProblemGetter
+from spaced_repetition.use_cases.get_tag import AsyncTagGetter, TagGetter
+from spaced_repetition.use_cases.get_problem import (AsyncProblemGetter,
+                                                     ProblemGetter)
+from spaced_repetition.use_cases.get_problem_log import ProblemLogGetter
 from spaced_repetition.use_cases.helpers_pandas import add_missing_columns
 
 
@@ -135,41 +140,37 @@ class TestGetPrioritizedTags(unittest.TestCase):
             required_columns=['tags', 'experience', 'KW (weighted avg)',
                               'num_problems', 'priority'])
 
-    def test_prioritize(self):
+    def test_prioritize_tags_single_tag(self):
         test_df = pd.DataFrame(data=[
             self.data_tag1_prob1_easy,
             self.data_tag1_prob2_easy,
             self.data_tag1_prob3_medium])
 
-        expected_res = pd.Series(
-            data={
-                'KS (weighted avg)': 2,  # max(0.5 * 4, 0.75 * 2)
-                'experience': 0.6,
-                'num_problems': 3,
-                'priority': 1.2},
-            dtype='object')
+        expected_res = pd.DataFrame(data=[
+            {'tag': 'tag_1',
+             'KS (weighted avg)': 2.0,  # max(0.5 * 4, 0.75 * 2)
+             'experience': 0.6,
+             'num_problems': 3,
+             'priority': 1.2}])
 
-        res = TagGetter._prioritize(group_df=test_df)
+        res = TagGetter._prioritize_tags(tag_data=test_df)
 
-        assert_series_equal(expected_res,
-                            res.reindex(index=expected_res.index))
+        assert_frame_equal(expected_res, res, check_like=True)
 
-    def test_prioritize_tag_without_problem(self):
+    def test_prioritize_tags_tag_without_problem(self):
         test_df = pd.DataFrame(data=[
             self.data_tag_no_problems])
 
-        expected_res = pd.Series(
-            data={
-                'KS (weighted avg)': 0.0,
-                'experience': 0.0,
-                'num_problems': 0,
-                'priority': 0.0},
-            dtype='object')
+        expected_res = pd.DataFrame(data=[
+            {'tag': 'tag_wo_problems',
+             'KS (weighted avg)': 0.0,
+             'experience': 0.0,
+             'num_problems': 0,
+             'priority': 0.0}])
 
-        res = TagGetter._prioritize(group_df=test_df)
+        res = TagGetter._prioritize_tags(tag_data=test_df)
 
-        assert_series_equal(expected_res,
-                            res.reindex(index=expected_res.index))
+        assert_frame_equal(expected_res, res, check_like=True)
 
     def test_prioritize_tags(self):
         test_df = pd.DataFrame(data=[
@@ -272,17 +273,103 @@ class TestGetPrioritizedTags(unittest.TestCase):
 
         # assert
         mock_get_tags.assert_called_once_with(sub_str=None)
-        mock_get_knowledge_status.assert_called_once_with()
+        mock_get_knowledge_status.assert_called_once_with(tag_names=None)
         assert_frame_equal(self.empty_tag_df, res, check_like=True)
 
-    def test_mean_knowledge_score(self):
+    @patch.object(AsyncTagGetter, '_aget_tags', new_callable=AsyncMock)
+    @patch.object(AsyncProblemGetter, 'aget_knowledge_status',
+                  new_callable=AsyncMock)
+    def test_aget_prioritized_tags_no_data(
+            self, mock_aget_knowledge_status, mock_aget_tags):
+        mock_aget_knowledge_status.return_value = self.empty_problem_df
+        mock_aget_tags.return_value = add_missing_columns(
+            df=pd.DataFrame(), required_columns=['tag', 'tag_id'])
+
+        tag_getter = AsyncTagGetter(db_gateway=Mock(), presenter=Mock())
+
+        res = asyncio.run(tag_getter._aget_prioritized_tags())
+
+        mock_aget_tags.assert_awaited_once_with(sub_str=None)
+        mock_aget_knowledge_status.assert_awaited_once_with(tag_names=None)
+        assert_frame_equal(self.empty_tag_df, res, check_like=True)
+
+    def test_weighted_knowledge_score(self):
         data_df = pd.DataFrame(data=[
-            {'difficulty': Difficulty.EASY, 'KS': 3},
-            {'difficulty': Difficulty.EASY, 'KS': 1},
-            {'difficulty': Difficulty.EASY, 'KS': np.nan}
+            {'tag': 'tag_1', 'difficulty': Difficulty.EASY, 'KS': 3},
+            {'tag': 'tag_1', 'difficulty': Difficulty.EASY, 'KS': 1},
+            {'tag': 'tag_1', 'difficulty': Difficulty.EASY, 'KS': np.nan},
+            {'tag': 'tag_2', 'difficulty': Difficulty.EASY, 'KS': 4},
+            {'tag': 'tag_2', 'difficulty': Difficulty.HARD, 'KS': 1.5},
+            {'tag': 'tag_3', 'difficulty': Difficulty.MEDIUM, 'KS': np.nan}
         ])
 
-        res = TagGetter._mean_knowledge_score(df=data_df,
-                                              difficulty=Difficulty.EASY)
+        expected_res = pd.Series(data={'tag_1': 1.0,  # 0.5 * 2
+                                       'tag_2': 2.0,  # 0.5 * 4 > 1.5
+                                       'tag_3': 0.0})
+
+        res = TagGetter._weighted_knowledge_score(tag_data=data_df)
+
+        assert_series_equal(expected_res, res, check_names=False)
+
+
+class TestForecast(unittest.TestCase):
+    def setUp(self) -> None:
+        ts_logged = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+        self.ts = ts_logged + dt.timedelta(days=3)
+        self.tag_data = pd.DataFrame(data={
+            'tag': ['tag_1', 'tag_1', 'tag_2', 'tag_2', 'tag_3'],
+            'problem': ['prob_1', 'prob_2', 'prob_3', 'prob_4', np.nan],
+            'difficulty': [Difficulty.EASY, Difficulty.MEDIUM,
+                           Difficulty.HARD, Difficulty.EASY, np.nan],
+            'interval': [1., 6., 2., np.nan, np.nan],
+            'result': [Result.KNEW_BY_HEART, Result.SOLVED_OPTIMALLY_SLOWER,
+                       Result.SOLVED_OPTIMALLY_IN_UNDER_25, np.nan, np.nan],
+            'ts_logged': [ts_logged] * 3 + [np.nan] * 2})
+
+    def test_forecast_tags(self):
+        res = TagGetter._forecast_tags(tag_data=self.tag_data, ts=self.ts,
+                                       days=20)
+
+        self.assertEqual(['tag', '2021-01-04', '2021-01-05'],
+                         res.columns[:3].to_list())
+        self.assertEqual('2021-01-24', res.columns[-1])
+        # each day's forecast is the priority evaluated at that day
+        for day in [0, 5, 20]:
+            tag_data = self.tag_data.assign(
+                KS=ProblemLogGetter._add_knowledge_scores(
+                    log_data=self.tag_data.iloc[:3],
+                    ts=self.ts + dt.timedelta(days=day)).KS)
+            expected = TagGetter._prioritize_tags(tag_data=tag_data) \
+                .set_index('tag') \
+                .priority
+            assert_series_equal(expected.sort_index(),
+                                res.set_index('tag').iloc[:, day].sort_index(),
+                                check_names=False)
+        # lowest knowledge at the end of the forecast first
+        self.assertEqual(['tag_3', 'tag_2', 'tag_1'], res.tag.to_list())
+
+    def test_forecast_tags_empty_data(self):
+        res = TagGetter._forecast_tags(tag_data=pd.DataFrame(), ts=self.ts,
+                                       days=1)
+
+        self.assertTrue(res.empty)
+        self.assertEqual(['tag', '2021-01-04', '2021-01-05'],
+                         res.columns.to_list())
+
+    @patch.object(TagGetter, '_get_tag_data')
+    def test_list_forecast(self, mock_get_tag_data):
+        mock_get_tag_data.return_value = self.tag_data
+        tag_getter = TagGetter(db_gateway=Mock(), presenter=Mock())
+        tag_getter.repo.get_data_version.return_value = 1
+
+        tag_getter.list_forecast(days=2)
+
+        forecast = tag_getter.presenter.list_tag_forecast.call_args[0][0]
+        self.assertEqual(4, len(forecast.columns))
+        self.assertEqual(3, len(forecast))
+
+    def test_forecast_negative_days(self):
+        tag_getter = TagGetter(db_gateway=Mock(), presenter=Mock())
 
-        self.assertAlmostEqual(2.0, res)
+        with self.assertRaises(ValueError):
+            tag_getter.get_forecast(days=-1)
@@ -8,7 +8,9 @@ from pandas.testing import assert_frame_equal
 from spaced_repetition.domain.problem import Difficulty
 from spaced_repetition.use_cases.helpers_pandas import (add_missing_columns,
                                                         denormalize_tags,
-                                                        case_insensitive_sort)
+                                                        case_insensitive_sort,
+                                                        k_smallest_positions,
+                                                        sort_page)
 
 # pylint: disable=no-self-use
 
@@ -31,6 +33,13 @@ class TestAddMissingColumns(unittest.TestCase):
 
         assert_frame_equal(expected_res, res)
 
+    def test_nothing_missing_returns_input(self):
+        input_df = pd.DataFrame(data={'a': [1, 2, 3]})
+
+        res = add_missing_columns(input_df, required_columns=['a'])
+
+        self.assertIs(res, input_df)
+
 
 class TestDenormalizeTags(unittest.TestCase):
     def test_denormalize_tags(self):
@@ -86,3 +95,70 @@ class TestCaseInsensitiveSort(unittest.TestCase):
             .reset_index(drop=True)
 
         assert_frame_equal(expected_res, res)
+
+
+class TestSortPage(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(data={
+            'KS': [3., np.nan, 1., 1., 0.5, 4.],
+            'problem': ['c', 'B', 'a', 'D', 'e', 'f']})
+
+    def test_sort_page_equals_slice_of_full_sort(self):
+        full_sort = sort_page(self.df, sorted_by=['KS', 'problem'])
+
+        for limit, offset in [(1, 0), (2, 1), (3, 2), (10, 4), (0, 0)]:
+            with self.subTest(limit=limit, offset=offset):
+                res = sort_page(self.df, sorted_by=['KS', 'problem'],
+                                limit=limit, offset=offset)
+                assert_frame_equal(full_sort.iloc[offset:offset + limit], res)
+
+    def test_nan_first(self):
+        res = sort_page(self.df, sorted_by='KS', limit=2)
+
+        self.assertEqual(['B', 'e'], res.problem.to_list())
+
+    def test_object_column(self):
+        res = sort_page(self.df, sorted_by='problem', limit=2, offset=1)
+
+        self.assertEqual(['B', 'c'], res.problem.to_list())
+
+    def test_negative_limit_or_offset(self):
+        for limit, offset in [(-1, 0), (2, -1), (None, -1)]:
+            with self.subTest(limit=limit, offset=offset), \
+                    self.assertRaises(ValueError):
+                sort_page(self.df, sorted_by='KS', limit=limit, offset=offset)
+
+
+class TestKSmallestPositions(unittest.TestCase):
+    def test_k_smallest_positions(self):
+        primary = np.array([3., 1., 2., 0.5, 4.])
+
+        res = k_smallest_positions(primary=primary,
+                                   secondary=np.zeros(5),
+                                   k=2)
+
+        np.testing.assert_array_equal([3, 1], res)
+
+    def test_ties_are_broken_by_secondary(self):
+        primary = np.array([1., 0., 0., 0., 2.])
+        secondary = np.array([0., 3., 1., 2., 0.])
+
+        res = k_smallest_positions(primary=primary,
+                                   secondary=secondary,
+                                   k=2)
+
+        np.testing.assert_array_equal([2, 3], res)
+
+    def test_k_larger_than_input(self):
+        res = k_smallest_positions(primary=np.array([2., 1.]),
+                                   secondary=np.zeros(2),
+                                   k=5)
+
+        np.testing.assert_array_equal([1, 0], res)
+
+    def test_empty_input(self):
+        res = k_smallest_positions(primary=np.array([]),
+                                   secondary=np.array([]),
+                                   k=3)
+
+        self.assertEqual(0, len(res))
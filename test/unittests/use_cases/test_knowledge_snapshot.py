@@ -0,0 +1,151 @@
+import datetime as dt
+import unittest
+from unittest.mock import Mock
+
+import pandas as pd
+from dateutil.tz import gettz
+
+from spaced_repetition.use_cases.knowledge_snapshot import (
+    SNAPSHOT_RESOLUTION,
+    KnowledgeSnapshotCache,
+    evaluation_ts)
+
+
+class TestEvaluationTs(unittest.TestCase):
+    def test_explicit_ts_is_kept(self):
+        ts = dt.datetime(2021, 1, 1, 10, 11, 12, tzinfo=gettz('UTC'))
+
+        self.assertEqual(ts, evaluation_ts(ts))
+
+    def test_now_is_floored(self):
+        ts = evaluation_ts()
+
+        self.assertEqual(0, ts.second)
+        self.assertEqual(0, ts.microsecond)
+        self.assertLess(dt.datetime.now(tz=gettz('UTC')) - ts,
+                        SNAPSHOT_RESOLUTION + dt.timedelta(seconds=1))
+
+
+class TestKnowledgeSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        self.ts = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+        self.repo = Mock()
+        self.repo.get_data_version.return_value = (1, 2)
+        self.compute = Mock(return_value=pd.DataFrame({'KS': [1.]}))
+
+    def test_view_computed_once(self):
+        cache = KnowledgeSnapshotCache()
+
+        first = cache.get(repo=self.repo, ts=self.ts).view('v', self.compute)
+        second = cache.get(repo=self.repo, ts=self.ts).view('v', self.compute)
+
+        self.compute.assert_called_once_with()
+        self.assertIs(first, second)
+
+    def test_new_data_version_invalidates(self):
+        cache = KnowledgeSnapshotCache()
+        cache.get(repo=self.repo, ts=self.ts).view('v', self.compute)
+
+        self.repo.get_data_version.return_value = (1, 3)
+        snapshot = cache.get(repo=self.repo, ts=self.ts)
+
+        self.assertFalse(snapshot.has_view('v'))
+        self.assertEqual((1, 3), snapshot.data_version)
+
+    def test_new_ts_invalidates(self):
+        cache = KnowledgeSnapshotCache()
+        cache.get(repo=self.repo, ts=self.ts).view('v', self.compute)
+
+        snapshot = cache.get(repo=self.repo,
+                             ts=self.ts + SNAPSHOT_RESOLUTION)
+
+        self.assertFalse(snapshot.has_view('v'))
+
+    def test_invalidate(self):
+        cache = KnowledgeSnapshotCache()
+        cache.get(repo=self.repo, ts=self.ts).view('v', self.compute)
+
+        cache.invalidate()
+
+        self.assertFalse(cache.get(repo=self.repo, ts=self.ts).has_view('v'))
+
+
+class TestSnapshotState(unittest.TestCase):
+    def setUp(self):
+        self.ts = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+        self.repo = Mock()
+        self.repo.get_data_version.return_value = (1, 2)
+        self.compute = Mock(return_value=pd.DataFrame({'ease': [2.5]}))
+
+    def test_state_carried_over_to_later_snapshot(self):
+        cache = KnowledgeSnapshotCache()
+        cache.get(repo=self.repo, ts=self.ts).state('s', self.compute)
+
+        later = cache.get(repo=self.repo, ts=self.ts + SNAPSHOT_RESOLUTION)
+        later.state('s', self.compute)
+
+        self.compute.assert_called_once_with()
+
+    def test_state_depends_on_key(self):
+        snapshot = KnowledgeSnapshotCache().get(repo=self.repo, ts=self.ts)
+
+        snapshot.state('s', self.compute, key='a')
+        snapshot.state('s', self.compute, key='b')
+
+        self.assertEqual(2, self.compute.call_count)
+
+    def test_state_loaded_from_persistent_cache(self):
+        persistent_cache = Mock()
+        persistent_cache.load.return_value = 'stored_df'
+        cache = KnowledgeSnapshotCache(persistent_cache=persistent_cache)
+
+        res = cache.get(repo=self.repo, ts=self.ts).state('s', self.compute)
+
+        self.assertEqual('stored_df', res)
+        self.compute.assert_not_called()
+        persistent_cache.save.assert_not_called()
+
+    def test_state_saved_to_persistent_cache(self):
+        persistent_cache = Mock()
+        persistent_cache.load.return_value = None
+        cache = KnowledgeSnapshotCache(persistent_cache=persistent_cache)
+
+        res = cache.get(repo=self.repo, ts=self.ts).state('s', self.compute)
+
+        self.compute.assert_called_once_with()
+        persistent_cache.save.assert_called_once_with(
+            name='s', key=persistent_cache.load.call_args[1]['key'], df=res)
+
+    def test_previous_state_of_earlier_data_version(self):
+        cache = KnowledgeSnapshotCache()
+        df = cache.get(repo=self.repo, ts=self.ts).state('s', self.compute,
+                                                         key='k')
+
+        self.repo.get_data_version.return_value = (1, 3)
+        snapshot = cache.get(repo=self.repo, ts=self.ts)
+
+        data_version, res = snapshot.previous_state('s', key='k')
+        self.assertEqual((1, 2), data_version)
+        self.assertIs(df, res)
+        self.assertIsNone(snapshot.previous_state('s', key='other'))
+
+    def test_previous_state_kept_until_state_is_derived(self):
+        cache = KnowledgeSnapshotCache()
+        cache.get(repo=self.repo, ts=self.ts).state('s', self.compute)
+        for version in [(1, 3), (1, 4)]:
+            self.repo.get_data_version.return_value = version
+            cache.get(repo=self.repo, ts=self.ts).view('v', self.compute)
+        cache.invalidate()
+
+        snapshot = cache.get(repo=self.repo, ts=self.ts)
+
+        self.assertEqual((1, 2), snapshot.previous_state('s')[0])
+        snapshot.state('s', self.compute)
+        cache.invalidate()
+        self.assertEqual((1, 4), cache.get(
+            repo=self.repo, ts=self.ts).previous_state('s')[0])
+
+    def test_no_previous_state_initially(self):
+        snapshot = KnowledgeSnapshotCache().get(repo=self.repo, ts=self.ts)
+
+        self.assertIsNone(snapshot.previous_state('s'))
@@ -1,11 +1,13 @@
+import asyncio
 import datetime as dt
 import unittest
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 from spaced_repetition.domain.problem import Difficulty, ProblemCreator
 from spaced_repetition.domain.problem_log import ProblemLogCreator, Result
 from spaced_repetition.domain.tag import TagCreator
-from spaced_repetition.use_cases.log_problem import ProblemLogger
+from spaced_repetition.use_cases.log_problem import (AsyncProblemLogger,
+                                                     ProblemLogger)
 
 
 class TestProblemLogger(unittest.TestCase):
@@ -33,7 +35,7 @@ class TestProblemLogger(unittest.TestCase):
         repo.get_tags.return_value = [self.tag_2]
         p_l = ProblemLogger(db_gateway=repo, presenter=Mock())
 
-        p_l.log_problem(
+        res = p_l.log_problem(
             comment=self.pl_2.comment,
             problem_name=self.problem.name,
             result=self.pl_2.result,
@@ -41,6 +43,7 @@ class TestProblemLogger(unittest.TestCase):
 
         repo.create_problem_log.assert_called_once()
         called_with = repo.create_problem_log.call_args[1]['problem_log']
+        self.assertIs(res, called_with)
         self.assertEqual(called_with.tags, [self.tag_2])
         self.assertEqual(called_with.problem_id, self.problem.problem_id)
         p_l.presenter.confirm_problem_logged.assert_called_once()  # noqa
@@ -77,3 +80,41 @@ class TestProblemLogger(unittest.TestCase):
         self.assertEqual(
             str(context.exception),
             "The following tag names don't exist: {'non_existing_tag'}")
+
+
+class TestAsyncProblemLogger(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tag = TagCreator.create(name='tag_1')
+        self.problem = ProblemCreator.create(name='problem_1',
+                                             difficulty=Difficulty.MEDIUM,
+                                             problem_id=1,
+                                             tags=[self.tag])
+        self.repo = Mock()
+        self.repo.aget_problems = AsyncMock(return_value=[self.problem])
+        self.repo.aget_tags = AsyncMock(return_value=[self.tag])
+        self.repo.acreate_problem_log = AsyncMock()
+
+    def test_alog_problem(self):
+        p_l = AsyncProblemLogger(db_gateway=self.repo, presenter=Mock())
+
+        res = asyncio.run(p_l.alog_problem(comment='',
+                                           problem_name=self.problem.name,
+                                           result=Result.NO_IDEA,
+                                           tags=[self.tag.name]))
+
+        self.repo.acreate_problem_log.assert_awaited_once_with(problem_log=res)
+        self.assertEqual([self.tag], res.tags)
+        self.assertEqual(self.problem.problem_id, res.problem_id)
+        self.repo.create_problem_log.assert_not_called()
+        p_l.presenter.confirm_problem_logged.assert_called_once()  # noqa
+
+    def test_alog_problem_raises_tag_does_not_exist(self):
+        self.repo.aget_tags.return_value = []
+        p_l = AsyncProblemLogger(db_gateway=self.repo, presenter=Mock())
+
+        with self.assertRaises(ValueError):
+            asyncio.run(p_l.alog_problem(comment='',
+                                         problem_name=self.problem.name,
+                                         result=Result.NO_IDEA,
+                                         tags=['unknown_tag']))
+        self.repo.acreate_problem_log.assert_not_awaited()
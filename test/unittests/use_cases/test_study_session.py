@@ -0,0 +1,113 @@
+import datetime as dt
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import gettz
+
+from spaced_repetition.domain.problem_log import ProblemLogCreator, Result
+from spaced_repetition.domain.tag import TagCreator
+from spaced_repetition.use_cases.get_problem import ProblemGetter
+from spaced_repetition.use_cases.get_problem_log import SuperMemo2
+from spaced_repetition.use_cases.log_problem import ProblemLogger
+from spaced_repetition.use_cases.study_session import StudySession
+
+# pylint: disable=protected-access, no-self-use
+
+
+@patch.object(ProblemGetter, 'get_knowledge_status')
+class TestStudySession(unittest.TestCase):
+    def setUp(self):
+        self.ts_logged = dt.datetime(2021, 1, 1, tzinfo=gettz('UTC'))
+        self.knowledge_status = pd.DataFrame(data={
+            'problem': ['prob_a', 'prob_b', 'prob_c'],
+            'problem_id': [1, 2, 3],
+            'tag': ['tag_1', 'tag_1', 'tag_2'],
+            'KS': [3., np.nan, 1.],
+            'RF': [1., np.nan, 0.5],
+            'result': [Result.SOLVED_OPTIMALLY_SLOWER, np.nan,
+                       Result.SOLVED_OPTIMALLY_WITH_HINT],
+            'ease': [2.5, np.nan, 2.5],
+            'interval': [7., np.nan, 3.],
+            'ts_logged': [self.ts_logged, pd.NaT, self.ts_logged]})
+        self.presenter = Mock()
+
+    def _session(self, **kwargs) -> StudySession:
+        return StudySession(db_gateway=Mock(), presenter=self.presenter,
+                            **kwargs)
+
+    def _presented_problem(self) -> str:
+        return self.presenter.list_problem_tag_combos.call_args[0][0] \
+            .problem.iloc[0]
+
+    def test_show_next(self, mock_get_knowledge_status):
+        mock_get_knowledge_status.return_value = self.knowledge_status
+        session = self._session()
+
+        self.assertTrue(session.show_next())
+
+        self.assertEqual('prob_b', self._presented_problem())
+        mock_get_knowledge_status.assert_called_once_with()
+
+    def test_tag(self, mock_get_knowledge_status):
+        mock_get_knowledge_status.return_value = self.knowledge_status
+        session = self._session(tag='tag_1')
+
+        session.show_next()
+
+        mock_get_knowledge_status.assert_called_once_with(tag_names=['tag_1'])
+
+    def test_skip(self, mock_get_knowledge_status):
+        mock_get_knowledge_status.return_value = self.knowledge_status
+        session = self._session()
+
+        for _ in range(3):
+            session.show_next()
+            session.skip()
+
+        self.assertFalse(session.show_next())
+        self.assertEqual(3, self.presenter.list_problem_tag_combos.call_count)
+
+    def test_log_result_updates_combo_in_memory(self, mock_get_knowledge_status):
+        mock_get_knowledge_status.return_value = self.knowledge_status
+        ts = dt.datetime(2021, 2, 1, tzinfo=gettz('UTC'))
+        problem_log = ProblemLogCreator.create(
+            problem_id=2,
+            result=Result.KNEW_BY_HEART,
+            tags=[TagCreator.create(name='tag_1')],
+            timestamp=ts)
+        session = self._session()
+
+        with patch.object(ProblemLogger, 'log_problem',
+                          return_value=problem_log) as mock_log_problem:
+            session.show_next()
+            session.log_result(result=Result.KNEW_BY_HEART, comment='nice')
+
+            mock_log_problem.assert_called_once_with(
+                comment='nice', problem_name='prob_b',
+                result=Result.KNEW_BY_HEART, tags=['tag_1'])
+
+        combo = session._combos.loc[1]
+        self.assertEqual(5., combo.KS)
+        self.assertEqual(1., combo.RF)
+        self.assertEqual(Result.KNEW_BY_HEART, combo.result)
+        self.assertEqual(SuperMemo2.DEFAULT_EASE, combo.ease)
+        self.assertEqual(SuperMemo2.INTERVAL_KNEW_BY_HEART, combo.interval)
+        self.assertEqual(pd.Timestamp(ts), combo.ts_logged)
+
+        # the snapshot's view is untouched; the next combo is offered
+        self.assertTrue(np.isnan(self.knowledge_status.KS.iloc[1]))
+        session.show_next()
+        self.assertEqual('prob_c', self._presented_problem())
+        mock_get_knowledge_status.assert_called_once()
+
+    def test_log_result_requires_current_combo(self, mock_get_knowledge_status):
+        mock_get_knowledge_status.return_value = self.knowledge_status
+        session = self._session()
+
+        with self.assertRaises(ValueError) as context:
+            session.log_result(result=Result.NO_IDEA)
+
+        self.assertEqual(str(context.exception),
+                         'No problem-tag-combo is being studied!')
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+from spaced_repetition.domain.problem_log import Result
+from spaced_repetition.use_cases.get_problem_log import SuperMemo2
+from spaced_repetition.utils import calibration
+
+
+class TestSimulate(unittest.TestCase):
+    def test_simulate_matches_next_state(self):
+        results = calibration.random_results(num_learners=200, repetitions=10)
+
+        ease, interval = calibration.simulate(results)
+
+        for learner, path in enumerate(results):
+            prev_ease, prev_interval = None, None
+            for rep, value in enumerate(path):
+                prev_ease, prev_interval = SuperMemo2.next_state(
+                    prev_ease=prev_ease, prev_interval=prev_interval,
+                    result=Result(value))
+                self.assertAlmostEqual(prev_ease, ease[learner, rep])
+                self.assertEqual(prev_interval, interval[learner, rep])
+
+    def test_simulate_modified_constants(self):
+        class Calibrated(SuperMemo2):
+            EASE_DELTA = 0.5
+            INTERVAL_NON_OPTIMAL_SOLUTION = 1
+
+        ease, interval = calibration.simulate(
+            np.array([[Result.KNEW_BY_HEART.value] * 2
+                      + [Result.NO_IDEA.value]]),
+            sm2=Calibrated)
+
+        np.testing.assert_allclose([[2.5, 3., 2.5]], ease)
+        np.testing.assert_array_equal([[30, 90, 1]], interval)
+
+    def test_simulate_no_repetitions(self):
+        ease, interval = calibration.simulate(np.empty((3, 0), dtype=np.int8))
+
+        self.assertEqual((3, 0), ease.shape)
+        self.assertEqual((3, 0), interval.shape)
+
+
+class TestDistributions(unittest.TestCase):
+    def test_distributions(self):
+        ease = np.array([[2.5, 2.62], [2.5, 2.5]])
+        interval = np.array([[30, 79], [3, 3]])
+
+        stats = calibration.distributions(ease=ease, interval=interval,
+                                          percentiles=[50])
+
+        self.assertEqual(['repetition', 'ease_mean', 'ease_p50',
+                          'interval_mean', 'interval_p50', 'day_mean',
+                          'day_p50'], list(stats.columns))
+        np.testing.assert_allclose([2.5, 2.56], stats.ease_mean)
+        np.testing.assert_allclose([16.5, 41], stats.interval_p50)
+        np.testing.assert_allclose([0, 16.5], stats.day_mean)
+
+    def test_spacing_data(self):
+        data = calibration.spacing_data([Result.SOLVED_OPTIMALLY_SLOWER,
+                                         Result.KNEW_BY_HEART])
+
+        self.assertEqual([0, 7], data.day.tolist())
+        self.assertEqual(['SOLVED_OPTIMALLY_SLOWER', 'KNEW_BY_HEART'],
+                         data.result.tolist())
+        self.assertEqual([7, 30], data.interval.tolist())